@@ -76,6 +76,15 @@ def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
     
     # Initialize the cache - make it available globally 
     cache = Cache(app)
+    if app.config.get('CACHE_L1_ENABLED', True):
+        # Serve hot keys from process memory in front of the configured backend
+        from app.cache_tiers import TwoTierCache
+        cache = TwoTierCache(
+            cache,
+            max_items=app.config.get('CACHE_L1_MAX_ITEMS', 128),
+            ttl=app.config.get('CACHE_L1_TTL', 5),
+            check_interval=app.config.get('CACHE_L1_CHECK_INTERVAL', 1),
+        )
     
     # Also make the cache available in app context for convenience
     app.cache = cache
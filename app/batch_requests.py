@@ -0,0 +1,191 @@
+"""
+Batched internal GET requests for ``/api/batch``
+
+Pages such as the plant detail view need several API resources at once
+(plant detail, weather, power distribution, fault logs). ``run_batch``
+dispatches each of them through the application itself, concurrently on a
+bounded executor, so they go through the same routes, ``cached_route``
+entries and snapshot reads as separate requests would, and returns one
+result per item.
+
+Sub-requests carry the caller's cookies (so they see the same session) and
+its Cache-Control header, but never its conditional or Accept-Encoding
+headers: every item is returned with its full, uncompressed body. Changes a
+sub-request makes to the session are not sent back to the client.
+
+The caller can pass the outcome of a login check made once for the whole
+batch in ``environ``; ``ensure_login`` returns it to every sub-request
+instead of checking (and possibly logging in) once per item.
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlencode, urlsplit
+
+from flask import current_app, has_request_context, request
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# WSGI environ key holding the batch's login status for its sub-requests
+BATCH_LOGIN_ENVIRON_KEY = 'growatt.batch_login'
+
+# Only API resources can be batched, and never the batch or streaming endpoints themselves
+BATCH_PATH_PREFIX = '/api/'
+BATCH_EXCLUDED_PATHS = ('/api/batch', '/api/device-status/stream')
+
+# Caller headers passed on to sub-requests
+FORWARDED_HEADERS = ('Cookie', 'Authorization', 'Accept-Language', 'Cache-Control', 'User-Agent')
+
+# Sub-response headers reported per item
+REPORTED_HEADERS = ('X-Cache', 'X-Data-Source', 'X-Snapshot-Age', 'ETag', 'Last-Modified')
+
+# Separate from the per-plant executor: sub-requests may themselves fan out on that one
+_batch_executor: Optional[ThreadPoolExecutor] = None
+_batch_executor_lock = threading.Lock()
+
+
+def _get_batch_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Get the shared executor for batch sub-requests, creating it on first use"""
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='batch-request')
+        return _batch_executor
+
+
+def parse_batch(body: Any, max_requests: int) -> List[Dict[str, Any]]:
+    """
+    Validate a batch request body
+
+    The body is a list of items, or an object with the list under
+    'requests'. An item is a path ("/api/plants/123?x=1") or an object with
+    'path', optional 'params' (query parameters), optional 'id' (echoed in
+    the result) and optional 'method', which must be GET.
+
+    Args:
+        body: Parsed JSON body
+        max_requests: Maximum number of items
+
+    Returns:
+        List[Dict[str, Any]]: Items with 'id', 'path', 'query_string' and 'params'
+
+    Raises:
+        ValueError: If the body or one of its items is invalid
+    """
+    items = body.get('requests') if isinstance(body, dict) else body
+    if not isinstance(items, list) or not items:
+        raise ValueError("Expected a non-empty list of requests")
+    if len(items) > max_requests:
+        raise ValueError(f"At most {max_requests} requests can be batched, got {len(items)}")
+
+    parsed = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'path': item}
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise ValueError(f"Request {index}: expected a path or an object with 'path'")
+        if str(item.get('method', 'GET')).upper() != 'GET':
+            raise ValueError(f"Request {index}: only GET requests can be batched")
+        params = item.get('params') or {}
+        if not isinstance(params, dict):
+            raise ValueError(f"Request {index}: 'params' must be an object")
+
+        url = urlsplit(item['path'])
+        if url.scheme or url.netloc or not url.path.startswith(BATCH_PATH_PREFIX):
+            raise ValueError(f"Request {index}: path must be an internal {BATCH_PATH_PREFIX} path")
+        if url.path.rstrip('/') in BATCH_EXCLUDED_PATHS:
+            raise ValueError(f"Request {index}: {url.path} cannot be batched")
+
+        parsed.append({
+            'id': item.get('id', index),
+            'path': url.path,
+            'query_string': url.query,
+            'params': params,
+        })
+    return parsed
+
+
+def _response_body(response) -> Any:
+    """Decode a sub-response body as JSON when possible"""
+    data = response.get_data(as_text=True)
+    if response.is_json:
+        try:
+            return json.loads(data)
+        except ValueError:
+            pass
+    return data
+
+
+def run_batch(items: List[Dict[str, Any]], timeout: Optional[float] = None,
+              environ: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """
+    Run sub-requests concurrently through the application
+
+    Args:
+        items: Items from parse_batch
+        timeout: Seconds the whole batch may take (default: BATCH_TIMEOUT); items
+            still running then are reported with status 504
+        environ: Extra WSGI environ values for every sub-request (optional)
+
+    Returns:
+        List[Dict[str, Any]]: One result per item, in input order, with 'id', 'path',
+        'status', 'headers', 'body' and 'elapsed_ms'
+    """
+    app = current_app._get_current_object()
+    if timeout is None:
+        timeout = app.config.get('BATCH_TIMEOUT', 30)
+    executor = _get_batch_executor(app.config.get('BATCH_MAX_WORKERS', 8))
+
+    headers = {}
+    environ_base = dict(environ or {})
+    if has_request_context():
+        headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+        environ_base.setdefault('REMOTE_ADDR', request.remote_addr)
+
+    def dispatch(item: Dict[str, Any]) -> Dict[str, Any]:
+        started = time.monotonic()
+        query_string = item['query_string']
+        if item['params']:
+            extra = urlencode(item['params'], doseq=True)
+            query_string = f"{query_string}&{extra}" if query_string else extra
+        with app.test_request_context(item['path'], method='GET', query_string=query_string,
+                                      headers=headers, environ_base=environ_base):
+            response = app.full_dispatch_request()
+            try:
+                if response.is_streamed:
+                    status, body = 501, {"status": "error", "message": "Streaming responses cannot be batched"}
+                else:
+                    status, body = response.status_code, _response_body(response)
+                return {
+                    'status': status,
+                    'headers': {name: response.headers[name] for name in REPORTED_HEADERS if name in response.headers},
+                    'body': body,
+                    'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+                }
+            finally:
+                response.close()
+
+    futures = [executor.submit(dispatch, item) for item in items]
+    wait(futures, timeout=timeout)
+
+    results = []
+    for item, future in zip(items, futures):
+        result = {'id': item['id'], 'path': item['path']}
+        if not future.done():
+            # Keeps its worker until it returns, but the result is discarded
+            future.cancel()
+            result.update(status=504, headers={}, body={"status": "error", "message": f"Timed out after {timeout:g}s"},
+                          elapsed_ms=None)
+        else:
+            try:
+                result.update(future.result())
+            except Exception as e:
+                logger.error(f"Error in batch sub-request {item['path']}: {e}")
+                result.update(status=500, headers={}, body={"status": "error", "message": str(e)}, elapsed_ms=None)
+        results.append(result)
+    return results
@@ -0,0 +1,230 @@
+"""
+Two-tier cache: a per-process LRU (L1) in front of the Flask-Caching backend (L2)
+
+With several gunicorn workers, ``SimpleCache`` leaves each worker its own
+cold cache, while a shared backend (Redis, FileSystemCache) makes every hit
+pay a network hop or file read plus unpickling of multi-MB route entries.
+``TwoTierCache`` exposes the ``app.cache`` interface and keeps recently read
+values in process memory for at most ``CACHE_L1_TTL`` seconds, bounded to
+``CACHE_L1_MAX_ITEMS`` entries.
+
+Coherence across workers:
+
+* Route results are validated against their tag generations on every hit
+  (see ``app.cache_utils``). Tag and lock keys are never kept in L1, so a
+  tag bump in any worker invalidates the L1 copies of dependent results on
+  their next read.
+* ``delete``/``delete_many``/``clear`` bump a shared L1 generation in L2;
+  each process compares it at most every ``CACHE_L1_CHECK_INTERVAL``
+  seconds and drops its whole L1 when it has changed.
+* Overwrites from other workers are picked up when the L1 copy expires.
+
+Values served from L1 are shared between requests and must not be mutated.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# L2 key holding the shared L1 generation
+GENERATION_KEY = 'l1:generation'
+
+# Small coordination keys that must always be read from the shared backend
+L2_ONLY_PREFIXES: Tuple[str, ...] = ('tag:', 'lock:', 'l1:')
+
+
+class TwoTierCache:
+    """Per-process LRU in front of a Flask-Caching instance, with the same interface"""
+
+    def __init__(self, l2: Any, max_items: int = 128, ttl: float = 5.0, check_interval: float = 1.0):
+        """
+        Args:
+            l2: Flask-Caching instance used as the shared tier
+            max_items: Maximum number of values kept in process memory
+            ttl: Maximum seconds a value is served from process memory
+            check_interval: Seconds between checks of the shared L1 generation
+        """
+        self.l2 = l2
+        self.max_items = max_items
+        self.ttl = ttl
+        self.check_interval = check_interval
+        self._l1: 'OrderedDict[str, Tuple[float, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation: Optional[str] = None
+        self._checked_at = 0.0
+        self.stats = {'l1_hits': 0, 'l1_misses': 0, 'l1_evictions': 0, 'l1_flushes': 0}
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything else (cache, config, memoize, cached, ...) is the backend's
+        if name == 'l2':
+            raise AttributeError(name)
+        return getattr(self.l2, name)
+
+    # ----- L1 bookkeeping -----
+
+    @staticmethod
+    def _l2_only(key: str) -> bool:
+        return key.startswith(L2_ONLY_PREFIXES)
+
+    def _check_generation(self) -> None:
+        """Drop L1 when another process has invalidated keys since the last check"""
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        try:
+            generation = self.l2.get(GENERATION_KEY)
+        except Exception as e:
+            logger.warning(f"Error reading L1 cache generation, flushing L1: {e}")
+            generation = None
+        with self._lock:
+            if generation != self._generation:
+                if self._l1:
+                    self.stats['l1_flushes'] += 1
+                self._l1.clear()
+                self._generation = generation
+
+    def _bump_generation(self) -> None:
+        generation = uuid.uuid4().hex
+        try:
+            self.l2.set(GENERATION_KEY, generation, timeout=0)
+        except Exception as e:
+            logger.warning(f"Error bumping L1 cache generation: {e}")
+            return
+        with self._lock:
+            self._generation = generation
+            self._checked_at = time.monotonic()
+
+    def _remember(self, key: str, value: Any, timeout: Optional[int] = None) -> None:
+        if value is None or self._l2_only(key) or self.max_items <= 0:
+            return
+        ttl = self.ttl if not timeout or timeout <= 0 else min(self.ttl, timeout)
+        with self._lock:
+            self._l1[key] = (time.monotonic() + ttl, value)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.max_items:
+                self._l1.popitem(last=False)
+                self.stats['l1_evictions'] += 1
+
+    def _recall(self, key: str) -> Tuple[bool, Any]:
+        with self._lock:
+            item = self._l1.get(key)
+            if item is None:
+                self.stats['l1_misses'] += 1
+                return False, None
+            expires, value = item
+            if expires <= time.monotonic():
+                del self._l1[key]
+                self.stats['l1_misses'] += 1
+                return False, None
+            self._l1.move_to_end(key)
+            self.stats['l1_hits'] += 1
+            return True, value
+
+    def _forget(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._l1.pop(key, None)
+
+    def l1_info(self) -> Dict[str, Any]:
+        """
+        Describe the in-process tier
+
+        Returns:
+            Dict[str, Any]: Size limits, current item count and hit/miss/eviction/flush counters
+        """
+        with self._lock:
+            return {
+                'items': len(self._l1),
+                'max_items': self.max_items,
+                'ttl_seconds': self.ttl,
+                **self.stats,
+            }
+
+    # ----- Flask-Caching interface -----
+
+    def get(self, key: str) -> Any:
+        if self._l2_only(key):
+            return self.l2.get(key)
+        self._check_generation()
+        found, value = self._recall(key)
+        if found:
+            return value
+        value = self.l2.get(key)
+        self._remember(key, value)
+        return value
+
+    def get_many(self, *keys: str) -> List[Any]:
+        if all(self._l2_only(key) for key in keys):
+            return self.l2.get_many(*keys)
+        self._check_generation()
+        values: List[Any] = [None] * len(keys)
+        missing = []
+        for index, key in enumerate(keys):
+            found, value = (False, None) if self._l2_only(key) else self._recall(key)
+            if found:
+                values[index] = value
+            else:
+                missing.append(index)
+        if missing:
+            for index, value in zip(missing, self.l2.get_many(*[keys[i] for i in missing])):
+                values[index] = value
+                self._remember(keys[index], value)
+        return values
+
+    def get_dict(self, *keys: str) -> Dict[str, Any]:
+        return dict(zip(keys, self.get_many(*keys)))
+
+    def has(self, key: str) -> bool:
+        if not self._l2_only(key):
+            found, _ = self._recall(key)
+            if found:
+                return True
+        return self.l2.has(key)
+
+    def set(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        result = self.l2.set(key, value, timeout=timeout)
+        if result:
+            self._remember(key, value, timeout)
+        else:
+            self._forget([key])
+        return result
+
+    def set_many(self, mapping: Dict[str, Any], timeout: Optional[int] = None) -> List[Any]:
+        result = self.l2.set_many(mapping, timeout=timeout)
+        for key, value in mapping.items():
+            self._remember(key, value, timeout)
+        return result
+
+    def add(self, key: str, value: Any, timeout: Optional[int] = None) -> bool:
+        added = self.l2.add(key, value, timeout=timeout)
+        if added:
+            self._remember(key, value, timeout)
+        return added
+
+    def delete(self, key: str) -> bool:
+        self._forget([key])
+        result = self.l2.delete(key)
+        if not self._l2_only(key):
+            self._bump_generation()
+        return result
+
+    def delete_many(self, *keys: str) -> List[str]:
+        self._forget(keys)
+        result = self.l2.delete_many(*keys)
+        if not all(self._l2_only(key) for key in keys):
+            self._bump_generation()
+        return result
+
+    def clear(self) -> bool:
+        with self._lock:
+            self._l1.clear()
+        result = self.l2.clear()
+        self._bump_generation()
+        return result
@@ -1,9 +1,40 @@
 import functools
+import gzip
 import hashlib
 import json
-from typing import Any, Callable, Dict, Optional, Union, List, Tuple, cast
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional, Union, List, Tuple, cast
 
-from flask import request, current_app
+from flask import Response, copy_current_request_context, has_app_context, jsonify, request, current_app
+from werkzeug.http import http_date
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Cache key holding the current generation of a tag
+TAG_KEY_PREFIX = 'tag:'
+
+# Route tags: a fixed list, or a callable evaluated in the request context
+Tags = Union[Iterable[str], Callable[[], Iterable[str]], None]
+
+# Cache events counted per key prefix (see record_cache_event)
+CACHE_EVENTS = ('hit', 'stale', 'miss', 'bypass', 'coalesced', 'invalidated', 'early_refresh',
+                'not_modified', 'uncacheable', 'set', 'lock_timeout')
+
+# Key prefix -> counters of this process
+_stats: Dict[str, Dict[str, Any]] = {}
+_stats_lock = threading.Lock()
 
 def make_cache_key(*args, **kwargs) -> str:
     """
@@ -38,58 +69,412 @@ def make_cache_key(*args, **kwargs) -> str:
     key_string = '|'.join(key_parts)
     return hashlib.sha256(key_string.encode('utf-8')).hexdigest()
 
-def cached_route(timeout: Optional[int] = None, key_prefix: str = 'route_'):
+def record_cache_event(key_prefix: str, event: str, seconds: Optional[float] = None,
+                       size: Optional[int] = None, route: Optional[str] = None) -> None:
+    """
+    Count a cache event for a route or ad-hoc cache key.
+    
+    Args:
+        key_prefix: Key prefix (or ad-hoc key) the event belongs to
+        event: One of CACHE_EVENTS
+        seconds: Time spent recomputing the value, if it was recomputed
+        size: Bytes stored, if a value was stored
+        route: Request path, kept as an example of what the prefix serves
+    """
+    with _stats_lock:
+        stats = _stats.get(key_prefix)
+        if stats is None:
+            stats = _stats[key_prefix] = {
+                **{name: 0 for name in CACHE_EVENTS},
+                'recomputes': 0, 'recompute_seconds_total': 0.0, 'recompute_seconds_max': 0.0,
+                'stored_bytes_last': 0, 'stored_bytes_max': 0, 'route': route,
+            }
+        stats[event] += 1
+        if seconds is not None:
+            stats['recomputes'] += 1
+            stats['recompute_seconds_total'] += seconds
+            stats['recompute_seconds_max'] = max(stats['recompute_seconds_max'], seconds)
+        if size is not None:
+            stats['stored_bytes_last'] = size
+            stats['stored_bytes_max'] = max(stats['stored_bytes_max'], size)
+        if route and not stats['route']:
+            stats['route'] = route
+
+def get_cache_stats(reset: bool = False) -> Dict[str, Dict[str, Any]]:
+    """
+    Get the cache counters of this process.
+    
+    Args:
+        reset: Zero the counters after reading them
+        
+    Returns:
+        Dict[str, Dict[str, Any]]: Per key prefix: event counts, hit ratio
+        (fresh, stale and coalesced hits over all lookups), recompute count
+        and average/max seconds, and the last/max stored size in bytes
+    """
+    with _stats_lock:
+        snapshot = {prefix: dict(stats) for prefix, stats in _stats.items()}
+        if reset:
+            _stats.clear()
+    for stats in snapshot.values():
+        served = stats['hit'] + stats['stale'] + stats['coalesced']
+        lookups = served + stats['miss']
+        stats['hit_ratio'] = round(served / lookups, 4) if lookups else None
+        stats['recompute_seconds_avg'] = (
+            round(stats['recompute_seconds_total'] / stats['recomputes'], 4) if stats['recomputes'] else None
+        )
+        stats['recompute_seconds_total'] = round(stats['recompute_seconds_total'], 4)
+        stats['recompute_seconds_max'] = round(stats['recompute_seconds_max'], 4)
+    return snapshot
+
+def get_cache() -> Optional[Any]:
+    """
+    Get the Flask-Caching instance of the current app.
+    
+    Flask-Caching registers ``app.extensions['cache']`` as a dict of
+    ``{Cache: backend}``, so the instance is looked up there as well.
+    
+    Returns:
+        Optional[Any]: The cache, or None if caching is not set up
+    """
+    cache = getattr(current_app, 'cache', None)
+    if cache is None:
+        extension = current_app.extensions.get('cache')
+        cache = next(iter(extension), None) if isinstance(extension, dict) else extension
+    return cache if hasattr(cache, 'get') and hasattr(cache, 'set') else None
+
+def _tag_generations(cache: Any, tags: List[str], create: bool = False) -> Dict[str, Optional[str]]:
+    """
+    Read the current generation of each tag.
+    
+    Args:
+        cache: Flask-Caching instance
+        tags: Tag names
+        create: Start a generation for tags that have none yet (or were evicted)
+        
+    Returns:
+        Dict[str, Optional[str]]: Generation per tag (None if it has none)
+    """
+    if not tags:
+        return {}
+    values = cache.get_many(*[TAG_KEY_PREFIX + tag for tag in tags])
+    generations = dict(zip(tags, values))
+    if create:
+        for tag, generation in generations.items():
+            if generation is None:
+                new_generation = uuid.uuid4().hex
+                cache.add(TAG_KEY_PREFIX + tag, new_generation, timeout=0)
+                generations[tag] = cache.get(TAG_KEY_PREFIX + tag) or new_generation
+    return generations
+
+def bump_tags(*tags: str) -> int:
+    """
+    Invalidate every cached route result that depends on any of the tags.
+    
+    Each tag has a generation stored in the cache; results remember the
+    generations they were computed under and count as misses once one has
+    changed. Bumping is a single write per tag on any backend, and works
+    outside a request (e.g. from the data collector).
+    
+    Args:
+        *tags: Tag names, e.g. 'plants', 'devices:<plant_id>', 'weather'
+        
+    Returns:
+        int: Number of tags bumped
+    """
+    if has_app_context():
+        cache = get_cache()
+    else:
+        from app import cache
+    if cache is None or not tags:
+        return 0
+    
+    try:
+        cache.set_many({TAG_KEY_PREFIX + tag: uuid.uuid4().hex for tag in tags}, timeout=0)
+    except Exception as e:
+        logger.error(f"Error bumping cache tags {', '.join(tags)}: {e}")
+        return 0
+    logger.debug(f"Bumped cache tags: {', '.join(tags)}")
+    return len(tags)
+
+def _store_entry(result: Any, compute_seconds: float, fresh_ttl: int,
+                 generations: Dict[str, Optional[str]]) -> Optional[Dict[str, Any]]:
+    """
+    Turn a route result into a picklable cache entry.
+    
+    Args:
+        result: Whatever the route returned
+        compute_seconds: How long the route took
+        fresh_ttl: Seconds the entry counts as fresh
+        generations: Generations of the route's tags before it ran
+        
+    Returns:
+        Optional[Dict[str, Any]]: The entry, or None if the result must not be cached
+    """
+    response = current_app.make_response(result)
+    if response.status_code != 200 or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return None
+    body = response.get_data()
+    now = time.time()
+    
+    # Compress once here instead of on every request served from the entry
+    encodings = {}
+    config = current_app.config
+    if len(body) >= config.get('CACHE_COMPRESS_MIN_BYTES', 1024):
+        encodings['gzip'] = gzip.compress(body, compresslevel=config.get('CACHE_GZIP_LEVEL', 6))
+        if BROTLI_AVAILABLE:
+            encodings['br'] = brotli.compress(body, quality=config.get('CACHE_BROTLI_QUALITY', 5))
+    
+    return {
+        'body': body,
+        'encodings': encodings,
+        'etag': hashlib.sha256(body).hexdigest()[:32],
+        'status': response.status_code,
+        'headers': [(k, v) for k, v in response.headers.items()
+                    if k.lower() not in ('content-length', 'etag', 'last-modified')],
+        'created': now,
+        'fresh_until': now + fresh_ttl,
+        'compute_seconds': compute_seconds,
+        'tags': generations,
+    }
+
+def _choose_encoding(entry: Dict[str, Any]) -> Optional[str]:
+    """Pick the stored encoding the client accepts with the highest quality (brotli on ties)"""
+    best, best_quality = None, 0.0
+    for encoding in ('br', 'gzip'):
+        quality = request.accept_encodings[encoding] if encoding in entry.get('encodings', {}) else 0
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def _not_modified(entry: Dict[str, Any], last_modified: datetime) -> bool:
+    """Whether the client's cached copy (If-None-Match, else If-Modified-Since) is current"""
+    if request.if_none_match:
+        # Every encoding of the body shares the content hash
+        return request.if_none_match.star_tag or any(
+            request.if_none_match.contains_weak(entry['etag'] + suffix) for suffix in ('', '-gzip', '-br')
+        )
+    return request.if_modified_since is not None and last_modified <= request.if_modified_since
+
+def _entry_response(entry: Dict[str, Any], state: str) -> Response:
+    """
+    Build the response for a cache entry.
+    
+    Answers conditional requests with 304 and otherwise sends the stored
+    body in the best encoding the client accepts, without re-serializing.
+    The response is tagged with X-Cache.
+    """
+    last_modified = datetime.fromtimestamp(int(entry['created']), tz=timezone.utc)
+    encoding = _choose_encoding(entry)
+    
+    if _not_modified(entry, last_modified):
+        response = Response(status=304)
+    else:
+        body = entry['encodings'][encoding] if encoding else entry['body']
+        response = Response(body, status=entry['status'], headers=entry['headers'])
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    
+    response.headers['ETag'] = f'"{entry["etag"]}-{encoding}"' if encoding else f'"{entry["etag"]}"'
+    response.headers['Last-Modified'] = http_date(last_modified)
+    # Let browsers keep the body but revalidate it on every poll
+    response.headers['Cache-Control'] = 'private, no-cache'
+    if entry.get('encodings'):
+        response.vary.add('Accept-Encoding')
+    response.headers['X-Cache'] = state
+    return response
+
+def _acquire_lock(cache: Any, lock_key: str) -> Optional[str]:
+    """
+    Take the recompute lock of a cache key.
+    
+    ``add`` only succeeds if the key does not exist yet; on a shared backend
+    (RedisCache, FileSystemCache) this makes one worker process the owner.
+    
+    Returns:
+        Optional[str]: Token to release the lock with, or None if another request holds it
+    """
+    token = uuid.uuid4().hex
+    lock_ttl = current_app.config.get('CACHE_LOCK_TIMEOUT', 60)
+    try:
+        return token if cache.add(lock_key, token, timeout=lock_ttl) else None
+    except Exception as e:
+        current_app.logger.warning(f"Cache lock {lock_key} unavailable, recomputing without it: {e}")
+        return token
+
+def _release_lock(cache: Any, lock_key: str, token: str) -> None:
+    try:
+        if cache.get(lock_key) == token:
+            cache.delete(lock_key)
+    except Exception as e:
+        current_app.logger.warning(f"Error releasing cache lock {lock_key}: {e}")
+
+def _valid_entry(cache: Any, entry: Any) -> bool:
+    """Whether a cached value is a route entry none of whose tags has been bumped since"""
+    if not isinstance(entry, dict) or 'etag' not in entry:
+        return False
+    return not entry.get('tags') or _tag_generations(cache, list(entry['tags'])) == entry['tags']
+
+def _early_refresh(entry: Dict[str, Any], beta: float) -> bool:
+    """
+    Decide whether to refresh a fresh entry ahead of its expiry.
+    
+    Probabilistic early expiration ("XFetch"): the closer the entry is to
+    expiring and the longer it takes to compute, the likelier one request
+    refreshes it early, so hot keys rarely expire at all.
+    """
+    if beta <= 0 or not entry.get('compute_seconds'):
+        return False
+    jitter = -entry['compute_seconds'] * beta * math.log(1.0 - random.random())
+    return time.time() + jitter >= entry['fresh_until']
+
+def cached_route(timeout: Optional[int] = None, key_prefix: str = 'route_', stale_ttl: Optional[int] = None,
+                 tags: Tags = None):
     """
     A decorator for caching Flask routes.
     
+    Only 200 responses are cached. A result is fresh for ``timeout`` seconds
+    and then served stale for up to ``stale_ttl`` more seconds while a single
+    background request recomputes it (stale-while-revalidate). Recomputes are
+    single-flight per key: the request holding the key's lock computes, and
+    on a miss the others wait for its result while the lock is held, up to
+    CACHE_LOCK_WAIT seconds. A waiter never recomputes while another request
+    holds the lock: it takes over once the lock is released without a result,
+    or answers 503 with Retry-After when its wait runs out. With a shared
+    backend the lock holds across gunicorn workers. Fresh
+    entries may be refreshed early at random (CACHE_EARLY_REFRESH_BETA).
+    Responses carry ``X-Cache: HIT``, ``STALE``, ``MISS`` or ``BYPASS``.
+    
+    Results are invalidated early when one of their tags is bumped (see
+    bump_tags); an invalidated result is recomputed, never served stale.
+    A ``Cache-Control: no-cache`` request recomputes and stores the result.
+    
+    Entries keep the body with a content hash and gzip/brotli copies, so
+    responses carry ETag/Last-Modified, conditional requests get a 304 and
+    compressed bodies are sent as stored (see _entry_response).
+    
     Args:
-        timeout: Cache timeout in seconds, or None for default
+        timeout: Seconds a result stays fresh, or None for CACHE_DEFAULT_TIMEOUT
         key_prefix: Prefix for the cache key
+        stale_ttl: Seconds a result may be served stale, or None for CACHE_STALE_TTL
+        tags: Tags the result depends on, or a callable returning them for the
+            current request (e.g. one 'devices:<plant_id>' tag per requested plant)
         
     Returns:
         Callable: The decorated function
     """
     def decorator(f: Callable) -> Callable:
+        def recompute(cache: Any, cache_key: str, fresh_ttl: int, hard_ttl: int, route_tags: List[str],
+                      args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[Any, Optional[Dict[str, Any]]]:
+            # Generations are read before running, so a bump during the run invalidates the result
+            generations = _tag_generations(cache, route_tags, create=True)
+            started = time.monotonic()
+            result = f(*args, **kwargs)
+            seconds = time.monotonic() - started
+            entry = _store_entry(result, seconds, fresh_ttl, generations)
+            if entry is None:
+                record_cache_event(key_prefix, 'uncacheable', seconds=seconds, route=request.path)
+            else:
+                size = len(entry['body']) + sum(len(body) for body in entry['encodings'].values())
+                record_cache_event(key_prefix, 'set', seconds=seconds, size=size, route=request.path)
+                cache.set(cache_key, entry, timeout=hard_ttl)
+                current_app.logger.debug(
+                    f"Cached result for {request.path} ({cache_key}) fresh for {fresh_ttl}s, kept {hard_ttl}s"
+                )
+            return result, entry
+        
+        def refresh_in_background(cache: Any, cache_key: str, lock_key: str, token: str, *params: Any) -> None:
+            @copy_current_request_context
+            def run() -> None:
+                try:
+                    recompute(cache, cache_key, *params)
+                except Exception as e:
+                    current_app.logger.error(f"Background refresh of {request.path} ({cache_key}) failed: {e}")
+                finally:
+                    _release_lock(cache, lock_key, token)
+            threading.Thread(target=run, name=f"cache-refresh-{key_prefix}", daemon=True).start()
+        
+        def respond(entry: Dict[str, Any], state: str) -> Response:
+            response = _entry_response(entry, state)
+            if response.status_code == 304:
+                record_cache_event(key_prefix, 'not_modified')
+            return response
+        
         @functools.wraps(f)
         def decorated_function(*args, **kwargs):
-            # Always bypass cache if requested via headers
-            force_refresh = request.headers.get('Cache-Control') == 'no-cache'
-            if force_refresh:
-                current_app.logger.debug(f"Bypassing cache for {request.path} due to Cache-Control header")
-                return f(*args, **kwargs)
-            
             # Get the cache instance
-            cache = current_app.extensions.get('cache')
-            if not cache:
+            cache = get_cache()
+            if cache is None:
                 current_app.logger.warning("Cache extension not found, skipping cache")
                 return f(*args, **kwargs)
             
+            config = current_app.config
+            fresh_ttl = timeout or config.get('CACHE_DEFAULT_TIMEOUT', 300)
+            hard_ttl = fresh_ttl + (stale_ttl if stale_ttl is not None else config.get('CACHE_STALE_TTL', 300))
+            route_tags = list(tags() if callable(tags) else tags or [])
+            params = (fresh_ttl, hard_ttl, route_tags, args, kwargs)
+            
             # Generate a cache key
             cache_key = f"{key_prefix}{make_cache_key(*args, **kwargs)}"
+            lock_key = f"lock:{cache_key}"
             
-            # Try to get from cache
-            cached_result = cache.get(cache_key) if hasattr(cache, 'get') else None
-            if cached_result is not None:
-                current_app.logger.debug(f"Cache hit for {request.path} ({cache_key})")
-                return cached_result
+            # Always recompute if requested via headers; the result still refreshes the cache
+            force_refresh = request.headers.get('Cache-Control') == 'no-cache'
+            if force_refresh:
+                current_app.logger.debug(f"Bypassing cache for {request.path} due to Cache-Control header")
+                record_cache_event(key_prefix, 'bypass', route=request.path)
+                result, entry = recompute(cache, cache_key, *params)
+                return result if entry is None else respond(entry, 'BYPASS')
             
-            # Run the function and cache the result
-            result = f(*args, **kwargs)
+            entry = cache.get(cache_key)
+            if entry is not None and not _valid_entry(cache, entry):
+                record_cache_event(key_prefix, 'invalidated', route=request.path)
+                entry = None
+            if entry is not None:
+                fresh = time.time() < entry['fresh_until']
+                early = fresh and _early_refresh(entry, config.get('CACHE_EARLY_REFRESH_BETA', 1.0))
+                if not fresh or early:
+                    token = _acquire_lock(cache, lock_key)
+                    if token:
+                        current_app.logger.debug(f"Refreshing {request.path} ({cache_key}) in the background")
+                        if early:
+                            record_cache_event(key_prefix, 'early_refresh')
+                        refresh_in_background(cache, cache_key, lock_key, token, *params)
+                current_app.logger.debug(f"Cache {'hit' if fresh else 'stale hit'} for {request.path} ({cache_key})")
+                record_cache_event(key_prefix, 'hit' if fresh else 'stale', route=request.path)
+                return respond(entry, 'HIT' if fresh else 'STALE')
+            
+            # Miss: one request computes, the others wait for its result
+            token = _acquire_lock(cache, lock_key)
+            deadline = time.monotonic() + config.get('CACHE_LOCK_WAIT', 60)
+            while token is None:
+                if time.monotonic() >= deadline:
+                    # Recomputing next to the lock holder would repeat its (possibly upstream) work
+                    current_app.logger.warning(f"Timed out waiting for the recompute of {request.path} ({cache_key})")
+                    record_cache_event(key_prefix, 'lock_timeout', route=request.path)
+                    response = jsonify({"status": "error", "message": "Result is still being computed, retry shortly"})
+                    response.status_code = 503
+                    response.headers['Retry-After'] = '5'
+                    return response
+                time.sleep(0.05)
+                entry = cache.get(cache_key)
+                if _valid_entry(cache, entry):
+                    record_cache_event(key_prefix, 'coalesced')
+                    return respond(entry, 'HIT')
+                if cache.get(lock_key) is None:
+                    # Released without a cacheable result: take over
+                    current_app.logger.debug(f"No result from concurrent recompute of {request.path}, computing")
+                    token = _acquire_lock(cache, lock_key)
             
-            # Only cache if result is cacheable (tuple with response, status code)
-            if isinstance(result, tuple) and len(result) == 2:
-                cache_ttl = timeout or current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300)
-                
-                # Check if cache object has the set method before calling it
-                if hasattr(cache, 'set'):
-                    cache.set(cache_key, result, timeout=cache_ttl)
-                    current_app.logger.debug(f"Cached result for {request.path} ({cache_key}) with TTL {cache_ttl}s")
-                elif isinstance(cache, dict):
-                    # Fallback for dict-like caches
-                    cache[cache_key] = result
-                    current_app.logger.debug(f"Cached result for {request.path} ({cache_key}) using dictionary storage")
+            record_cache_event(key_prefix, 'miss', route=request.path)
+            try:
+                result, entry = recompute(cache, cache_key, *params)
+            finally:
+                _release_lock(cache, lock_key, token)
             
-            return result
+            if entry is None:
+                return result
+            return respond(entry, 'MISS')
         return decorated_function
     return decorator
 
@@ -97,6 +482,10 @@ def invalidate_cache_pattern(pattern: str) -> int:
     """
     Invalidate cache keys matching a pattern.
     
+    Only supported on Redis, where keys are found with SCAN so Redis is not
+    blocked on large keyspaces. Route results are better invalidated with
+    bump_tags, which works on every backend.
+    
     Args:
         pattern: Pattern to match cache keys
         
@@ -104,22 +493,26 @@ def invalidate_cache_pattern(pattern: str) -> int:
         int: Number of keys deleted
     """
     # Get the cache instance
-    cache = current_app.extensions.get('cache')
-    if not cache:
+    cache = get_cache()
+    if cache is None:
         current_app.logger.warning("Cache extension not found, can't invalidate cache")
         return 0
     
     # This only works for Redis cache backend
-    if hasattr(cache, '_client') and hasattr(cache._client, 'keys') and hasattr(cache._client, 'delete'):
+    backend = getattr(cache, 'cache', None)
+    client = getattr(backend, '_write_client', None)
+    if client is not None and hasattr(client, 'scan_iter') and hasattr(client, 'delete'):
         try:
-            # Get all keys matching the pattern
-            keys = cache._client.keys(pattern)
-            if not keys:
-                return 0
-            
-            # Delete the keys
-            num_deleted = len(keys)
-            cache._client.delete(*keys)
+            key_prefix = getattr(backend, 'key_prefix', '') or ''
+            num_deleted = 0
+            batch = []
+            for key in client.scan_iter(match=f"{key_prefix}{pattern}", count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    num_deleted += client.delete(*batch)
+                    batch = []
+            if batch:
+                num_deleted += client.delete(*batch)
             current_app.logger.info(f"Invalidated {num_deleted} cache keys matching '{pattern}'")
             return num_deleted
         except Exception as e:
@@ -127,4 +520,4 @@ def invalidate_cache_pattern(pattern: str) -> int:
             return 0
     else:
         current_app.logger.warning("Cache backend doesn't support pattern invalidation")
-        return 0
\ No newline at end of file
+        return 0
@@ -50,6 +50,30 @@ class Config:
     POSTGRES_CONNECT_TIMEOUT = int(os.getenv('POSTGRES_CONNECT_TIMEOUT', '15'))
     POSTGRES_USE_IPV4_ONLY = os.getenv('POSTGRES_USE_IPV4_ONLY', 'False').lower() in ('true', '1', 't')
     POSTGRES_IP_ADDRESS = os.getenv('POSTGRES_IP_ADDRESS', '')
+    POSTGRES_STREAM_FETCH_SIZE = int(os.getenv('POSTGRES_STREAM_FETCH_SIZE', '2000'))  # Rows per server-side cursor fetch
+    POSTGRES_POOL_TIMEOUT = float(os.getenv('POSTGRES_POOL_TIMEOUT', '30'))  # Seconds to wait for a free connection
+    POSTGRES_POOL_MAX_LIFETIME = float(os.getenv('POSTGRES_POOL_MAX_LIFETIME', '1800'))  # Seconds before a connection is recycled
+    POSTGRES_POOL_PRE_PING_IDLE = float(os.getenv('POSTGRES_POOL_PRE_PING_IDLE', '10'))  # Ping connections idle longer than this
+    POSTGRES_POOL_LEAK_THRESHOLD = float(os.getenv('POSTGRES_POOL_LEAK_THRESHOLD', '300'))  # Seconds before a checkout is reported
+    POSTGRES_POOL_TRACK_STACKS = os.getenv('POSTGRES_POOL_TRACK_STACKS', 'True').lower() in ('true', '1', 't')
+    # Optional read replica for dashboard/report reads (leave POSTGRES_REPLICA_HOST empty to disable)
+    POSTGRES_REPLICA_HOST = os.getenv('POSTGRES_REPLICA_HOST', '')
+    POSTGRES_REPLICA_PORT = os.getenv('POSTGRES_REPLICA_PORT', POSTGRES_PORT)
+    POSTGRES_REPLICA_USER = os.getenv('POSTGRES_REPLICA_USER', POSTGRES_USER)
+    POSTGRES_REPLICA_PASSWORD = os.getenv('POSTGRES_REPLICA_PASSWORD', POSTGRES_PASSWORD)
+    POSTGRES_REPLICA_DB = os.getenv('POSTGRES_REPLICA_DB', POSTGRES_DB)
+    POSTGRES_REPLICA_MAX_CONNECTIONS = int(os.getenv('POSTGRES_REPLICA_MAX_CONNECTIONS', '10'))
+    POSTGRES_REPLICA_MAX_LAG = float(os.getenv('POSTGRES_REPLICA_MAX_LAG', '30'))  # Seconds of replay lag tolerated
+    POSTGRES_REPLICA_CHECK_INTERVAL = float(os.getenv('POSTGRES_REPLICA_CHECK_INTERVAL', '10'))  # Seconds between lag checks
+    POSTGRES_REPLICA_RETRY_AFTER = float(os.getenv('POSTGRES_REPLICA_RETRY_AFTER', '30'))  # Seconds to skip a failed replica
+    FILE_CHUNK_SIZE = int(os.getenv('FILE_CHUNK_SIZE', str(1024 * 1024)))  # Bytes per stored file chunk
+    POSTGRES_PREPARED_STATEMENTS = os.getenv('POSTGRES_PREPARED_STATEMENTS', 'True').lower() in ('true', '1', 't')
+    # 'transaction' when connecting through a transaction-mode pooler (the Supabase pooler uses port 6543)
+    POSTGRES_POOL_MODE = os.getenv('POSTGRES_POOL_MODE', 'transaction' if POSTGRES_PORT == '6543' else 'session').lower()
+    # Delta-encoded history of raw device payloads
+    RAW_DATA_HISTORY_ENABLED = os.getenv('RAW_DATA_HISTORY_ENABLED', 'False').lower() in ('true', '1', 't')
+    RAW_DATA_HISTORY_SNAPSHOT_EVERY = int(os.getenv('RAW_DATA_HISTORY_SNAPSHOT_EVERY', '96'))  # Deltas between full snapshots
+    RAW_DATA_HISTORY_SNAPSHOT_MAX_AGE_HOURS = float(os.getenv('RAW_DATA_HISTORY_SNAPSHOT_MAX_AGE_HOURS', '24'))
     
     # Growatt API credentials
     GROWATT_USERNAME = os.getenv('GROWATT_USERNAME', '')
@@ -76,13 +100,44 @@ class Config:
     NOTIFICATION_COOLDOWN_SECONDS = int(os.getenv('NOTIFICATION_COOLDOWN_SECONDS', '3600'))  # Default 1 hour
     DEVICE_OFFLINE_THRESHOLD_MINUTES = int(os.getenv('DEVICE_OFFLINE_THRESHOLD_MINUTES', '30'))
     
+    # Live device events (/api/device-status/stream, see app/services/device_events.py)
+    DEVICE_EVENTS_BUFFER_SIZE = int(os.getenv('DEVICE_EVENTS_BUFFER_SIZE', '1000'))  # Events kept for Last-Event-ID resumes
+    DEVICE_EVENTS_POWER_DELTA = float(os.getenv('DEVICE_EVENTS_POWER_DELTA', '50'))  # Min change of a device's pac for a power event
+    DEVICE_EVENTS_HEARTBEAT = float(os.getenv('DEVICE_EVENTS_HEARTBEAT', '15'))  # Seconds between keep-alive comments
+    DEVICE_EVENTS_MAX_STREAM_SECONDS = int(os.getenv('DEVICE_EVENTS_MAX_STREAM_SECONDS', '300'))  # Streams end and clients reconnect
+    DEVICE_EVENTS_MAX_CLIENTS = int(os.getenv('DEVICE_EVENTS_MAX_CLIENTS', '4'))  # Concurrent streams per process (each holds a thread)
+    DEVICE_EVENTS_RETRY_MS = int(os.getenv('DEVICE_EVENTS_RETRY_MS', '5000'))  # Reconnect delay suggested to EventSource clients
+    
     # Cache configuration
     CACHE_TYPE = os.getenv('CACHE_TYPE', 'SimpleCache')
     CACHE_DEFAULT_TIMEOUT = int(os.getenv('CACHE_DEFAULT_TIMEOUT', '300'))
     CACHE_THRESHOLD = int(os.getenv('CACHE_THRESHOLD', '1000'))
+    # cached_route: seconds a route result may be served stale while one request recomputes it
+    CACHE_STALE_TTL = int(os.getenv('CACHE_STALE_TTL', '300'))
+    CACHE_LOCK_TIMEOUT = int(os.getenv('CACHE_LOCK_TIMEOUT', '60'))  # Max seconds a recompute holds its key's lock
+    # Max seconds a miss waits for another worker's recompute before answering 503; covers a live
+    # PLANT_FETCH_TIMEOUT fan-out and matches the lock's own lifetime
+    CACHE_LOCK_WAIT = float(os.getenv('CACHE_LOCK_WAIT', str(CACHE_LOCK_TIMEOUT)))
+    CACHE_EARLY_REFRESH_BETA = float(os.getenv('CACHE_EARLY_REFRESH_BETA', '1.0'))  # Probabilistic early refresh (0 disables)
+    CACHE_COMPRESS_MIN_BYTES = int(os.getenv('CACHE_COMPRESS_MIN_BYTES', '1024'))  # Smaller cached bodies are sent uncompressed
+    CACHE_GZIP_LEVEL = int(os.getenv('CACHE_GZIP_LEVEL', '6'))
+    CACHE_BROTLI_QUALITY = int(os.getenv('CACHE_BROTLI_QUALITY', '5'))
+    # Per-process LRU in front of the cache backend (see app/cache_tiers.py)
+    CACHE_L1_ENABLED = os.getenv('CACHE_L1_ENABLED', 'True').lower() in ('true', '1', 't')
+    CACHE_L1_MAX_ITEMS = int(os.getenv('CACHE_L1_MAX_ITEMS', '128'))
+    CACHE_L1_TTL = float(os.getenv('CACHE_L1_TTL', '5'))  # Max seconds a value is served from process memory
+    CACHE_L1_CHECK_INTERVAL = float(os.getenv('CACHE_L1_CHECK_INTERVAL', '1'))  # Seconds between invalidation checks
     # Specific cache TTLs for different endpoints
     DEVICE_CACHE_TTL = int(os.getenv('DEVICE_CACHE_TTL', '300'))  # Default 5 minutes for device data
     PLANT_CACHE_TTL = int(os.getenv('PLANT_CACHE_TTL', '600'))    # Default 10 minutes for plant data
+    DATA_STATS_CACHE_TTL = int(os.getenv('DATA_STATS_CACHE_TTL', '60'))  # Default 1 minute for /api/data/stats
+    # Serve /api/plants, /api/devices and /api/weather from the collector's database snapshot
+    SNAPSHOT_READS_ENABLED = os.getenv('SNAPSHOT_READS_ENABLED', 'True').lower() in ('true', '1', 't')
+    PLANT_SNAPSHOT_SLA = int(os.getenv('PLANT_SNAPSHOT_SLA', '3600'))  # Max snapshot age in seconds before a refresh
+    DEVICE_SNAPSHOT_SLA = int(os.getenv('DEVICE_SNAPSHOT_SLA', '900'))
+    WEATHER_SNAPSHOT_SLA = int(os.getenv('WEATHER_SNAPSHOT_SLA', '10800'))
+    SNAPSHOT_STALE_MODE = os.getenv('SNAPSHOT_STALE_MODE', 'background')  # 'background' serves stale data, 'live' calls Growatt
+    SNAPSHOT_REFRESH_MIN_INTERVAL = int(os.getenv('SNAPSHOT_REFRESH_MIN_INTERVAL', '300'))  # Seconds between background refreshes
     
     # CORS configuration
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', '*')
@@ -95,6 +150,12 @@ class Config:
     API_RETRY_COUNT = int(os.getenv('API_RETRY_COUNT', '3'))
     API_RETRY_DELAY = int(os.getenv('API_RETRY_DELAY', '2'))
     API_TIMEOUT = int(os.getenv('API_TIMEOUT', '30'))  # Default 30 seconds timeout for API calls
+    PLANT_FETCH_MAX_WORKERS = int(os.getenv('PLANT_FETCH_MAX_WORKERS', '8'))  # Concurrent per-plant API calls
+    PLANT_FETCH_TIMEOUT = float(os.getenv('PLANT_FETCH_TIMEOUT', '20'))  # Seconds before a plant is reported as failed
+    # /api/batch: internal GET sub-requests run concurrently within one request
+    BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+    BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', '8'))  # Concurrent sub-requests across all batches
+    BATCH_TIMEOUT = float(os.getenv('BATCH_TIMEOUT', '30'))  # Seconds before unfinished sub-requests are reported as 504
     
     # Live reload for development
     LIVE_RELOAD_ENABLED = os.getenv('LIVE_RELOAD_ENABLED', 'False').lower() in ('true', '1', 't')
@@ -139,6 +200,41 @@ class Config:
     # 24-hour monitoring setting
     ENABLE_24H_COLLECTION = os.getenv('ENABLE_24H_COLLECTION', 'False').lower() in ('true', '1', 't')
     
+    # Data retention settings (days of raw rows to keep; 0 keeps a table forever)
+    RETENTION_ENABLED = os.getenv('RETENTION_ENABLED', 'False').lower() in ('true', '1', 't')
+    RETENTION_CRON = os.getenv('RETENTION_CRON', '30 2 * * *')  # Daily at 2:30 AM
+    RETENTION_DEVICE_DATA_DAYS = int(os.getenv('RETENTION_DEVICE_DATA_DAYS', '30'))
+    # Day charts are kept as packed chart_series_daily rows, so per-timestamp rows only need to cover re-collection
+    RETENTION_INVERTER_HISTORY_DAYS = int(os.getenv('RETENTION_INVERTER_HISTORY_DAYS', '14'))
+    RETENTION_INVERTER_DETAILS_DAYS = int(os.getenv('RETENTION_INVERTER_DETAILS_DAYS', '30'))
+    RETENTION_NOTIFICATION_HISTORY_DAYS = int(os.getenv('RETENTION_NOTIFICATION_HISTORY_DAYS', '180'))
+    RETENTION_WEATHER_DATA_DAYS = int(os.getenv('RETENTION_WEATHER_DATA_DAYS', '730'))
+    RETENTION_BATCH_SIZE = int(os.getenv('RETENTION_BATCH_SIZE', '5000'))  # Raw rows deleted per transaction
+    RETENTION_BATCH_PAUSE = float(os.getenv('RETENTION_BATCH_PAUSE', '0.1'))  # Seconds between delete batches
+    RETENTION_LOCK_TIMEOUT_MS = int(os.getenv('RETENTION_LOCK_TIMEOUT_MS', '2000'))
+    # Columnar cold archive of closed months (energy_stats, device_data, inverter_history)
+    ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'False').lower() in ('true', '1', 't')
+    ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', os.path.join('app', 'data', 'archive'))
+    ARCHIVE_DELETE_HOT = os.getenv('ARCHIVE_DELETE_HOT', 'True').lower() in ('true', '1', 't')
+    ARCHIVE_CRON = os.getenv('ARCHIVE_CRON', '0 2 * * *')  # Daily at 2 AM, before retention
+    # Days after a month ends before it is archived; the collector re-upserts the last 7 days of energy_stats
+    ARCHIVE_SETTLE_DAYS = int(os.getenv('ARCHIVE_SETTLE_DAYS', '8'))
+    # Logical database backups (gzip-compressed COPY output per table)
+    BACKUP_ENABLED = os.getenv('BACKUP_ENABLED', 'False').lower() in ('true', '1', 't')
+    BACKUP_DIR = os.getenv('BACKUP_DIR', os.path.join('app', 'data', 'backups'))
+    BACKUP_CRON = os.getenv('BACKUP_CRON', '0 1 * * *')  # Daily at 1 AM
+    BACKUP_FULL_EVERY = int(os.getenv('BACKUP_FULL_EVERY', '7'))  # Incremental backups between full backups
+    BACKUP_COMPRESSION_LEVEL = int(os.getenv('BACKUP_COMPRESSION_LEVEL', '6'))
+    # Incremental backups re-copy this many IDs below the previous watermark to catch rows committed late
+    BACKUP_WATERMARK_OVERLAP = int(os.getenv('BACKUP_WATERMARK_OVERLAP', '10000'))
+    # Database maintenance (VACUUM/ANALYZE of churned tables, REINDEX CONCURRENTLY of bloated indexes)
+    MAINTENANCE_ENABLED = os.getenv('MAINTENANCE_ENABLED', 'False').lower() in ('true', '1', 't')
+    MAINTENANCE_CRON = os.getenv('MAINTENANCE_CRON', '0 3 * * *')  # Daily at 3 AM, after retention
+    MAINTENANCE_DEAD_TUPLE_RATIO = float(os.getenv('MAINTENANCE_DEAD_TUPLE_RATIO', '0.1'))
+    MAINTENANCE_ANALYZE_CHANGE_RATIO = float(os.getenv('MAINTENANCE_ANALYZE_CHANGE_RATIO', '0.1'))
+    MAINTENANCE_INDEX_BLOAT_RATIO = float(os.getenv('MAINTENANCE_INDEX_BLOAT_RATIO', '0.3'))
+    MAINTENANCE_MIN_INDEX_BYTES = int(os.getenv('MAINTENANCE_MIN_INDEX_BYTES', str(1024 * 1024)))
+    
     # Weather API settings
     WEATHER_API_KEY = os.getenv('WEATHER_API_KEY', '')
     WEATHER_API_ENDPOINT = os.getenv('WEATHER_API_ENDPOINT', 'https://api.openweathermap.org/data/2.5/onecall')
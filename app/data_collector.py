@@ -10,6 +10,8 @@ import pytz
 from app.core.growatt import Growatt
 from app.config import Config  # Import the Config class
 from app.database import DatabaseConnector
+from app.cache_utils import bump_tags
+from app.services.device_events import publish_device_changes
 
 # Get application timezone
 def get_timezone():
@@ -280,6 +282,7 @@ class GrowattDataCollector:
             plant_store_result = self.db.save_plant_data(plants)
             if plant_store_result:
                 results["plants"] = len(plants)
+                bump_tags('plants')
             
             # For each plant, collect and store devices, energy data, and weather
             all_devices = []  # Store all device data for status tracking
@@ -371,6 +374,8 @@ class GrowattDataCollector:
                         device_store_result = self.db.save_device_data(transformed_devices)
                         if device_store_result:
                             results["devices"] += len(transformed_devices)
+                            bump_tags('devices', f"devices:{plant_id}")
+                            publish_device_changes(transformed_devices)
                     
                     # Collect energy data for each device - continue even if some devices fail
                     for device_index, device in enumerate(device_data):
@@ -511,6 +516,8 @@ class GrowattDataCollector:
             if batch_data:
                 saved_count = self.db.save_energy_data_batch(batch_data)
                 results["energy_stats"] += saved_count
+                if saved_count:
+                    bump_tags('energy', f"energy:{plant_id}")
                 logger.info(f"Saved {saved_count} energy records for device {device_sn}")
             else:
                 logger.warning(f"No valid energy data points found for device {device_sn}")
@@ -550,10 +557,12 @@ class GrowattDataCollector:
                         plant_id=plant_id,
                         date=today,
                         temperature=temp,
-                        condition=condition
+                        condition=condition,
+                        raw_data=weather
                     )
                     if result:
                         results["weather"] += 1
+                        bump_tags('weather')
         except Exception as e:
             logger.error(f"Error collecting weather data for plant {plant_id}: {str(e)}")
             results["errors"].append(f"Weather for plant {plant_id}: {str(e)}")
@@ -589,6 +598,7 @@ class GrowattDataCollector:
         plant_store_result = self.db.save_plant_data(plants)
         if plant_store_result:
             results["plants"] = len(plants)
+            bump_tags('plants')
             
         return plants
     
@@ -872,6 +882,8 @@ def collect_device_data():
                         if saved:
                             logger.info(f"Successfully saved {len(transformed_devices)} devices for plant {plant_name}")
                             results["devices"] += len(transformed_devices)
+                            bump_tags('devices', f"devices:{plant_id}")
+                            publish_device_changes(transformed_devices)
                         else:
                             logger.error(f"Failed to save devices for plant {plant_name}")
                             results["errors"].append(f"Failed to save devices for plant {plant_name}")
@@ -7,18 +7,23 @@ Growatt solar panel monitoring data using PostgreSQL.
 
 import os
 import logging
+import re
 import time
 import socket
+import threading
 from pathlib import Path
 from contextlib import contextmanager
 import json
-from typing import List, Dict, Any, Optional, Union, Tuple, Generator
+import base64
+from typing import List, Dict, Any, Optional, Union, Tuple, Generator, BinaryIO
 from datetime import datetime, timedelta, date
 import psycopg2
 from psycopg2.extras import RealDictCursor, Json
 from psycopg2 import pool
 
 from app.config import Config
+from app.db_prepared import register_statement, execute_prepared
+from app.db_pool import ObservableConnectionPool
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,12 +39,31 @@ SUPABASE_POOLER_IPS = [
 # Global connection pool
 _connection_pool = None
 
+# Optional read replica pool and its health, refreshed at most every POSTGRES_REPLICA_CHECK_INTERVAL
+_replica_pool = None
+_replica_lock = threading.Lock()
+_replica_state = {
+    'available': False,
+    'lag_seconds': None,
+    'checked_at': 0.0,
+    'down_until': 0.0,
+    'last_error': None,
+    'fallbacks': 0,
+}
+
+# Matches statements that are safe to run on a read replica
+_READ_ONLY_PATTERN = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+_WRITE_PATTERN = re.compile(r'\b(INSERT|UPDATE|DELETE|MERGE|FOR\s+UPDATE|FOR\s+SHARE|NEXTVAL|SETVAL)\b', re.IGNORECASE)
+
+# Text searched by fault log search; the search indexes are built on this exact expression
+FAULT_LOG_SEARCH_DOCUMENT = "(coalesce(device_name, '') || ' ' || coalesce(error_msg, ''))"
+
 def get_connection_pool():
     """
     Creates or returns the global connection pool
     
     Returns:
-        ThreadedConnectionPool: Connection pool for PostgreSQL
+        ObservableConnectionPool: Connection pool for PostgreSQL
     """
     global _connection_pool
     
@@ -58,9 +82,14 @@ def get_connection_pool():
             try:
                 host = resolve_host()
                 logger.info(f"Creating connection pool to {host}:{Config.POSTGRES_PORT} as {Config.POSTGRES_USER}")
-                _connection_pool = psycopg2.pool.ThreadedConnectionPool(
+                _connection_pool = ObservableConnectionPool(
                     minconn=min_connections,
                     maxconn=max_connections,
+                    timeout=Config.POSTGRES_POOL_TIMEOUT,
+                    max_lifetime=Config.POSTGRES_POOL_MAX_LIFETIME,
+                    pre_ping_idle=Config.POSTGRES_POOL_PRE_PING_IDLE,
+                    leak_threshold=Config.POSTGRES_POOL_LEAK_THRESHOLD,
+                    track_stacks=Config.POSTGRES_POOL_TRACK_STACKS,
                     host=host,
                     port=Config.POSTGRES_PORT,
                     user=Config.POSTGRES_USER,
@@ -102,6 +131,148 @@ def get_connection_pool():
                 
     return _connection_pool
 
+class ReplicaUnavailableError(Exception):
+    """Raised when a read failed on the replica and should be retried on the primary"""
+
+def _on_replica(conn) -> bool:
+    """Whether a checked-out connection belongs to the replica pool."""
+    return _replica_pool is not None and _replica_pool.owns(conn)
+
+def get_replica_pool():
+    """
+    Creates or returns the read replica connection pool
+    
+    Unlike the primary pool this does not retry: a replica that cannot be reached
+    is skipped for POSTGRES_REPLICA_RETRY_AFTER seconds and reads go to the primary.
+    
+    Returns:
+        ObservableConnectionPool: Replica pool, or None if no replica is configured
+    """
+    global _replica_pool
+    
+    if not Config.POSTGRES_REPLICA_HOST:
+        return None
+    
+    with _replica_lock:
+        if _replica_pool is None:
+            logger.info(f"Creating replica connection pool to {Config.POSTGRES_REPLICA_HOST}:{Config.POSTGRES_REPLICA_PORT}")
+            _replica_pool = ObservableConnectionPool(
+                minconn=0,
+                maxconn=Config.POSTGRES_REPLICA_MAX_CONNECTIONS,
+                timeout=Config.POSTGRES_POOL_TIMEOUT,
+                max_lifetime=Config.POSTGRES_POOL_MAX_LIFETIME,
+                pre_ping_idle=Config.POSTGRES_POOL_PRE_PING_IDLE,
+                leak_threshold=Config.POSTGRES_POOL_LEAK_THRESHOLD,
+                track_stacks=Config.POSTGRES_POOL_TRACK_STACKS,
+                host=Config.POSTGRES_REPLICA_HOST,
+                port=Config.POSTGRES_REPLICA_PORT,
+                user=Config.POSTGRES_REPLICA_USER,
+                password=Config.POSTGRES_REPLICA_PASSWORD,
+                dbname=Config.POSTGRES_REPLICA_DB,
+                connect_timeout=Config.POSTGRES_CONNECT_TIMEOUT
+            )
+    return _replica_pool
+
+def mark_replica_down(error: Exception) -> None:
+    """
+    Stop routing reads to the replica for POSTGRES_REPLICA_RETRY_AFTER seconds.
+    
+    Args:
+        error: The error that made the replica unusable
+    """
+    with _replica_lock:
+        _replica_state['available'] = False
+        _replica_state['down_until'] = time.monotonic() + Config.POSTGRES_REPLICA_RETRY_AFTER
+        _replica_state['last_error'] = str(error)
+        _replica_state['fallbacks'] += 1
+    logger.warning(f"Read replica unavailable, using primary for reads: {error}")
+
+def replica_available() -> bool:
+    """
+    Check whether reads can currently go to the replica.
+    
+    The replica is usable when it is configured, has not failed recently and its
+    replay lag is within POSTGRES_REPLICA_MAX_LAG. The lag check runs at most once
+    per POSTGRES_REPLICA_CHECK_INTERVAL.
+    
+    Returns:
+        bool: True if the replica should serve reads
+    """
+    if not Config.POSTGRES_REPLICA_HOST:
+        return False
+    
+    now = time.monotonic()
+    with _replica_lock:
+        if now < _replica_state['down_until']:
+            return False
+        if now - _replica_state['checked_at'] < Config.POSTGRES_REPLICA_CHECK_INTERVAL:
+            return _replica_state['available']
+        # Claim this check so concurrent callers keep using the last result
+        _replica_state['checked_at'] = now
+    
+    try:
+        pool = get_replica_pool()
+        conn = pool.getconn(timeout=Config.POSTGRES_CONNECT_TIMEOUT)
+        try:
+            cursor = conn.cursor(cursor_factory=psycopg2.extensions.cursor)
+            # Replay timestamps go stale when the primary is idle, so only count lag while WAL is pending
+            cursor.execute("""
+                SELECT CASE
+                    WHEN NOT pg_is_in_recovery() THEN 0
+                    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                END
+            """)
+            lag = float(cursor.fetchone()[0])
+            cursor.close()
+            conn.rollback()
+        finally:
+            pool.putconn(conn)
+    except Exception as e:
+        mark_replica_down(e)
+        return False
+    
+    available = lag <= Config.POSTGRES_REPLICA_MAX_LAG
+    with _replica_lock:
+        if not available and _replica_state['available']:
+            _replica_state['fallbacks'] += 1
+        _replica_state['available'] = available
+        _replica_state['lag_seconds'] = lag
+        _replica_state['last_error'] = None if available else f"Replica lag {lag:.1f}s exceeds {Config.POSTGRES_REPLICA_MAX_LAG}s"
+    if not available:
+        logger.warning(f"Read replica lagging by {lag:.1f}s, using primary for reads")
+    return available
+
+def is_read_only_query(query_string: str) -> bool:
+    """
+    Check whether a SQL statement only reads data and may run on a replica.
+    
+    Args:
+        query_string: SQL query string
+        
+    Returns:
+        bool: True for plain SELECT/WITH queries without data-modifying clauses
+    """
+    return bool(_READ_ONLY_PATTERN.match(query_string)) and not _WRITE_PATTERN.search(query_string)
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Get connection pool metrics without creating the pool.
+    
+    Returns:
+        Dict with pool metrics and possible leaks, or an empty dict if the pool is not initialized
+    """
+    if _connection_pool is None:
+        return {}
+    
+    stats = _connection_pool.get_stats()
+    stats['leaks'] = _connection_pool.get_leaks()
+    if Config.POSTGRES_REPLICA_HOST:
+        with _replica_lock:
+            stats['replica'] = dict(_replica_state, checked_at=None, down_until=None)
+        stats['replica']['pool'] = _replica_pool.get_stats() if _replica_pool is not None else {}
+    return stats
+
 def resolve_host():
     """
     Resolves the PostgreSQL host from configuration or environment.
@@ -138,20 +309,35 @@ def resolve_host():
         raise
 
 @contextmanager
-def get_db_connection():
+def get_db_connection(replica: bool = False):
     """
     Context manager for database connections to ensure proper closing
     Uses connection pool in transaction mode
     
+    Args:
+        replica: Use the read replica if one is configured and healthy; falls back to the primary
+    
     Yields:
         Connection: A connection to the PostgreSQL database
     """
-    pool = get_connection_pool()
+    pool = None
     conn = None
     
+    if replica and replica_available():
+        try:
+            pool = get_replica_pool()
+            conn = pool.getconn()
+        except Exception as e:
+            mark_replica_down(e)
+            pool = conn = None
+    
+    if pool is None:
+        pool = get_connection_pool()
+    
     try:
         # Get connection from pool
-        conn = pool.getconn()
+        if conn is None:
+            conn = pool.getconn()
         
         # Set transaction mode (autocommit=False is the default)
         conn.autocommit = False
@@ -258,7 +444,8 @@ def init_db():
                     filename TEXT NOT NULL,
                     file_path TEXT NOT NULL,
                     file_type TEXT,
-                    content BYTEA NOT NULL,
+                    content BYTEA,
+                    content_hash TEXT,
                     plant_id TEXT,
                     device_id TEXT,
                     size_bytes INTEGER,
@@ -304,6 +491,60 @@ except ImportError:
 except Exception as e:
     logger.error(f"Error running database migrations: {e}")
 
+# Hot statements issued on every collection cycle
+register_statement('device_upsert', '''
+    INSERT INTO devices
+    (serial_number, plant_id, alias, type, status, last_update_time, last_updated)
+    VALUES (%s, %s, %s, %s, %s, %s, NOW())
+    ON CONFLICT (serial_number) DO UPDATE
+    SET plant_id = EXCLUDED.plant_id,
+        alias = EXCLUDED.alias,
+        type = EXCLUDED.type,
+        status = EXCLUDED.status,
+        last_update_time = EXCLUDED.last_update_time,
+        last_updated = NOW()
+''')
+register_statement('device_upsert_raw', '''
+    INSERT INTO devices
+    (serial_number, plant_id, alias, type, status, last_update_time, last_updated, raw_data)
+    VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
+    ON CONFLICT (serial_number) DO UPDATE
+    SET plant_id = EXCLUDED.plant_id,
+        alias = EXCLUDED.alias,
+        type = EXCLUDED.type,
+        status = EXCLUDED.status,
+        last_update_time = EXCLUDED.last_update_time,
+        last_updated = NOW(),
+        raw_data = EXCLUDED.raw_data
+''')
+register_statement('energy_upsert', '''
+    INSERT INTO energy_stats
+    (plant_id, mix_sn, date, daily_energy, peak_power, last_updated)
+    VALUES (%s, %s, %s, %s, %s, NOW())
+    ON CONFLICT (mix_sn, date) DO UPDATE
+    SET daily_energy = EXCLUDED.daily_energy,
+        peak_power = EXCLUDED.peak_power,
+        last_updated = NOW()
+''')
+
+def _encode_keyset_cursor(position: datetime, row_id: int) -> str:
+    """Encode a (timestamp, id) listing position as an opaque URL-safe cursor."""
+    payload = json.dumps([position.isoformat(), row_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+def _decode_keyset_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by _encode_keyset_cursor."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(position), int(row_id)
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+def _escape_like(text: str) -> str:
+    """Escape LIKE wildcards so user input matches literally."""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
 # Add the DatabaseConnector class that's being imported
 class DatabaseConnector:
     """Database connector class for Growatt API data storage"""
@@ -376,12 +617,13 @@ class DatabaseConnector:
             'raw_data': raw_data
         }
 
-    def _check_raw_data_column(self, cursor) -> bool:
+    def _check_raw_data_column(self, cursor, table: str = 'devices') -> bool:
         """
-        Check if raw_data column exists in the devices table.
+        Check if raw_data column exists in a table.
         
         Args:
             cursor: Database cursor
+            table: Table to check (devices, plants or weather_data)
             
         Returns:
             bool: True if raw_data column exists, False otherwise
@@ -390,8 +632,8 @@ class DatabaseConnector:
             cursor.execute("""
                 SELECT column_name 
                 FROM information_schema.columns 
-                WHERE table_name = 'devices' AND column_name = 'raw_data'
-            """)
+                WHERE table_name = %s AND column_name = 'raw_data'
+            """, (table,))
             return cursor.fetchone() is not None
         except Exception:
             # If we can't check, assume it doesn't exist
@@ -406,99 +648,19 @@ class DatabaseConnector:
             device_data: Prepared device data dictionary
             raw_data_column_exists: Whether raw_data column exists in the table
         """
-        # Check if the device already exists
-        cursor.execute(
-            """
-            SELECT serial_number FROM devices 
-            WHERE serial_number = %s
-            """,
-            (device_data['serial_number'],)
-        )
-        exists = cursor.fetchone()
-        
-        if exists:
-            if raw_data_column_exists:
-                # Update existing device with raw_data
-                cursor.execute(
-                    """
-                    UPDATE devices 
-                    SET plant_id = %s,
-                        alias = %s,
-                        type = %s,
-                        status = %s,
-                        last_update_time = %s,
-                        last_updated = NOW(),
-                        raw_data = %s
-                    WHERE serial_number = %s
-                    """,
-                    (
-                        device_data['plant_id'],
-                        device_data['alias'],
-                        device_data['type'],
-                        device_data['status'],
-                        device_data['last_update_time'],
-                        device_data['raw_data'],
-                        device_data['serial_number']
-                    )
-                )
-            else:
-                # Update existing device without raw_data
-                cursor.execute(
-                    """
-                    UPDATE devices 
-                    SET plant_id = %s,
-                        alias = %s,
-                        type = %s,
-                        status = %s,
-                        last_update_time = %s,
-                        last_updated = NOW()
-                    WHERE serial_number = %s
-                    """,
-                    (
-                        device_data['plant_id'],
-                        device_data['alias'],
-                        device_data['type'],
-                        device_data['status'],
-                        device_data['last_update_time'],
-                        device_data['serial_number']
-                    )
-                )
+        params = [
+            device_data['serial_number'],
+            device_data['plant_id'],
+            device_data['alias'],
+            device_data['type'],
+            device_data['status'],
+            device_data['last_update_time']
+        ]
+        
+        if raw_data_column_exists:
+            execute_prepared(cursor, 'device_upsert_raw', params + [device_data['raw_data']])
         else:
-            if raw_data_column_exists:
-                # Insert new device with raw_data
-                cursor.execute(
-                    """
-                    INSERT INTO devices 
-                    (serial_number, plant_id, alias, type, status, last_update_time, last_updated, raw_data)
-                    VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
-                    """,
-                    (
-                        device_data['serial_number'],
-                        device_data['plant_id'],
-                        device_data['alias'],
-                        device_data['type'],
-                        device_data['status'],
-                        device_data['last_update_time'],
-                        device_data['raw_data']
-                    )
-                )
-            else:
-                # Insert new device without raw_data
-                cursor.execute(
-                    """
-                    INSERT INTO devices 
-                    (serial_number, plant_id, alias, type, status, last_update_time, last_updated)
-                    VALUES (%s, %s, %s, %s, %s, %s, NOW())
-                    """,
-                    (
-                        device_data['serial_number'],
-                        device_data['plant_id'],
-                        device_data['alias'],
-                        device_data['type'],
-                        device_data['status'],
-                        device_data['last_update_time']
-                    )
-                )
+            execute_prepared(cursor, 'device_upsert', params)
 
     def save_device_data(self, devices_data: List[Dict[str, Any]]) -> bool:
         """
@@ -517,6 +679,7 @@ class DatabaseConnector:
                 
                 # Check if raw_data column exists once for all devices
                 raw_data_column_exists = self._check_raw_data_column(cursor)
+                raw_payloads = []
                 
                 for device in devices_data:
                     # Prepare device data
@@ -526,43 +689,77 @@ class DatabaseConnector:
                     
                     # Save device to database
                     self._save_device_to_db(cursor, device_data, raw_data_column_exists)
+                    raw_payloads.append((device_data['serial_number'], device.get('raw_data')))
+                
+                if Config.RAW_DATA_HISTORY_ENABLED:
+                    from app.db_raw_history import record_raw_data
+                    record_raw_data(cursor, raw_payloads)
                 
                 conn.commit()
                 return True
             
         except psycopg2.Error as e:
             logger.error(f"PostgreSQL error saving device data: {e}")
-            if conn:
-                conn.rollback()
             return False
         except Exception as e:
             logger.error(f"Unexpected error saving device data: {e}")
-            if conn:
-                conn.rollback()
             return False
 
-    def query(self, query_string: str, params: Optional[Union[Tuple, Dict[str, Any], List[Any]]] = None) -> List[Dict[str, Any]]:
+    def _fetch_all(self,
+                   query_string: str,
+                   params: Optional[Union[Tuple, Dict[str, Any], List[Any]]],
+                   replica: bool) -> List[Dict[str, Any]]:
+        """
+        Run a query and fetch all rows, raising ReplicaUnavailableError when the
+        replica fails in a way the primary would not.
+        """
+        with get_db_connection(replica=replica) as conn:
+            cursor = conn.cursor()
+            try:
+                if params:
+                    cursor.execute(query_string, params)
+                else:
+                    cursor.execute(query_string)
+            except (psycopg2.OperationalError, psycopg2.errors.SerializationFailure) as e:
+                # Connection loss or a query cancelled by WAL replay on the standby
+                if not _on_replica(conn):
+                    raise
+                if isinstance(e, psycopg2.OperationalError):
+                    mark_replica_down(e)
+                raise ReplicaUnavailableError(str(e)) from e
+            
+            # PostgreSQL returns a list of dictionaries already
+            results = cursor.fetchall()
+            return [dict(row) for row in results]
+
+    def query(self,
+              query_string: str,
+              params: Optional[Union[Tuple, Dict[str, Any], List[Any]]] = None,
+              use_replica: Optional[bool] = None) -> List[Dict[str, Any]]:
         """
         Execute a query and return results.
         
+        Read-only statements go to the read replica when one is configured and
+        healthy, and fall back to the primary if it lags, is down or fails.
+        
         Args:
             query_string: SQL query string
             params: Parameters for the query (tuple, dict, or list)
+            use_replica: True/False to force or forbid the replica (pass False to read
+                         your own writes); None routes read-only statements automatically
             
         Returns:
             List of query results as dictionary-like objects
         """
+        if use_replica is None:
+            use_replica = is_read_only_query(query_string)
+        
         try:
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
-                if params:
-                    cursor.execute(query_string, params)
-                else:
-                    cursor.execute(query_string)
-                
-                # PostgreSQL returns a list of dictionaries already
-                results = cursor.fetchall()
-                return [dict(row) for row in results]
+            try:
+                return self._fetch_all(query_string, params, replica=use_replica)
+            except ReplicaUnavailableError as e:
+                logger.warning(f"Replica query failed, retrying on primary: {e}")
+                return self._fetch_all(query_string, params, replica=False)
                     
         except psycopg2.Error as e:
             logger.error(f"PostgreSQL error: {e}")
@@ -570,7 +767,133 @@ class DatabaseConnector:
         except Exception as e:
             logger.error(f"Unexpected query error: {e}")
             return []
-    
+
+    def query_prepared(self, name: str, params: Optional[Union[Tuple, List[Any]]] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a registered prepared statement and return the results.
+        
+        Args:
+            name: Statement name registered with app.db_prepared.register_statement
+            params: Positional parameters for the statement
+            
+        Returns:
+            List of dictionaries containing the query results
+        """
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                execute_prepared(cursor, name, params)
+                return cursor.fetchall() if cursor.description else []
+                
+        except psycopg2.Error as e:
+            logger.error(f"PostgreSQL prepared query error ({name}): {e}")
+            return []
+        except Exception as e:
+            logger.error(f"Unexpected prepared query error ({name}): {e}")
+            return []
+
+    def stream_batches(self,
+                       query_string: str,
+                       params: Optional[Union[Tuple, Dict[str, Any], List[Any]]] = None,
+                       fetch_size: Optional[int] = None,
+                       row_format: str = 'dict',
+                       use_replica: Optional[bool] = None) -> Generator[Any, None, None]:
+        """
+        Execute a query on a named server-side cursor and yield results in batches.
+
+        Only one batch of rows is held in memory at a time, so large result sets can be
+        processed with bounded memory. The connection stays checked out until the
+        generator is exhausted or closed.
+
+        Args:
+            query_string: SQL query string
+            params: Parameters for the query (tuple, dict, or list)
+            fetch_size: Rows fetched per round trip (default: Config.POSTGRES_STREAM_FETCH_SIZE)
+            row_format: 'dict' for lists of dicts, 'tuple' for lists of tuples, or
+                        'numpy' for a dict mapping each column name to a NumPy array
+            use_replica: True/False to force or forbid the read replica; None routes
+                         read-only statements automatically
+
+        Yields:
+            One batch of at most fetch_size rows in the requested format
+        """
+        if row_format not in ('dict', 'tuple', 'numpy'):
+            raise ValueError(f"Invalid row_format: {row_format}")
+
+        fetch_size = fetch_size or Config.POSTGRES_STREAM_FETCH_SIZE
+        cursor_factory = RealDictCursor if row_format == 'dict' else psycopg2.extensions.cursor
+        if use_replica is None:
+            use_replica = is_read_only_query(query_string)
+
+        with get_db_connection(replica=use_replica) as conn:
+            # Named cursors live on the server, so rows are only transferred as they are fetched
+            cursor = conn.cursor(name=f"stream_{id(self)}_{time.monotonic_ns()}", cursor_factory=cursor_factory)
+            cursor.itersize = fetch_size
+            try:
+                cursor.execute(query_string, params)
+                while True:
+                    rows = cursor.fetchmany(fetch_size)
+                    if not rows:
+                        break
+                    if row_format == 'numpy':
+                        yield self._rows_to_arrays(rows, [col.name for col in cursor.description])
+                    else:
+                        yield rows
+            finally:
+                cursor.close()
+
+    def stream(self,
+               query_string: str,
+               params: Optional[Union[Tuple, Dict[str, Any], List[Any]]] = None,
+               fetch_size: Optional[int] = None,
+               as_tuples: bool = False,
+               use_replica: Optional[bool] = None) -> Generator[Union[Dict[str, Any], Tuple], None, None]:
+        """
+        Execute a query on a named server-side cursor and yield rows one at a time.
+
+        Args:
+            query_string: SQL query string
+            params: Parameters for the query (tuple, dict, or list)
+            fetch_size: Rows fetched per round trip (default: Config.POSTGRES_STREAM_FETCH_SIZE)
+            as_tuples: Yield plain tuples instead of dictionary-like rows
+            use_replica: True/False to force or forbid the read replica; None routes
+                         read-only statements automatically
+
+        Yields:
+            Each result row
+        """
+        row_format = 'tuple' if as_tuples else 'dict'
+        for rows in self.stream_batches(query_string, params, fetch_size=fetch_size,
+                                        row_format=row_format, use_replica=use_replica):
+            yield from rows
+
+    @staticmethod
+    def _rows_to_arrays(rows: List[Tuple], column_names: List[str]) -> Dict[str, Any]:
+        """
+        Convert a batch of tuple rows into one NumPy array per column.
+
+        Numeric columns become float64 arrays with NULLs as NaN; any other column
+        becomes an object array.
+
+        Args:
+            rows: Batch of tuple rows
+            column_names: Column names in cursor order
+
+        Returns:
+            Dict mapping column name to a NumPy array
+        """
+        import numpy as np
+        from decimal import Decimal
+
+        arrays = {}
+        for index, name in enumerate(column_names):
+            values = [row[index] for row in rows]
+            if all(v is None or isinstance(v, (int, float, Decimal)) for v in values):
+                arrays[name] = np.array([np.nan if v is None else float(v) for v in values], dtype=np.float64)
+            else:
+                arrays[name] = np.array(values, dtype=object)
+        return arrays
+
     def save_plant_data(self, plants: List[Dict[str, Any]]) -> bool:
         """
         Save plant data to the database.
@@ -584,6 +907,7 @@ class DatabaseConnector:
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
+                raw_data_column_exists = self._check_raw_data_column(cursor, 'plants')
                 
                 for plant in plants:
                     plant_id = plant.get('id')
@@ -602,6 +926,26 @@ class DatabaseConnector:
                             logger.warning(f"Invalid date format for plant {plant_id}: {plant['last_update_time']}")
                             plant['last_update_time'] = datetime.now()
                     
+                    if raw_data_column_exists:
+                        # Keep the full payload for the API snapshot read path
+                        cursor.execute(
+                            """
+                            INSERT INTO plants
+                            (id, name, status, raw_data, last_updated)
+                            VALUES (%s, %s, %s, %s, NOW())
+                            ON CONFLICT (id) DO UPDATE
+                            SET name = EXCLUDED.name, status = EXCLUDED.status,
+                                raw_data = EXCLUDED.raw_data, last_updated = NOW()
+                            """,
+                            (
+                                plant_id,
+                                plant_name,
+                                plant.get('status', 'unknown'),
+                                Json(plant, dumps=lambda obj: json.dumps(obj, default=str))
+                            )
+                        )
+                        continue
+                    
                     cursor.execute(
                         """
                         INSERT INTO plants
@@ -637,154 +981,146 @@ class DatabaseConnector:
         logger = logging.getLogger(__name__)
         
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            
-            for device in devices_data:
-                # Ensure we have all required fields
-                if not all(k in device for k in ['serial_number', 'plant_id', 'alias', 'type', 'status']):
-                    logger.warning(f"Device data missing required fields: {device}")
-                    continue
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
                 
-                # Convert the last_update_time string to a proper datetime object if it's a string
-                if 'last_update_time' in device and isinstance(device['last_update_time'], str):
-                    try:
-                        # Try to parse the date string in format "YYYY-MM-DD HH:MM:SS"
-                        device['last_update_time'] = datetime.strptime(device['last_update_time'], "%Y-%m-%d %H:%M:%S")
-                    except ValueError:
-                        # If parsing fails, use current datetime
-                        logger.warning(f"Invalid date format for last_update_time: {device['last_update_time']}")
-                        device['last_update_time'] = datetime.now()
+                for device in devices_data:
+                    # Ensure we have all required fields
+                    if not all(k in device for k in ['serial_number', 'plant_id', 'alias', 'type', 'status']):
+                        logger.warning(f"Device data missing required fields: {device}")
+                        continue
                 
-                # Prepare raw_data as JSON
-                raw_data = json.dumps(device.get('raw_data', {}))
+                    # Convert the last_update_time string to a proper datetime object if it's a string
+                    if 'last_update_time' in device and isinstance(device['last_update_time'], str):
+                        try:
+                            # Try to parse the date string in format "YYYY-MM-DD HH:MM:SS"
+                            device['last_update_time'] = datetime.strptime(device['last_update_time'], "%Y-%m-%d %H:%M:%S")
+                        except ValueError:
+                            # If parsing fails, use current datetime
+                            logger.warning(f"Invalid date format for last_update_time: {device['last_update_time']}")
+                            device['last_update_time'] = datetime.now()
                 
-                # Check if raw_data column exists in the table
-                try:
-                    cursor.execute("""
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name = 'devices' AND column_name = 'raw_data'
-                    """)
-                    raw_data_column_exists = cursor.fetchone() is not None
-                except Exception:
-                    # If we can't check, assume it doesn't exist
-                    raw_data_column_exists = False
+                    # Prepare raw_data as JSON
+                    raw_data = json.dumps(device.get('raw_data', {}))
                 
-                # Check if the device already exists
-                cursor.execute(
-                    """
-                    SELECT serial_number FROM devices 
-                    WHERE serial_number = %s
-                    """,
-                    (device['serial_number'],)
-                )
-                exists = cursor.fetchone()
+                    # Check if raw_data column exists in the table
+                    try:
+                        cursor.execute("""
+                            SELECT column_name 
+                            FROM information_schema.columns 
+                            WHERE table_name = 'devices' AND column_name = 'raw_data'
+                        """)
+                        raw_data_column_exists = cursor.fetchone() is not None
+                    except Exception:
+                        # If we can't check, assume it doesn't exist
+                        raw_data_column_exists = False
                 
-                if exists:
-                    if raw_data_column_exists:
-                        # Update existing device with raw_data
-                        cursor.execute(
-                            """
-                            UPDATE devices 
-                            SET plant_id = %s,
-                                alias = %s,
-                                type = %s,
-                                status = %s,
-                                last_update_time = %s,
-                                last_updated = NOW(),
-                                raw_data = %s
-                            WHERE serial_number = %s
-                            """,
-                            (
-                                device['plant_id'],
-                                device['alias'],
-                                device['type'],
-                                device['status'],
-                                device['last_update_time'],
-                                raw_data,
-                                device['serial_number']
-                            )
-                        )
-                    else:
-                        # Update existing device without raw_data
-                        cursor.execute(
-                            """
-                            UPDATE devices 
-                            SET plant_id = %s,
-                                alias = %s,
-                                type = %s,
-                                status = %s,
-                                last_update_time = %s,
-                                last_updated = NOW()
-                            WHERE serial_number = %s
-                            """,
-                            (
-                                device['plant_id'],
-                                device['alias'],
-                                device['type'],
-                                device['status'],
-                                device['last_update_time'],
-                                device['serial_number']
+                    # Check if the device already exists
+                    cursor.execute(
+                        """
+                        SELECT serial_number FROM devices 
+                        WHERE serial_number = %s
+                        """,
+                        (device['serial_number'],)
+                    )
+                    exists = cursor.fetchone()
+                
+                    if exists:
+                        if raw_data_column_exists:
+                            # Update existing device with raw_data
+                            cursor.execute(
+                                """
+                                UPDATE devices 
+                                SET plant_id = %s,
+                                    alias = %s,
+                                    type = %s,
+                                    status = %s,
+                                    last_update_time = %s,
+                                    last_updated = NOW(),
+                                    raw_data = %s
+                                WHERE serial_number = %s
+                                """,
+                                (
+                                    device['plant_id'],
+                                    device['alias'],
+                                    device['type'],
+                                    device['status'],
+                                    device['last_update_time'],
+                                    raw_data,
+                                    device['serial_number']
+                                )
                             )
-                        )
-                else:
-                    if raw_data_column_exists:
-                        # Insert new device with raw_data
-                        cursor.execute(
-                            """
-                            INSERT INTO devices 
-                            (serial_number, plant_id, alias, type, status, last_update_time, last_updated, raw_data)
-                            VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
-                            """,
-                            (
-                                device['serial_number'],
-                                device['plant_id'],
-                                device['alias'],
-                                device['type'],
-                                device['status'],
-                                device['last_update_time'],
-                                raw_data
+                        else:
+                            # Update existing device without raw_data
+                            cursor.execute(
+                                """
+                                UPDATE devices 
+                                SET plant_id = %s,
+                                    alias = %s,
+                                    type = %s,
+                                    status = %s,
+                                    last_update_time = %s,
+                                    last_updated = NOW()
+                                WHERE serial_number = %s
+                                """,
+                                (
+                                    device['plant_id'],
+                                    device['alias'],
+                                    device['type'],
+                                    device['status'],
+                                    device['last_update_time'],
+                                    device['serial_number']
+                                )
                             )
-                        )
                     else:
-                        # Insert new device without raw_data
-                        cursor.execute(
-                            """
-                            INSERT INTO devices 
-                            (serial_number, plant_id, alias, type, status, last_update_time, last_updated)
-                            VALUES (%s, %s, %s, %s, %s, %s, NOW())
-                            """,
-                            (
-                                device['serial_number'],
-                                device['plant_id'],
-                                device['alias'],
-                                device['type'],
-                                device['status'],
-                                device['last_update_time']
+                        if raw_data_column_exists:
+                            # Insert new device with raw_data
+                            cursor.execute(
+                                """
+                                INSERT INTO devices 
+                                (serial_number, plant_id, alias, type, status, last_update_time, last_updated, raw_data)
+                                VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
+                                """,
+                                (
+                                    device['serial_number'],
+                                    device['plant_id'],
+                                    device['alias'],
+                                    device['type'],
+                                    device['status'],
+                                    device['last_update_time'],
+                                    raw_data
+                                )
+                            )
+                        else:
+                            # Insert new device without raw_data
+                            cursor.execute(
+                                """
+                                INSERT INTO devices 
+                                (serial_number, plant_id, alias, type, status, last_update_time, last_updated)
+                                VALUES (%s, %s, %s, %s, %s, %s, NOW())
+                                """,
+                                (
+                                    device['serial_number'],
+                                    device['plant_id'],
+                                    device['alias'],
+                                    device['type'],
+                                    device['status'],
+                                    device['last_update_time']
+                                )
                             )
-                        )
             
-            conn.commit()
+                conn.commit()
             return True
         
         except Exception as e:
+            # get_db_connection() has already rolled back and returned the connection
             logger.error(f"Unexpected error saving devices: {e}")
-            if conn:
-                conn.rollback()
-                logger.info("Transaction rolled back due to error")
             
             # Log the first device data for debugging
             if devices_data:
                 logger.error(f"Failed to save device data: {json.dumps(devices_data, default=str, indent=2)}")
             
             return False
-        
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
 
     def save_energy_data_batch(self, batch_data: List[Dict[str, Any]]) -> int:
         """
@@ -797,8 +1133,11 @@ class DatabaseConnector:
         Returns:
             int: Number of records successfully saved
         """
+        from app.db_rollups import update_energy_rollups
+        
         try:
             count = 0
+            touched_days = []
             with get_db_connection() as conn:
                 cursor = conn.cursor()
                 for data in batch_data:
@@ -815,25 +1154,22 @@ class DatabaseConnector:
                             logger.warning(f"Invalid date format for energy data: {data['date']}")
                             data['date'] = datetime.now().date()
                     
-                    cursor.execute(
-                        """
-                        INSERT INTO energy_stats 
-                        (plant_id, mix_sn, date, daily_energy, peak_power, last_updated) 
-                        VALUES (%s, %s, %s, %s, %s, NOW())
-                        ON CONFLICT (mix_sn, date) DO UPDATE
-                        SET daily_energy = %s, peak_power = %s, last_updated = NOW()
-                        """, 
+                    execute_prepared(
+                        cursor,
+                        'energy_upsert',
                         (
                             data['plant_id'], 
                             data['mix_sn'], 
                             data['date'], 
                             data['daily_energy'], 
-                            data.get('peak_power', 0),
-                            data['daily_energy'],
                             data.get('peak_power', 0)
                         )
                     )
                     count += 1
+                    touched_days.append((data['mix_sn'], data['date']))
+                
+                # Refresh the daily/monthly rollups for the keys in this batch only
+                update_energy_rollups(cursor, day_keys=touched_days)
                 conn.commit()
             return count
         except psycopg2.Error as e:
@@ -843,7 +1179,8 @@ class DatabaseConnector:
             logger.error(f"Unexpected error saving energy data batch: {e}")
             return 0
     
-    def save_weather_data(self, plant_id: str, date: str, temperature: Optional[float], condition: Optional[str]) -> bool:
+    def save_weather_data(self, plant_id: str, date: str, temperature: Optional[float], condition: Optional[str],
+                          raw_data: Optional[Dict[str, Any]] = None) -> bool:
         """
         Save weather data to the database.
         
@@ -852,6 +1189,7 @@ class DatabaseConnector:
             date: Date string in YYYY-MM-DD format
             temperature: Temperature value (can be None)
             condition: Weather condition description (can be None)
+            raw_data: Full weather payload from the API, kept for the snapshot read path (optional)
             
         Returns:
             bool: True if successful, False otherwise
@@ -868,6 +1206,22 @@ class DatabaseConnector:
                         logger.warning(f"Invalid date format for weather data: {date}")
                         date = datetime.now().date()
                 
+                if raw_data is not None and self._check_raw_data_column(cursor, 'weather_data'):
+                    cursor.execute(
+                        """
+                        INSERT INTO weather_data
+                        (plant_id, date, temperature, condition, raw_data, last_updated)
+                        VALUES (%s, %s, %s, %s, %s, NOW())
+                        ON CONFLICT (plant_id, date) DO UPDATE
+                        SET temperature = EXCLUDED.temperature, condition = EXCLUDED.condition,
+                            raw_data = EXCLUDED.raw_data, last_updated = NOW()
+                        """,
+                        (plant_id, date, temperature, condition,
+                         Json(raw_data, dumps=lambda obj: json.dumps(obj, default=str)))
+                    )
+                    conn.commit()
+                    return True
+                
                 cursor.execute(
                     """
                     INSERT INTO weather_data
@@ -890,18 +1244,22 @@ class DatabaseConnector:
     def save_file_to_db(self, 
                         filename: str, 
                         file_path: str, 
-                        content: bytes, 
+                        content: Union[bytes, BinaryIO], 
                         file_type: Optional[str] = None, 
                         plant_id: Optional[str] = None, 
                         device_id: Optional[str] = None, 
                         metadata: Optional[Dict[str, Any]] = None) -> bool:
         """
-        Save a file to the database as binary data.
+        Save a file to the database using content-addressed blob storage.
+        
+        The content is stored once per distinct hash; the files row only holds
+        metadata and the content hash. Content that is already stored under any
+        path is not uploaded again.
         
         Args:
             filename: Original filename
             file_path: Path of the file (used as a unique identifier)
-            content: Binary content of the file
+            content: Binary content of the file, or a binary stream to read it from
             file_type: MIME type or extension of the file
             plant_id: Associated plant ID (optional)
             device_id: Associated device ID (optional)
@@ -910,55 +1268,55 @@ class DatabaseConnector:
         Returns:
             bool: True if successful, False otherwise
         """
+        from app.db_blobs import store_blob, delete_orphaned_blob
+        
         try:
-            import hashlib
-            
-            # Calculate MD5 hash for file integrity
-            md5_hash = hashlib.md5(content).hexdigest()
-            size_bytes = len(content)
-            
             with get_db_connection() as conn:
                 cursor = conn.cursor()
                 
+                blob = store_blob(cursor, content)
+                
+                # Remember the previous content so it can be dropped if nothing else uses it
+                cursor.execute("SELECT content_hash FROM files WHERE file_path = %s FOR UPDATE", (file_path,))
+                previous = cursor.fetchone()
+                
                 cursor.execute(
                     """
                     INSERT INTO files
-                    (filename, file_path, file_type, content, plant_id, device_id, 
+                    (filename, file_path, file_type, content, content_hash, plant_id, device_id, 
                      size_bytes, md5_hash, created_at, last_updated, metadata)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW(), %s)
+                    VALUES (%s, %s, %s, NULL, %s, %s, %s, %s, %s, NOW(), NOW(), %s)
                     ON CONFLICT (file_path) DO UPDATE
-                    SET content = %s, 
-                        file_type = %s,
-                        plant_id = %s,
-                        device_id = %s,
-                        size_bytes = %s,
-                        md5_hash = %s,
+                    SET filename = EXCLUDED.filename,
+                        file_type = EXCLUDED.file_type,
+                        content = NULL,
+                        content_hash = EXCLUDED.content_hash,
+                        plant_id = EXCLUDED.plant_id,
+                        device_id = EXCLUDED.device_id,
+                        size_bytes = EXCLUDED.size_bytes,
+                        md5_hash = EXCLUDED.md5_hash,
                         last_updated = NOW(),
-                        metadata = %s
+                        metadata = EXCLUDED.metadata
                     """,
                     (
                         filename, 
                         file_path, 
                         file_type, 
-                        psycopg2.Binary(content), 
+                        blob['content_hash'],
                         plant_id, 
                         device_id, 
-                        size_bytes, 
-                        md5_hash,
-                        psycopg2.extras.Json(metadata) if metadata else None,
-                        # Values for the ON CONFLICT UPDATE
-                        psycopg2.Binary(content),
-                        file_type,
-                        plant_id,
-                        device_id,
-                        size_bytes,
-                        md5_hash,
-                        psycopg2.extras.Json(metadata) if metadata else None
+                        blob['size_bytes'], 
+                        blob['md5_hash'],
+                        Json(metadata) if metadata else None
                     )
                 )
+                
+                if previous and previous['content_hash'] != blob['content_hash']:
+                    delete_orphaned_blob(cursor, previous['content_hash'])
                 conn.commit()
                 
-            logger.info(f"Successfully saved file to database: {file_path} ({size_bytes} bytes)")
+            stored = "stored" if blob['created'] else "deduplicated"
+            logger.info(f"Successfully saved file to database: {file_path} ({blob['size_bytes']} bytes, {stored})")
             return True
             
         except psycopg2.Error as e:
@@ -968,15 +1326,15 @@ class DatabaseConnector:
             logger.error(f"Unexpected error saving file: {e}")
             return False
     
-    def get_file_from_db(self, file_path: str) -> Optional[Dict[str, Any]]:
+    def get_file_info(self, file_path: str) -> Optional[Dict[str, Any]]:
         """
-        Retrieve a file from the database by its path.
+        Retrieve a file's metadata (without content) by its path.
         
         Args:
-            file_path: Path of the file to retrieve
+            file_path: Path of the file
             
         Returns:
-            Optional[Dict[str, Any]]: Dictionary with file information and content, or None if not found
+            Optional[Dict[str, Any]]: File metadata including content_hash, or None if not found
         """
         try:
             with get_db_connection() as conn:
@@ -984,7 +1342,7 @@ class DatabaseConnector:
                 
                 cursor.execute(
                     """
-                    SELECT id, filename, file_path, file_type, content, plant_id, device_id, 
+                    SELECT id, filename, file_path, file_type, content_hash, plant_id, device_id, 
                            size_bytes, md5_hash, created_at, last_updated, metadata
                     FROM files
                     WHERE file_path = %s
@@ -993,33 +1351,95 @@ class DatabaseConnector:
                 )
                 
                 result = cursor.fetchone()
-                
-                if result:
-                    # Convert to regular dict and ensure content is bytes
-                    file_info = dict(result)
-                    
-                    # psycopg2 returns memoryview, convert to bytes
-                    if isinstance(file_info.get('content'), memoryview):
-                        file_info['content'] = bytes(file_info['content'])
-                        
-                    # Calculate MD5 to verify integrity
-                    import hashlib
-                    md5_hash = hashlib.md5(file_info['content']).hexdigest()
-                    if md5_hash != file_info.get('md5_hash'):
-                        logger.warning(f"MD5 hash mismatch for file {file_path}. Stored: {file_info.get('md5_hash')}, Calculated: {md5_hash}")
-                    
-                    return file_info
-                else:
-                    logger.info(f"File not found in database: {file_path}")
-                    return None
+                return dict(result) if result else None
                 
         except psycopg2.Error as e:
-            logger.error(f"PostgreSQL error retrieving file: {e}")
+            logger.error(f"PostgreSQL error retrieving file info: {e}")
             return None
         except Exception as e:
-            logger.error(f"Unexpected error retrieving file: {e}")
+            logger.error(f"Unexpected error retrieving file info: {e}")
             return None
     
+    def iter_file_content(self, file_info: Dict[str, Any]) -> Generator[bytes, None, None]:
+        """
+        Stream a file's content chunk by chunk.
+        
+        Args:
+            file_info: Metadata returned by get_file_info
+            
+        Yields:
+            bytes: Consecutive chunks of the file content
+        """
+        from app.db_blobs import iter_blob
+        
+        if file_info.get('content_hash'):
+            yield from iter_blob(file_info['content_hash'])
+            return
+        
+        # Rows saved before blob storage still hold their bytes inline
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT content FROM files WHERE id = %s", (file_info['id'],))
+            row = cursor.fetchone()
+        if row and row['content'] is not None:
+            yield bytes(row['content'])
+    
+    def get_file_from_db(self, file_path: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieve a file from the database by its path.
+        
+        This assembles the whole content in memory; use get_file_info and
+        iter_file_content to stream large files instead.
+        
+        Args:
+            file_path: Path of the file to retrieve
+            
+        Returns:
+            Optional[Dict[str, Any]]: Dictionary with file information and content, or None if not found
+        """
+        import hashlib
+        
+        file_info = self.get_file_info(file_path)
+        if not file_info:
+            logger.info(f"File not found in database: {file_path}")
+            return None
+        
+        try:
+            file_info['content'] = b''.join(self.iter_file_content(file_info))
+        except Exception as e:
+            logger.error(f"Error reading file content for {file_path}: {e}")
+            return None
+        
+        # Calculate MD5 to verify integrity
+        md5_hash = hashlib.md5(file_info['content']).hexdigest()
+        if md5_hash != file_info.get('md5_hash'):
+            logger.warning(f"MD5 hash mismatch for file {file_path}. Stored: {file_info.get('md5_hash')}, Calculated: {md5_hash}")
+        
+        return file_info
+    
+    def content_hash_exists(self, content_hash: str) -> bool:
+        """
+        Check if content with the given hash is already stored.
+        
+        Args:
+            content_hash: SHA-256 hex digest of the content
+            
+        Returns:
+            bool: True if a blob with this hash exists, False otherwise
+        """
+        from app.db_blobs import blob_exists
+        
+        try:
+            with get_db_connection() as conn:
+                return blob_exists(conn.cursor(), content_hash)
+                
+        except psycopg2.Error as e:
+            logger.error(f"PostgreSQL error checking content hash: {e}")
+            return False
+        except Exception as e:
+            logger.error(f"Unexpected error checking content hash: {e}")
+            return False
+    
     def file_exists_in_db(self, file_path: str) -> bool:
         """
         Check if a file exists in the database.
@@ -1053,60 +1473,116 @@ class DatabaseConnector:
     def list_files_in_db(self, 
                          plant_id: Optional[str] = None, 
                          device_id: Optional[str] = None, 
-                         file_type: Optional[str] = None) -> List[Dict[str, Any]]:
+                         file_type: Optional[str] = None,
+                         limit: Optional[int] = None,
+                         cursor: Optional[str] = None) -> List[Dict[str, Any]]:
         """
-        List files in the database with optional filtering.
+        List files in the database with optional filtering, newest first.
         
         Args:
             plant_id: Filter by plant ID (optional)
             device_id: Filter by device ID (optional)
             file_type: Filter by file type (optional)
+            limit: Maximum number of files to return (optional, default: all)
+            cursor: Opaque cursor from list_files_page to continue after (optional)
             
         Returns:
-            List[Dict[str, Any]]: List of file information dictionaries (without content)
+            List[Dict[str, Any]]: List of file information dictionaries (without content or metadata)
         """
-        try:
-            query = """
-                SELECT id, filename, file_path, file_type, plant_id, device_id, 
-                       size_bytes, md5_hash, created_at, last_updated, metadata
-                FROM files
-                WHERE 1=1
-            """
+        return self.list_files_page(plant_id, device_id, file_type, limit=limit, cursor=cursor)['files']
+    
+    def list_files_page(self,
+                        plant_id: Optional[str] = None,
+                        device_id: Optional[str] = None,
+                        file_type: Optional[str] = None,
+                        limit: Optional[int] = 100,
+                        cursor: Optional[str] = None,
+                        include_total: bool = False) -> Dict[str, Any]:
+        """
+        List one page of files using keyset pagination on (created_at, id).
+        
+        Pages are read from covering indexes, so the cost of a page does not grow
+        with its position in the listing and the content column is never read.
+        
+        Args:
+            plant_id: Filter by plant ID (optional)
+            device_id: Filter by device ID (optional)
+            file_type: Filter by file type (optional)
+            limit: Page size (None returns every remaining file)
+            cursor: Opaque cursor returned as next_cursor by the previous page
+            include_total: Add total_estimate, the planner's row estimate for the filters
             
-            params = []
+        Returns:
+            Dict with 'files', 'next_cursor' (None on the last page) and optionally 'total_estimate'
             
-            if plant_id:
-                query += " AND plant_id = %s"
-                params.append(plant_id)
-                
-            if device_id:
-                query += " AND device_id = %s"
-                params.append(device_id)
-                
-            if file_type:
-                query += " AND file_type = %s"
-                params.append(file_type)
-                
-            query += " ORDER BY created_at DESC"
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        conditions = []
+        params: List[Any] = []
+        
+        if plant_id:
+            conditions.append("plant_id = %s")
+            params.append(plant_id)
             
-            with get_db_connection() as conn:
-                cursor = conn.cursor()
+        if device_id:
+            conditions.append("device_id = %s")
+            params.append(device_id)
+            
+        if file_type:
+            conditions.append("file_type = %s")
+            params.append(file_type)
+        
+        filter_sql = (" WHERE " + " AND ".join(conditions)) if conditions else ""
+        page_conditions = list(conditions)
+        page_params = list(params)
+        
+        if cursor:
+            created_at, last_id = _decode_keyset_cursor(cursor)
+            page_conditions.append("(created_at, id) < (%s, %s)")
+            page_params.extend([created_at, last_id])
+        
+        query = """
+            SELECT id, filename, file_path, file_type, content_hash, plant_id, device_id, 
+                   size_bytes, md5_hash, created_at, last_updated
+            FROM files
+        """
+        if page_conditions:
+            query += " WHERE " + " AND ".join(page_conditions)
+        query += " ORDER BY created_at DESC, id DESC"
+        
+        if limit is not None:
+            # Fetch one extra row to know whether another page exists
+            query += " LIMIT %s"
+            page_params.append(limit + 1)
+        
+        page = {'files': [], 'next_cursor': None}
+        
+        try:
+            with get_db_connection(replica=True) as conn:
+                db_cursor = conn.cursor()
+                db_cursor.execute(query, tuple(page_params))
+                files = [dict(row) for row in db_cursor.fetchall()]
                 
-                if params:
-                    cursor.execute(query, tuple(params))
-                else:
-                    cursor.execute(query)
+                if limit is not None and len(files) > limit:
+                    files = files[:limit]
+                    page['next_cursor'] = _encode_keyset_cursor(files[-1]['created_at'], files[-1]['id'])
+                page['files'] = files
                 
-                results = cursor.fetchall()
+                if include_total:
+                    # Planner estimate instead of COUNT(*): cheap, but approximate
+                    db_cursor.execute("EXPLAIN (FORMAT JSON) SELECT 1 FROM files" + filter_sql, tuple(params))
+                    plan = db_cursor.fetchone()['QUERY PLAN']
+                    page['total_estimate'] = int(plan[0]['Plan']['Plan Rows'])
                 
-                return [dict(row) for row in results]
+            return page
                 
         except psycopg2.Error as e:
             logger.error(f"PostgreSQL error listing files: {e}")
-            return []
+            return page
         except Exception as e:
             logger.error(f"Unexpected error listing files: {e}")
-            return []
+            return page
     
     def delete_file_from_db(self, file_path: str) -> bool:
         """
@@ -1118,6 +1594,8 @@ class DatabaseConnector:
         Returns:
             bool: True if the file was deleted, False otherwise
         """
+        from app.db_blobs import delete_orphaned_blob
+        
         try:
             with get_db_connection() as conn:
                 cursor = conn.cursor()
@@ -1125,11 +1603,16 @@ class DatabaseConnector:
                 cursor.execute(
                     """
                     DELETE FROM files WHERE file_path = %s
+                    RETURNING content_hash
                     """,
                     (file_path,)
                 )
                 
-                deleted = cursor.rowcount > 0
+                row = cursor.fetchone()
+                deleted = row is not None
+                if deleted:
+                    # Drop the content too unless another path still points at it
+                    delete_orphaned_blob(cursor, row['content_hash'])
                 conn.commit()
                 
                 if deleted:
@@ -1225,3 +1708,109 @@ class DatabaseConnector:
         except Exception as e:
             logger.error(f"Error saving fault logs: {str(e)}")
             return 0
+    
+    def search_fault_logs(self,
+                          q: Optional[str] = None,
+                          plant_id: Optional[str] = None,
+                          device_sn: Optional[str] = None,
+                          fault_type: Optional[int] = None,
+                          start: Optional[datetime] = None,
+                          end: Optional[datetime] = None,
+                          fuzzy: bool = False,
+                          limit: int = 50,
+                          cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Search stored fault logs, newest first, with keyset pagination on (happen_time, id).
+        
+        The text query matches device names and error messages by full-text
+        search or by substring (which also covers Thai text, where words are not
+        space-separated). With fuzzy=True, misspelled words are matched by
+        trigram word similarity as well.
+        
+        Args:
+            q: Text to search for (optional)
+            plant_id: Filter by plant ID (optional)
+            device_sn: Filter by device serial number (optional)
+            fault_type: Filter by fault type (1=fault, 2=alarm, etc.) (optional)
+            start: Only faults that happened at or after this time (optional)
+            end: Only faults that happened before this time (optional)
+            fuzzy: Also match words similar to the query
+            limit: Page size
+            cursor: Opaque cursor returned as next_cursor by the previous page
+            
+        Returns:
+            Dict with 'fault_logs' and 'next_cursor' (None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        conditions = []
+        params: List[Any] = []
+        
+        q = (q or '').strip()
+        if q:
+            matches = [
+                f"to_tsvector('simple', {FAULT_LOG_SEARCH_DOCUMENT}) @@ plainto_tsquery('simple', %s)",
+                f"{FAULT_LOG_SEARCH_DOCUMENT} ILIKE %s",
+            ]
+            params.extend([q, f"%{_escape_like(q)}%"])
+            if fuzzy:
+                matches.append(f"%s <%% {FAULT_LOG_SEARCH_DOCUMENT}")
+                params.append(q)
+            conditions.append("(" + " OR ".join(matches) + ")")
+        
+        if plant_id:
+            conditions.append("plant_id = %s")
+            params.append(plant_id)
+        
+        if device_sn:
+            conditions.append("device_sn = %s")
+            params.append(device_sn)
+        
+        if fault_type is not None:
+            conditions.append("fault_type = %s")
+            params.append(fault_type)
+        
+        if start:
+            conditions.append("happen_time >= %s")
+            params.append(start)
+        
+        if end:
+            conditions.append("happen_time < %s")
+            params.append(end)
+        
+        if cursor:
+            happen_time, last_id = _decode_keyset_cursor(cursor)
+            conditions.append("(happen_time, id) < (%s, %s)")
+            params.extend([happen_time, last_id])
+        
+        query = """
+            SELECT id, plant_id, device_sn, device_name, error_code, error_msg, happen_time, fault_type
+            FROM fault_logs
+        """
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        # Fetch one extra row to know whether another page exists
+        query += " ORDER BY happen_time DESC, id DESC LIMIT %s"
+        params.append(limit + 1)
+        
+        page = {'fault_logs': [], 'next_cursor': None}
+        
+        try:
+            with get_db_connection(replica=True) as conn:
+                db_cursor = conn.cursor()
+                db_cursor.execute(query, tuple(params))
+                logs = [dict(row) for row in db_cursor.fetchall()]
+            
+            if len(logs) > limit:
+                logs = logs[:limit]
+                page['next_cursor'] = _encode_keyset_cursor(logs[-1]['happen_time'], logs[-1]['id'])
+            page['fault_logs'] = logs
+            return page
+            
+        except psycopg2.Error as e:
+            logger.error(f"PostgreSQL error searching fault logs: {e}")
+            return page
+        except Exception as e:
+            logger.error(f"Unexpected error searching fault logs: {e}")
+            return page
@@ -0,0 +1,553 @@
+"""
+Columnar cold archive for closed months of readings
+
+Closed months of ``energy_stats``, ``device_data`` and ``inverter_history``
+are exported to ``Config.ARCHIVE_DIR/<table>/<YYYY-MM>/``: one ``.npy`` file
+per column plus a ``manifest.json``. Numeric columns are float32, timestamps
+datetime64, and text columns (serial numbers, plant IDs) are dictionary
+encoded as int32 codes with the categories listed in the manifest, so every
+file can be memory-mapped with ``np.load(mmap_mode='r')``.
+
+A month is archived once it has been closed for ``ARCHIVE_SETTLE_DAYS``, so
+the collector's backfill of recent days has stopped writing to it. A month
+directory is written under a temporary name and renamed into place, so a
+manifest only ever describes complete files. After a successful export
+exactly the exported row versions are deleted in small batches (unless
+``delete_hot=False``); rows inserted or updated during the export stay hot.
+Rows that reach an archived month later are merged into its archive by the
+next run (newer values win), and while archiving is enabled the retention
+engine never prunes rows of a closed month that has not been archived yet.
+
+``read_range`` is the single reader for analytics: it serves archived months
+from the memory-mapped files and everything else from Postgres (the read
+replica when available), and returns one NumPy array per column. Rows still
+in Postgres take precedence over archived rows with the same device and time.
+
+Only the columns listed in ``ARCHIVE_TABLES`` are archived; JSONB payloads
+such as ``device_data.raw_data`` are not kept.
+"""
+
+import json
+import logging
+import os
+import shutil
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+from app.config import Config
+from app.database import get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT_VERSION = 1
+
+# Column kinds: 'float32', 'datetime' (datetime64[s]), 'date' (datetime64[D]) and 'category'
+ARCHIVE_TABLES: Dict[str, Dict[str, Any]] = {
+    'energy_stats': {
+        'time_column': 'date',
+        'time_expr': 'date::date',
+        'serial_column': 'mix_sn',
+        'columns': [
+            ('plant_id', 'category', 'plant_id'),
+            ('mix_sn', 'category', 'mix_sn'),
+            ('date', 'date', 'date::date'),
+            ('daily_energy', 'float32', 'daily_energy'),
+            ('peak_power', 'float32', 'peak_power'),
+        ],
+    },
+    'device_data': {
+        'time_column': 'collected_at',
+        'time_expr': 'collected_at',
+        'serial_column': 'device_serial_number',
+        'columns': [
+            ('device_serial_number', 'category', 'device_serial_number'),
+            ('collected_at', 'datetime', 'collected_at'),
+            ('energy_today', 'float32', 'energy_today'),
+            ('energy_total', 'float32', 'energy_total'),
+            ('ac_power', 'float32', 'ac_power'),
+        ],
+    },
+    'inverter_history': {
+        'time_column': 'timestamp',
+        'time_expr': 'timestamp',
+        'serial_column': 'serial_number',
+        'columns': [
+            ('serial_number', 'category', 'serial_number'),
+            ('plant_id', 'category', 'plant_id'),
+            ('timestamp', 'datetime', 'timestamp'),
+            ('dc_voltage_1', 'float32', 'dc_voltage_1'),
+            ('dc_current_1', 'float32', 'dc_current_1'),
+            ('dc_power_1', 'float32', 'dc_power_1'),
+            ('dc_voltage_2', 'float32', 'dc_voltage_2'),
+            ('dc_current_2', 'float32', 'dc_current_2'),
+            ('dc_power_2', 'float32', 'dc_power_2'),
+            ('ac_voltage', 'float32', 'ac_voltage'),
+            ('ac_current', 'float32', 'ac_current'),
+            ('ac_frequency', 'float32', 'ac_frequency'),
+            ('ac_power', 'float32', 'ac_power'),
+            ('temperature', 'float32', 'temperature'),
+            ('energy', 'float32', 'energy'),
+        ],
+    },
+}
+
+
+def month_start(value: date) -> datetime:
+    """Get the first instant of the month containing a date"""
+    return datetime(value.year, value.month, 1)
+
+
+def next_month(start: datetime) -> datetime:
+    """Get the first instant of the month after a month start"""
+    return datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+
+
+def archive_cutoff() -> datetime:
+    """
+    Get the start of the oldest month that is not settled yet
+
+    Months starting before the cutoff ended at least ARCHIVE_SETTLE_DAYS ago and can be archived.
+    """
+    return month_start(datetime.now() - timedelta(days=Config.ARCHIVE_SETTLE_DAYS))
+
+
+def parse_month(month: str) -> datetime:
+    """
+    Parse a 'YYYY-MM' month
+
+    Raises:
+        ValueError: If the month is malformed
+    """
+    return datetime.strptime(month, '%Y-%m')
+
+
+def _month_dir(table: str, start: datetime) -> str:
+    """Directory holding one archived month of a table"""
+    return os.path.join(Config.ARCHIVE_DIR, table, f"{start:%Y-%m}")
+
+
+def _spec(table: str) -> Dict[str, Any]:
+    """Get a table's archive spec"""
+    if table not in ARCHIVE_TABLES:
+        raise ValueError(f"Table is not archivable: {table}")
+    return ARCHIVE_TABLES[table]
+
+
+def load_manifest(table: str, start: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Load the manifest of an archived month
+
+    Args:
+        table: Archived table
+        start: First instant of the month
+
+    Returns:
+        Dict or None if the month is not archived
+    """
+    path = os.path.join(_month_dir(table, start), 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def archived_months(table: str) -> List[datetime]:
+    """
+    List the archived months of a table, oldest first
+
+    Args:
+        table: Archived table
+
+    Returns:
+        List of month starts
+    """
+    root = os.path.join(Config.ARCHIVE_DIR, table)
+    if not os.path.isdir(root):
+        return []
+    months = []
+    for name in sorted(os.listdir(root)):
+        try:
+            start = parse_month(name)
+        except ValueError:
+            continue
+        if os.path.exists(os.path.join(root, name, 'manifest.json')):
+            months.append(start)
+    return months
+
+
+def _to_columns(table: str, rows: List[Tuple]) -> Dict[str, np.ndarray]:
+    """Convert tuple rows (in spec order) into one typed array per column; text stays as objects"""
+    columns = {}
+    for index, (name, kind, _) in enumerate(_spec(table)['columns']):
+        values = [row[index] for row in rows]
+        if kind == 'float32':
+            columns[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float32)
+        elif kind == 'datetime':
+            columns[name] = np.array(values, dtype='datetime64[s]')
+        elif kind == 'date':
+            columns[name] = np.array(values, dtype='datetime64[D]')
+        else:
+            columns[name] = np.array(values, dtype=object)
+    return columns
+
+
+def _encode_category(values: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+    """Dictionary-encode a text column as int32 codes (-1 for NULL)"""
+    categories = sorted({v for v in values if v is not None})
+    lookup = {value: code for code, value in enumerate(categories)}
+    codes = np.fromiter((lookup.get(v, -1) for v in values), dtype=np.int32, count=len(values))
+    return codes, categories
+
+
+def _decode_category(codes: np.ndarray, categories: List[str]) -> np.ndarray:
+    """Decode int32 codes back into an object array of strings (None for -1)"""
+    table = np.array(list(categories) + [None], dtype=object)
+    return table[codes]
+
+
+def _select_sql(table: str, condition: str, row_versions: bool = False) -> str:
+    """Build the SELECT of a table's archived columns, optionally followed by each row's ctid and xmin"""
+    spec = _spec(table)
+    select_list = ", ".join(f"{expr} AS {name}" for name, _, expr in spec['columns'])
+    if row_versions:
+        select_list += ", ctid::text AS row_ctid, xmin::text AS row_xmin"
+    return f"SELECT {select_list} FROM {table} WHERE {condition} ORDER BY {spec['time_expr']}"
+
+
+def _row_keys(table: str, columns: Dict[str, np.ndarray]) -> List[Tuple[Any, Any]]:
+    """(serial, time) of every row; a device has at most one reading per time"""
+    spec = _spec(table)
+    return list(zip(columns[spec['serial_column']].tolist(), columns[spec['time_column']].tolist()))
+
+
+def _drop_superseded(table: str, archived: Dict[str, np.ndarray], hot: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Drop archived rows that have a newer copy among the hot rows"""
+    hot_keys = set(_row_keys(table, hot))
+    if not hot_keys:
+        return archived
+    keep = np.fromiter((key not in hot_keys for key in _row_keys(table, archived)), dtype=bool,
+                       count=len(archived[_spec(table)['time_column']]))
+    return {name: values[keep] for name, values in archived.items()}
+
+
+def export_month(table: str, start: datetime, delete_hot: bool = True, overwrite: bool = False,
+                 merge: bool = False) -> Dict[str, Any]:
+    """
+    Export one settled month of a table to columnar files
+
+    Args:
+        table: Table to archive
+        start: First instant of the month
+        delete_hot: Delete the exported rows from Postgres afterwards
+        overwrite: Replace an existing archive of the month with the hot rows
+        merge: Merge the hot rows into an existing archive of the month (hot rows win)
+
+    Returns:
+        Dict with the month, row_count and rows_deleted
+
+    Raises:
+        ValueError: If the month is not settled yet or is already archived
+    """
+    from app.database import DatabaseConnector
+
+    spec = _spec(table)
+    end = next_month(start)
+    if start >= archive_cutoff():
+        raise ValueError(f"{start:%Y-%m} is not settled yet: months are archived "
+                         f"{Config.ARCHIVE_SETTLE_DAYS} days after they end")
+    existing = load_manifest(table, start)
+    if existing and not (overwrite or merge):
+        raise ValueError(f"{table} {start:%Y-%m} is already archived")
+
+    condition = f"{spec['time_expr']} >= %s AND {spec['time_expr']} < %s"
+    rows = []
+    for batch in DatabaseConnector().stream_batches(_select_sql(table, condition, row_versions=True), (start, end),
+                                                     row_format='tuple', use_replica=False):
+        rows.extend(batch)
+    # Exact row versions exported, so rows written meanwhile are not deleted with them
+    versions = [(row[-2], row[-1]) for row in rows]
+    columns = _to_columns(table, rows)
+
+    if existing and merge:
+        # Copy out of the memory maps before the directory is replaced
+        archived = {name: np.array(values) for name, values in _read_month(table, start, existing, None).items()}
+        archived = _drop_superseded(table, archived, columns)
+        columns = {name: np.concatenate([archived[name], columns[name]]) for name in columns}
+        order = np.argsort(columns[spec['time_column']], kind='stable')
+        columns = {name: values[order] for name, values in columns.items()}
+    row_count = len(columns[spec['time_column']])
+
+    final_dir = _month_dir(table, start)
+    tmp_dir = f"{final_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    manifest = {
+        'format_version': ARCHIVE_FORMAT_VERSION,
+        'table': table,
+        'month': f"{start:%Y-%m}",
+        'row_count': row_count,
+        'time_column': spec['time_column'],
+        'exported_at': datetime.now().isoformat(timespec='seconds'),
+        'hot_rows_kept': not delete_hot,
+        'columns': {},
+    }
+    for name, kind, _ in spec['columns']:
+        values = columns[name]
+        entry = {'kind': kind, 'file': f"{name}.npy"}
+        if kind == 'category':
+            values, entry['categories'] = _encode_category(values)
+        np.save(os.path.join(tmp_dir, entry['file']), values, allow_pickle=False)
+        entry['dtype'] = str(values.dtype)
+        manifest['columns'][name] = entry
+
+    with open(os.path.join(tmp_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(final_dir):
+        shutil.rmtree(final_dir)
+    os.replace(tmp_dir, final_dir)
+    logger.info(f"Archived {len(rows)} hot rows of {table} for {start:%Y-%m} to {final_dir} "
+                f"({row_count} rows in the archive)")
+
+    deleted = _delete_exported_rows(table, versions) if delete_hot else 0
+    return {'month': f"{start:%Y-%m}", 'row_count': row_count, 'rows_deleted': deleted}
+
+
+def _delete_exported_rows(table: str, versions: List[Tuple[str, str]]) -> int:
+    """Delete exported row versions, identified by (ctid, xmin), in short batches"""
+    deleted = 0
+    batch_size = Config.RETENTION_BATCH_SIZE
+    for offset in range(0, len(versions), batch_size):
+        batch = versions[offset:offset + batch_size]
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT set_config('lock_timeout', %s, true)", (f"{Config.RETENTION_LOCK_TIMEOUT_MS}ms",))
+            # A row updated since the export has a new version (ctid/xmin) and is left alone
+            cursor.execute(f"""
+                DELETE FROM {table} t
+                USING unnest(%s::tid[], %s::xid[]) AS e(row_ctid, row_xmin)
+                WHERE t.ctid = e.row_ctid AND t.xmin = e.row_xmin
+            """, ([ctid for ctid, _ in batch], [xmin for _, xmin in batch]))
+            deleted += cursor.rowcount
+            conn.commit()
+    return deleted
+
+
+def pending_months(table: str, settled_only: bool = True) -> List[datetime]:
+    """
+    List closed months whose hot rows still have to be archived, oldest first
+
+    These are months with hot rows and no archive, plus archived months that
+    received rows after their export (unless the export kept its hot rows).
+
+    Args:
+        table: Archived table
+        settled_only: Only months that ended at least ARCHIVE_SETTLE_DAYS ago
+
+    Returns:
+        List of month starts
+    """
+    spec = _spec(table)
+    cutoff = archive_cutoff() if settled_only else month_start(datetime.now())
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL AS present", (table,))
+        if not cursor.fetchone()['present']:
+            return []
+        cursor.execute(f"""
+            SELECT DISTINCT date_trunc('month', {spec['time_expr']})::timestamp AS month
+            FROM {table}
+            WHERE {spec['time_expr']} < %s
+            ORDER BY month
+        """, (cutoff,))
+        months = [row['month'] for row in cursor.fetchall()]
+
+    pending = []
+    for month in months:
+        manifest = load_manifest(table, month)
+        if manifest is None or not manifest.get('hot_rows_kept', False):
+            pending.append(month)
+    return pending
+
+
+def archive_closed_months(tables: Optional[Iterable[str]] = None,
+                          delete_hot: Optional[bool] = None) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Archive every settled month that is not archived yet, and merge late rows into archived ones
+
+    Args:
+        tables: Tables to archive (default: all archivable tables)
+        delete_hot: Delete exported rows from Postgres (default: Config.ARCHIVE_DELETE_HOT)
+
+    Returns:
+        Dict[str, List[Dict[str, Any]]]: Exported months per table
+    """
+    delete_hot = Config.ARCHIVE_DELETE_HOT if delete_hot is None else delete_hot
+    report = {}
+    for table in tables or ARCHIVE_TABLES:
+        report[table] = []
+        try:
+            for start in pending_months(table):
+                # Months archived before now hold late rows, which are merged in
+                report[table].append(export_month(table, start, delete_hot=delete_hot, merge=True))
+        except (psycopg2.Error, OSError) as e:
+            logger.error(f"Error archiving {table}: {e}")
+            report[table].append({'error': str(e).strip()})
+    return report
+
+
+def import_month(table: str, start: datetime) -> int:
+    """
+    Load an archived month back into Postgres
+
+    Rows already in the database (written after the month was archived) are
+    newer and are kept; only archived rows of other devices or times are inserted.
+
+    Args:
+        table: Archived table
+        start: First instant of the month
+
+    Returns:
+        int: Number of rows inserted
+
+    Raises:
+        ValueError: If the month is not archived
+    """
+    spec = _spec(table)
+    manifest = load_manifest(table, start)
+    if manifest is None:
+        raise ValueError(f"{table} {start:%Y-%m} is not archived")
+
+    columns = _read_month(table, start, manifest, None)
+    serial_column, time_column = spec['serial_column'], spec['time_column']
+    time_expr = spec['time_expr']
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {serial_column} AS serial, {time_expr} AS time FROM {table} WHERE {time_expr} >= %s AND {time_expr} < %s",
+            (start, next_month(start))
+        )
+        hot = _to_columns(table, [])
+        rows = cursor.fetchall()
+        hot[serial_column] = np.array([row['serial'] for row in rows], dtype=object)
+        hot[time_column] = np.array([row['time'] for row in rows], dtype=hot[time_column].dtype)
+    columns = _drop_superseded(table, {name: np.asarray(values) for name, values in columns.items()}, hot)
+
+    names = [name for name, _, _ in spec['columns']]
+    pythonized = []
+    for name, kind, _ in spec['columns']:
+        values = columns[name]
+        if kind == 'float32':
+            pythonized.append([None if np.isnan(v) else v for v in values.tolist()])
+        elif kind == 'date':
+            pythonized.append([v.isoformat() if v else None for v in values.tolist()])
+        else:
+            pythonized.append(values.tolist())
+    rows = list(zip(*pythonized))
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if rows:
+            execute_values(cursor, f"INSERT INTO {table} ({', '.join(names)}) VALUES %s", rows, page_size=1000)
+            conn.commit()
+
+    logger.info(f"Imported {len(rows)} rows of {table} for {start:%Y-%m}")
+
+    from app.db_maintenance import analyze_tables
+    analyze_tables([table])
+    return len(rows)
+
+
+def _read_month(table: str, start: datetime, manifest: Dict[str, Any],
+                names: Optional[List[str]]) -> Dict[str, np.ndarray]:
+    """Open an archived month's columns as memory maps (text columns are decoded)"""
+    month_dir = _month_dir(table, start)
+    columns = {}
+    for name, entry in manifest['columns'].items():
+        if names is not None and name not in names:
+            continue
+        values = np.load(os.path.join(month_dir, entry['file']), mmap_mode='r')
+        if entry['kind'] == 'category':
+            values = _decode_category(values, entry['categories'])
+        columns[name] = values
+    return columns
+
+
+def read_range(table: str,
+               start: datetime,
+               end: datetime,
+               columns: Optional[List[str]] = None,
+               serial_numbers: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Read readings from the archive and Postgres as one set of column arrays
+
+    Args:
+        table: Archivable table
+        start: Start of the range (inclusive)
+        end: End of the range (exclusive)
+        columns: Columns to return (default: all archived columns)
+        serial_numbers: Only rows of these devices (optional)
+
+    Returns:
+        Dict mapping column name to a NumPy array, ordered by time; text columns
+        are object arrays, numeric columns float32 with NaN for NULL. A row in
+        Postgres replaces an archived row of the same device and time.
+
+    Raises:
+        ValueError: If the table or a column is not archivable
+    """
+    from app.database import DatabaseConnector
+
+    spec = _spec(table)
+    known = [name for name, _, _ in spec['columns']]
+    names = list(columns) if columns else known
+    unknown = set(names) - set(known)
+    if unknown:
+        raise ValueError(f"Columns not archived for {table}: {', '.join(sorted(unknown))}")
+
+    time_column = spec['time_column']
+    serial_column = spec['serial_column']
+    # The key columns are always read to let hot rows replace archived ones
+    needed = list(dict.fromkeys(names + [time_column, serial_column]))
+    wanted = set(serial_numbers) if serial_numbers else None
+    parts = []
+
+    archived = [m for m in archived_months(table) if m < end and next_month(m) > start]
+    for month in archived:
+        manifest = load_manifest(table, month)
+        data = _read_month(table, month, manifest, needed)
+        times = data[time_column]
+        mask = (times >= np.datetime64(start)) & (times < np.datetime64(end))
+        if wanted is not None:
+            mask &= np.isin(data[serial_column], list(wanted))
+        parts.append({name: np.asarray(data[name][mask]) for name in needed})
+
+    # Archived months normally have no hot rows left, so the range scan only returns
+    # unarchived months plus rows that reached an archived month after its export
+    condition = f"{spec['time_expr']} >= %s AND {spec['time_expr']} < %s"
+    params: List[Any] = [start, end]
+    if wanted is not None:
+        condition += f" AND {serial_column} = ANY(%s)"
+        params.append(list(wanted))
+    rows = []
+    for batch in DatabaseConnector().stream_batches(_select_sql(table, condition), tuple(params),
+                                                     row_format='tuple', use_replica=True):
+        rows.extend(batch)
+    hot = _to_columns(table, rows)
+    hot = {name: hot[name] for name in needed}
+
+    if parts:
+        archived_part = {name: np.concatenate([part[name] for part in parts]) for name in needed}
+        parts = [_drop_superseded(table, archived_part, hot), hot]
+    else:
+        parts = [hot]
+
+    merged = {name: np.concatenate([part[name] for part in parts]) for name in needed}
+    order = np.argsort(merged[time_column], kind='stable')
+    return {name: merged[name][order] for name in names}
@@ -0,0 +1,511 @@
+"""
+Streaming logical backups of the PostgreSQL database
+
+Every table of the ``public`` schema is streamed with ``COPY ... TO STDOUT``
+straight into a gzip-compressed CSV file under
+``Config.BACKUP_DIR/<backup id>/``, so nothing is buffered in memory and the
+app host only pays for compression. All tables are copied inside one
+``REPEATABLE READ`` read-only transaction (on the read replica when one is
+available), which gives a consistent snapshot without blocking writers.
+
+Append-only tables (``APPEND_ONLY_TABLES``) support incremental backups: an
+incremental backup only copies the rows whose watermark column is above the
+value recorded by its base backup, and every other table is copied in full.
+Restoring an incremental backup replays its chain (the full backup, then each
+incremental in order). Rows deleted from an append-only table after the base
+backup (e.g. by retention) are not tracked, so a restore may bring them back.
+
+Watermark IDs are handed out when a row is inserted, not when its transaction
+commits, so a snapshot can contain ID 101 while ID 100 is still uncommitted.
+Incremental backups therefore re-copy the last ``BACKUP_WATERMARK_OVERLAP``
+IDs below the base watermark, and restore skips the rows of later files whose
+ID is already loaded. A row whose transaction stays open while more than that
+many newer IDs are committed can still be missed.
+
+Each backup directory holds a ``manifest.json`` describing the tables, column
+lists, row counts and watermarks; it is written last, so a directory without
+one is an incomplete backup and is ignored.
+
+``start_backup_job`` runs a backup in a background thread and
+``get_backup_job`` reports its progress.
+"""
+
+import gzip
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import psycopg2
+
+from app.config import Config
+from app.database import get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+BACKUP_FORMAT_VERSION = 1
+
+# Tables that are only ever inserted into, with their monotonically increasing integer watermark column.
+# inverter_history is not one of them: the collector upserts the current day's rows in place.
+APPEND_ONLY_TABLES: Dict[str, str] = {
+    'device_data': 'id',
+    'notification_history': 'id',
+    'raw_data_history': 'id',
+}
+
+# Background backup jobs of this process, by job ID
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = threading.Lock()
+
+
+class _CountingWriter:
+    """File wrapper that reports the number of bytes COPY has streamed into it"""
+
+    def __init__(self, fileobj, on_write=None):
+        self.fileobj = fileobj
+        self.on_write = on_write
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        if self.on_write:
+            self.on_write(self.bytes_written)
+        return self.fileobj.write(data)
+
+
+def _quote(identifier: str) -> str:
+    """Quote a table or column name for use in a COPY statement"""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _column_list(columns: Iterable[str]) -> str:
+    return ', '.join(_quote(column) for column in columns)
+
+
+def _backup_path(backup_id: str) -> str:
+    return os.path.join(Config.BACKUP_DIR, backup_id)
+
+
+def load_manifest(backup_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Load the manifest of a completed backup
+
+    Args:
+        backup_id: Backup ID (its directory name)
+
+    Returns:
+        Dict or None if the backup does not exist or is incomplete
+    """
+    try:
+        with open(os.path.join(_backup_path(backup_id), 'manifest.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def list_backups() -> List[Dict[str, Any]]:
+    """
+    List completed backups, oldest first
+
+    Returns:
+        List of manifests
+    """
+    if not os.path.isdir(Config.BACKUP_DIR):
+        return []
+    manifests = [load_manifest(name) for name in os.listdir(Config.BACKUP_DIR)]
+    return sorted((m for m in manifests if m), key=lambda m: m['created_at'])
+
+
+def latest_backup() -> Optional[Dict[str, Any]]:
+    """Get the manifest of the most recent completed backup, if any"""
+    backups = list_backups()
+    return backups[-1] if backups else None
+
+
+def backup_chain(backup_id: str) -> List[Dict[str, Any]]:
+    """
+    Resolve the manifests needed to restore a backup
+
+    Args:
+        backup_id: Backup ID
+
+    Returns:
+        List of manifests from the full backup to the requested one
+
+    Raises:
+        ValueError: If the backup or one of its bases is missing
+    """
+    chain = []
+    current = backup_id
+    while current:
+        manifest = load_manifest(current)
+        if manifest is None:
+            raise ValueError(f"Backup {current} not found or incomplete")
+        chain.append(manifest)
+        current = manifest.get('base')
+    return list(reversed(chain))
+
+
+def _list_tables(cursor) -> List[str]:
+    cursor.execute("""
+        SELECT table_name FROM information_schema.tables
+        WHERE table_schema = 'public' AND table_type = 'BASE TABLE'
+        ORDER BY table_name
+    """)
+    return [row['table_name'] for row in cursor.fetchall()]
+
+
+def _table_columns(cursor, table: str) -> List[str]:
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s
+        ORDER BY ordinal_position
+    """, (table,))
+    return [row['column_name'] for row in cursor.fetchall()]
+
+
+def _estimated_rows(cursor, tables: List[str]) -> Dict[str, int]:
+    cursor.execute("""
+        SELECT relname, GREATEST(reltuples, 0)::bigint AS estimate
+        FROM pg_class
+        WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace AND relname = ANY(%s)
+    """, (tables,))
+    return {row['relname']: row['estimate'] for row in cursor.fetchall()}
+
+
+def _update_progress(progress: Optional[Dict[str, Any]], **values) -> None:
+    if progress is not None:
+        with _jobs_lock:
+            progress.update(values)
+
+
+def create_backup(incremental: bool = False,
+                  tables: Optional[Iterable[str]] = None,
+                  progress: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Create a logical backup
+
+    Args:
+        incremental: Only copy new rows of append-only tables since the latest backup
+                     (falls back to a full backup when there is none)
+        tables: Tables to back up (default: every table of the public schema);
+                incremental backups always cover every table
+        progress: Optional dict updated in place with the current table, bytes and rows
+
+    Returns:
+        Dict[str, Any]: The backup manifest
+
+    Raises:
+        psycopg2.Error, OSError: If the backup fails (the partial directory is removed)
+    """
+    base = None
+    if incremental:
+        # Partial (table subset) backups cannot serve as a base
+        base = next((m for m in reversed(list_backups()) if not m.get('partial')), None)
+    if incremental and base is None:
+        logger.info("No previous backup found, creating a full backup instead")
+    if base is not None:
+        tables = None
+
+    created_at = datetime.now()
+    backup_id = created_at.strftime('%Y%m%d_%H%M%S_') + uuid.uuid4().hex[:6]
+    target = _backup_path(backup_id)
+    os.makedirs(target)
+
+    manifest: Dict[str, Any] = {
+        'version': BACKUP_FORMAT_VERSION,
+        'id': backup_id,
+        'kind': 'incremental' if base else 'full',
+        'base': base['id'] if base else None,
+        'partial': tables is not None,
+        'created_at': created_at.isoformat(),
+        'tables': {},
+    }
+
+    try:
+        with get_db_connection(replica=True) as conn:
+            cursor = conn.cursor()
+            # One snapshot for every table; must be the first statement of the transaction
+            cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+
+            wanted = None if tables is None else set(tables)
+            selected = [t for t in _list_tables(cursor) if wanted is None or t in wanted]
+            estimates = _estimated_rows(cursor, selected)
+            _update_progress(progress, backup_id=backup_id, tables_total=len(selected),
+                             tables_done=0, rows_estimated=sum(estimates.values()),
+                             rows_written=0, bytes_written=0)
+            rows_written = bytes_written = 0
+
+            for index, table in enumerate(selected):
+                columns = _table_columns(cursor, table)
+                watermark_column = APPEND_ONLY_TABLES.get(table)
+                if watermark_column not in columns:
+                    watermark_column = None
+
+                query = f"SELECT {_column_list(columns)} FROM {_quote(table)}"
+                entry: Dict[str, Any] = {'file': f'{table}.csv.gz', 'columns': columns, 'mode': 'full'}
+
+                if watermark_column:
+                    column = _quote(watermark_column)
+                    cursor.execute(f"SELECT MAX({column}) AS watermark FROM {_quote(table)}")
+                    watermark_to = cursor.fetchone()['watermark']
+                    watermark_from = (base or {}).get('tables', {}).get(table, {}).get('watermark_to')
+                    # Integer watermarks are inlined: COPY does not take parameters
+                    conditions = [f"{column} <= {int(watermark_to or 0)}"]
+                    if watermark_from is not None:
+                        entry['mode'] = 'incremental'
+                        # Overlap the base so rows committed after its snapshot are not lost
+                        copy_from = max(int(watermark_from) - Config.BACKUP_WATERMARK_OVERLAP, 0)
+                        conditions.append(f"{column} > {copy_from}")
+                        entry['copy_from'] = copy_from
+                    query += f" WHERE {' AND '.join(conditions)} ORDER BY {column}"
+                    entry.update(watermark_column=watermark_column,
+                                 watermark_from=watermark_from, watermark_to=watermark_to)
+
+                _update_progress(progress, current_table=table, tables_done=index)
+                bytes_before = bytes_written
+                started = datetime.now()
+
+                with gzip.open(os.path.join(target, entry['file']), 'wb',
+                               compresslevel=Config.BACKUP_COMPRESSION_LEVEL) as f:
+                    writer = _CountingWriter(
+                        f, lambda n: _update_progress(progress, bytes_written=bytes_before + n))
+                    cursor.copy_expert(
+                        f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)",
+                        writer
+                    )
+
+                entry['rows'] = max(cursor.rowcount, 0)
+                entry['bytes'] = os.path.getsize(os.path.join(target, entry['file']))
+                entry['seconds'] = round((datetime.now() - started).total_seconds(), 3)
+                manifest['tables'][table] = entry
+                rows_written += entry['rows']
+                bytes_written += writer.bytes_written
+                _update_progress(progress, rows_written=rows_written, bytes_written=bytes_written)
+
+    except Exception:
+        shutil.rmtree(target, ignore_errors=True)
+        raise
+
+    manifest['completed_at'] = datetime.now().isoformat()
+    manifest['bytes'] = sum(entry['bytes'] for entry in manifest['tables'].values())
+    tmp_path = os.path.join(target, 'manifest.json.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(tmp_path, os.path.join(target, 'manifest.json'))
+
+    _update_progress(progress, tables_done=len(manifest['tables']), current_table=None)
+    logger.info(f"{manifest['kind'].capitalize()} backup {backup_id} written: "
+                f"{len(manifest['tables'])} tables, {manifest['bytes']} bytes")
+    return manifest
+
+
+def run_scheduled_backup() -> Optional[Dict[str, Any]]:
+    """
+    Scheduled backup: incremental, with a new full backup every BACKUP_FULL_EVERY runs
+
+    Returns:
+        Dict[str, Any]: The backup manifest, or None if the backup failed
+    """
+    latest = latest_backup()
+    incremental = False
+    if latest is not None:
+        try:
+            incremental = len(backup_chain(latest['id'])) <= Config.BACKUP_FULL_EVERY
+        except ValueError:
+            incremental = False
+
+    try:
+        return create_backup(incremental=incremental)
+    except (psycopg2.Error, OSError) as e:
+        logger.error(f"Scheduled database backup failed: {e}")
+        return None
+
+
+def _run_job(job: Dict[str, Any], incremental: bool, tables: Optional[List[str]]) -> None:
+    try:
+        manifest = create_backup(incremental=incremental, tables=tables, progress=job)
+        _update_progress(job, status='completed', kind=manifest['kind'], bytes=manifest['bytes'],
+                         finished_at=datetime.now().isoformat())
+    except Exception as e:
+        logger.error(f"Database backup job {job['job_id']} failed: {e}")
+        _update_progress(job, status='failed', error=str(e), finished_at=datetime.now().isoformat())
+
+
+def start_backup_job(incremental: bool = False, tables: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Start a backup in a background thread
+
+    Only one backup job runs at a time per process; while one is running its
+    state is returned instead of starting another.
+
+    Args:
+        incremental: Create an incremental backup
+        tables: Tables to back up (full backups only)
+
+    Returns:
+        Dict[str, Any]: Snapshot of the job state (see get_backup_job)
+    """
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job['status'] == 'running':
+                return dict(job)
+
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'status': 'running',
+            'incremental': incremental,
+            'started_at': datetime.now().isoformat(),
+        }
+        _jobs[job['job_id']] = job
+
+    threading.Thread(target=_run_job, args=(job, incremental, tables),
+                     name=f"db-backup-{job['job_id'][:8]}", daemon=True).start()
+    return get_backup_job(job['job_id'])
+
+
+def get_backup_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the state of a backup job
+
+    Args:
+        job_id: Job ID returned by start_backup_job
+
+    Returns:
+        Dict with status ('running', 'completed' or 'failed'), backup_id,
+        current_table, tables_done/tables_total, rows_written/rows_estimated,
+        bytes_written and percent, or None if the job is unknown
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        if job is None:
+            return None
+        state = dict(job)
+
+    if state['status'] == 'completed':
+        state['percent'] = 100.0
+    elif state.get('rows_estimated'):
+        state['percent'] = round(min(99.0, 100.0 * state.get('rows_written', 0) / state['rows_estimated']), 1)
+    else:
+        state['percent'] = 0.0
+    return state
+
+
+def _restore_order(cursor, tables: List[str]) -> List[str]:
+    """Sort tables so that tables referenced by foreign keys are loaded first"""
+    cursor.execute("""
+        SELECT child.relname AS child, parent.relname AS parent
+        FROM pg_constraint c
+        JOIN pg_class child ON child.oid = c.conrelid
+        JOIN pg_class parent ON parent.oid = c.confrelid
+        WHERE c.contype = 'f' AND child.relname = ANY(%s) AND parent.relname = ANY(%s)
+          AND child.oid <> parent.oid
+    """, (tables, tables))
+    parents: Dict[str, set] = {table: set() for table in tables}
+    for row in cursor.fetchall():
+        parents[row['child']].add(row['parent'])
+
+    ordered: List[str] = []
+    while parents:
+        ready = sorted(t for t, deps in parents.items() if not deps - set(ordered))
+        if not ready:
+            # Circular references: load the rest in name order
+            ready = sorted(parents)
+        for table in ready:
+            ordered.append(table)
+            del parents[table]
+    return ordered
+
+
+def restore_backup(backup_id: str,
+                   tables: Optional[Iterable[str]] = None,
+                   truncate: bool = True) -> Dict[str, int]:
+    """
+    Restore a backup (and the chain it is based on) into the database
+
+    Runs in a single transaction on the primary: either every table is
+    restored or nothing changes. Serial sequences are moved past the
+    restored IDs.
+
+    Args:
+        backup_id: Backup ID to restore
+        tables: Tables to restore (default: every table in the backup)
+        truncate: Empty the tables before loading them
+
+    Returns:
+        Dict[str, int]: Rows loaded per table
+
+    Raises:
+        ValueError: If the backup chain is incomplete or a table is not in the backup
+        psycopg2.Error: If the restore fails (the transaction is rolled back)
+    """
+    chain = backup_chain(backup_id)
+    available = chain[-1]['tables']
+    selected = list(available) if tables is None else list(tables)
+    unknown = [t for t in selected if t not in available]
+    if unknown:
+        raise ValueError(f"Tables not in backup {backup_id}: {', '.join(unknown)}")
+
+    loaded: Dict[str, int] = {}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        ordered = _restore_order(cursor, selected)
+
+        if truncate:
+            cursor.execute(f"TRUNCATE {_column_list(ordered)}")
+
+        for table in ordered:
+            # Append-only tables replay every file of the chain; other tables only need the newest
+            if available[table].get('mode') == 'incremental':
+                sources = [m for m in chain if table in m['tables']]
+            else:
+                sources = [chain[-1]]
+
+            loaded[table] = 0
+            for index, manifest in enumerate(sources):
+                entry = manifest['tables'][table]
+                path = os.path.join(_backup_path(manifest['id']), entry['file'])
+                columns = _column_list(entry['columns'])
+                if index == 0 or not entry.get('watermark_column'):
+                    with gzip.open(path, 'rb') as f:
+                        cursor.copy_expert(f"COPY {_quote(table)} ({columns}) FROM STDIN WITH (FORMAT csv, HEADER)", f)
+                else:
+                    # Later files overlap the previous ones (see BACKUP_WATERMARK_OVERLAP): stage and skip loaded IDs
+                    watermark = _quote(entry['watermark_column'])
+                    cursor.execute("DROP TABLE IF EXISTS restore_staging")
+                    cursor.execute(f"CREATE TEMP TABLE restore_staging (LIKE {_quote(table)}) ON COMMIT DROP")
+                    with gzip.open(path, 'rb') as f:
+                        cursor.copy_expert(f"COPY restore_staging ({columns}) FROM STDIN WITH (FORMAT csv, HEADER)", f)
+                    cursor.execute(
+                        f"INSERT INTO {_quote(table)} ({columns}) SELECT {columns} FROM restore_staging s "
+                        f"WHERE NOT EXISTS (SELECT 1 FROM {_quote(table)} t WHERE t.{watermark} = s.{watermark})"
+                    )
+                loaded[table] += max(cursor.rowcount, 0)
+
+            # Move serial sequences past the restored rows
+            cursor.execute("""
+                SELECT a.attname AS column_name, pg_get_serial_sequence(%s, a.attname) AS sequence
+                FROM pg_attribute a
+                WHERE a.attrelid = %s::regclass AND a.attnum > 0 AND NOT a.attisdropped
+            """, (_quote(table), _quote(table)))
+            for row in cursor.fetchall():
+                if row['sequence']:
+                    cursor.execute(
+                        f"SELECT setval(%s, COALESCE((SELECT MAX({_quote(row['column_name'])}) "
+                        f"FROM {_quote(table)}), 0) + 1, false)",
+                        (row['sequence'],)
+                    )
+
+            logger.info(f"Restored {loaded[table]} rows into {table}")
+
+        conn.commit()
+
+    # Reloaded tables have no planner statistics until autovacuum catches up
+    from app.db_maintenance import analyze_tables
+    analyze_tables(loaded)
+    return loaded
@@ -0,0 +1,330 @@
+"""
+Content-addressed, chunked file storage
+
+File contents are stored once per distinct SHA-256 hash in ``file_blobs`` and
+split into fixed-size rows in ``file_chunks``. Rows in ``files`` are metadata
+(path, type, owner, ...) that point at a blob through ``content_hash``, so the
+same report PNG or PDF saved under many paths is stored only once.
+
+Writes hash the source in one pass and upload it chunk by chunk in a second
+pass, skipping the upload entirely when the hash is already stored. Reads yield
+one chunk at a time, so neither side holds a whole file in memory.
+
+Rows written before this storage existed keep their bytes in ``files.content``
+(``content_hash`` is NULL); readers fall back to that column and
+``migrate_legacy_file_contents`` moves them over.
+"""
+
+import hashlib
+import io
+import logging
+import tempfile
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple, Union
+
+import psycopg2
+import psycopg2.errors
+
+from app.config import Config
+from app.database import get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Sources larger than this are spooled to disk when they cannot be re-read
+_SPOOL_MAX_MEMORY = 8 * 1024 * 1024
+
+
+def ensure_blob_tables() -> bool:
+    """
+    Create the blob tables and link the files table to them
+
+    Returns:
+        bool: True if successful, False if an error occurred
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS file_blobs (
+                    content_hash TEXT PRIMARY KEY,
+                    size_bytes BIGINT NOT NULL,
+                    chunk_size INTEGER NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    md5_hash TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS file_chunks (
+                    content_hash TEXT NOT NULL REFERENCES file_blobs (content_hash) ON DELETE CASCADE,
+                    chunk_index INTEGER NOT NULL,
+                    data BYTEA NOT NULL,
+                    PRIMARY KEY (content_hash, chunk_index)
+                )
+            """)
+
+            # files rows become metadata pointing at a blob; content is only kept for legacy rows
+            cursor.execute("ALTER TABLE files ADD COLUMN IF NOT EXISTS content_hash TEXT")
+            cursor.execute("ALTER TABLE files ALTER COLUMN content DROP NOT NULL")
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_files_content_hash ON files(content_hash)')
+
+            # A files row can never point at a deleted blob
+            cursor.execute("SELECT 1 FROM pg_constraint WHERE conname = 'fk_files_content_hash'")
+            if cursor.fetchone() is None:
+                cursor.execute("""
+                    ALTER TABLE files ADD CONSTRAINT fk_files_content_hash
+                    FOREIGN KEY (content_hash) REFERENCES file_blobs (content_hash) NOT VALID
+                """)
+                cursor.execute("SAVEPOINT validate_files_fk")
+                try:
+                    cursor.execute("ALTER TABLE files VALIDATE CONSTRAINT fk_files_content_hash")
+                    cursor.execute("RELEASE SAVEPOINT validate_files_fk")
+                except psycopg2.Error as e:
+                    # Still enforced for new rows; existing dangling references are left for inspection
+                    cursor.execute("ROLLBACK TO SAVEPOINT validate_files_fk")
+                    logger.warning(f"files rows reference missing blobs, foreign key left unvalidated: {e}")
+
+            conn.commit()
+            logger.info("File blob tables verified/created successfully")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error creating file blob tables: {e}")
+        return False
+
+
+def _as_rereadable(source: Union[bytes, BinaryIO]) -> BinaryIO:
+    """Return a seekable binary stream for the source, spooling one-shot streams to disk."""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return io.BytesIO(source)
+
+    try:
+        if source.seekable():
+            return source
+    except AttributeError:
+        pass
+
+    spooled = tempfile.SpooledTemporaryFile(max_size=_SPOOL_MAX_MEMORY)
+    for chunk in iter(lambda: source.read(Config.FILE_CHUNK_SIZE), b''):
+        spooled.write(chunk)
+    spooled.seek(0)
+    return spooled
+
+
+def hash_stream(stream: BinaryIO, chunk_size: Optional[int] = None) -> Tuple[str, str, int]:
+    """
+    Hash a stream without reading it into memory at once.
+
+    Args:
+        stream: Binary stream positioned at the start of the content
+        chunk_size: Bytes read per step (default: Config.FILE_CHUNK_SIZE)
+
+    Returns:
+        Tuple of (sha256 hex digest, md5 hex digest, size in bytes)
+    """
+    chunk_size = chunk_size or Config.FILE_CHUNK_SIZE
+    sha256 = hashlib.sha256()
+    md5 = hashlib.md5()
+    size = 0
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        sha256.update(chunk)
+        md5.update(chunk)
+        size += len(chunk)
+    return sha256.hexdigest(), md5.hexdigest(), size
+
+
+def hash_file(path: str) -> str:
+    """
+    Compute the content hash of a file on disk.
+
+    Args:
+        path: File path
+
+    Returns:
+        str: SHA-256 hex digest used as the blob key
+    """
+    with open(path, 'rb') as f:
+        return hash_stream(f)[0]
+
+
+def blob_exists(cursor, content_hash: str) -> bool:
+    """
+    Check whether a blob is already stored.
+
+    Args:
+        cursor: Database cursor
+        content_hash: SHA-256 hex digest
+
+    Returns:
+        bool: True if the blob exists
+    """
+    cursor.execute("SELECT 1 FROM file_blobs WHERE content_hash = %s", (content_hash,))
+    return cursor.fetchone() is not None
+
+
+def store_blob(cursor, source: Union[bytes, BinaryIO]) -> Dict[str, Union[str, int, bool]]:
+    """
+    Store content as a blob unless a blob with the same hash already exists.
+
+    Runs inside the caller's transaction so the blob and the path row that
+    references it are committed together.
+
+    Args:
+        cursor: Database cursor
+        source: File content as bytes or a binary stream
+
+    Returns:
+        Dict with content_hash, md5_hash, size_bytes and created (False when deduplicated)
+    """
+    chunk_size = Config.FILE_CHUNK_SIZE
+    stream = _as_rereadable(source)
+    start = stream.tell()
+    content_hash, md5_hash, size_bytes = hash_stream(stream, chunk_size)
+    chunk_count = (size_bytes + chunk_size - 1) // chunk_size
+
+    # Claiming the hash first makes concurrent writers of the same content wait for each other.
+    # The no-op update locks an existing blob until the caller commits its files row, so
+    # delete_orphaned_blob cannot remove it in between.
+    cursor.execute(
+        """
+        INSERT INTO file_blobs (content_hash, size_bytes, chunk_size, chunk_count, md5_hash)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (content_hash) DO UPDATE SET content_hash = EXCLUDED.content_hash
+        RETURNING (xmax = 0) AS created
+        """,
+        (content_hash, size_bytes, chunk_size, chunk_count, md5_hash)
+    )
+    created = bool(cursor.fetchone()['created'])
+
+    if created:
+        stream.seek(start)
+        for index, chunk in enumerate(iter(lambda: stream.read(chunk_size), b'')):
+            cursor.execute(
+                "INSERT INTO file_chunks (content_hash, chunk_index, data) VALUES (%s, %s, %s)",
+                (content_hash, index, psycopg2.Binary(chunk))
+            )
+
+    return {
+        'content_hash': content_hash,
+        'md5_hash': md5_hash,
+        'size_bytes': size_bytes,
+        'created': created,
+    }
+
+
+def delete_orphaned_blob(cursor, content_hash: Optional[str]) -> bool:
+    """
+    Delete a blob (and its chunks) if no files row references it any more.
+
+    Args:
+        cursor: Database cursor
+        content_hash: Blob to check
+
+    Returns:
+        bool: True if the blob was deleted
+    """
+    if not content_hash:
+        return False
+    # Wait for writers holding the blob (see store_blob); the reference check below then
+    # runs with a new snapshot that includes their committed files rows
+    cursor.execute("SELECT 1 FROM file_blobs WHERE content_hash = %s FOR UPDATE", (content_hash,))
+    if cursor.fetchone() is None:
+        return False
+    cursor.execute("SAVEPOINT delete_blob")
+    try:
+        cursor.execute(
+            """
+            DELETE FROM file_blobs b
+            WHERE b.content_hash = %s
+              AND NOT EXISTS (SELECT 1 FROM files f WHERE f.content_hash = b.content_hash)
+            """,
+            (content_hash,)
+        )
+        deleted = cursor.rowcount > 0
+        cursor.execute("RELEASE SAVEPOINT delete_blob")
+        return deleted
+    except psycopg2.errors.ForeignKeyViolation:
+        # Referenced after all; the foreign key keeps the blob
+        cursor.execute("ROLLBACK TO SAVEPOINT delete_blob")
+        return False
+
+
+def iter_blob(content_hash: str) -> Iterator[bytes]:
+    """
+    Yield a blob's content chunk by chunk.
+
+    Each chunk is read with a short-lived pooled connection, so a slow client
+    does not hold a database connection for the whole download.
+
+    Args:
+        content_hash: Blob to read
+
+    Yields:
+        bytes: Consecutive chunks of the content
+
+    Raises:
+        IOError: If the blob or one of its chunks is missing
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT chunk_count FROM file_blobs WHERE content_hash = %s", (content_hash,))
+        row = cursor.fetchone()
+    if row is None:
+        raise IOError(f"Blob not found: {content_hash}")
+
+    for index in range(row['chunk_count']):
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT data FROM file_chunks WHERE content_hash = %s AND chunk_index = %s",
+                (content_hash, index)
+            )
+            chunk = cursor.fetchone()
+        if chunk is None:
+            raise IOError(f"Chunk {index} of blob {content_hash} is missing")
+        yield bytes(chunk['data'])
+
+
+def migrate_legacy_file_contents(batch_size: int = 50) -> int:
+    """
+    Move contents stored inline in files.content into deduplicated blobs.
+
+    Args:
+        batch_size: Rows migrated per transaction
+
+    Returns:
+        int: Number of files rows migrated
+    """
+    migrated = 0
+    while True:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT id FROM files
+                WHERE content_hash IS NULL AND content IS NOT NULL
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+                """,
+                (batch_size,)
+            )
+            ids = [row['id'] for row in cursor.fetchall()]
+            if not ids:
+                return migrated
+
+            for file_id in ids:
+                # Fetch one row's content at a time to bound memory
+                cursor.execute("SELECT content FROM files WHERE id = %s", (file_id,))
+                content = bytes(cursor.fetchone()['content'])
+                blob = store_blob(cursor, content)
+                cursor.execute(
+                    "UPDATE files SET content_hash = %s, md5_hash = %s, content = NULL WHERE id = %s",
+                    (blob['content_hash'], blob['md5_hash'], file_id)
+                )
+            conn.commit()
+
+        migrated += len(ids)
+        logger.info(f"Migrated {migrated} file contents to blob storage")
@@ -0,0 +1,363 @@
+"""
+Database maintenance: bloat estimates, VACUUM, REINDEX and planner statistics
+
+Upserts on tables such as ``devices`` and ``energy_stats`` leave dead tuples
+and half-empty index pages behind faster than autovacuum's defaults clean them
+up, which degrades query plans between manual cleanups. ``run_maintenance``
+is the single entry point used by the operations route, the CLI script and
+the optional ``MAINTENANCE_CRON`` job:
+
+* ``estimate_bloat`` reads dead-tuple ratios from ``pg_stat_user_tables``
+  and estimates B-tree index bloat by comparing each index's size with the
+  size its row count and average key width (from ``pg_stats``) would need.
+* Tables over ``MAINTENANCE_DEAD_TUPLE_RATIO`` dead tuples, or with many rows
+  modified since their last analyze, get ``VACUUM (ANALYZE)``; each table is
+  vacuumed separately in autocommit mode (VACUUM cannot run in a transaction).
+* Indexes over ``MAINTENANCE_INDEX_BLOAT_RATIO`` estimated bloat are rebuilt
+  with ``REINDEX INDEX CONCURRENTLY`` (PostgreSQL 12+), which does not block
+  writes. Invalid ``*_ccnew`` leftovers of an interrupted rebuild are dropped.
+
+``analyze_tables`` refreshes planner statistics and is called after bulk
+loads (restores, archive imports, rollup rebuilds).
+
+A full run can take minutes, so the operations route starts it with
+``start_maintenance_job`` in a background thread and reports it through
+``get_maintenance_job``.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import psycopg2
+
+from app.config import Config
+from app.database import get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# REINDEX ... CONCURRENTLY needs PostgreSQL 12
+REINDEX_CONCURRENTLY_MIN_VERSION = 120000
+
+# Background maintenance jobs of this process, by job ID
+_jobs: Dict[str, Dict[str, Any]] = {}
+_jobs_lock = threading.Lock()
+
+
+def _quote(identifier: str) -> str:
+    """Quote a table or index name"""
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def estimate_bloat(tables: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Estimate table and index bloat
+
+    Args:
+        tables: Tables to inspect (default: every table of the public schema)
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Per table: live/dead tuples, dead tuple ratio,
+        rows modified since the last analyze, size in bytes and an 'indexes' dict
+        with each index's size, expected size and estimated bloat ratio
+    """
+    table_list = list(tables) if tables is not None else None
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT s.relname AS table_name,
+                       s.n_live_tup, s.n_dead_tup, s.n_mod_since_analyze,
+                       s.last_vacuum, s.last_autovacuum, s.last_analyze, s.last_autoanalyze,
+                       pg_table_size(s.relid) AS table_bytes
+                FROM pg_stat_user_tables s
+                WHERE s.schemaname = 'public'
+                  AND (%(tables)s::text[] IS NULL OR s.relname = ANY(%(tables)s::text[]))
+                ORDER BY s.relname
+            """, {'tables': table_list})
+            report = {}
+            for row in cursor.fetchall():
+                total = row['n_live_tup'] + row['n_dead_tup']
+                report[row['table_name']] = {
+                    'live_tuples': row['n_live_tup'],
+                    'dead_tuples': row['n_dead_tup'],
+                    'dead_ratio': round(row['n_dead_tup'] / total, 4) if total else 0.0,
+                    'modified_since_analyze': row['n_mod_since_analyze'],
+                    'last_vacuum': max(filter(None, [row['last_vacuum'], row['last_autovacuum']]), default=None),
+                    'last_analyze': max(filter(None, [row['last_analyze'], row['last_autoanalyze']]), default=None),
+                    'bytes': row['table_bytes'],
+                    'indexes': {},
+                }
+
+            # Expected B-tree size: per entry the key width plus an 8-byte tuple header
+            # and a 4-byte line pointer, packed into 8 KB pages at the index fillfactor
+            cursor.execute("""
+                SELECT t.relname AS table_name, i.relname AS index_name,
+                       am.amname AS method, i.relpages, i.reltuples,
+                       pg_relation_size(i.oid) AS index_bytes,
+                       current_setting('block_size')::int AS block_size,
+                       COALESCE((SELECT substring(opt FROM 'fillfactor=([0-9]+)')::int
+                                 FROM unnest(i.reloptions) opt WHERE opt LIKE 'fillfactor=%%'), 90) AS fillfactor,
+                       (SELECT COALESCE(SUM(st.avg_width), 8)
+                        FROM pg_attribute a
+                        LEFT JOIN pg_stats st ON st.schemaname = 'public' AND st.tablename = t.relname
+                                             AND st.attname = a.attname
+                        WHERE a.attrelid = t.oid AND a.attnum = ANY(ix.indkey::int2[])) AS key_width,
+                       ix.indisvalid
+                FROM pg_index ix
+                JOIN pg_class i ON i.oid = ix.indexrelid
+                JOIN pg_class t ON t.oid = ix.indrelid
+                JOIN pg_am am ON am.oid = i.relam
+                WHERE t.relnamespace = 'public'::regnamespace AND t.relname = ANY(%s)
+                ORDER BY t.relname, i.relname
+            """, (list(report),))
+            for row in cursor.fetchall():
+                entry = {'bytes': row['index_bytes'], 'valid': row['indisvalid'], 'method': row['method']}
+                if row['method'] == 'btree' and row['relpages'] > 1:
+                    per_page = (row['block_size'] - 24) * row['fillfactor'] / 100.0
+                    entry_width = row['key_width'] + 8 + 4
+                    # One metapage plus the leaf pages (inner pages are negligible)
+                    expected_pages = 1 + max(row['reltuples'], 0) * entry_width / per_page
+                    entry['expected_bytes'] = int(expected_pages * row['block_size'])
+                    entry['bloat_ratio'] = round(max(0.0, 1 - expected_pages / row['relpages']), 4)
+                else:
+                    entry['bloat_ratio'] = None
+                report[row['table_name']]['indexes'][row['index_name']] = entry
+
+            return report
+
+    except psycopg2.Error as e:
+        logger.error(f"PostgreSQL error estimating bloat: {e}")
+        return {}
+
+
+def _run_autocommit(statements: List[str]) -> List[float]:
+    """Run statements one by one in autocommit mode, returning each one's duration"""
+    durations = []
+    with get_db_connection() as conn:
+        conn.autocommit = True
+        cursor = conn.cursor()
+        for statement in statements:
+            started = time.monotonic()
+            cursor.execute(statement)
+            durations.append(round(time.monotonic() - started, 3))
+    return durations
+
+
+def vacuum_table(table: str, analyze: bool = True) -> float:
+    """
+    Run VACUUM on one table outside of a transaction
+
+    Args:
+        table: Table name
+        analyze: Also refresh planner statistics
+
+    Returns:
+        float: Duration in seconds
+
+    Raises:
+        psycopg2.Error: If VACUUM fails
+    """
+    options = '(ANALYZE) ' if analyze else ''
+    return _run_autocommit([f"VACUUM {options}{_quote(table)}"])[0]
+
+
+def reindex_index(index: str) -> float:
+    """
+    Rebuild one index with REINDEX CONCURRENTLY
+
+    An invalid copy left behind by an earlier interrupted rebuild
+    (``<index>_ccnew``) is dropped first.
+
+    Args:
+        index: Index name
+
+    Returns:
+        float: Duration in seconds
+
+    Raises:
+        psycopg2.Error: If the rebuild fails
+    """
+    return sum(_run_autocommit([
+        f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(index + '_ccnew')}",
+        f"REINDEX INDEX CONCURRENTLY {_quote(index)}",
+    ]))
+
+
+def analyze_tables(tables: Iterable[str]) -> Dict[str, float]:
+    """
+    Refresh planner statistics, e.g. after a bulk load
+
+    Errors are logged, never raised, so callers can run this after their
+    own work has been committed.
+
+    Args:
+        tables: Tables to analyze
+
+    Returns:
+        Dict[str, float]: Duration in seconds per analyzed table
+    """
+    timings = {}
+    for table in tables:
+        try:
+            timings[table] = _run_autocommit([f"ANALYZE {_quote(table)}"])[0]
+        except psycopg2.Error as e:
+            logger.error(f"PostgreSQL error analyzing {table}: {e}")
+    return timings
+
+
+def _server_version() -> int:
+    with get_db_connection() as conn:
+        return conn.server_version
+
+
+def run_maintenance(tables: Optional[Iterable[str]] = None,
+                    vacuum: bool = True,
+                    reindex: bool = True,
+                    force: bool = False,
+                    dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Vacuum, analyze and reindex the tables that need it
+
+    Args:
+        tables: Tables to maintain (default: every table of the public schema)
+        vacuum: Run VACUUM (ANALYZE) on tables over the dead tuple threshold
+        reindex: Rebuild indexes over the bloat threshold
+        force: Vacuum every selected table regardless of its dead tuple ratio
+        dry_run: Only report what would be done
+
+    Returns:
+        Dict[str, Any]: 'tables' with per-table bloat figures, the actions taken and
+        their timings (or errors), and 'seconds' for the whole run
+    """
+    started = time.monotonic()
+    bloat = estimate_bloat(tables)
+    report: Dict[str, Any] = {'started_at': datetime.now().isoformat(), 'dry_run': dry_run, 'tables': {}}
+
+    can_reindex = True
+    if reindex and not dry_run:
+        try:
+            can_reindex = _server_version() >= REINDEX_CONCURRENTLY_MIN_VERSION
+        except psycopg2.Error as e:
+            logger.error(f"PostgreSQL error reading server version: {e}")
+            can_reindex = False
+        if not can_reindex:
+            logger.warning("REINDEX CONCURRENTLY requires PostgreSQL 12 or later; skipping index rebuilds")
+
+    for table, stats in bloat.items():
+        entry: Dict[str, Any] = {
+            'dead_ratio': stats['dead_ratio'],
+            'bytes': stats['bytes'],
+            'actions': {},
+        }
+        report['tables'][table] = entry
+
+        stale_stats = stats['modified_since_analyze'] > Config.MAINTENANCE_ANALYZE_CHANGE_RATIO * max(stats['live_tuples'], 1)
+        if vacuum and (force or stats['dead_ratio'] >= Config.MAINTENANCE_DEAD_TUPLE_RATIO or stale_stats):
+            if dry_run:
+                entry['actions']['vacuum'] = 'pending'
+            else:
+                try:
+                    entry['actions']['vacuum'] = vacuum_table(table)
+                except psycopg2.Error as e:
+                    logger.error(f"PostgreSQL error vacuuming {table}: {e}")
+                    entry['actions']['vacuum'] = {'error': str(e)}
+
+        if not reindex:
+            continue
+        for index, index_stats in stats['indexes'].items():
+            if index.endswith('_ccnew'):
+                # Leftover of an interrupted rebuild; dropped when its index is rebuilt
+                continue
+            bloated = (index_stats['bloat_ratio'] is not None
+                       and index_stats['bloat_ratio'] >= Config.MAINTENANCE_INDEX_BLOAT_RATIO
+                       and index_stats['bytes'] >= Config.MAINTENANCE_MIN_INDEX_BYTES)
+            if index_stats['valid'] and not bloated:
+                continue
+            action = f"reindex:{index}"
+            if dry_run or not can_reindex:
+                entry['actions'][action] = 'pending' if dry_run else 'skipped'
+                continue
+            try:
+                entry['actions'][action] = reindex_index(index)
+            except psycopg2.Error as e:
+                logger.error(f"PostgreSQL error rebuilding index {index}: {e}")
+                entry['actions'][action] = {'error': str(e)}
+
+    report['seconds'] = round(time.monotonic() - started, 3)
+    done = sum(1 for entry in report['tables'].values() if entry['actions'])
+    logger.info(f"Database maintenance {'planned' if dry_run else 'finished'}: "
+                f"{done} of {len(report['tables'])} tables in {report['seconds']}s")
+    return report
+
+
+def _run_job(job: Dict[str, Any], options: Dict[str, Any],
+             on_complete: Optional[Callable[[Dict[str, Any]], None]]) -> None:
+    try:
+        report = run_maintenance(**options)
+        if on_complete:
+            on_complete(report)
+        with _jobs_lock:
+            job.update(status='completed', report=report, finished_at=datetime.now().isoformat())
+    except Exception as e:
+        logger.error(f"Database maintenance job {job['job_id']} failed: {e}")
+        with _jobs_lock:
+            job.update(status='failed', error=str(e), finished_at=datetime.now().isoformat())
+
+
+def start_maintenance_job(tables: Optional[Iterable[str]] = None,
+                          reindex: bool = True,
+                          force: bool = False,
+                          on_complete: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Start run_maintenance in a background thread
+
+    Only one maintenance job runs at a time per process; while one is running
+    its state is returned instead of starting another.
+
+    Args:
+        tables: Tables to maintain (default: every table of the public schema)
+        reindex: Rebuild indexes over the bloat threshold
+        force: Vacuum every selected table regardless of its dead tuple ratio
+        on_complete: Called with the report after a successful run (optional)
+
+    Returns:
+        Dict[str, Any]: Snapshot of the job state (see get_maintenance_job)
+    """
+    with _jobs_lock:
+        for job in _jobs.values():
+            if job['status'] == 'running':
+                return dict(job)
+
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'status': 'running',
+            'started_at': datetime.now().isoformat(),
+        }
+        _jobs[job['job_id']] = job
+
+    options = {'tables': list(tables) if tables else None, 'reindex': reindex, 'force': force}
+    threading.Thread(target=_run_job, args=(job, options, on_complete),
+                     name=f"db-maintenance-{job['job_id'][:8]}", daemon=True).start()
+    return get_maintenance_job(job['job_id'])
+
+
+def get_maintenance_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the state of a maintenance job
+
+    Args:
+        job_id: Job ID returned by start_maintenance_job
+
+    Returns:
+        Dict with status ('running', 'completed' or 'failed'), started_at,
+        finished_at and, once completed, the run_maintenance report, or None if
+        the job is unknown
+    """
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job is not None else None
@@ -2,15 +2,25 @@
 Database migration utility to add missing columns to existing tables
 """
 import logging
-from app.database import get_db_connection
+import psycopg2
+from app.database import get_db_connection, FAULT_LOG_SEARCH_DOCUMENT
+from app.db_rollups import ensure_rollup_tables
+from app.db_blobs import ensure_blob_tables
+from app.db_retention import ensure_retention_tables
+from app.db_series import ensure_series_table
+from app.db_raw_history import ensure_raw_history_tables
+from app.db_stats import STATS_TABLES
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Tables that keep the raw Growatt payload (served by the API snapshot read path)
+RAW_DATA_TABLES = ('devices', 'plants', 'weather_data')
+
 def add_raw_data_column():
     """
-    Add the raw_data JSONB column to the devices table if it doesn't exist
+    Add the raw_data JSONB column to the devices, plants and weather_data tables if it doesn't exist
     
     Returns:
         bool: True if successful, False if an error occurred
@@ -19,25 +29,26 @@ def add_raw_data_column():
         with get_db_connection() as conn:
             cursor = conn.cursor()
             
-            # Check if the column exists
-            cursor.execute("""
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'devices' AND column_name = 'raw_data'
-            """)
-            
-            if not cursor.fetchone():
-                logger.info("Adding raw_data column to devices table...")
-                cursor.execute("ALTER TABLE devices ADD COLUMN raw_data JSONB")
-                conn.commit()
-                logger.info("Successfully added raw_data column to devices table")
-            else:
-                logger.info("raw_data column already exists in devices table")
+            for table in RAW_DATA_TABLES:
+                # Check if the column exists
+                cursor.execute("""
+                    SELECT column_name 
+                    FROM information_schema.columns 
+                    WHERE table_name = %s AND column_name = 'raw_data'
+                """, (table,))
+                
+                if not cursor.fetchone():
+                    logger.info(f"Adding raw_data column to {table} table...")
+                    cursor.execute(f"ALTER TABLE {table} ADD COLUMN raw_data JSONB")
+                    conn.commit()
+                    logger.info(f"Successfully added raw_data column to {table} table")
+                else:
+                    logger.info(f"raw_data column already exists in {table} table")
             
             return True
             
     except Exception as e:
-        logger.error(f"Error adding raw_data column to devices table: {e}")
+        logger.error(f"Error adding raw_data columns: {e}")
         return False
 
 def add_device_data_table():
@@ -88,6 +99,168 @@ def add_device_data_table():
         logger.error(f"Error creating device_data table: {e}")
         return False
 
+def add_files_listing_indexes():
+    """
+    Add covering indexes for keyset-paginated file listings
+    
+    The indexes are ordered by (created_at, id) and include every column the
+    listing returns, so listings are served by index-only scans and never touch
+    the TOASTed content column or the JSONB metadata.
+    
+    Returns:
+        bool: True if successful, False if an error occurred
+    """
+    covered = "INCLUDE (filename, file_path, file_type, content_hash, plant_id, device_id, size_bytes, md5_hash, last_updated)"
+    
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            # Keyset pagination needs a total order without NULLs
+            cursor.execute("UPDATE files SET created_at = COALESCE(last_updated, NOW()) WHERE created_at IS NULL")
+            cursor.execute("ALTER TABLE files ALTER COLUMN created_at SET NOT NULL")
+            
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_files_created_id ON files(created_at DESC, id DESC) {covered}')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_files_plant_created_id ON files(plant_id, created_at DESC, id DESC) {covered}')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_files_device_created_id ON files(device_id, created_at DESC, id DESC) {covered}')
+            
+            conn.commit()
+            logger.info("Files listing indexes verified/created successfully")
+            return True
+            
+    except Exception as e:
+        logger.error(f"Error creating files listing indexes: {e}")
+        return False
+
+def add_fault_log_search_indexes():
+    """
+    Add search indexes over fault log device names and error messages
+    
+    A GIN tsvector index serves word queries and a GIN trigram index serves
+    substring and fuzzy queries (including Thai text, which has no spaces
+    between words). Both are built on FAULT_LOG_SEARCH_DOCUMENT, the exact
+    expression the search query uses. The trigram index needs the pg_trgm
+    extension and is skipped if it cannot be installed.
+    
+    Returns:
+        bool: True if successful, False if an error occurred
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("SELECT to_regclass('fault_logs') IS NOT NULL AS present")
+            if not cursor.fetchone()['present']:
+                logger.info("fault_logs table does not exist, skipping search indexes")
+                return True
+            
+            cursor.execute(
+                "CREATE INDEX IF NOT EXISTS idx_fault_logs_search_tsv ON fault_logs "
+                f"USING GIN (to_tsvector('simple', {FAULT_LOG_SEARCH_DOCUMENT}))"
+            )
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_fault_logs_plant_time_id '
+                'ON fault_logs(plant_id, happen_time DESC, id DESC)'
+            )
+            
+            cursor.execute("SAVEPOINT pg_trgm")
+            try:
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                cursor.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_fault_logs_search_trgm ON fault_logs "
+                    f"USING GIN ({FAULT_LOG_SEARCH_DOCUMENT} gin_trgm_ops)"
+                )
+                cursor.execute("RELEASE SAVEPOINT pg_trgm")
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT pg_trgm")
+                logger.warning(f"pg_trgm unavailable, substring search will not be indexed: {e}")
+            
+            conn.commit()
+            logger.info("Fault log search indexes verified/created successfully")
+            return True
+            
+    except Exception as e:
+        logger.error(f"Error creating fault log search indexes: {e}")
+        return False
+
+def add_device_listing_indexes():
+    """
+    Add indexes for filtered, keyset-paginated device listings
+    
+    Listings are ordered by serial number (the primary key); the
+    (plant_id, serial_number) index serves per-plant pages. Trigram indexes
+    serve the alias/serial number substring search and are skipped if the
+    pg_trgm extension cannot be installed.
+    
+    Returns:
+        bool: True if successful, False if an error occurred
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_devices_plant_serial ON devices(plant_id, serial_number)')
+            
+            cursor.execute("SAVEPOINT pg_trgm")
+            try:
+                cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_devices_alias_trgm ON devices USING GIN (alias gin_trgm_ops)')
+                cursor.execute('CREATE INDEX IF NOT EXISTS idx_devices_serial_trgm ON devices USING GIN (serial_number gin_trgm_ops)')
+                cursor.execute("RELEASE SAVEPOINT pg_trgm")
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT pg_trgm")
+                logger.warning(f"pg_trgm unavailable, device search will not be indexed: {e}")
+            
+            conn.commit()
+            logger.info("Device listing indexes verified/created successfully")
+            return True
+            
+    except Exception as e:
+        logger.error(f"Error creating device listing indexes: {e}")
+        return False
+
+def add_time_range_indexes():
+    """
+    Add single-column indexes on the time columns reported by the data statistics
+    
+    MIN/MAX over a column is only answered from the ends of an index whose
+    leading column it is; otherwise it scans the whole table. An index is only
+    created where no valid B-tree index already leads with the column.
+    
+    Returns:
+        bool: True if successful, False if an error occurred
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+            
+            for table, column in STATS_TABLES.values():
+                if not column:
+                    continue
+                cursor.execute("SELECT to_regclass(%s) IS NOT NULL AS present", (table,))
+                if not cursor.fetchone()['present']:
+                    continue
+                cursor.execute("""
+                    SELECT 1
+                    FROM pg_index i
+                    JOIN pg_class c ON c.oid = i.indexrelid
+                    JOIN pg_am am ON am.oid = c.relam
+                    JOIN pg_attribute a ON a.attrelid = i.indrelid AND a.attnum = i.indkey[0]
+                    WHERE i.indrelid = %s::regclass AND a.attname = %s
+                      AND am.amname = 'btree' AND i.indisvalid AND i.indpred IS NULL
+                """, (table, column))
+                if cursor.fetchone() is None:
+                    cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_{column} ON {table}({column})')
+                    logger.info(f"Created index on {table}({column})")
+            
+            conn.commit()
+            logger.info("Time range indexes verified/created successfully")
+            return True
+            
+    except Exception as e:
+        logger.error(f"Error creating time range indexes: {e}")
+        return False
+
 def run_migrations():
     """
     Run all database migrations
@@ -99,6 +272,15 @@ def run_migrations():
         logger.info("Running database migrations...")
         add_raw_data_column()
         add_device_data_table()
+        ensure_rollup_tables()
+        ensure_blob_tables()
+        add_files_listing_indexes()
+        ensure_retention_tables()
+        add_fault_log_search_indexes()
+        add_device_listing_indexes()
+        ensure_series_table()
+        ensure_raw_history_tables()
+        add_time_range_indexes()
         logger.info("Database migrations completed")
         return True
     except Exception as e:
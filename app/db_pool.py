@@ -0,0 +1,361 @@
+"""
+Observable PostgreSQL connection pool for Growatt API data storage
+
+This module provides a drop-in replacement for psycopg2's ThreadedConnectionPool
+(getconn/putconn/closeall) that:
+
+- blocks for up to a configurable timeout when every connection is checked out
+  instead of failing immediately,
+- health-checks idle connections on checkout and retires connections that exceed
+  a maximum lifetime,
+- records where each connection was checked out so leaked connections can be
+  traced back to their caller,
+- keeps metrics for in-use and idle connections, wait times and timeouts.
+"""
+
+import logging
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import psycopg2
+from psycopg2 import extensions, pool
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(pool.PoolError):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class _PooledConnection:
+    """Bookkeeping for a single physical connection"""
+
+    __slots__ = ('conn', 'created_at', 'returned_at', 'checked_out_at', 'thread_name', 'stack')
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.created_at = time.monotonic()
+        self.returned_at = self.created_at
+        self.checked_out_at = None
+        self.thread_name = None
+        self.stack = None
+
+
+class ObservableConnectionPool:
+    """
+    Thread-safe blocking connection pool with health checks, lifetime limits,
+    leak detection and metrics.
+    """
+
+    def __init__(self,
+                 minconn: int,
+                 maxconn: int,
+                 timeout: float = 30.0,
+                 max_lifetime: float = 1800.0,
+                 pre_ping_idle: float = 10.0,
+                 leak_threshold: float = 300.0,
+                 track_stacks: bool = True,
+                 **connect_kwargs):
+        """
+        Create the pool and open minconn connections.
+
+        Args:
+            minconn: Connections opened up front and kept while idle
+            maxconn: Maximum number of open connections
+            timeout: Seconds getconn() waits for a free connection before raising PoolTimeoutError
+            max_lifetime: Seconds after which a connection is closed instead of reused (0 disables)
+            pre_ping_idle: Connections idle longer than this are pinged on checkout (0 pings every checkout)
+            leak_threshold: Seconds a checkout may be held before it is reported as a possible leak
+            track_stacks: Record the caller's stack trace on every checkout
+            **connect_kwargs: Arguments passed to psycopg2.connect
+        """
+        if maxconn < 1 or minconn > maxconn:
+            raise ValueError(f"Invalid pool size {minconn}-{maxconn}")
+
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.pre_ping_idle = pre_ping_idle
+        self.leak_threshold = leak_threshold
+        self.track_stacks = track_stacks
+        self._connect_kwargs = connect_kwargs
+
+        self._cond = threading.Condition(threading.Lock())
+        self._idle = deque()
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._size = 0
+        self._waiting = 0
+        self.closed = False
+
+        self._metrics = {
+            'checkouts': 0,
+            'timeouts': 0,
+            'waits': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'connections_created': 0,
+            'connections_closed': 0,
+            'health_check_failures': 0,
+            'lifetime_recycles': 0,
+            'leaks_detected': 0,
+        }
+
+        for _ in range(minconn):
+            entry = self._connect()
+            with self._cond:
+                self._size += 1
+                self._idle.append(entry)
+
+    def _connect(self) -> _PooledConnection:
+        """Open a new physical connection."""
+        conn = psycopg2.connect(**self._connect_kwargs)
+        with self._cond:
+            self._metrics['connections_created'] += 1
+        return _PooledConnection(conn)
+
+    def _close(self, entry: _PooledConnection) -> None:
+        """Close a physical connection and release its slot. Must be called without the lock held."""
+        try:
+            if not entry.conn.closed:
+                entry.conn.close()
+        except Exception as e:
+            logger.debug(f"Error closing pooled connection: {e}")
+        with self._cond:
+            self._size -= 1
+            self._metrics['connections_closed'] += 1
+            self._cond.notify()
+
+    def _expired(self, entry: _PooledConnection, now: float) -> bool:
+        """Whether a connection has outlived max_lifetime."""
+        return bool(self.max_lifetime) and now - entry.created_at > self.max_lifetime
+
+    def _healthy(self, entry: _PooledConnection, now: float) -> bool:
+        """Check a connection before handing it out."""
+        if entry.conn.closed:
+            return False
+        if now - entry.returned_at < self.pre_ping_idle:
+            return True
+        try:
+            cursor = entry.conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            entry.conn.rollback()
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding stale pooled connection: {e}")
+            return False
+
+    def _reap_leaked(self) -> List[_PooledConnection]:
+        """
+        Release slots held by checkouts whose connection was closed without putconn().
+
+        Must be called with the lock held; returns the reaped entries for logging.
+        """
+        leaked = [entry for entry in self._in_use.values() if entry.conn.closed]
+        for entry in leaked:
+            del self._in_use[id(entry.conn)]
+            self._size -= 1
+            self._metrics['leaks_detected'] += 1
+            self._metrics['connections_closed'] += 1
+        return leaked
+
+    def getconn(self, key: Any = None, timeout: Optional[float] = None):
+        """
+        Check out a connection, waiting up to the timeout if the pool is exhausted.
+
+        Args:
+            key: Unused, accepted for compatibility with psycopg2 pools
+            timeout: Seconds to wait (default: the pool's timeout)
+
+        Returns:
+            A psycopg2 connection
+
+        Raises:
+            PoolTimeoutError: If no connection became available in time
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        waited = False
+
+        while True:
+            entry = None
+            with self._cond:
+                if self.closed:
+                    raise pool.PoolError("connection pool is closed")
+
+                leaked = self._reap_leaked()
+                while not self._idle and self._size >= self.maxconn:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._metrics['timeouts'] += 1
+                        oldest = min(self._in_use.values(), key=lambda e: e.checked_out_at or 0, default=None)
+                        if oldest is not None and oldest.stack:
+                            logger.error(f"Pool exhausted; longest-held connection was checked out by "
+                                         f"{oldest.thread_name} at:\n{''.join(oldest.stack)}")
+                        raise PoolTimeoutError(
+                            f"Timed out after {timeout:.1f}s waiting for a database connection "
+                            f"({len(self._in_use)} in use, {self._waiting} waiting)"
+                        )
+                    waited = True
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    leaked.extend(self._reap_leaked())
+                if self._idle:
+                    entry = self._idle.pop()
+                else:
+                    self._size += 1
+
+            for leaked_entry in leaked:
+                logger.error(f"Connection checked out by {leaked_entry.thread_name} was closed without being "
+                             f"returned to the pool. Checkout stack:\n{''.join(leaked_entry.stack or [])}")
+
+            now = time.monotonic()
+            if entry is None:
+                try:
+                    entry = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif self._expired(entry, now):
+                with self._cond:
+                    self._metrics['lifetime_recycles'] += 1
+                self._close(entry)
+                continue
+            elif not self._healthy(entry, now):
+                with self._cond:
+                    self._metrics['health_check_failures'] += 1
+                self._close(entry)
+                continue
+
+            entry.checked_out_at = time.monotonic()
+            entry.thread_name = threading.current_thread().name
+            entry.stack = traceback.format_stack(limit=12)[:-1] if self.track_stacks else None
+
+            wait_time = entry.checked_out_at - started
+            with self._cond:
+                self._in_use[id(entry.conn)] = entry
+                self._metrics['checkouts'] += 1
+                if waited:
+                    self._metrics['waits'] += 1
+                self._metrics['wait_time_total'] += wait_time
+                self._metrics['wait_time_max'] = max(self._metrics['wait_time_max'], wait_time)
+            return entry.conn
+
+    def putconn(self, conn, key: Any = None, close: bool = False) -> None:
+        """
+        Return a connection to the pool.
+
+        Args:
+            conn: Connection previously returned by getconn()
+            key: Unused, accepted for compatibility with psycopg2 pools
+            close: Close the connection instead of keeping it
+        """
+        with self._cond:
+            entry = self._in_use.pop(id(conn), None)
+        if entry is None:
+            raise pool.PoolError("trying to put unkeyed connection")
+
+        if close or self.closed or conn.closed:
+            self._close(entry)
+            return
+        if self._expired(entry, time.monotonic()):
+            with self._cond:
+                self._metrics['lifetime_recycles'] += 1
+            self._close(entry)
+            return
+
+        # Discard any open transaction, as psycopg2's own pools do
+        try:
+            if conn.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+        except psycopg2.Error as e:
+            logger.warning(f"Discarding connection that could not be reset: {e}")
+            self._close(entry)
+            return
+
+        entry.returned_at = time.monotonic()
+        entry.checked_out_at = None
+        entry.stack = None
+        with self._cond:
+            self._idle.append(entry)
+            self._cond.notify()
+
+    def owns(self, conn) -> bool:
+        """
+        Check whether a connection is currently checked out from this pool.
+
+        Args:
+            conn: Database connection
+
+        Returns:
+            bool: True if conn was handed out by this pool and not yet returned
+        """
+        with self._cond:
+            return id(conn) in self._in_use
+
+    def closeall(self) -> None:
+        """Close every idle connection and refuse further checkouts."""
+        with self._cond:
+            self.closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._cond.notify_all()
+        for entry in idle:
+            self._close(entry)
+
+    def get_leaks(self, threshold: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        List checkouts held longer than the leak threshold.
+
+        Args:
+            threshold: Seconds a checkout may be held (default: the pool's leak_threshold)
+
+        Returns:
+            List of dicts with the holding thread, held seconds and checkout stack
+        """
+        threshold = self.leak_threshold if threshold is None else threshold
+        now = time.monotonic()
+        with self._cond:
+            held = list(self._in_use.values())
+        return [
+            {
+                'thread': entry.thread_name,
+                'held_seconds': round(now - entry.checked_out_at, 3),
+                'stack': ''.join(entry.stack) if entry.stack else None,
+            }
+            for entry in held
+            if entry.checked_out_at is not None and now - entry.checked_out_at > threshold
+        ]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of the pool metrics.
+
+        Returns:
+            Dict with pool size, in-use/idle/waiting counts, wait times, timeouts and recycle counters
+        """
+        with self._cond:
+            metrics = dict(self._metrics)
+            stats = {
+                'min_connections': self.minconn,
+                'max_connections': self.maxconn,
+                'size': self._size,
+                'in_use': len(self._in_use),
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+            }
+        stats.update(metrics)
+        stats['wait_time_avg'] = metrics['wait_time_total'] / metrics['checkouts'] if metrics['checkouts'] else 0.0
+        stats['possible_leaks'] = len(self.get_leaks())
+        return stats
@@ -0,0 +1,166 @@
+"""
+Prepared statement registry for Growatt API data storage
+
+This module keeps a registry of named SQL statements that are issued on every
+collection cycle and executes them as server-side prepared statements, so
+PostgreSQL parses and plans them once per connection instead of once per call.
+
+Statements are prepared lazily the first time they are used on a pooled
+connection. A reconnect produces a new connection object, which simply starts
+with an empty set and prepares again on first use.
+
+Behind a transaction-mode pooler (e.g. the Supabase pooler on port 6543) each
+transaction may land on a different server backend, so a statement would have
+to be prepared again in every transaction, costing an extra round trip where
+it should save one. Statements are therefore executed unprepared in that mode.
+PREPARE still tolerates the statement already existing on the backend, e.g.
+after a connection was reset without forget_connection.
+"""
+
+import logging
+import re
+import threading
+import weakref
+from typing import Any, Dict, Optional, Sequence
+
+import psycopg2
+from psycopg2 import errorcodes
+
+from app.config import Config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Statement name -> SQL text with %s placeholders
+_statements: Dict[str, str] = {}
+
+# Connection -> names prepared on it (dropped automatically with the connection)
+_prepared: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+_NAME_PATTERN = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+
+def register_statement(name: str, sql: str) -> None:
+    """
+    Register a statement that can later be run with execute_prepared.
+
+    Args:
+        name: Statement name (lowercase identifier, unique per process)
+        sql: SQL text using positional %s placeholders
+    """
+    if not _NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid prepared statement name: {name}")
+    if name in _statements and _statements[name] != sql:
+        raise ValueError(f"Prepared statement {name} is already registered with different SQL")
+    _statements[name] = sql
+
+
+def get_statement(name: str) -> str:
+    """
+    Get the SQL text of a registered statement.
+
+    Args:
+        name: Statement name
+
+    Returns:
+        str: SQL text with %s placeholders
+    """
+    try:
+        return _statements[name]
+    except KeyError:
+        raise KeyError(f"Prepared statement {name} is not registered")
+
+
+def _to_server_placeholders(sql: str) -> str:
+    """Rewrite %s placeholders as $1, $2, ... for PREPARE."""
+    parts = sql.split('%s')
+    return ''.join(part + (f'${i + 1}' if i < len(parts) - 1 else '') for i, part in enumerate(parts))
+
+
+def _transaction_pooling() -> bool:
+    """Whether connections go through a transaction-mode pooler."""
+    return Config.POSTGRES_POOL_MODE == 'transaction'
+
+
+def _prepared_names(conn) -> set:
+    """Get the set of statement names prepared on a connection."""
+    with _lock:
+        names = _prepared.get(conn)
+        if names is None:
+            names = set()
+            _prepared[conn] = names
+        return names
+
+
+def _prepare(cursor, name: str) -> None:
+    """
+    Prepare a registered statement on the cursor's connection.
+
+    A statement that already exists on the server backend is treated as prepared.
+    """
+    prepare_sql = f"PREPARE {name} AS {_to_server_placeholders(_statements[name])}"
+
+    if cursor.connection.autocommit:
+        try:
+            cursor.execute(prepare_sql)
+        except psycopg2.Error as e:
+            if e.pgcode != errorcodes.DUPLICATE_PREPARED_STATEMENT:
+                raise
+        return
+
+    # Guard the PREPARE with a savepoint so a duplicate does not abort the caller's transaction
+    try:
+        cursor.execute(f"SAVEPOINT prepare_{name}; {prepare_sql}; RELEASE SAVEPOINT prepare_{name}")
+    except psycopg2.Error as e:
+        if e.pgcode != errorcodes.DUPLICATE_PREPARED_STATEMENT:
+            raise
+        cursor.execute(f"ROLLBACK TO SAVEPOINT prepare_{name}; RELEASE SAVEPOINT prepare_{name}")
+
+
+def execute_prepared(cursor, name: str, params: Optional[Sequence[Any]] = None) -> None:
+    """
+    Execute a registered statement, preparing it on this connection if needed.
+
+    Results are left on the cursor exactly as with cursor.execute().
+
+    Args:
+        cursor: Database cursor
+        name: Registered statement name
+        params: Positional parameters for the statement's %s placeholders
+    """
+    sql = get_statement(name)
+    params = tuple(params or ())
+    conn = cursor.connection
+
+    if not Config.POSTGRES_PREPARED_STATEMENTS or _transaction_pooling():
+        cursor.execute(sql, params or None)
+        return
+
+    names = _prepared_names(conn)
+    if name not in names:
+        _prepare(cursor, name)
+        names.add(name)
+
+    try:
+        if params:
+            cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+        else:
+            cursor.execute(f"EXECUTE {name}")
+    except psycopg2.Error as e:
+        if e.pgcode == errorcodes.INVALID_SQL_STATEMENT_NAME:
+            # The server lost its prepared statements (e.g. DISCARD ALL); prepare again next time
+            logger.warning(f"Prepared statement {name} missing on server, it will be re-prepared")
+            forget_connection(conn)
+        raise
+
+
+def forget_connection(conn) -> None:
+    """
+    Drop prepared state tracked for a connection, e.g. after DISCARD ALL.
+
+    Args:
+        conn: Database connection
+    """
+    with _lock:
+        _prepared.pop(conn, None)
@@ -0,0 +1,316 @@
+"""
+Delta-encoded history of raw device payloads
+
+With ``Config.RAW_DATA_HISTORY_ENABLED``, every device save also records the
+raw Growatt payload in ``raw_data_history``. Most of a payload (model,
+firmware, plant metadata) never changes, so rows are either a full
+``snapshot`` or a ``delta``: a compact diff against the most recent snapshot of
+the same serial. A state is rebuilt from one snapshot and at most one delta.
+
+A new snapshot is written when the serial has none yet, after
+``RAW_DATA_HISTORY_SNAPSHOT_EVERY`` deltas, when the latest snapshot is older
+than ``RAW_DATA_HISTORY_SNAPSHOT_MAX_AGE_HOURS``, or when the delta would be
+more than half the size of the payload. Polls whose payload is identical to
+the last recorded state are not stored; the state at a time is the latest
+record at or before it.
+
+``raw_data_history_head`` holds the current snapshot and last delta of each
+serial, so recording a batch of devices takes one lookup instead of scanning
+the history.
+
+Diff format (keys only appear when non-empty)::
+
+    {"set": {key: new value}, "unset": [removed key, ...], "patch": {key: nested diff}}
+"""
+
+import copy
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import psycopg2
+from psycopg2.extras import Json
+
+from app.config import Config
+from app.database import get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def ensure_raw_history_tables() -> bool:
+    """
+    Create the raw payload history tables if they don't exist
+
+    Returns:
+        bool: True if successful, False if an error occurred
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS raw_data_history (
+                    id BIGSERIAL PRIMARY KEY,
+                    serial_number TEXT NOT NULL,
+                    recorded_at TIMESTAMP NOT NULL,
+                    kind TEXT NOT NULL CHECK (kind IN ('snapshot', 'delta')),
+                    snapshot_id BIGINT REFERENCES raw_data_history (id) ON DELETE CASCADE,
+                    data JSONB NOT NULL
+                )
+            """)
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_raw_data_history_sn_time '
+                'ON raw_data_history(serial_number, recorded_at DESC, id DESC)'
+            )
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS raw_data_history_head (
+                    serial_number TEXT PRIMARY KEY,
+                    snapshot_id BIGINT NOT NULL,
+                    snapshot_at TIMESTAMP NOT NULL,
+                    snapshot JSONB NOT NULL,
+                    delta_count INTEGER NOT NULL DEFAULT 0,
+                    last_delta JSONB
+                )
+            """)
+
+            conn.commit()
+            logger.info("Raw data history tables verified/created successfully")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error creating raw data history tables: {e}")
+        return False
+
+
+def json_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute the diff that turns one JSON object into another
+
+    Args:
+        old: Base object
+        new: Target object
+
+    Returns:
+        Dict[str, Any]: Diff in the module's format (empty if the objects are equal)
+    """
+    diff: Dict[str, Any] = {}
+    for key, value in new.items():
+        if key not in old:
+            diff.setdefault('set', {})[key] = value
+        elif old[key] != value:
+            if isinstance(old[key], dict) and isinstance(value, dict):
+                diff.setdefault('patch', {})[key] = json_diff(old[key], value)
+            else:
+                diff.setdefault('set', {})[key] = value
+
+    removed = [key for key in old if key not in new]
+    if removed:
+        diff['unset'] = removed
+    return diff
+
+
+def apply_diff(base: Dict[str, Any], diff: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply a diff produced by json_diff
+
+    Args:
+        base: Object the diff was computed against (not modified)
+        diff: Diff to apply
+
+    Returns:
+        Dict[str, Any]: The target object
+    """
+    result = dict(base)
+    for key, value in diff.get('set', {}).items():
+        result[key] = copy.deepcopy(value)
+    for key in diff.get('unset', []):
+        result.pop(key, None)
+    for key, nested in diff.get('patch', {}).items():
+        result[key] = apply_diff(result.get(key) or {}, nested)
+    return result
+
+
+def _needs_snapshot(head: Optional[Dict[str, Any]], diff: Dict[str, Any],
+                    payload: Dict[str, Any], recorded_at: datetime) -> bool:
+    """Decide whether a payload is stored as a new snapshot instead of a delta"""
+    if head is None:
+        return True
+    if head['delta_count'] >= Config.RAW_DATA_HISTORY_SNAPSHOT_EVERY:
+        return True
+    if recorded_at - head['snapshot_at'] >= timedelta(hours=Config.RAW_DATA_HISTORY_SNAPSHOT_MAX_AGE_HOURS):
+        return True
+    return len(json.dumps(diff, default=str)) * 2 > len(json.dumps(payload, default=str))
+
+
+def record_raw_data(cursor,
+                    payloads: Iterable[Tuple[str, Dict[str, Any]]],
+                    recorded_at: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Record raw payloads in the delta-encoded history
+
+    Runs inside the caller's transaction, next to the device upserts.
+
+    Args:
+        cursor: Database cursor
+        payloads: (serial_number, raw payload) pairs
+        recorded_at: Time of the poll (default: now)
+
+    Returns:
+        Dict[str, int]: Number of snapshots, deltas and unchanged payloads
+    """
+    recorded_at = recorded_at or datetime.now()
+    payloads = [(sn, payload) for sn, payload in payloads if sn and isinstance(payload, dict)]
+    counts = {'snapshots': 0, 'deltas': 0, 'unchanged': 0}
+    if not payloads:
+        return counts
+
+    cursor.execute(
+        "SELECT * FROM raw_data_history_head WHERE serial_number = ANY(%s) FOR UPDATE",
+        ([sn for sn, _ in payloads],)
+    )
+    heads = {row['serial_number']: row for row in cursor.fetchall()}
+
+    for serial_number, payload in payloads:
+        head = heads.get(serial_number)
+        diff = json_diff(head['snapshot'], payload) if head else None
+
+        if head and diff == (head['last_delta'] or {}):
+            counts['unchanged'] += 1
+            continue
+
+        if _needs_snapshot(head, diff, payload, recorded_at):
+            cursor.execute(
+                """
+                INSERT INTO raw_data_history (serial_number, recorded_at, kind, data)
+                VALUES (%s, %s, 'snapshot', %s)
+                RETURNING id
+                """,
+                (serial_number, recorded_at, Json(payload))
+            )
+            snapshot_id = cursor.fetchone()['id']
+            cursor.execute(
+                """
+                INSERT INTO raw_data_history_head
+                (serial_number, snapshot_id, snapshot_at, snapshot, delta_count, last_delta)
+                VALUES (%s, %s, %s, %s, 0, NULL)
+                ON CONFLICT (serial_number) DO UPDATE
+                SET snapshot_id = EXCLUDED.snapshot_id,
+                    snapshot_at = EXCLUDED.snapshot_at,
+                    snapshot = EXCLUDED.snapshot,
+                    delta_count = 0,
+                    last_delta = NULL
+                """,
+                (serial_number, snapshot_id, recorded_at, Json(payload))
+            )
+            heads[serial_number] = {'snapshot_id': snapshot_id, 'snapshot_at': recorded_at,
+                                    'snapshot': payload, 'delta_count': 0, 'last_delta': None}
+            counts['snapshots'] += 1
+        else:
+            cursor.execute(
+                """
+                INSERT INTO raw_data_history (serial_number, recorded_at, kind, snapshot_id, data)
+                VALUES (%s, %s, 'delta', %s, %s)
+                """,
+                (serial_number, recorded_at, head['snapshot_id'], Json(diff))
+            )
+            cursor.execute(
+                """
+                UPDATE raw_data_history_head
+                SET delta_count = delta_count + 1, last_delta = %s
+                WHERE serial_number = %s
+                """,
+                (Json(diff), serial_number)
+            )
+            head['delta_count'] += 1
+            head['last_delta'] = diff
+            counts['deltas'] += 1
+
+    return counts
+
+
+def get_raw_data_at(serial_number: str, at: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """
+    Reconstruct a device's raw payload as it was at a given time
+
+    Args:
+        serial_number: Device serial number
+        at: Point in time (default: latest recorded state)
+
+    Returns:
+        Dict with 'recorded_at' (time of the record in effect) and 'raw_data',
+        or None if nothing was recorded before that time
+    """
+    try:
+        with get_db_connection(replica=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT h.recorded_at, h.kind, h.data, s.data AS snapshot
+                FROM raw_data_history h
+                LEFT JOIN raw_data_history s ON s.id = h.snapshot_id
+                WHERE h.serial_number = %s AND h.recorded_at <= %s
+                ORDER BY h.recorded_at DESC, h.id DESC
+                LIMIT 1
+                """,
+                (serial_number, at or datetime.max)
+            )
+            row = cursor.fetchone()
+
+    except psycopg2.Error as e:
+        logger.error(f"PostgreSQL error reconstructing raw data for {serial_number}: {e}")
+        return None
+
+    if row is None:
+        return None
+
+    raw_data = row['data'] if row['kind'] == 'snapshot' else apply_diff(row['snapshot'], row['data'])
+    return {'recorded_at': row['recorded_at'], 'raw_data': raw_data}
+
+
+def get_raw_data_history(serial_number: str, start: datetime, end: datetime) -> List[Dict[str, Any]]:
+    """
+    Reconstruct every recorded payload of a device in a time range
+
+    Args:
+        serial_number: Device serial number
+        start: Start of the range (inclusive)
+        end: End of the range (exclusive)
+
+    Returns:
+        List of dicts with 'recorded_at' and 'raw_data', oldest first
+    """
+    try:
+        with get_db_connection(replica=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT id, recorded_at, kind, snapshot_id, data
+                FROM raw_data_history
+                WHERE serial_number = %s AND recorded_at >= %s AND recorded_at < %s
+                ORDER BY recorded_at, id
+                """,
+                (serial_number, start, end)
+            )
+            rows = cursor.fetchall()
+
+            # Deltas at the start of the range may refer to a snapshot recorded before it
+            snapshots = {row['id']: row['data'] for row in rows if row['kind'] == 'snapshot'}
+            missing = list({row['snapshot_id'] for row in rows if row['kind'] == 'delta'} - snapshots.keys())
+            if missing:
+                cursor.execute("SELECT id, data FROM raw_data_history WHERE id = ANY(%s)", (missing,))
+                snapshots.update((row['id'], row['data']) for row in cursor.fetchall())
+
+    except psycopg2.Error as e:
+        logger.error(f"PostgreSQL error loading raw data history for {serial_number}: {e}")
+        return []
+
+    return [
+        {
+            'recorded_at': row['recorded_at'],
+            'raw_data': row['data'] if row['kind'] == 'snapshot' else apply_diff(snapshots[row['snapshot_id']], row['data']),
+        }
+        for row in rows
+    ]
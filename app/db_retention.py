@@ -0,0 +1,399 @@
+"""
+Retention and downsampling for time-series tables
+
+Raw rows in the high-volume history tables are kept for a configurable number
+of days (``Config.RETENTION_*_DAYS``). Older rows are first summarized into a
+coarser aggregate table and then deleted in small batches:
+
+    device_data          -> device_data_hourly          (per device, hour)
+    inverter_history     -> inverter_history_hourly     (per inverter, hour)
+    inverter_details     -> inverter_details_daily      (per inverter, day)
+    notification_history -> notification_history_daily  (per device and type, day)
+    weather_data         -> weather_data_monthly        (per plant, month)
+
+The cutoff is aligned to the aggregate bucket size, so a bucket is always
+summarized from all of its raw rows. Aggregates are written with
+``ON CONFLICT DO NOTHING``: a run interrupted between downsampling and
+deleting never overwrites a complete bucket with the rows that are left.
+
+Each delete batch is its own short transaction with a ``lock_timeout`` and
+skips rows locked by writers, so retention can run next to the collectors.
+
+When the cold archive is enabled (see app/db_archive.py), rows of closed months
+that are not archived yet are kept regardless of their age.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+import psycopg2
+
+from app.config import Config
+from app.database import get_db_connection
+from app.db_rollups import truncate_bucket
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+RETENTION_POLICIES: Dict[str, Dict[str, str]] = {
+    'device_data': {
+        'time_column': 'collected_at',
+        'days_setting': 'RETENTION_DEVICE_DATA_DAYS',
+        'granularity': 'hour',
+        'bucket_key': "device_serial_number, date_trunc('hour', collected_at)",
+        'aggregate_table': 'device_data_hourly',
+        'downsample': """
+            INSERT INTO device_data_hourly
+            (device_serial_number, bucket, energy_today, energy_total, avg_ac_power, max_ac_power, sample_count)
+            SELECT device_serial_number, date_trunc('hour', collected_at),
+                   MAX(energy_today), MAX(energy_total), AVG(ac_power), MAX(ac_power), COUNT(*)
+            FROM device_data
+            WHERE collected_at < %s
+            GROUP BY device_serial_number, date_trunc('hour', collected_at)
+            ON CONFLICT (device_serial_number, bucket) DO NOTHING
+        """,
+    },
+    'inverter_history': {
+        'time_column': 'timestamp',
+        'days_setting': 'RETENTION_INVERTER_HISTORY_DAYS',
+        'granularity': 'hour',
+        'bucket_key': "serial_number, date_trunc('hour', timestamp)",
+        'aggregate_table': 'inverter_history_hourly',
+        'downsample': """
+            INSERT INTO inverter_history_hourly
+            (serial_number, plant_id, bucket, avg_dc_power_1, avg_dc_power_2, avg_ac_voltage,
+             avg_ac_frequency, avg_ac_power, max_ac_power, avg_temperature, max_temperature,
+             energy, sample_count)
+            SELECT serial_number, MAX(plant_id), date_trunc('hour', timestamp),
+                   AVG(dc_power_1), AVG(dc_power_2), AVG(ac_voltage),
+                   AVG(ac_frequency), AVG(ac_power), MAX(ac_power), AVG(temperature), MAX(temperature),
+                   MAX(energy), COUNT(*)
+            FROM inverter_history
+            WHERE timestamp < %s
+            GROUP BY serial_number, date_trunc('hour', timestamp)
+            ON CONFLICT (serial_number, bucket) DO NOTHING
+        """,
+    },
+    'inverter_details': {
+        'time_column': 'collected_at',
+        'days_setting': 'RETENTION_INVERTER_DETAILS_DAYS',
+        'granularity': 'day',
+        'bucket_key': "serial_number, date_trunc('day', collected_at)",
+        'aggregate_table': 'inverter_details_daily',
+        'downsample': """
+            INSERT INTO inverter_details_daily
+            (serial_number, plant_id, bucket, daily_energy, total_energy, avg_ac_power, max_ac_power,
+             avg_temperature, max_temperature, sample_count)
+            SELECT serial_number, MAX(plant_id), date_trunc('day', collected_at),
+                   MAX(daily_energy), MAX(total_energy), AVG(ac_power), MAX(ac_power),
+                   AVG(temperature), MAX(temperature), COUNT(*)
+            FROM inverter_details
+            WHERE collected_at < %s
+            GROUP BY serial_number, date_trunc('day', collected_at)
+            ON CONFLICT (serial_number, bucket) DO NOTHING
+        """,
+    },
+    'notification_history': {
+        'time_column': 'sent_at',
+        'days_setting': 'RETENTION_NOTIFICATION_HISTORY_DAYS',
+        'granularity': 'day',
+        'bucket_key': "device_serial_number, notification_type, date_trunc('day', sent_at)",
+        'aggregate_table': 'notification_history_daily',
+        'downsample': """
+            INSERT INTO notification_history_daily
+            (device_serial_number, notification_type, bucket, sent_count, failed_count)
+            SELECT device_serial_number, notification_type, date_trunc('day', sent_at),
+                   COUNT(*) FILTER (WHERE success), COUNT(*) FILTER (WHERE NOT success)
+            FROM notification_history
+            WHERE sent_at < %s
+            GROUP BY device_serial_number, notification_type, date_trunc('day', sent_at)
+            ON CONFLICT (device_serial_number, notification_type, bucket) DO NOTHING
+        """,
+    },
+    'weather_data': {
+        'time_column': 'date::date',
+        'days_setting': 'RETENTION_WEATHER_DATA_DAYS',
+        'granularity': 'month',
+        'bucket_key': "plant_id, date_trunc('month', date::date)",
+        'aggregate_table': 'weather_data_monthly',
+        'downsample': """
+            INSERT INTO weather_data_monthly
+            (plant_id, bucket, avg_temperature, min_temperature, max_temperature, condition, day_count)
+            SELECT plant_id, date_trunc('month', date::date),
+                   AVG(temperature), MIN(temperature), MAX(temperature),
+                   mode() WITHIN GROUP (ORDER BY condition), COUNT(*)
+            FROM weather_data
+            WHERE date::date < %s
+            GROUP BY plant_id, date_trunc('month', date::date)
+            ON CONFLICT (plant_id, bucket) DO NOTHING
+        """,
+    },
+}
+
+
+def ensure_retention_tables() -> bool:
+    """
+    Create the downsampled aggregate tables if they don't exist
+
+    Returns:
+        bool: True if successful, False if an error occurred
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS device_data_hourly (
+                    device_serial_number TEXT NOT NULL,
+                    bucket TIMESTAMP NOT NULL,
+                    energy_today REAL,
+                    energy_total REAL,
+                    avg_ac_power REAL,
+                    max_ac_power REAL,
+                    sample_count INTEGER NOT NULL,
+                    PRIMARY KEY (device_serial_number, bucket)
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS inverter_history_hourly (
+                    serial_number TEXT NOT NULL,
+                    plant_id TEXT,
+                    bucket TIMESTAMP NOT NULL,
+                    avg_dc_power_1 REAL,
+                    avg_dc_power_2 REAL,
+                    avg_ac_voltage REAL,
+                    avg_ac_frequency REAL,
+                    avg_ac_power REAL,
+                    max_ac_power REAL,
+                    avg_temperature REAL,
+                    max_temperature REAL,
+                    energy REAL,
+                    sample_count INTEGER NOT NULL,
+                    PRIMARY KEY (serial_number, bucket)
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS inverter_details_daily (
+                    serial_number TEXT NOT NULL,
+                    plant_id TEXT,
+                    bucket TIMESTAMP NOT NULL,
+                    daily_energy REAL,
+                    total_energy REAL,
+                    avg_ac_power REAL,
+                    max_ac_power REAL,
+                    avg_temperature REAL,
+                    max_temperature REAL,
+                    sample_count INTEGER NOT NULL,
+                    PRIMARY KEY (serial_number, bucket)
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS notification_history_daily (
+                    device_serial_number TEXT NOT NULL,
+                    notification_type TEXT NOT NULL,
+                    bucket TIMESTAMP NOT NULL,
+                    sent_count INTEGER NOT NULL,
+                    failed_count INTEGER NOT NULL,
+                    PRIMARY KEY (device_serial_number, notification_type, bucket)
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS weather_data_monthly (
+                    plant_id TEXT NOT NULL,
+                    bucket TIMESTAMP NOT NULL,
+                    avg_temperature REAL,
+                    min_temperature REAL,
+                    max_temperature REAL,
+                    condition TEXT,
+                    day_count INTEGER NOT NULL,
+                    PRIMARY KEY (plant_id, bucket)
+                )
+            """)
+
+            conn.commit()
+            logger.info("Retention aggregate tables verified/created successfully")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error creating retention aggregate tables: {e}")
+        return False
+
+
+def retention_cutoff(table: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Get the time before which raw rows of a table are downsampled and deleted
+
+    Args:
+        table: Table with a retention policy
+        now: Reference time (default: current local time)
+
+    Returns:
+        datetime: Cutoff aligned to the aggregate bucket, or None if retention is disabled
+    """
+    policy = RETENTION_POLICIES[table]
+    days = getattr(Config, policy['days_setting'])
+    if days <= 0:
+        return None
+    return truncate_bucket((now or datetime.now()) - timedelta(days=days), policy['granularity'])
+
+
+def _table_exists(table: str) -> bool:
+    """Check whether a table exists (some history tables are created by the collector scripts)"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL AS present", (table,))
+        return cursor.fetchone()['present']
+
+
+def _dry_run_table(table: str, cutoff: datetime, batch_size: int) -> Dict[str, Any]:
+    """Report what a retention run would do to one table without changing anything"""
+    policy = RETENTION_POLICIES[table]
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT COUNT(*) AS rows, COUNT(DISTINCT ({policy['bucket_key']})) AS buckets,
+                   MIN({policy['time_column']}) AS oldest
+            FROM {table}
+            WHERE {policy['time_column']} < %s
+        """, (cutoff,))
+        row = cursor.fetchone()
+
+    return {
+        'rows_to_delete': row['rows'],
+        'buckets_to_downsample': row['buckets'],
+        'oldest': row['oldest'].isoformat() if row['oldest'] else None,
+        'batches': -(-row['rows'] // batch_size),
+    }
+
+
+def _downsample_table(table: str, cutoff: datetime) -> int:
+    """Write aggregates for all buckets older than the cutoff; returns the number of new buckets"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(RETENTION_POLICIES[table]['downsample'], (cutoff,))
+        written = cursor.rowcount
+        conn.commit()
+    return written
+
+
+def _delete_batch(table: str, cutoff: datetime, batch_size: int) -> int:
+    """Delete one batch of raw rows older than the cutoff in its own short transaction"""
+    time_column = RETENTION_POLICIES[table]['time_column']
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT set_config('lock_timeout', %s, true)", (f"{Config.RETENTION_LOCK_TIMEOUT_MS}ms",))
+        # ctid lookups keep each batch an index range scan plus a TID scan, whatever the table's keys
+        cursor.execute(f"""
+            DELETE FROM {table}
+            WHERE ctid = ANY(ARRAY(
+                SELECT ctid FROM {table}
+                WHERE {time_column} < %s
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            ))
+        """, (cutoff, batch_size))
+        deleted = cursor.rowcount
+        conn.commit()
+    return deleted
+
+
+def prune_table(table: str, cutoff: datetime, batch_size: int,
+                max_batches: Optional[int] = None) -> int:
+    """
+    Delete raw rows older than the cutoff in bounded batches
+
+    Args:
+        table: Table with a retention policy
+        cutoff: Rows older than this are deleted
+        batch_size: Rows deleted per transaction
+        max_batches: Stop after this many batches (optional)
+
+    Returns:
+        int: Number of rows deleted
+    """
+    deleted = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        count = _delete_batch(table, cutoff, batch_size)
+        deleted += count
+        batches += 1
+        if count < batch_size:
+            break
+        time.sleep(Config.RETENTION_BATCH_PAUSE)
+    return deleted
+
+
+def apply_retention(dry_run: bool = False,
+                    tables: Optional[Iterable[str]] = None,
+                    batch_size: Optional[int] = None,
+                    max_batches: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Downsample and prune the time-series tables according to their policies
+
+    Args:
+        dry_run: Only report what would be downsampled and deleted
+        tables: Tables to process (default: all tables with a policy)
+        batch_size: Rows deleted per transaction (default: Config.RETENTION_BATCH_SIZE)
+        max_batches: Maximum delete batches per table (optional)
+
+    Returns:
+        Dict[str, Dict[str, Any]]: Report per table
+    """
+    batch_size = batch_size or Config.RETENTION_BATCH_SIZE
+    report = {}
+
+    for table in tables or RETENTION_POLICIES:
+        if table not in RETENTION_POLICIES:
+            raise ValueError(f"No retention policy for table: {table}")
+
+        policy = RETENTION_POLICIES[table]
+        cutoff = retention_cutoff(table)
+        entry = {
+            'retention_days': getattr(Config, policy['days_setting']),
+            'aggregate_table': policy['aggregate_table'],
+            'cutoff': cutoff.isoformat() if cutoff else None,
+        }
+        report[table] = entry
+
+        if cutoff is None:
+            entry['skipped'] = 'retention disabled'
+            continue
+
+        started = time.monotonic()
+        try:
+            if not _table_exists(table):
+                entry['skipped'] = 'table not found'
+                continue
+
+            if Config.ARCHIVE_ENABLED:
+                # Never prune rows of a closed month before it has been archived
+                from app.db_archive import ARCHIVE_TABLES, pending_months
+                if table in ARCHIVE_TABLES:
+                    pending = pending_months(table, settled_only=False)
+                    if pending and pending[0] < cutoff:
+                        cutoff = pending[0]
+                        entry['cutoff'] = cutoff.isoformat()
+                        entry['held_for_archive'] = True
+
+            if dry_run:
+                entry.update(_dry_run_table(table, cutoff, batch_size))
+                continue
+
+            entry['buckets_downsampled'] = _downsample_table(table, cutoff)
+            entry['rows_deleted'] = prune_table(table, cutoff, batch_size, max_batches)
+            logger.info(f"Retention for {table}: downsampled {entry['buckets_downsampled']} buckets, "
+                        f"deleted {entry['rows_deleted']} rows older than {cutoff:%Y-%m-%d %H:%M}")
+        except psycopg2.Error as e:
+            # A lock timeout or other failure leaves the remaining rows for the next run
+            logger.error(f"Error applying retention to {table}: {e}")
+            entry['error'] = str(e).strip()
+        finally:
+            entry['duration_seconds'] = round(time.monotonic() - started, 3)
+
+    return report
@@ -0,0 +1,466 @@
+"""
+Energy rollup tables for hourly, daily and monthly reporting
+
+Reports and dashboard charts read pre-aggregated energy per device and per
+plant from these tables instead of re-aggregating raw rows on every run.
+
+Rollups are maintained incrementally: each collection batch recomputes only
+the (device, bucket) keys it touched and then the plant buckets those devices
+belong to. Every refresh recomputes a key from its source rows, so re-saving
+the same raw data is idempotent. ``rebuild_energy_rollups`` recomputes
+every bucket whose raw rows are still present (or those since a given date)
+for repairs.
+
+Sources:
+    hour  - inverter_history (energy is estimated from average AC power)
+    day   - energy_stats (daily_energy / peak_power as reported by Growatt)
+    month - daily device rollups
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+import psycopg2
+
+from app.database import get_db_connection
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day', 'month')
+
+DeviceKey = Tuple[str, datetime]
+PlantKey = Tuple[str, datetime]
+
+ROLLUP_DEVICE_UPSERT = """
+    ON CONFLICT (granularity, serial_number, bucket) DO UPDATE
+    SET plant_id = EXCLUDED.plant_id,
+        energy = EXCLUDED.energy,
+        avg_power = EXCLUDED.avg_power,
+        peak_power = EXCLUDED.peak_power,
+        sample_count = EXCLUDED.sample_count,
+        last_updated = NOW()
+    RETURNING plant_id, bucket
+"""
+
+ROLLUP_PLANT_UPSERT = """
+    ON CONFLICT (granularity, plant_id, bucket) DO UPDATE
+    SET energy = EXCLUDED.energy,
+        avg_power = EXCLUDED.avg_power,
+        device_count = EXCLUDED.device_count,
+        last_updated = NOW()
+"""
+
+
+def ensure_rollup_tables() -> bool:
+    """
+    Create the energy rollup tables if they don't exist
+
+    Returns:
+        bool: True if successful, False if an error occurred
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS energy_rollup_device (
+                    serial_number TEXT NOT NULL,
+                    plant_id TEXT NOT NULL,
+                    granularity TEXT NOT NULL,
+                    bucket TIMESTAMP NOT NULL,
+                    energy REAL,
+                    avg_power REAL,
+                    peak_power REAL,
+                    sample_count INTEGER,
+                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (granularity, serial_number, bucket)
+                )
+            """)
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS energy_rollup_plant (
+                    plant_id TEXT NOT NULL,
+                    granularity TEXT NOT NULL,
+                    bucket TIMESTAMP NOT NULL,
+                    energy REAL,
+                    avg_power REAL,
+                    device_count INTEGER,
+                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (granularity, plant_id, bucket)
+                )
+            """)
+
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_rollup_device_plant '
+                'ON energy_rollup_device(granularity, plant_id, bucket)'
+            )
+            cursor.execute(
+                'CREATE INDEX IF NOT EXISTS idx_rollup_plant_bucket '
+                'ON energy_rollup_plant(granularity, bucket)'
+            )
+
+            conn.commit()
+            logger.info("Energy rollup tables verified/created successfully")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error creating energy rollup tables: {e}")
+        return False
+
+
+def _to_datetime(value: Union[str, date, datetime]) -> datetime:
+    """Normalize a date, datetime or 'YYYY-MM-DD[ HH:MM:SS]' string to a datetime"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d')
+
+
+def truncate_bucket(value: Union[str, date, datetime], granularity: str) -> datetime:
+    """
+    Truncate a timestamp to the start of its rollup bucket
+
+    Args:
+        value: Date, datetime or date string
+        granularity: One of 'hour', 'day' or 'month'
+
+    Returns:
+        datetime: Start of the bucket containing value
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Invalid rollup granularity: {granularity}")
+
+    if isinstance(value, str) and granularity == 'hour':
+        value = datetime.strptime(value[:19], '%Y-%m-%d %H:%M:%S')
+    ts = _to_datetime(value)
+
+    if granularity == 'hour':
+        return ts.replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+    return ts.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _unzip(keys: Iterable[Tuple[str, datetime]]) -> Tuple[List[str], List[datetime]]:
+    """Split (id, bucket) keys into two parallel lists for unnest()"""
+    ids, buckets = [], []
+    for key_id, bucket in sorted(set(keys)):
+        ids.append(key_id)
+        buckets.append(bucket)
+    return ids, buckets
+
+
+def _refresh_hour(cursor, keys: Set[DeviceKey]) -> Set[PlantKey]:
+    """Recompute hourly device rollups from inverter_history"""
+    serials, buckets = _unzip(keys)
+    cursor.execute("""
+        INSERT INTO energy_rollup_device
+        (serial_number, plant_id, granularity, bucket, energy, avg_power, peak_power, sample_count, last_updated)
+        SELECT h.serial_number, MAX(h.plant_id), 'hour', k.bucket,
+               AVG(h.ac_power) / 1000.0, AVG(h.ac_power), MAX(h.ac_power), COUNT(*), NOW()
+        FROM unnest(%s::text[], %s::timestamp[]) AS k(serial_number, bucket)
+        JOIN inverter_history h
+          ON h.serial_number = k.serial_number
+         AND h.timestamp >= k.bucket
+         AND h.timestamp < k.bucket + INTERVAL '1 hour'
+        GROUP BY h.serial_number, k.bucket
+    """ + ROLLUP_DEVICE_UPSERT, (serials, buckets))
+    return {(row['plant_id'], row['bucket']) for row in cursor.fetchall()}
+
+
+def _refresh_day(cursor, keys: Set[DeviceKey]) -> Set[PlantKey]:
+    """Recompute daily device rollups from energy_stats"""
+    serials, buckets = _unzip(keys)
+    # energy_stats.date is TEXT and may hold either 'YYYY-MM-DD' or a full
+    # timestamp string, so MAX() collapses both spellings of the same day
+    cursor.execute("""
+        INSERT INTO energy_rollup_device
+        (serial_number, plant_id, granularity, bucket, energy, avg_power, peak_power, sample_count, last_updated)
+        SELECT e.mix_sn, MAX(e.plant_id), 'day', k.bucket,
+               MAX(e.daily_energy), NULL, MAX(e.peak_power), COUNT(*), NOW()
+        FROM unnest(%s::text[], %s::timestamp[]) AS k(serial_number, bucket)
+        JOIN energy_stats e
+          ON e.mix_sn = k.serial_number
+         AND e.date::date = k.bucket::date
+        GROUP BY e.mix_sn, k.bucket
+    """ + ROLLUP_DEVICE_UPSERT, (serials, buckets))
+    return {(row['plant_id'], row['bucket']) for row in cursor.fetchall()}
+
+
+def _refresh_month(cursor, keys: Set[DeviceKey]) -> Set[PlantKey]:
+    """Recompute monthly device rollups from daily device rollups"""
+    serials, buckets = _unzip(keys)
+    cursor.execute("""
+        INSERT INTO energy_rollup_device
+        (serial_number, plant_id, granularity, bucket, energy, avg_power, peak_power, sample_count, last_updated)
+        SELECT d.serial_number, MAX(d.plant_id), 'month', k.bucket,
+               SUM(d.energy), NULL, MAX(d.peak_power), SUM(d.sample_count), NOW()
+        FROM unnest(%s::text[], %s::timestamp[]) AS k(serial_number, bucket)
+        JOIN energy_rollup_device d
+          ON d.granularity = 'day'
+         AND d.serial_number = k.serial_number
+         AND d.bucket >= k.bucket
+         AND d.bucket < k.bucket + INTERVAL '1 month'
+        GROUP BY d.serial_number, k.bucket
+    """ + ROLLUP_DEVICE_UPSERT, (serials, buckets))
+    return {(row['plant_id'], row['bucket']) for row in cursor.fetchall()}
+
+
+def _refresh_plant(cursor, granularity: str, keys: Set[PlantKey]) -> None:
+    """Recompute plant rollups for the given buckets from device rollups"""
+    plant_ids, buckets = _unzip(keys)
+    cursor.execute("""
+        INSERT INTO energy_rollup_plant
+        (plant_id, granularity, bucket, energy, avg_power, device_count, last_updated)
+        SELECT d.plant_id, d.granularity, d.bucket,
+               SUM(d.energy), SUM(d.avg_power), COUNT(*), NOW()
+        FROM unnest(%s::text[], %s::timestamp[]) AS k(plant_id, bucket)
+        JOIN energy_rollup_device d
+          ON d.granularity = %s
+         AND d.plant_id = k.plant_id
+         AND d.bucket = k.bucket
+        GROUP BY d.plant_id, d.granularity, d.bucket
+    """ + ROLLUP_PLANT_UPSERT, (plant_ids, buckets, granularity))
+
+
+def update_energy_rollups(cursor,
+                          hour_keys: Optional[Iterable[Tuple[str, Any]]] = None,
+                          day_keys: Optional[Iterable[Tuple[str, Any]]] = None) -> bool:
+    """
+    Incrementally refresh rollups for the raw rows touched by a collection batch.
+
+    Runs inside the caller's transaction under a savepoint, so a failing rollup
+    refresh never discards the raw data being saved; run a rebuild to repair.
+
+    Args:
+        cursor: Cursor of the transaction that saved the raw rows
+        hour_keys: (serial_number, timestamp) pairs written to inverter_history
+        day_keys: (serial_number, date) pairs written to energy_stats
+
+    Returns:
+        bool: True if the rollups were refreshed, False otherwise
+    """
+    hours = {(sn, truncate_bucket(ts, 'hour')) for sn, ts in (hour_keys or [])}
+    days = {(sn, truncate_bucket(d, 'day')) for sn, d in (day_keys or [])}
+    if not hours and not days:
+        return True
+
+    try:
+        cursor.execute("SAVEPOINT energy_rollups")
+
+        if hours:
+            _refresh_plant(cursor, 'hour', _refresh_hour(cursor, hours))
+
+        if days:
+            _refresh_plant(cursor, 'day', _refresh_day(cursor, days))
+            months = {(sn, truncate_bucket(d, 'month')) for sn, d in days}
+            _refresh_plant(cursor, 'month', _refresh_month(cursor, months))
+
+        cursor.execute("RELEASE SAVEPOINT energy_rollups")
+        logger.debug(f"Refreshed energy rollups for {len(hours)} hourly and {len(days)} daily device keys")
+        return True
+
+    except psycopg2.Error as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT energy_rollups")
+        logger.error(f"PostgreSQL error updating energy rollups (run a rebuild to repair): {e}")
+        return False
+
+
+def _ceil_bucket(value: datetime, granularity: str) -> datetime:
+    """Start of the first bucket that begins at or after value"""
+    bucket = truncate_bucket(value, granularity)
+    if bucket == value:
+        return bucket
+    if granularity == 'hour':
+        return bucket + timedelta(hours=1)
+    if granularity == 'day':
+        return bucket + timedelta(days=1)
+    return datetime(bucket.year + bucket.month // 12, bucket.month % 12 + 1, 1)
+
+
+def _oldest_complete_raw(cursor, table: str, time_expr: str) -> Optional[datetime]:
+    """
+    Start of the oldest raw data that is still complete in the database
+
+    Retention prunes old raw rows and the cold archive (app/db_archive.py)
+    moves closed months out, so only data after the oldest remaining row and
+    after the newest archived month can be recomputed.
+    """
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL AS present", (table,))
+    if not cursor.fetchone()['present']:
+        return None
+    cursor.execute(f"SELECT MIN({time_expr}) AS oldest FROM {table}")
+    oldest = cursor.fetchone()['oldest']
+    if oldest is None:
+        return None
+    oldest = _to_datetime(oldest)
+
+    from app.db_archive import ARCHIVE_TABLES, archived_months, next_month
+    if table in ARCHIVE_TABLES:
+        archived = archived_months(table)
+        if archived:
+            oldest = max(oldest, next_month(archived[-1]))
+    return oldest
+
+
+def rebuild_energy_rollups(since: Optional[Union[str, date]] = None) -> Dict[str, int]:
+    """
+    Rebuild the rollup tables from raw data.
+
+    Only buckets whose raw rows are all still in the database are rebuilt:
+    hourly buckets from the oldest complete hour of inverter_history, daily
+    ones from the oldest energy_stats day and monthly ones from the first
+    complete month after it. Older rollups, whose raw rows have been pruned
+    or archived, are left untouched. A granularity without raw rows is not
+    rebuilt at all.
+
+    Args:
+        since: Only rebuild buckets starting on or after this date (optional)
+
+    Returns:
+        Dict[str, int]: Number of device rollup rows written per granularity
+    """
+    floor = truncate_bucket(since, 'month') if since else None
+    counts = {granularity: 0 for granularity in GRANULARITIES}
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        starts: Dict[str, Optional[datetime]] = {}
+        oldest_hour = _oldest_complete_raw(cursor, 'inverter_history', 'timestamp')
+        starts['hour'] = _ceil_bucket(oldest_hour, 'hour') if oldest_hour else None
+        oldest_day = _oldest_complete_raw(cursor, 'energy_stats', 'date::date')
+        starts['day'] = _ceil_bucket(oldest_day, 'day') if oldest_day else None
+        starts['month'] = _ceil_bucket(starts['day'], 'month') if starts['day'] else None
+        if floor:
+            starts = {g: max(start, floor) if start else None for g, start in starts.items()}
+
+        for granularity, start in starts.items():
+            if start is None:
+                logger.info(f"No raw data for {granularity} rollups, leaving them untouched")
+                continue
+            cursor.execute("DELETE FROM energy_rollup_device WHERE granularity = %s AND bucket >= %s",
+                           (granularity, start))
+            cursor.execute("DELETE FROM energy_rollup_plant WHERE granularity = %s AND bucket >= %s",
+                           (granularity, start))
+
+        if starts['hour']:
+            cursor.execute("""
+                INSERT INTO energy_rollup_device
+                (serial_number, plant_id, granularity, bucket, energy, avg_power, peak_power, sample_count, last_updated)
+                SELECT serial_number, MAX(plant_id), 'hour', date_trunc('hour', timestamp),
+                       AVG(ac_power) / 1000.0, AVG(ac_power), MAX(ac_power), COUNT(*), NOW()
+                FROM inverter_history
+                WHERE timestamp >= %s
+                GROUP BY serial_number, date_trunc('hour', timestamp)
+            """, (starts['hour'],))
+            counts['hour'] = cursor.rowcount
+
+        if starts['day']:
+            cursor.execute("""
+                INSERT INTO energy_rollup_device
+                (serial_number, plant_id, granularity, bucket, energy, avg_power, peak_power, sample_count, last_updated)
+                SELECT mix_sn, MAX(plant_id), 'day', date::date::timestamp,
+                       MAX(daily_energy), NULL, MAX(peak_power), COUNT(*), NOW()
+                FROM energy_stats
+                WHERE date::date >= %s::date
+                GROUP BY mix_sn, date::date
+            """, (starts['day'],))
+            counts['day'] = cursor.rowcount
+
+        if starts['month']:
+            cursor.execute("""
+                INSERT INTO energy_rollup_device
+                (serial_number, plant_id, granularity, bucket, energy, avg_power, peak_power, sample_count, last_updated)
+                SELECT serial_number, MAX(plant_id), 'month', date_trunc('month', bucket),
+                       SUM(energy), NULL, MAX(peak_power), SUM(sample_count), NOW()
+                FROM energy_rollup_device
+                WHERE granularity = 'day' AND bucket >= %s
+                GROUP BY serial_number, date_trunc('month', bucket)
+            """, (starts['month'],))
+            counts['month'] = cursor.rowcount
+
+        for granularity, start in starts.items():
+            if start is None:
+                continue
+            cursor.execute("""
+                INSERT INTO energy_rollup_plant
+                (plant_id, granularity, bucket, energy, avg_power, device_count, last_updated)
+                SELECT plant_id, granularity, bucket, SUM(energy), SUM(avg_power), COUNT(*), NOW()
+                FROM energy_rollup_device
+                WHERE granularity = %s AND bucket >= %s
+                GROUP BY plant_id, granularity, bucket
+            """, (granularity, start))
+
+        conn.commit()
+
+    logger.info(f"Rebuilt energy rollups from {({g: f'{s:%Y-%m-%d %H:%M}' if s else None for g, s in starts.items()})}: {counts}")
+
+    from app.db_maintenance import analyze_tables
+    analyze_tables(['energy_rollup_device', 'energy_rollup_plant'])
+    return counts
+
+
+def get_energy_rollups(granularity: str,
+                       start: Union[str, date, datetime],
+                       end: Union[str, date, datetime],
+                       level: str = 'device',
+                       plant_id: Optional[str] = None,
+                       serial_number: Optional[str] = None,
+                       use_replica: bool = True) -> List[Dict[str, Any]]:
+    """
+    Read rollup rows for a time range.
+
+    Args:
+        granularity: One of 'hour', 'day' or 'month'
+        start: Inclusive start of the range
+        end: Inclusive end of the range
+        level: 'device' for per-device rows, 'plant' for per-plant rows
+        plant_id: Filter by plant ID (optional)
+        serial_number: Filter by device serial number (device level only)
+        use_replica: Read from the replica when available (pass False right after a rebuild)
+
+    Returns:
+        List[Dict[str, Any]]: Rollup rows ordered by plant, device and bucket.
+        Device rows include alias, type and plant_name.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"Invalid rollup granularity: {granularity}")
+
+    params: List[Any] = [granularity, truncate_bucket(start, granularity), truncate_bucket(end, granularity)]
+
+    if level == 'plant':
+        query = """
+            SELECT r.plant_id, p.name AS plant_name, r.bucket, r.energy, r.avg_power, r.device_count
+            FROM energy_rollup_plant r
+            LEFT JOIN plants p ON r.plant_id = p.id
+            WHERE r.granularity = %s AND r.bucket BETWEEN %s AND %s
+        """
+        order_by = " ORDER BY r.plant_id, r.bucket"
+    else:
+        query = """
+            SELECT r.serial_number, r.plant_id, d.alias, d.type, p.name AS plant_name,
+                   r.bucket, r.energy, r.avg_power, r.peak_power, r.sample_count
+            FROM energy_rollup_device r
+            LEFT JOIN devices d ON r.serial_number = d.serial_number
+            LEFT JOIN plants p ON r.plant_id = p.id
+            WHERE r.granularity = %s AND r.bucket BETWEEN %s AND %s
+        """
+        order_by = " ORDER BY p.name, r.plant_id, d.alias, r.serial_number, r.bucket"
+        if serial_number:
+            query += " AND r.serial_number = %s"
+            params.append(serial_number)
+
+    if plant_id:
+        query += " AND r.plant_id = %s"
+        params.append(plant_id)
+
+    # Imported here because app.database runs migrations (which import this module) before defining it
+    from app.database import DatabaseConnector
+
+    # Dashboard and report reads; the connector falls back to the primary if the replica is unusable
+    return DatabaseConnector().query(query + order_by, tuple(params), use_replica=use_replica)
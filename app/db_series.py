@@ -0,0 +1,229 @@
+"""
+Packed storage for daily chart series
+
+``get_energy_stats_daily`` returns one chart array per series (ppv, pex,
+pcharge, ...) with a value every few minutes. Instead of one row per
+timestamp, each (device, date, series) is stored as a single ``REAL[]`` row in
+``chart_series_daily``, indexed by slot (minutes since midnight divided by the
+sampling interval). Missing samples are stored as NULL elements.
+
+``encode_series`` and ``decode_series`` convert between the API / database
+representations and float32 NumPy arrays, with NaN marking missing samples.
+
+The packed rows are the long-term store of day charts. The collector still
+writes per-timestamp ``inverter_history`` rows, which feed the hourly energy
+rollups, but retention summarizes them into ``inverter_history_hourly`` and
+deletes them after ``RETENTION_INVERTER_HISTORY_DAYS`` (14 by default).
+"""
+
+import logging
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+from app.database import get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Growatt day charts have one value every 5 minutes
+DEFAULT_INTERVAL_MINUTES = 5
+
+
+def ensure_series_table() -> bool:
+    """
+    Create the packed chart series table if it doesn't exist
+
+    Returns:
+        bool: True if successful, False if an error occurred
+    """
+    try:
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS chart_series_daily (
+                    serial_number TEXT NOT NULL,
+                    plant_id TEXT,
+                    date DATE NOT NULL,
+                    series TEXT NOT NULL,
+                    interval_minutes SMALLINT NOT NULL,
+                    "values" REAL[] NOT NULL,
+                    sample_count INTEGER NOT NULL,
+                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (serial_number, date, series)
+                )
+            """)
+
+            conn.commit()
+            logger.info("Chart series table verified/created successfully")
+            return True
+
+    except Exception as e:
+        logger.error(f"Error creating chart series table: {e}")
+        return False
+
+
+def _slot_of(time_str: str, interval_minutes: int) -> int:
+    """Convert an 'HH:MM' chart label to its slot index"""
+    hour, minute = str(time_str).split(':')[:2]
+    return (int(hour) * 60 + int(minute)) // interval_minutes
+
+
+def encode_series(points: Sequence[Any], interval_minutes: int = DEFAULT_INTERVAL_MINUTES) -> np.ndarray:
+    """
+    Convert one chart series into a fixed-length float32 array
+
+    Args:
+        points: Either a plain list of values (one per slot, starting at midnight)
+                or a list of [time 'HH:MM', value] pairs; values may be numbers,
+                numeric strings or None
+        interval_minutes: Sampling interval of the chart
+
+    Returns:
+        np.ndarray: float32 array with one element per slot of the day, NaN where missing
+
+    Raises:
+        ValueError: If a value, time label or [time, value] pair cannot be parsed
+    """
+    slots = (24 * 60) // interval_minutes
+    packed = np.full(slots, np.nan, dtype=np.float32)
+    if not points:
+        return packed
+
+    if isinstance(points[0], (list, tuple)):
+        for point in points:
+            if not isinstance(point, (list, tuple)) or len(point) < 2:
+                raise ValueError(f"Expected a [time, value] pair, got {point!r}")
+        indexes = np.fromiter((_slot_of(p[0], interval_minutes) for p in points), dtype=np.int64, count=len(points))
+        values = np.array([p[1] for p in points], dtype=object)
+    else:
+        indexes = np.arange(min(len(points), slots))
+        values = np.array(points[:slots], dtype=object)
+
+    values[np.equal(values, None)] = np.nan
+    in_day = (indexes >= 0) & (indexes < slots)
+    packed[indexes[in_day]] = values[in_day].astype(np.float32)
+    return packed
+
+
+def decode_series(values: Optional[Sequence[Optional[float]]]) -> np.ndarray:
+    """
+    Convert a stored REAL[] value into a float32 array
+
+    Args:
+        values: Array as returned by psycopg2 (a list with None for NULL elements)
+
+    Returns:
+        np.ndarray: float32 array with NaN where samples are missing
+    """
+    if values is None:
+        return np.empty(0, dtype=np.float32)
+    return np.array(values, dtype=np.float32)
+
+
+def series_to_list(packed: np.ndarray) -> List[Optional[float]]:
+    """Convert a packed array to a list of floats with None for NaN (for REAL[] parameters and JSON)"""
+    return np.where(np.isnan(packed), None, packed.astype(object)).tolist()
+
+
+def series_timestamps(day: Union[str, date], interval_minutes: int = DEFAULT_INTERVAL_MINUTES) -> np.ndarray:
+    """
+    Get the timestamp of every slot of a day
+
+    Args:
+        day: Date as a date or 'YYYY-MM-DD' string
+        interval_minutes: Sampling interval of the chart
+
+    Returns:
+        np.ndarray: datetime64[m] array aligned with the packed series
+    """
+    start = np.datetime64(str(day)[:10], 'm')
+    return start + np.arange(0, 24 * 60, interval_minutes).astype('timedelta64[m]')
+
+
+def save_daily_series(cursor,
+                      serial_number: str,
+                      plant_id: Optional[str],
+                      day: Union[str, date],
+                      charts: Dict[str, Any],
+                      interval_minutes: int = DEFAULT_INTERVAL_MINUTES) -> int:
+    """
+    Store the chart series of one device and day, one row per series
+
+    Args:
+        cursor: Database cursor (the caller commits)
+        serial_number: Device serial number
+        plant_id: Plant ID the device belongs to
+        day: Date of the charts
+        charts: The 'charts' object of a getMIXEnergyDayChart response
+        interval_minutes: Sampling interval of the charts
+
+    Returns:
+        int: Number of series rows written
+    """
+    rows = []
+    for series, points in charts.items():
+        if not isinstance(points, list):
+            continue
+        try:
+            packed = encode_series(points, interval_minutes)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Skipping unparseable chart series {series} for {serial_number} on {day}: {e}")
+            continue
+        sample_count = int(np.count_nonzero(~np.isnan(packed)))
+        rows.append((serial_number, plant_id, str(day)[:10], series, interval_minutes,
+                     series_to_list(packed), sample_count))
+
+    if not rows:
+        return 0
+
+    execute_values(cursor, """
+        INSERT INTO chart_series_daily
+        (serial_number, plant_id, date, series, interval_minutes, "values", sample_count)
+        VALUES %s
+        ON CONFLICT (serial_number, date, series) DO UPDATE
+        SET plant_id = EXCLUDED.plant_id,
+            interval_minutes = EXCLUDED.interval_minutes,
+            "values" = EXCLUDED."values",
+            sample_count = EXCLUDED.sample_count,
+            last_updated = NOW()
+    """, rows, template="(%s, %s, %s::date, %s, %s, %s::real[], %s)")
+    return len(rows)
+
+
+def get_daily_series(serial_number: str,
+                     day: Union[str, date],
+                     series: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Load the chart series of one device and day
+
+    Args:
+        serial_number: Device serial number
+        day: Date of the charts
+        series: Series names to load (default: all stored series)
+
+    Returns:
+        Dict[str, np.ndarray]: float32 array per series name (empty if nothing is stored)
+    """
+    query = """
+        SELECT series, "values" FROM chart_series_daily
+        WHERE serial_number = %s AND date = %s::date
+    """
+    params: List[Any] = [serial_number, str(day)[:10]]
+    if series is not None:
+        query += " AND series = ANY(%s)"
+        params.append(list(series))
+
+    try:
+        with get_db_connection(replica=True) as conn:
+            cursor = conn.cursor()
+            cursor.execute(query, tuple(params))
+            return {row['series']: decode_series(row['values']) for row in cursor.fetchall()}
+
+    except psycopg2.Error as e:
+        logger.error(f"PostgreSQL error loading chart series: {e}")
+        return {}
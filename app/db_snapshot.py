@@ -0,0 +1,324 @@
+"""
+Database snapshot read path for the plant, device and weather APIs
+
+The scheduled collector already writes what ``/api/plants``, ``/api/devices``
+and ``/api/weather`` show into ``plants``, ``devices`` and ``weather_data``
+(including the raw Growatt payloads in ``raw_data``). ``read_snapshot`` serves
+those rows instead of calling Growatt, together with the snapshot's age.
+
+Each source has a freshness SLA (``PLANT_SNAPSHOT_SLA``,
+``DEVICE_SNAPSHOT_SLA``, ``WEATHER_SNAPSHOT_SLA``, in seconds) measured from
+the latest collection. A snapshot within its SLA is served as is. An older
+one is still served, but ``trigger_refresh`` starts the matching collector job
+in a background thread; with ``SNAPSHOT_STALE_MODE = 'live'`` the route calls
+Growatt instead. Refreshes are single-flight per collector job and throttled
+to one per ``SNAPSHOT_REFRESH_MIN_INTERVAL`` seconds. Every gunicorn worker
+runs its own scheduler, so the throttle is also taken as an ``add`` lock in
+the shared Flask cache (RedisCache, FileSystemCache): web traffic then adds at
+most one upstream collection per job and interval across all workers.
+
+``query_devices`` filters, projects and pages the stored device list for
+clients that only need part of the fleet.
+"""
+
+import base64
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import psycopg2
+
+from app.config import Config
+from app.database import _escape_like, get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Source -> (SLA setting, collector function in app.data_collector that refreshes it)
+SNAPSHOT_SOURCES: Dict[str, Tuple[str, str]] = {
+    'plants': ('PLANT_SNAPSHOT_SLA', 'collect_plant_data'),
+    'devices': ('DEVICE_SNAPSHOT_SLA', 'collect_device_data'),
+    'weather': ('WEATHER_SNAPSHOT_SLA', 'collect_plant_data'),
+}
+
+# Collector function -> monotonic time its last background refresh started
+_refresh_started: Dict[str, float] = {}
+_refresh_running: set = set()
+_refresh_lock = threading.Lock()
+
+
+def _load_plants(cursor) -> Tuple[List[Dict[str, Any]], Optional[datetime]]:
+    cursor.execute("SELECT id, name, status, raw_data, last_updated FROM plants ORDER BY id")
+    rows = cursor.fetchall()
+    plants = []
+    for row in rows:
+        plant = dict(row['raw_data'] or {})
+        plant.setdefault('id', row['id'])
+        plant.setdefault('plantName', row['name'])
+        plant.setdefault('status', row['status'])
+        plants.append(plant)
+    return plants, max((row['last_updated'] for row in rows if row['last_updated']), default=None)
+
+
+def _device_from_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a device in the live API's format from a devices row"""
+    device = dict(row['raw_data'] or {})
+    device.update(serial_number=row['serial_number'], plantId=row['plant_id'],
+                  plantName=row['plant_name'] or '')
+    device.setdefault('deviceSn', row['serial_number'])
+    device.setdefault('alias', row['alias'])
+    device.setdefault('deviceType', row['type'])
+    device.setdefault('status', row['status'])
+    if row['last_update_time'] and 'last_update_time' not in device:
+        device['last_update_time'] = row['last_update_time'].strftime('%Y-%m-%d %H:%M:%S')
+    return device
+
+
+def _load_devices(cursor) -> Tuple[List[Dict[str, Any]], Optional[datetime]]:
+    cursor.execute("""
+        SELECT d.serial_number, d.plant_id, d.alias, d.type, d.status, d.last_update_time,
+               d.last_updated, d.raw_data, p.name AS plant_name
+        FROM devices d
+        LEFT JOIN plants p ON p.id = d.plant_id
+        ORDER BY d.plant_id, d.serial_number
+    """)
+    rows = cursor.fetchall()
+    devices = [_device_from_row(row) for row in rows]
+    return devices, max((row['last_updated'] for row in rows if row['last_updated']), default=None)
+
+
+def _load_weather(cursor) -> Tuple[List[Dict[str, Any]], Optional[datetime]]:
+    cursor.execute("""
+        SELECT DISTINCT ON (plant_id) plant_id, date, temperature, condition, raw_data, last_updated
+        FROM weather_data
+        ORDER BY plant_id, date DESC
+    """)
+    rows = cursor.fetchall()
+    weather_list = []
+    for row in rows:
+        weather = dict(row['raw_data'] or {})
+        weather.setdefault('temperature', row['temperature'])
+        weather.setdefault('weather', row['condition'])
+        weather.setdefault('date', str(row['date']))
+        weather_list.append({'plant_id': row['plant_id'], 'weather': weather})
+    return weather_list, max((row['last_updated'] for row in rows if row['last_updated']), default=None)
+
+
+_LOADERS = {'plants': _load_plants, 'devices': _load_devices, 'weather': _load_weather}
+
+
+def read_snapshot(source: str) -> Optional[Dict[str, Any]]:
+    """
+    Read the stored snapshot of an API source
+
+    Args:
+        source: 'plants', 'devices' or 'weather'
+
+    Returns:
+        Dict with 'data' (in the live API's format), 'as_of' (time of the latest
+        collection), 'age_seconds', 'sla_seconds' and 'fresh'; None if nothing
+        has been collected yet or the database is unavailable
+    """
+    sla_setting, _ = SNAPSHOT_SOURCES[source]
+    try:
+        with get_db_connection(replica=True) as conn:
+            data, as_of = _LOADERS[source](conn.cursor())
+    except psycopg2.Error as e:
+        logger.error(f"PostgreSQL error reading {source} snapshot: {e}")
+        return None
+
+    if not data or as_of is None:
+        return None
+
+    age = max(0.0, (datetime.now() - as_of).total_seconds())
+    sla = getattr(Config, sla_setting)
+    return {
+        'data': data,
+        'as_of': as_of.isoformat(),
+        'age_seconds': round(age, 1),
+        'sla_seconds': sla,
+        'fresh': age <= sla,
+    }
+
+
+def _encode_device_cursor(serial_number: str) -> str:
+    """Encode a device listing position as an opaque URL-safe cursor"""
+    return base64.urlsafe_b64encode(serial_number.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def _decode_device_cursor(cursor: str) -> str:
+    """Decode a cursor produced by _encode_device_cursor"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        serial_number = base64.b64decode(padded.encode('ascii'), altchars=b'-_', validate=True).decode('utf-8')
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    if not serial_number:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return serial_number
+
+
+def query_devices(plant_ids: Optional[List[str]] = None,
+                  statuses: Optional[List[str]] = None,
+                  device_types: Optional[List[str]] = None,
+                  q: Optional[str] = None,
+                  fields: Optional[List[str]] = None,
+                  limit: int = 200,
+                  cursor: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Filter and page through the stored device list, ordered by serial number
+
+    Pages are always keyset-paginated on ``serial_number``, whether or not
+    plants are filtered; for a single plant the ``(plant_id, serial_number)``
+    index returns its devices already in that order. The alias/serial text
+    search is served by trigram indexes. With ``fields``, only those keys of
+    the Growatt payload are read from ``raw_data``.
+
+    Args:
+        plant_ids: Only devices of these plants (optional)
+        statuses: Only devices with one of these statuses, e.g. 'online', 'offline' (optional)
+        device_types: Only devices of these types (optional)
+        q: Text to find in device aliases or serial numbers (optional)
+        fields: Keys to return per device (default: all of them)
+        limit: Page size
+        cursor: Opaque cursor returned as next_cursor by the previous page
+
+    Returns:
+        Dict with 'devices' (in the live API's format) and 'next_cursor' (None on the last page),
+        or None if the database could not be read
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    conditions = []
+    params: List[Any] = []
+
+    if fields:
+        # Project inside the database instead of shipping the whole payload
+        raw_data = "(SELECT jsonb_object_agg(e.key, e.value) FROM jsonb_each(d.raw_data) e WHERE e.key = ANY(%s))"
+        params.append(list(fields))
+    else:
+        raw_data = "d.raw_data"
+
+    if plant_ids:
+        conditions.append("d.plant_id = ANY(%s)")
+        params.append(list(plant_ids))
+
+    if statuses:
+        conditions.append("d.status = ANY(%s)")
+        params.append(list(statuses))
+
+    if device_types:
+        conditions.append("d.type = ANY(%s)")
+        params.append(list(device_types))
+
+    q = (q or '').strip()
+    if q:
+        conditions.append("(d.alias ILIKE %s OR d.serial_number ILIKE %s)")
+        params.extend([f"%{_escape_like(q)}%"] * 2)
+
+    if cursor:
+        conditions.append("d.serial_number > %s")
+        params.append(_decode_device_cursor(cursor))
+
+    query = f"""
+        SELECT d.serial_number, d.plant_id, d.alias, d.type, d.status, d.last_update_time,
+               {raw_data} AS raw_data, p.name AS plant_name
+        FROM devices d
+        LEFT JOIN plants p ON p.id = d.plant_id
+    """
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    # Fetch one extra row to know whether another page exists
+    query += " ORDER BY d.serial_number LIMIT %s"
+    params.append(limit + 1)
+
+    page: Dict[str, Any] = {'devices': [], 'next_cursor': None}
+
+    try:
+        with get_db_connection(replica=True) as conn:
+            db_cursor = conn.cursor()
+            db_cursor.execute(query, tuple(params))
+            rows = db_cursor.fetchall()
+    except psycopg2.Error as e:
+        logger.error(f"PostgreSQL error querying devices: {e}")
+        # Not an empty page: callers must not cache this as "no devices"
+        return None
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        page['next_cursor'] = _encode_device_cursor(rows[-1]['serial_number'])
+
+    devices = [_device_from_row(row) for row in rows]
+    if fields:
+        devices = [{key: device[key] for key in fields if key in device} for device in devices]
+    page['devices'] = devices
+    return page
+
+
+def _run_refresh(job: str) -> None:
+    try:
+        from app import data_collector
+        result = getattr(data_collector, job)()
+        if not result or not result.get('success'):
+            logger.warning(f"Background snapshot refresh {job} failed: {(result or {}).get('message')}")
+    except Exception as e:
+        logger.error(f"Error in background snapshot refresh {job}: {e}")
+    finally:
+        with _refresh_lock:
+            _refresh_running.discard(job)
+
+
+def _claim_shared_refresh(job: str) -> bool:
+    """
+    Take the cross-worker refresh slot of a collector job for one minimum interval
+
+    Returns:
+        bool: False if another worker started the job within the interval
+    """
+    from flask import has_app_context
+    if not has_app_context():
+        return True
+    from app.cache_utils import get_cache
+    cache = get_cache()
+    if cache is None:
+        return True
+    try:
+        # Never released: the key expiring is what allows the next refresh
+        return bool(cache.add(f"snapshot_refresh_{job}", time.time(), timeout=Config.SNAPSHOT_REFRESH_MIN_INTERVAL))
+    except Exception as e:
+        logger.warning(f"Shared refresh lock for {job} unavailable, refreshing without it: {e}")
+        return True
+
+
+def trigger_refresh(source: str) -> bool:
+    """
+    Start a background collection that refreshes a stale snapshot
+
+    Args:
+        source: 'plants', 'devices' or 'weather'
+
+    Returns:
+        bool: True if a refresh was started, False if one is running or ran recently
+    """
+    _, job = SNAPSHOT_SOURCES[source]
+    now = time.monotonic()
+    with _refresh_lock:
+        if job in _refresh_running:
+            return False
+        last = _refresh_started.get(job)
+        if last is not None and now - last < Config.SNAPSHOT_REFRESH_MIN_INTERVAL:
+            return False
+        _refresh_running.add(job)
+        _refresh_started[job] = now
+
+    if not _claim_shared_refresh(job):
+        with _refresh_lock:
+            _refresh_running.discard(job)
+        return False
+
+    logger.info(f"{source} snapshot is older than its SLA, refreshing in the background ({job})")
+    threading.Thread(target=_run_refresh, args=(job,), name=f"snapshot-refresh-{job}", daemon=True).start()
+    return True
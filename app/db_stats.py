@@ -0,0 +1,139 @@
+"""
+Database statistics for the data management API
+
+Row counts come from the planner's estimate (``pg_class.reltuples``, kept
+current by autovacuum/ANALYZE), so a statistics request costs a catalog
+lookup instead of a scan; ``exact=True`` runs ``COUNT(*)`` instead. Sizes come
+from ``pg_table_size``/``pg_indexes_size`` and the oldest/newest timestamps
+from ``MIN``/``MAX`` over the time columns, which Postgres answers from the
+ends of an index; ``add_time_range_indexes`` in app/db_migration.py makes sure
+each of those columns leads a B-tree index.
+
+Results are cached in-process for ``DATA_STATS_CACHE_TTL`` seconds.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import psycopg2
+
+from app.config import Config
+from app.database import get_db_connection
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Statistic name -> (table, time column or None); the time columns are indexed by db_migration
+STATS_TABLES: Dict[str, Tuple[str, Optional[str]]] = {
+    'plants': ('plants', None),
+    'devices': ('devices', None),
+    'energy_records': ('energy_stats', 'date'),
+    'weather_records': ('weather_data', 'date'),
+    'device_readings': ('device_data', 'collected_at'),
+    'inverter_readings': ('inverter_history', 'timestamp'),
+    'fault_logs': ('fault_logs', 'happen_time'),
+    'notifications': ('notification_history', 'sent_at'),
+}
+
+# exact flag -> (monotonic time computed, statistics)
+_cache: Dict[bool, Tuple[float, Dict[str, Any]]] = {}
+_cache_lock = threading.Lock()
+
+
+def _isoformat(value: Any) -> Any:
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def _collect_stats(exact: bool) -> Dict[str, Any]:
+    """Query the catalog (and optionally the tables) for the statistics"""
+    tables = [table for table, _ in STATS_TABLES.values()]
+    with get_db_connection(replica=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT c.relname, c.reltuples::bigint AS estimate,
+                   pg_table_size(c.oid) AS table_bytes,
+                   pg_indexes_size(c.oid) AS index_bytes,
+                   pg_total_relation_size(c.oid) AS total_bytes
+            FROM pg_class c
+            WHERE c.relkind IN ('r', 'p') AND c.relnamespace = 'public'::regnamespace
+              AND c.relname = ANY(%s)
+        """, (tables,))
+        relations = {row['relname']: row for row in cursor.fetchall()}
+
+        cursor.execute("SELECT pg_database_size(current_database()) AS size")
+        database_bytes = cursor.fetchone()['size']
+
+        details: Dict[str, Any] = {}
+        for name, (table, time_column) in STATS_TABLES.items():
+            relation = relations.get(table)
+            if relation is None:
+                continue
+
+            # reltuples is -1 (or 0) until the table has been vacuumed or analyzed once
+            counted = exact or relation['estimate'] < 0
+            if counted:
+                cursor.execute(f"SELECT COUNT(*) AS count FROM {table}")
+                rows = cursor.fetchone()['count']
+            else:
+                rows = relation['estimate']
+
+            entry = {
+                'table': table,
+                'rows': rows,
+                'exact': counted,
+                'table_bytes': relation['table_bytes'],
+                'index_bytes': relation['index_bytes'],
+                'total_bytes': relation['total_bytes'],
+            }
+            if time_column:
+                cursor.execute(f"SELECT MIN({time_column}) AS oldest, MAX({time_column}) AS newest FROM {table}")
+                dates = cursor.fetchone()
+                entry['oldest'] = _isoformat(dates['oldest'])
+                entry['newest'] = _isoformat(dates['newest'])
+            details[name] = entry
+
+    stats: Dict[str, Any] = {name: entry['rows'] for name, entry in details.items()}
+    energy = details.get('energy_records', {})
+    if energy.get('oldest'):
+        stats['oldest_data'] = energy['oldest']
+        stats['newest_data'] = energy['newest']
+    stats['database_size_bytes'] = database_bytes
+    stats['database_size_mb'] = round(database_bytes / (1024 * 1024), 2)
+    stats['approximate'] = not exact
+    stats['tables'] = details
+    stats['generated_at'] = datetime.now().isoformat()
+    return stats
+
+
+def get_data_stats(exact: bool = False, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Get row counts, sizes and date ranges of the main data tables
+
+    Args:
+        exact: Count rows with COUNT(*) instead of using the planner estimate
+        use_cache: Return a result computed less than DATA_STATS_CACHE_TTL seconds ago if any
+
+    Returns:
+        Dict with a row count per statistic name, 'oldest_data'/'newest_data'
+        (energy stats), 'database_size_bytes'/'database_size_mb', 'approximate',
+        per-table details under 'tables' and 'generated_at'; None on database errors
+    """
+    now = time.monotonic()
+    if use_cache:
+        with _cache_lock:
+            cached = _cache.get(exact)
+        if cached and now - cached[0] < Config.DATA_STATS_CACHE_TTL:
+            return cached[1]
+
+    try:
+        stats = _collect_stats(exact)
+    except psycopg2.Error as e:
+        logger.error(f"PostgreSQL error collecting data statistics: {e}")
+        return None
+
+    with _cache_lock:
+        _cache[exact] = (now, stats)
+    return stats
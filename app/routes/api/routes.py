@@ -1,5 +1,6 @@
 import json
 import datetime
+import os
 from typing import Union, Tuple, List, Dict, Any
 
 from flask import (
@@ -13,10 +14,11 @@ from app.services.plant_service import get_maps_plants
 # Import from common helpers module
 from app.routes.common.api_helpers import (
     get_plant_fault_logs, get_plants, get_devices_for_plant, get_weather_list,
-    get_access_api, get_logout, get_plant_by_id, growatt_api, is_session_valid, ensure_login
+    get_access_api, get_logout, get_plant_by_id, growatt_api, is_session_valid, ensure_login, fan_out
 )
 
-from app.cache_utils import cached_route
+from app.cache_utils import bump_tags, cached_route, get_cache, get_cache_stats, record_cache_event
+from app.database import DatabaseConnector
 
 # Create a blueprint for the API routes
 api_blueprint = Blueprint('api_routes', __name__, url_prefix='/api')
@@ -81,6 +83,55 @@ def log_api_response(endpoint, start_time, status_code, response_data=None, erro
             f"Response time: {response_time:.2f}ms"
         )
 
+def _arg_flag(name: str) -> bool:
+    """Whether a boolean query parameter (?name=true) is set"""
+    return request.args.get(name, 'false').lower() in ('true', '1', 'yes')
+
+def _list_arg(*names: str) -> List[str]:
+    """Values of a list query parameter, given repeated (?a=1&a=2) or comma-separated (?a=1,2)"""
+    return [item.strip() for name in names for value in request.args.getlist(name)
+            for item in value.split(',') if item.strip()]
+
+# Query parameters that turn /api/devices into a filtered, paginated listing
+DEVICE_LISTING_ARGS = ('plant_id', 'plantId', 'status', 'type', 'q', 'fields', 'limit', 'cursor')
+
+def _read_snapshot(source: str) -> Union[Dict[str, Any], None]:
+    """
+    Get the stored snapshot to serve for a source instead of calling Growatt.
+    
+    A snapshot past its SLA is still returned (and a background refresh
+    started) unless SNAPSHOT_STALE_MODE is 'live'. ?live=true always skips it.
+    
+    Args:
+        source (str): 'plants', 'devices' or 'weather'
+    
+    Returns:
+        Union[Dict[str, Any], None]: Snapshot from app.db_snapshot.read_snapshot,
+        or None if the data should be fetched live
+    """
+    if not current_app.config.get('SNAPSHOT_READS_ENABLED', True) or _arg_flag('live'):
+        return None
+    
+    from app.db_snapshot import read_snapshot, trigger_refresh
+    snapshot = read_snapshot(source)
+    if snapshot is None:
+        return None
+    if not snapshot['fresh']:
+        if current_app.config.get('SNAPSHOT_STALE_MODE', 'background') == 'live':
+            return None
+        trigger_refresh(source)
+    return snapshot
+
+def _snapshot_response(payload: Any, snapshot: Union[Dict[str, Any], None]) -> Response:
+    """Build a JSON response tagged with where its data came from"""
+    response = jsonify(payload)
+    if snapshot is None:
+        response.headers['X-Data-Source'] = 'live'
+    else:
+        response.headers['X-Data-Source'] = 'snapshot'
+        response.headers['X-Snapshot-Age'] = str(int(snapshot['age_seconds']))
+    return response
+
 # ===== API Data Routes =====
 
 @api_blueprint.route('/activities', methods=['GET'])
@@ -149,11 +200,14 @@ def activity_data() -> Tuple[Response, int]:
         }), 500
 
 @api_blueprint.route('/plants', methods=['GET'])
-@cached_route(timeout=300, key_prefix='api_plants_')
+@cached_route(timeout=300, key_prefix='api_plants_', tags=['plants'])
 def api_plants() -> Tuple[Response, int]:
     """
     API endpoint to get the list of plants.
     
+    Served from the database snapshot when one exists (see _read_snapshot);
+    ?live=true fetches from Growatt.
+    
     Returns:
         Tuple[Response, int]: JSON response with status code
     """
@@ -165,7 +219,8 @@ def api_plants() -> Tuple[Response, int]:
     current_app.logger.info(f"API Request: /api/plants - Client IP: {client_ip}, User-Agent: {user_agent}")
     
     try:
-        plants = get_plants()
+        snapshot = _read_snapshot('plants')
+        plants = snapshot['data'] if snapshot else get_plants()
         # Add authentication status to the response
         if isinstance(plants, list):
             for plant in plants:
@@ -175,7 +230,7 @@ def api_plants() -> Tuple[Response, int]:
         response_time = (datetime.datetime.now() - start_time).total_seconds() * 1000  # in milliseconds
         current_app.logger.info(f"API Response: /api/plants - Success - {len(plants) if isinstance(plants, list) else 0} plants returned - Response time: {response_time:.2f}ms")
         
-        return jsonify(json.loads(json.dumps(plants, ensure_ascii=False))), 200
+        return _snapshot_response(plants, snapshot), 200
     except Exception as e:
         error_message = f"Error in api_plants: {str(e)}"
         # Log detailed error information including client details
@@ -237,19 +292,125 @@ def api_plant_detail(plant_id: int) -> Tuple[Response, int]:
             "ui_message": "An error occurred while fetching plant details."
         }), 500
 
+def _fetch_plant_devices(plant: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Union[str, None]]:
+    """
+    Fetch and normalize the devices of one plant (runs on a fan_out worker).
+    
+    Args:
+        plant (Dict[str, Any]): Plant as returned by get_plants
+    
+    Returns:
+        Tuple[List[Dict[str, Any]], Union[str, None]]: Valid devices with plant context,
+        and an error message if the plant could not be fetched
+    """
+    plant_id = plant.get('id')
+    current_app.logger.info(f"Fetching devices for plant: {plant_id} - {plant.get('plantName', '')}")
+    
+    # Use get_devices_for_plant which calls the pagination-aware get_device_list method
+    plant_devices = get_devices_for_plant(plant_id)
+    
+    # Print full response data for debugging
+    if current_app.config.get('DEBUG', False):
+        current_app.logger.debug(f"Device response type for plant {plant_id}: {type(plant_devices)}")
+        current_app.logger.debug(json.dumps(plant_devices, indent=2, ensure_ascii=False))
+    
+    # Handle case where response is an integer or other non-list/dict type
+    if not isinstance(plant_devices, (list, dict)):
+        return [], f"Unexpected response type: {type(plant_devices).__name__}"
+    
+    # Handle dict response format (pagination response)
+    if isinstance(plant_devices, dict):
+        if 'error' in plant_devices:
+            return [], plant_devices.get('error', 'Unknown error')
+        data_list = plant_devices.get('obj', {}).get('datas') if isinstance(plant_devices.get('obj'), dict) else None
+        if not isinstance(data_list, list):
+            return [], f"Unexpected 'datas' type: {type(data_list).__name__}"
+        plant_devices = data_list
+    
+    # Add plant information to each device and filter out invalid devices
+    valid_devices = []
+    for device in plant_devices:
+        if not isinstance(device, dict):
+            continue
+        if device.get('error') and device.get('code') == 'AUTH_ERROR':
+            return [], device['error']
+        
+        # Add plant context to each device
+        device['plantId'] = plant_id
+        device['plantName'] = plant.get('plantName', '')
+        
+        # Map API field names to frontend-friendly names for consistency
+        if 'deviceSn' in device and 'serial_number' not in device:
+            device['serial_number'] = device['deviceSn']
+        if 'deviceName' in device and 'alias' not in device:
+            device['alias'] = device['deviceName']
+        if 'eTotal' in device and 'total_energy' not in device:
+            device['total_energy'] = f"{device['eTotal']} kWh"
+        if 'lastUpdateTime' in device and 'last_update_time' not in device:
+            device['last_update_time'] = device['lastUpdateTime']
+        
+        # Check for required device fields to ensure it's a valid device
+        if 'deviceSn' in device or 'sn' in device or 'serial_number' in device:
+            valid_devices.append(device)
+        else:
+            current_app.logger.debug(f"Skipping invalid device without serial number: {device.keys()}")
+    
+    return valid_devices, None
+
 @api_blueprint.route('/devices', methods=['GET'])
-@cached_route(timeout=300, key_prefix='api_devices_')
+@cached_route(timeout=300, key_prefix='api_devices_',
+              tags=lambda: ['plants'] + ([f"devices:{plant_id}" for plant_id in _list_arg('plant_id', 'plantId')]
+                                         or ['devices']))
 def api_get_devices() -> Tuple[Response, int]:
     """
     API endpoint to get the list of devices for all plants.
-    Gets devices for all plants using the pagination-aware get_device_list method.
+    
+    Devices come from the database snapshot when one exists (see
+    _read_snapshot). Otherwise, or with ?live=true, plants are fetched
+    concurrently (see fan_out), each with its own timeout, and their devices
+    are merged in plant order. The response is the device list; with
+    ?meta=true it is an object with 'devices' and 'meta', where meta.source
+    tells where the data came from and meta.errors lists the plants that
+    failed or timed out.
+    
+    Any of the following parameters returns a page of the stored device list
+    instead (see _list_devices_page):
+    
+    Query Parameters:
+        plant_id/plantId: Only devices of these plants (comma-separated or repeated)
+        status: Only devices with these statuses, e.g. online,offline
+        type: Only devices of these types
+        q: Text to find in device aliases or serial numbers
+        fields: Keys to return per device, e.g. serial_number,alias,status
+        limit: Page size (default 200, max 1000)
+        cursor: next_cursor from the previous page
     
     Returns:
         Tuple[Response, int]: JSON response with status code
     """
     start_time = log_api_request('/api/devices')
     
+    if any(arg in request.args for arg in DEVICE_LISTING_ARGS):
+        return _list_devices_page(start_time)
+    
     try:
+        snapshot = _read_snapshot('devices')
+        if snapshot:
+            devices = snapshot['data']
+            response = {
+                "devices": devices,
+                "meta": {
+                    "total_devices": len(devices),
+                    "source": "snapshot",
+                    "as_of": snapshot['as_of'],
+                    "age_seconds": snapshot['age_seconds'],
+                    "fresh": snapshot['fresh'],
+                    "timestamp": datetime.datetime.now().isoformat()
+                }
+            }
+            log_api_response('/api/devices', start_time, 200, response)
+            return _snapshot_response(response if _arg_flag('meta') else devices, snapshot), 200
+        
         # Get all plants
         plants = get_plants()
         
@@ -266,162 +427,29 @@ def api_get_devices() -> Tuple[Response, int]:
         all_devices = []
         plants_with_errors = []
         successful_plants_count = 0
-        retrieved_devices_count = 0
         
-        if isinstance(plants, list):
-            for plant in plants:
-                try:
-                    plant_id = plant.get('id')
-                    if plant_id:
-                        current_app.logger.info(f"Fetching devices for plant: {plant_id} - {plant.get('plantName', '')}")
-                        
-                        # Get start time for this plant's device fetch operation
-                        plant_fetch_start = datetime.datetime.now()
-                        
-                        try:
-                            # Use get_devices_for_plant which calls the pagination-aware get_device_list method
-                            plant_devices = get_devices_for_plant(plant_id)
-                            
-                            # Log the API response structure to help with debugging
-                            if current_app.config.get('DEBUG', False):
-                                if isinstance(plant_devices, dict):
-                                    current_app.logger.debug(f"Device response keys: {plant_devices.keys()}")
-                                    # Log additional information if result and obj keys exist
-                                    if 'result' in plant_devices and 'obj' in plant_devices:
-                                        current_app.logger.debug(f"Response contains standard Growatt API format with result: {plant_devices['result']}")
-                                        if isinstance(plant_devices['obj'], dict):
-                                            obj_keys = plant_devices['obj'].keys()
-                                            current_app.logger.debug(f"Obj keys: {obj_keys}")
-                                            if 'totalCount' in obj_keys:
-                                                current_app.logger.debug(f"Total device count: {plant_devices['obj']['totalCount']}")
-                                current_app.logger.debug(f"Device response type: {type(plant_devices)}")
-                            
-                            # Print full response data for debugging
-                            if current_app.config.get('DEBUG', False):
-                                current_app.logger.debug(f"Full response data for plant {plant_id}:")
-                                current_app.logger.debug(json.dumps(plant_devices, indent=2, ensure_ascii=False))
-                                current_app.logger.debug("="*80)
-                            
-                            # Handle case where response is an empty list, integer, or other non-list/dict type
-                            if isinstance(plant_devices, int) or (not isinstance(plant_devices, (list, dict))):
-                                error_msg = f"Unexpected response type: {type(plant_devices).__name__}"
-                                current_app.logger.error(f"Error fetching devices for plant ID {plant_id}: object of type '{type(plant_devices).__name__}' has no len()")
-                                plants_with_errors.append({
-                                    'plant_id': plant_id,
-                                    'plant_name': plant.get('plantName', ''),
-                                    'error': error_msg
-                                })
-                                continue
-                            
-                            # Handle empty list response
-                            if isinstance(plant_devices, list) and len(plant_devices) == 0:
-                                current_app.logger.info(f"No devices found for plant {plant_id}")
-                                continue
-                                
-                        except Exception as fetch_error:
-                            error_msg = f"API error: {str(fetch_error)}"
-                            current_app.logger.error(f"Error fetching devices for plant ID {plant_id}: {error_msg}")
-                            plants_with_errors.append({
-                                'plant_id': plant_id,
-                                'plant_name': plant.get('plantName', ''),
-                                'error': error_msg
-                            })
-                            continue
-                        
-                        # Calculate fetch time for this plant
-                        plant_fetch_time = (datetime.datetime.now() - plant_fetch_start).total_seconds() * 1000  # in ms
-                        
-                        # Handle dict response format (pagination response)
-                        if isinstance(plant_devices, dict):
-                            # Check for data in dict response
-                            if 'obj' in plant_devices and isinstance(plant_devices['obj'], dict) and 'datas' in plant_devices['obj']:
-                                data_list = plant_devices['obj']['datas']
-                                if isinstance(data_list, list):
-                                    devices_count = len(data_list)
-                                    retrieved_devices_count += devices_count
-                                    successful_plants_count += 1
-                                    
-                                    current_app.logger.info(
-                                        f"Successfully retrieved {devices_count} devices for plant {plant_id} "
-                                        f"in {plant_fetch_time:.2f}ms"
-                                    )
-                                    plant_devices = data_list  # Use the extracted data list for further processing
-                                else:
-                                    current_app.logger.warning(
-                                        f"Unexpected 'datas' type in response for plant {plant_id}: {type(data_list)}"
-                                    )
-                                    continue
-                            elif 'error' in plant_devices:
-                                error_msg = plant_devices.get('error', 'Unknown error')
-                                current_app.logger.warning(
-                                    f"Error fetching devices for plant {plant_id}: {error_msg} "
-                                    f"in {plant_fetch_time:.2f}ms"
-                                )
-                                plants_with_errors.append({
-                                    'plant_id': plant_id,
-                                    'plant_name': plant.get('plantName', ''),
-                                    'error': error_msg
-                                })
-                                continue
-                        
-                        # Log the response with timing information
-                        if isinstance(plant_devices, list):
-                            devices_count = len(plant_devices)
-                            retrieved_devices_count += devices_count
-                            successful_plants_count += 1
-                            
-                            current_app.logger.info(
-                                f"Successfully retrieved {devices_count} devices for plant {plant_id} "
-                                f"in {plant_fetch_time:.2f}ms"
-                            )
-                        else:
-                            current_app.logger.warning(
-                                f"Unexpected response type for plant {plant_id} devices: {type(plant_devices)} "
-                                f"in {plant_fetch_time:.2f}ms"
-                            )
-                            plants_with_errors.append({
-                                'plant_id': plant_id,
-                                'plant_name': plant.get('plantName', ''),
-                                'error': f"Unexpected response type: {type(plant_devices)}"
-                            })
-                            continue
-                        
-                        # Add plant information to each device and filter out invalid devices
-                        if isinstance(plant_devices, list):
-                            valid_devices = []
-                            for device in plant_devices:
-                                if isinstance(device, dict):
-                                    # Add plant context to each device
-                                    device['plantId'] = plant_id
-                                    device['plantName'] = plant.get('plantName', '')
-                                    
-                                    # Map API field names to frontend-friendly names for consistency
-                                    if 'deviceSn' in device and 'serial_number' not in device:
-                                        device['serial_number'] = device['deviceSn']
-                                    if 'deviceName' in device and 'alias' not in device:
-                                        device['alias'] = device['deviceName']
-                                    if 'eTotal' in device and 'total_energy' not in device:
-                                        device['total_energy'] = f"{device['eTotal']} kWh"
-                                    if 'lastUpdateTime' in device and 'last_update_time' not in device:
-                                        device['last_update_time'] = device['lastUpdateTime']
-                                    
-                                    # Check for required device fields to ensure it's a valid device
-                                    if 'deviceSn' in device or 'sn' in device or 'serial_number' in device:
-                                        valid_devices.append(device)
-                                    else:
-                                        current_app.logger.debug(f"Skipping invalid device without serial number: {device.keys() if isinstance(device, dict) else type(device)}")
-                            
-                            all_devices.extend(valid_devices)
-                            current_app.logger.debug(f"Added {len(valid_devices)} valid devices from plant {plant_id}")
-                except Exception as plant_error:
-                    error_msg = str(plant_error)
-                    current_app.logger.warning(f"Error fetching devices for plant {plant.get('id')}: {error_msg}")
-                    plants_with_errors.append({
-                        'plant_id': plant.get('id'),
-                        'plant_name': plant.get('plantName', ''),
-                        'error': error_msg
-                    })
-                    # Continue with other plants even if one fails
+        plants_to_fetch = [plant for plant in plants if plant.get('id')] if isinstance(plants, list) else []
+        for outcome in fan_out(plants_to_fetch, _fetch_plant_devices):
+            plant = outcome['item']
+            devices, error_msg = outcome['result'] or ([], outcome['error'])
+            if error_msg:
+                current_app.logger.warning(
+                    f"Error fetching devices for plant {plant.get('id')}: {error_msg} "
+                    f"in {outcome['elapsed_ms'] or 0:.2f}ms"
+                )
+                plants_with_errors.append({
+                    'plant_id': plant.get('id'),
+                    'plant_name': plant.get('plantName', ''),
+                    'error': error_msg
+                })
+                continue
+            
+            successful_plants_count += 1
+            all_devices.extend(devices)
+            current_app.logger.info(
+                f"Successfully retrieved {len(devices)} devices for plant {plant.get('id')} "
+                f"in {outcome['elapsed_ms']:.2f}ms"
+            )
         
         # Log the final devices count and error statistics
         current_app.logger.info(
@@ -433,16 +461,13 @@ def api_get_devices() -> Tuple[Response, int]:
         # Cache the result
         cache_ttl = current_app.config.get('DEVICE_CACHE_TTL', 300)
         
-        # Access cache through current_app.extensions
-        cache = current_app.extensions.get('cache')
-        if cache and hasattr(cache, 'set'):
+        cache = get_cache()
+        if cache is not None:
             # Use cache.set() method to store the device list
             cache.set('api_devices', all_devices, timeout=cache_ttl)
+            # No size: serializing the whole fleet again only to measure it costs more than the metric is worth
+            record_cache_event('api_devices', 'set', route=request.path)
             current_app.logger.debug(f"Cached {len(all_devices)} devices with TTL {cache_ttl}s")
-        elif cache and isinstance(cache, dict):
-            # Handle the case where cache is a dictionary-like object
-            cache['api_devices'] = all_devices
-            current_app.logger.debug(f"Cached {len(all_devices)} devices in dictionary cache")
         
         # Create the response with success metrics
         response = {
@@ -454,12 +479,13 @@ def api_get_devices() -> Tuple[Response, int]:
                 "plants_with_errors": len(plants_with_errors),
                 "errors": plants_with_errors if plants_with_errors else None,
                 "cached": cache is not None,
+                "source": "live",
                 "timestamp": datetime.datetime.now().isoformat()
             }
         }
         
         log_api_response('/api/devices', start_time, 200, response)
-        return jsonify(all_devices), 200
+        return _snapshot_response(response if _arg_flag('meta') else all_devices, None), 200
     except Exception as e:
         error_message = f"Error fetching devices: {str(e)}"
         log_api_response('/api/devices', start_time, 500, error=e)
@@ -470,17 +496,92 @@ def api_get_devices() -> Tuple[Response, int]:
             "ui_message": "An error occurred while fetching devices. Please try again later."
         }), 500
 
+def _list_devices_page(start_time: datetime.datetime) -> Tuple[Response, int]:
+    """
+    Answer /api/devices with one filtered, projected page of the stored device list.
+    
+    Args:
+        start_time (datetime.datetime): Request start time for logging
+    
+    Returns:
+        Tuple[Response, int]: JSON response with 'devices', 'count', 'next_cursor' and 'meta',
+        or 503 if the device list could not be read
+    """
+    from app.db_snapshot import query_devices
+    
+    try:
+        limit = min(max(request.args.get('limit', default=200, type=int), 1), 1000)
+        filters = {
+            'plant_ids': _list_arg('plant_id', 'plantId'),
+            'statuses': _list_arg('status'),
+            'device_types': _list_arg('type'),
+            'q': request.args.get('q'),
+        }
+        fields = _list_arg('fields')
+        page = query_devices(**filters, fields=fields or None, limit=limit, cursor=request.args.get('cursor'))
+        if page is None:
+            # Not a 200, so cached_route does not store it
+            log_api_response('/api/devices', start_time, 503, error='Device list unavailable')
+            return jsonify({
+                "status": "error",
+                "message": "Device list is temporarily unavailable",
+                "code": "DATABASE_UNAVAILABLE",
+                "ui_message": "Devices could not be loaded right now. Please try again shortly."
+            }), 503
+        
+        response = {
+            "devices": page['devices'],
+            "count": len(page['devices']),
+            "next_cursor": page['next_cursor'],
+            "meta": {
+                "source": "snapshot",
+                "limit": limit,
+                "fields": fields or None,
+                "filters": {key: value for key, value in filters.items() if value},
+                "timestamp": datetime.datetime.now().isoformat()
+            }
+        }
+        log_api_response('/api/devices', start_time, 200, response)
+        listing = jsonify(response)
+        listing.headers['X-Data-Source'] = 'snapshot'
+        return listing, 200
+    except ValueError as e:
+        log_api_response('/api/devices', start_time, 400, error=e)
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "code": "INVALID_PARAMETER",
+            "ui_message": "Invalid parameters provided"
+        }), 400
+    except Exception as e:
+        log_api_response('/api/devices', start_time, 500, error=e)
+        return jsonify({
+            "status": "error",
+            "message": f"Error listing devices: {str(e)}",
+            "code": "API_ERROR",
+            "ui_message": "An error occurred while fetching devices. Please try again later."
+        }), 500
+
 @api_blueprint.route('/weather', methods=['GET'])
+@cached_route(timeout=600, key_prefix='api_weather_', tags=['weather'])
 def api_weather() -> Tuple[Response, int]:
     """
     API endpoint to get weather data for all plants.
     
+    Served from the latest stored weather per plant when available (see
+    _read_snapshot); ?live=true fetches from Growatt.
+    
     Returns:
         Tuple[Response, int]: JSON response with status code
     """
     start_time = log_api_request('/api/weather')
     
     try:
+        snapshot = _read_snapshot('weather')
+        if snapshot:
+            log_api_response('/api/weather', start_time, 200, snapshot['data'])
+            return _snapshot_response(snapshot['data'], snapshot), 200
+        
         plants = get_plants()
         if plants and isinstance(plants, list) and len(plants) > 0 and plants[0].get('error'):
             error_msg = plants[0].get('error', 'Authentication error')
@@ -502,11 +603,91 @@ def api_weather() -> Tuple[Response, int]:
                 })
                 
         log_api_response('/api/weather', start_time, 200, weather_list)
-        return jsonify(json.loads(json.dumps(weather_list, ensure_ascii=False))), 200
+        return _snapshot_response(weather_list, None), 200
     except Exception as e:
         log_api_response('/api/weather', start_time, 500, error=e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+@api_blueprint.route('/dashboard/charts', methods=['GET'])
+@cached_route(timeout=300, key_prefix='api_dashboard_charts_',
+              tags=lambda: [f"energy:{request.args['plant_id']}" if request.args.get('plant_id') else 'energy'])
+def api_dashboard_charts() -> Tuple[Response, int]:
+    """
+    API endpoint to get fleet-wide energy and power chart series for the dashboard.
+    Reads the plant energy rollups, so the cost does not grow with raw history.
+
+    Query Parameters:
+        timeRange: today (hourly), week/month (daily) or year (monthly); default today
+        plant_id: Restrict the series to a single plant (optional)
+
+    Returns:
+        Tuple[Response, int]: JSON response with chart series and status code
+    """
+    start_time = log_api_request('/api/dashboard/charts')
+
+    try:
+        from app.db_rollups import get_energy_rollups
+
+        time_range = request.args.get('timeRange', 'today')
+        plant_id = request.args.get('plant_id')
+        now = datetime.datetime.now()
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        ranges = {
+            'today': ('hour', today, '%H:%M'),
+            'week': ('day', today - datetime.timedelta(days=today.weekday()), '%a %d'),
+            'month': ('day', today.replace(day=1), '%d %b'),
+            'year': ('month', today.replace(month=1, day=1), '%b %Y'),
+        }
+        if time_range not in ranges:
+            log_api_response('/api/dashboard/charts', start_time, 400, error=f"Invalid timeRange: {time_range}")
+            return jsonify({
+                "status": "error",
+                "message": f"Invalid timeRange. Must be one of: {', '.join(ranges)}",
+                "code": "INVALID_PARAMETER"
+            }), 400
+
+        granularity, range_start, label_format = ranges[time_range]
+        rows = get_energy_rollups(granularity, range_start, now, level='plant', plant_id=plant_id)
+
+        # Sum the per-plant rollups into one fleet-wide series per bucket
+        energy_by_bucket: Dict[datetime.datetime, float] = {}
+        power_by_bucket: Dict[datetime.datetime, float] = {}
+        for row in rows:
+            bucket = row['bucket']
+            energy_by_bucket[bucket] = energy_by_bucket.get(bucket, 0.0) + float(row['energy'] or 0)
+            if row['avg_power'] is not None:
+                power_by_bucket[bucket] = power_by_bucket.get(bucket, 0.0) + float(row['avg_power'])
+
+        energy_buckets = sorted(energy_by_bucket)
+        power_buckets = sorted(power_by_bucket)
+        response = {
+            "timeRange": time_range,
+            "granularity": granularity,
+            "energy": {
+                "labels": [bucket.strftime(label_format) for bucket in energy_buckets],
+                "values": [round(energy_by_bucket[bucket], 2) for bucket in energy_buckets]
+            },
+            # Average power only exists for hourly buckets
+            "power": {
+                "labels": [bucket.strftime(label_format) for bucket in power_buckets],
+                "values": [round(power_by_bucket[bucket], 1) for bucket in power_buckets]
+            } if power_buckets else None,
+            "performance": None,
+            "deviceStatus": None
+        }
+
+        log_api_response('/api/dashboard/charts', start_time, 200, response)
+        return jsonify(response), 200
+    except Exception as e:
+        log_api_response('/api/dashboard/charts', start_time, 500, error=e)
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "code": "API_ERROR",
+            "ui_message": "An error occurred while fetching chart data"
+        }), 500
+
 @api_blueprint.route('/maps')
 def get_plants_data():
     """API endpoint to get all plants data for the map"""
@@ -700,6 +881,9 @@ def logout() -> Union[Response, WerkzeugResponse]:
             current_app.logger.warning(f"Session clear failed: {e}")
             # Continue with logout process even if session clear fails
         
+        # Invalidate the cached Growatt account data on every backend
+        bump_tags('plants', 'devices', 'weather', 'energy')
+        
         response = make_response(jsonify({
             "status": "success", 
             "message": "Logout successful, all cache cleared"
@@ -903,6 +1087,63 @@ def api_device_fault_logs() -> Tuple[Response, int]:
             "ui_message": "An error occurred while fetching fault logs"
         }), 500
 
+@api_blueprint.route('/device/fault-logs/search', methods=['GET'])
+def api_search_fault_logs() -> Tuple[Response, int]:
+    """
+    API endpoint to search fault logs stored in the database, newest first.
+    
+    Query Parameters:
+        q: Text to find in device names and error messages (optional)
+        plant_id/plantId: Filter by plant (optional)
+        device_sn/deviceSn: Filter by device (optional)
+        type: Filter by fault type (1=fault, 2=alarm, etc.) (optional)
+        start/end: Time range of happen_time, ISO date or datetime (optional, end exclusive)
+        fuzzy: 'true' to also match misspelled words
+        limit: Page size (default 50, max 500)
+        cursor: next_cursor from the previous page
+    
+    Returns:
+        Tuple[Response, int]: JSON response with status code
+    """
+    try:
+        fault_type = request.args.get('type')
+        start = request.args.get('start')
+        end = request.args.get('end')
+        limit = min(max(request.args.get('limit', default=50, type=int), 1), 500)
+        
+        page = DatabaseConnector().search_fault_logs(
+            q=request.args.get('q'),
+            plant_id=request.args.get('plant_id') or request.args.get('plantId'),
+            device_sn=request.args.get('device_sn') or request.args.get('deviceSn'),
+            fault_type=int(fault_type) if fault_type else None,
+            start=datetime.datetime.fromisoformat(start) if start else None,
+            end=datetime.datetime.fromisoformat(end) if end else None,
+            fuzzy=request.args.get('fuzzy', 'false').lower() == 'true',
+            limit=limit,
+            cursor=request.args.get('cursor')
+        )
+        
+        return jsonify({
+            "count": len(page['fault_logs']),
+            **page
+        }), 200
+    except ValueError as e:
+        current_app.logger.error(f"Invalid parameter: {str(e)}")
+        return jsonify({
+            "status": "error", 
+            "message": str(e),
+            "code": "INVALID_PARAMETER",
+            "ui_message": "Invalid parameters provided"
+        }), 400
+    except Exception as e:
+        current_app.logger.error(f"Error in api_search_fault_logs: {str(e)}")
+        return jsonify({
+            "status": "error", 
+            "message": str(e),
+            "code": "API_ERROR",
+            "ui_message": "An error occurred while searching fault logs"
+        }), 500
+
 @api_blueprint.route('/notifications/test', methods=['POST'])
 def test_notifications() -> Tuple[Response, int]:
     """
@@ -950,11 +1191,68 @@ def test_notifications() -> Tuple[Response, int]:
             "ui_message": "An error occurred while testing notifications"
         }), 500
 
+@api_blueprint.route('/batch', methods=['POST'])
+def api_batch() -> Tuple[Response, int]:
+    """
+    API endpoint to run several internal GET requests in one round trip.
+    
+    Sub-requests run concurrently through the regular routes (and so their
+    caches and snapshot reads), with one login check for the whole batch.
+    
+    JSON body:
+        requests: List of paths (e.g. "/api/plants/123") or objects with 'path',
+            optional 'params' and optional 'id'; a bare list is accepted as well
+    
+    Returns:
+        Tuple[Response, int]: JSON response with one result per sub-request
+        ('id', 'path', 'status', 'headers', 'body', 'elapsed_ms') and status code
+    """
+    start_time = log_api_request('/api/batch')
+    
+    from app.batch_requests import BATCH_LOGIN_ENVIRON_KEY, parse_batch, run_batch
+    
+    try:
+        items = parse_batch(request.get_json(silent=True),
+                            current_app.config.get('BATCH_MAX_REQUESTS', 20))
+    except ValueError as e:
+        log_api_response('/api/batch', start_time, 400, error=e)
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "code": "INVALID_BATCH",
+            "ui_message": "The batch request is invalid."
+        }), 400
+    
+    try:
+        login_status = ensure_login()
+        results = run_batch(items, environ={BATCH_LOGIN_ENVIRON_KEY: login_status})
+        
+        payload = {
+            "status": "success",
+            "count": len(results),
+            "failed": sum(1 for result in results if result['status'] >= 400),
+            "responses": results,
+        }
+        log_api_response('/api/batch', start_time, 200, results)
+        return jsonify(payload), 200
+    except Exception as e:
+        log_api_response('/api/batch', start_time, 500, error=e)
+        return jsonify({
+            "status": "error",
+            "message": str(e),
+            "code": "API_ERROR",
+            "ui_message": "An error occurred while running the batch request."
+        }), 500
+
 @api_blueprint.route('/clear-cache', methods=['POST'])
 def clear_cache() -> Tuple[Response, int]:
     """
     API endpoint to clear the application cache.
     
+    JSON body (optional):
+        tags: Cache tags to invalidate (e.g. ["devices:123"]), works on every backend
+        pattern: Key pattern to delete (Redis only)
+    
     Returns:
         Tuple[Response, int]: JSON response with status code
     """
@@ -962,15 +1260,21 @@ def clear_cache() -> Tuple[Response, int]:
     
     try:
         # Get the cache instance
-        cache_instance = current_app.extensions.get('cache')
+        cache_instance = get_cache()
         if not cache_instance:
             log_api_response('/api/clear-cache', start_time, 500, error="Cache extension not found")
             return jsonify({"status": "error", "message": "Cache extension not found"}), 500
         
-        # Clear specific pattern if provided
-        pattern = request.json.get('pattern') if request.is_json else None
+        # Clear specific tags or pattern if provided
+        body = request.get_json(silent=True) or {}
+        pattern = body.get('pattern')
+        tags = body.get('tags')
         
-        if pattern:
+        if tags:
+            tags = [tags] if isinstance(tags, str) else [str(tag) for tag in tags]
+            num_bumped = bump_tags(*tags)
+            message = f"Invalidated {num_bumped} cache tags: {', '.join(tags)}"
+        elif pattern:
             from app.cache_utils import invalidate_cache_pattern
             # Clear cache keys matching the pattern
             num_cleared = invalidate_cache_pattern(pattern)
@@ -992,6 +1296,11 @@ def cache_stats() -> Tuple[Response, int]:
     """
     API endpoint to get cache statistics.
     
+    Reports hit/miss/stale counts, recompute times and stored sizes per
+    cached route (key prefix) for every backend, plus the in-process tier
+    and, on Redis, server statistics. Counters are per worker process;
+    ?reset=true zeroes them after reading.
+    
     Returns:
         Tuple[Response, int]: JSON response with cache statistics
     """
@@ -999,54 +1308,32 @@ def cache_stats() -> Tuple[Response, int]:
     
     try:
         # Get the cache instance
-        cache_instance = current_app.extensions.get('cache')
+        cache_instance = get_cache()
         if not cache_instance:
             log_api_response('/api/cache-stats', start_time, 500, error="Cache extension not found")
             return jsonify({"status": "error", "message": "Cache extension not found"}), 500
         
-        stats = {}
+        stats = {
+            'cache_type': current_app.config.get('CACHE_TYPE', 'Unknown'),
+            'default_timeout': current_app.config.get('CACHE_DEFAULT_TIMEOUT', 300),
+            'threshold': current_app.config.get('CACHE_THRESHOLD', 'N/A'),
+            'worker_pid': os.getpid(),
+            'routes': get_cache_stats(reset=_arg_flag('reset')),
+        }
+        if hasattr(cache_instance, 'l1_info'):
+            stats['l1'] = cache_instance.l1_info()
         
-        # If using Redis cache, get detailed statistics
-        if hasattr(cache_instance, '_client') and cache_instance.config['CACHE_TYPE'] == 'RedisCache':
-            redis_client = cache_instance._client
+        # If using Redis cache, add server statistics
+        redis_client = getattr(getattr(cache_instance, 'cache', None), '_read_client', None)
+        if redis_client is not None and hasattr(redis_client, 'info'):
             info = redis_client.info()
-            
-            # Get key metrics 
-            stats = {
-                'cache_type': 'Redis',
+            stats['redis'] = {
                 'keys': redis_client.dbsize(),
                 'used_memory': info.get('used_memory_human', 'N/A'),
                 'hit_rate': info.get('keyspace_hits', 0) / max(info.get('keyspace_hits', 0) + info.get('keyspace_misses', 0), 1),
                 'uptime_seconds': info.get('uptime_in_seconds', 0),
                 'peak_memory': info.get('used_memory_peak_human', 'N/A'),
                 'clients_connected': info.get('connected_clients', 0),
-                'pattern_data': {}
-            }
-            
-            # Get stats for specific patterns
-            key_patterns = [
-                'api_plants_*',
-                'api_devices*',
-                'route_*'
-            ]
-            
-            for pattern in key_patterns:
-                keys = redis_client.keys(pattern)
-                if keys:
-                    # Get TTLs for all keys matching the pattern
-                    ttls = [redis_client.ttl(key) for key in keys]
-                    avg_ttl = sum(ttl for ttl in ttls if ttl > 0) / max(len([ttl for ttl in ttls if ttl > 0]), 1)
-                    
-                    stats['pattern_data'][pattern] = {
-                        'count': len(keys),
-                        'avg_ttl_seconds': avg_ttl
-                    }
-        else:
-            # For SimpleCache or other backends, provide limited info
-            stats = {
-                'cache_type': cache_instance.config['CACHE_TYPE'],
-                'default_timeout': cache_instance.config['CACHE_DEFAULT_TIMEOUT'],
-                'threshold': cache_instance.config.get('CACHE_THRESHOLD', 'N/A')
             }
         
         log_api_response('/api/cache-stats', start_time, 200, stats)
@@ -1,7 +1,9 @@
 import time
-from typing import Union, Dict, Any, List
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Union, Dict, Any, List, Callable, Iterable, Optional
 
-from flask import session, current_app
+from flask import session, current_app, copy_current_request_context, has_request_context, request
 
 # Global variables to manage session state
 last_login_time = 0
@@ -11,6 +13,10 @@ SESSION_TIMEOUT = 15 * 60
 # Keep reference to the Growatt API instance
 growatt_api = None
 
+# Shared pool for per-plant API calls, bounding concurrent upstream requests across all web requests
+_plant_executor: Optional[ThreadPoolExecutor] = None
+_plant_executor_lock = threading.Lock()
+
 def initialize(api_instance):
     """
     Initialize this module with the Growatt API instance.
@@ -46,9 +52,15 @@ def ensure_login() -> Dict[str, Any]:
     """
     Ensure the API session is active by checking validity and logging in if needed.
     
+    Sub-requests of /api/batch reuse the status of the batch's single check.
+    
     Returns:
         Dict[str, Any]: Login status information
     """
+    from app.batch_requests import BATCH_LOGIN_ENVIRON_KEY
+    if has_request_context() and BATCH_LOGIN_ENVIRON_KEY in request.environ:
+        return request.environ[BATCH_LOGIN_ENVIRON_KEY]
+    
     if not is_session_valid():
         current_app.logger.info("Session not valid, performing fresh login")
         return get_access_api()
@@ -272,6 +284,84 @@ def get_devices_for_plant(plant_id: str) -> Union[List[Dict[str, Any]], Dict[str
                 "ui_message": "An error occurred while fetching devices for this plant.",
                 "authenticated": False}]
 
+def _get_plant_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Get the shared executor for per-plant API calls, creating it on first use"""
+    global _plant_executor
+    with _plant_executor_lock:
+        if _plant_executor is None:
+            _plant_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='plant-fetch')
+        return _plant_executor
+
+def fan_out(items: Iterable[Any],
+            fetch: Callable[[Any], Any],
+            timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Call fetch for every item concurrently on the shared bounded executor.
+    
+    All calls share one deadline, timeout seconds after submission. Calls
+    still queued behind the PLANT_FETCH_MAX_WORKERS bound at the deadline are
+    cancelled, so fan_out returns on time even when every worker is held by a
+    hung call. A call that times out while running keeps its worker until it
+    returns, but its result is discarded. Calls run with a copy of the
+    current request context.
+    
+    Args:
+        items: Items to fetch (e.g. plant dicts or IDs)
+        fetch: Function called with one item
+        timeout: Seconds until unfinished calls are reported as timed out
+            (default: PLANT_FETCH_TIMEOUT)
+    
+    Returns:
+        List[Dict[str, Any]]: One dict per item, in input order, with 'item', 'result',
+        'error' (None on success) and 'elapsed_ms'
+    """
+    items = list(items)
+    if timeout is None:
+        timeout = current_app.config.get('PLANT_FETCH_TIMEOUT', 20)
+    executor = _get_plant_executor(current_app.config.get('PLANT_FETCH_MAX_WORKERS', 8))
+    
+    app = current_app._get_current_object()
+    in_request = has_request_context()
+    
+    def run(item: Any) -> Any:
+        with app.app_context():
+            return fetch(item)
+    
+    submitted = time.monotonic()
+    deadline = submitted + timeout
+    futures = {}
+    for index, item in enumerate(items):
+        # Each call gets its own copy: one request context cannot be pushed from several threads
+        task = copy_current_request_context(run) if in_request else run
+        futures[executor.submit(task, item)] = index
+    outcomes: List[Dict[str, Any]] = [
+        {'item': item, 'result': None, 'error': None, 'elapsed_ms': None} for item in items
+    ]
+    pending = set(futures)
+    
+    while pending:
+        done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()),
+                             return_when=FIRST_COMPLETED)
+        
+        for future in done:
+            outcome = outcomes[futures[future]]
+            outcome['elapsed_ms'] = (time.monotonic() - submitted) * 1000
+            try:
+                outcome['result'] = future.result()
+            except Exception as e:
+                outcome['error'] = f"API error: {str(e)}"
+        
+        now = time.monotonic()
+        if pending and now >= deadline:
+            for future in pending:
+                # Queued calls never start; running ones are abandoned
+                future.cancel()
+                outcomes[futures[future]]['elapsed_ms'] = (now - submitted) * 1000
+                outcomes[futures[future]]['error'] = f"Timed out after {timeout:g}s"
+            pending = set()
+    
+    return outcomes
+
 def get_weather_list(plant_id: str = None) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
     """
     Fetch weather data for a specific plant or all plants.
@@ -5,13 +5,19 @@ Routes for manual data collection and database management
 import subprocess
 import sys
 import os
+import unicodedata
 from pathlib import Path
-from flask import Blueprint, jsonify, request, current_app
+from urllib.parse import quote
+from flask import Blueprint, jsonify, request, current_app, Response, stream_with_context
+from werkzeug.http import dump_options_header
 from typing import Tuple, Dict, Any
 from datetime import datetime
 
 from app.data_collector import GrowattDataCollector
-from app.database import DatabaseConnector
+from app.database import DatabaseConnector, get_pool_stats
+from app.db_raw_history import get_raw_data_at, get_raw_data_history
+from app.db_series import DEFAULT_INTERVAL_MINUTES, get_daily_series, series_timestamps, series_to_list
+from app.db_stats import get_data_stats as collect_data_stats
 from app.services.plant_service import PlantService
 
 # Create a Blueprint for data management routes
@@ -232,39 +238,252 @@ def sync_status() -> Tuple[Dict[str, Any], int]:
             "message": str(e)
         }), 500
 
+@data_routes.route('/pool-stats', methods=['GET'])
+def pool_stats() -> Tuple[Dict[str, Any], int]:
+    """
+    Get database connection pool metrics: in-use/idle connections, wait times,
+    timeouts, recycled connections and checkouts held past the leak threshold
+    
+    Returns:
+        Tuple[Dict[str, Any], int]: JSON response with status code
+    """
+    try:
+        stats = get_pool_stats()
+        return jsonify({
+            "status": "success",
+            "initialized": bool(stats),
+            "pool": stats
+        }), 200
+    except Exception as e:
+        current_app.logger.error(f"Error getting pool stats: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@data_routes.route('/chart-series', methods=['GET'])
+def chart_series() -> Tuple[Dict[str, Any], int]:
+    """
+    Get a device's day chart series from packed storage
+    
+    Query parameters:
+        serial_number: Device serial number (required)
+        date: Day of the chart, YYYY-MM-DD (required)
+        series: Comma-separated series names, e.g. 'ppv,pacToUser' (default: all)
+    
+    Returns:
+        Tuple[Dict[str, Any], int]: JSON response with status code
+    """
+    try:
+        serial_number = request.args.get('serial_number')
+        day = request.args.get('date')
+        if not serial_number or not day:
+            return jsonify({
+                "status": "error",
+                "message": "serial_number and date are required"
+            }), 400
+        
+        names = request.args.get('series')
+        series = get_daily_series(serial_number, datetime.strptime(day, '%Y-%m-%d').date(),
+                                  names.split(',') if names else None)
+        interval = (24 * 60) // len(next(iter(series.values()))) if series else DEFAULT_INTERVAL_MINUTES
+        timestamps = series_timestamps(day, interval)
+        
+        return jsonify({
+            "status": "success",
+            "serial_number": serial_number,
+            "date": day,
+            "times": [str(t)[11:16] for t in timestamps],
+            "series": {name: series_to_list(values) for name, values in series.items()}
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        current_app.logger.error(f"Error getting chart series: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@data_routes.route('/devices/<serial_number>/raw-data', methods=['GET'])
+def device_raw_data(serial_number: str) -> Tuple[Dict[str, Any], int]:
+    """
+    Reconstruct a device's raw Growatt payload from the delta-encoded history
+    
+    Query parameters:
+        at: ISO timestamp; returns the payload in effect at that time (default: latest)
+        start, end: ISO timestamps; return every recorded payload in [start, end) instead
+    
+    Returns:
+        Tuple[Dict[str, Any], int]: JSON response with status code
+    """
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        if start or end:
+            if not (start and end):
+                return jsonify({
+                    "status": "error",
+                    "message": "start and end must be given together"
+                }), 400
+            history = get_raw_data_history(serial_number, datetime.fromisoformat(start), datetime.fromisoformat(end))
+            return jsonify({
+                "status": "success",
+                "serial_number": serial_number,
+                "history": history
+            }), 200
+        
+        at = request.args.get('at')
+        state = get_raw_data_at(serial_number, datetime.fromisoformat(at) if at else None)
+        if state is None:
+            return jsonify({
+                "status": "error",
+                "message": f"No raw data recorded for {serial_number} at that time"
+            }), 404
+        return jsonify({
+            "status": "success",
+            "serial_number": serial_number,
+            **state
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        current_app.logger.error(f"Error reconstructing raw data: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+@data_routes.route('/files', methods=['GET'])
+def list_files() -> Tuple[Dict[str, Any], int]:
+    """
+    List stored files newest first, one page at a time
+    
+    Query parameters:
+        plant_id, device_id, file_type: Optional filters
+        limit: Page size (default 100, max 1000)
+        cursor: next_cursor from the previous page
+        include_total: 'true' to add an estimated total from the query planner
+    
+    Returns:
+        Tuple[Dict[str, Any], int]: JSON response with status code
+    """
+    try:
+        limit = min(max(request.args.get('limit', default=100, type=int), 1), 1000)
+        page = db_connector.list_files_page(
+            plant_id=request.args.get('plant_id'),
+            device_id=request.args.get('device_id'),
+            file_type=request.args.get('file_type'),
+            limit=limit,
+            cursor=request.args.get('cursor'),
+            include_total=request.args.get('include_total', 'false').lower() == 'true'
+        )
+        return jsonify({
+            "status": "success",
+            **page
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 400
+    except Exception as e:
+        current_app.logger.error(f"Error listing files: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
+def content_disposition(filename: str) -> str:
+    """
+    Build an attachment Content-Disposition header for a stored filename
+    
+    The name is quoted, and non-ASCII names get an RFC 5987 ``filename*``
+    parameter with an ASCII fallback, as ``flask.send_file`` does.
+    
+    Args:
+        filename: Original filename, e.g. a Thai plant name in a report
+    
+    Returns:
+        str: Header value
+    """
+    filename = ''.join(ch for ch in filename if ch not in '\r\n')
+    try:
+        filename.encode('ascii')
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', filename).encode('ascii', 'ignore').decode('ascii')
+        names = {'filename': simple, 'filename*': f"UTF-8''{quote(filename, safe='!#$&+^`|~')}"}
+    else:
+        names = {'filename': filename}
+    return dump_options_header('attachment', names)
+
+@data_routes.route('/files/<path:file_path>', methods=['GET'])
+def download_file(file_path: str):
+    """
+    Stream a stored file chunk by chunk without buffering it in the worker
+    
+    Args:
+        file_path: Path the file was saved under
+    
+    Returns:
+        Response: Streamed file content, 304 if the client's copy is current, or a JSON error
+    """
+    try:
+        file_info = db_connector.get_file_info(file_path)
+        if not file_info:
+            return jsonify({
+                "status": "error",
+                "message": f"File not found: {file_path}"
+            }), 404
+        
+        etag = file_info.get('content_hash') or file_info.get('md5_hash')
+        if etag and request.if_none_match.contains(etag):
+            return Response(status=304, headers={'ETag': f'"{etag}"'})
+        
+        headers = {
+            'Content-Disposition': content_disposition(file_info['filename']),
+        }
+        if file_info.get('size_bytes') is not None:
+            headers['Content-Length'] = str(file_info['size_bytes'])
+        if etag:
+            headers['ETag'] = f'"{etag}"'
+        
+        return Response(
+            stream_with_context(db_connector.iter_file_content(file_info)),
+            mimetype=file_info.get('file_type') or 'application/octet-stream',
+            headers=headers
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error streaming file {file_path}: {str(e)}")
+        return jsonify({
+            "status": "error",
+            "message": str(e)
+        }), 500
+
 @data_routes.route('/stats', methods=['GET'])
 def get_data_stats() -> Tuple[Dict[str, Any], int]:
     """
     Get statistics about collected data in the database
     
+    Row counts are planner estimates unless ?exact=true is passed.
+    
     Returns:
         Tuple[Dict[str, Any], int]: JSON response with database statistics
     """
     try:
-        # Get count of records in each table
-        stats = {
-            "plants": len(db_connector.query("SELECT id FROM plants")),
-            "devices": len(db_connector.query("SELECT sn FROM devices")),
-            "energy_records": len(db_connector.query("SELECT id FROM energy_stats")),
-            "weather_records": len(db_connector.query("SELECT id FROM weather")),
-            "predictions": len(db_connector.query("SELECT id FROM predictions"))
-        }
-        
-        # Get date range of data
-        energy_dates = db_connector.query("""
-            SELECT MIN(date) as oldest, MAX(date) as newest 
-            FROM energy_stats
-        """)
-        
-        if energy_dates and energy_dates[0]['oldest']:
-            stats["oldest_data"] = energy_dates[0]['oldest']
-            stats["newest_data"] = energy_dates[0]['newest']
-        
-        # Get database file size
-        db_path = db_connector.db_path
-        if os.path.exists(db_path):
-            stats["database_size_bytes"] = os.path.getsize(db_path)
-            stats["database_size_mb"] = round(stats["database_size_bytes"] / (1024 * 1024), 2)
+        exact = request.args.get('exact', 'false').lower() in ('true', '1', 'yes')
+        stats = collect_data_stats(exact=exact)
+        if stats is None:
+            return jsonify({
+                "status": "error",
+                "message": "Failed to collect database statistics"
+            }), 500
         
         return jsonify({
             "status": "success",
@@ -5,8 +5,10 @@ Device Status API routes.
 import logging
 from typing import Tuple, Dict, Any, List
 
-from flask import Blueprint, jsonify, request, Response, current_app
+from flask import Blueprint, jsonify, request, Response, current_app, stream_with_context
 
+from app.config import Config
+from app.services.device_events import get_event_bus, iter_sse
 from app.services.device_status_tracker import DeviceStatusTracker
 from app.core import device_status
 
@@ -46,6 +48,49 @@ def get_offline_devices() -> Tuple[Response, int]:
             "ui_message": "An error occurred while fetching offline devices"
         }), 500
 
+@device_status_routes.route('/stream', methods=['GET'])
+def stream_device_events():
+    """
+    Stream device status changes and power deltas as Server-Sent Events.
+
+    Events are pushed as soon as the collector has persisted new device data:
+    ``status`` (status changed) and ``power`` (output moved by at least
+    DEVICE_EVENTS_POWER_DELTA). Subscribe to specific plants with
+    ``?plant_id=1,2``. EventSource resumes from its Last-Event-ID header (or
+    ``?lastEventId=``) after a reconnect; a ``reset`` event means events were
+    lost and the client should reload the device list.
+
+    Returns:
+        Response: text/event-stream response, or JSON error with HTTP 503 when too many streams are open
+    """
+    plant_ids = [p.strip() for value in request.args.getlist('plant_id') for p in value.split(',') if p.strip()]
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('lastEventId')
+
+    bus = get_event_bus()
+    if not bus.subscribe(Config.DEVICE_EVENTS_MAX_CLIENTS):
+        logger.warning("Rejecting device event stream: too many open streams")
+        response = jsonify({
+            "status": "error",
+            "message": "Too many open device event streams",
+            "code": "STREAM_LIMIT",
+            "ui_message": "Live updates are busy, falling back to periodic refresh"
+        })
+        response.status_code = 503
+        response.headers['Retry-After'] = str(max(1, Config.DEVICE_EVENTS_RETRY_MS // 1000))
+        return response
+
+    def generate():
+        try:
+            yield from iter_sse(bus, plant_ids or None, last_event_id)
+        finally:
+            bus.unsubscribe()
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
 @device_status_routes.route('/check', methods=['POST'])
 def check_device_statuses() -> Tuple[Response, int]:
     """
@@ -339,11 +339,10 @@ def get_system_health():
         # Get database connection status
         db_status = "connected"
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.close()
-            conn.close()
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
         except Exception as e:
             db_status = f"error: {str(e)}"
             
@@ -460,11 +459,10 @@ def run_system_diagnostics():
         
         # Check database connectivity
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.close()
-            conn.close()
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1")
+                cursor.close()
             diagnostics_results.append({
                 'component': 'Database',
                 'status': 'passed',
@@ -653,32 +651,43 @@ def check_service_status(service_id):
 @operations_scheduler_bp.route('/system/database/optimize', methods=['POST'])
 @admin_required
 def optimize_database():
-    """Optimize the database (run VACUUM)"""
+    """Optimize the database (VACUUM ANALYZE and REINDEX where needed) in the background"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        from app.db_maintenance import run_maintenance, start_maintenance_job
         
-        # Start time
-        start_time = datetime.datetime.now()
-        
-        # Run VACUUM
-        cursor.execute("VACUUM")
+        data = request.get_json(silent=True) or {}
+        if data.get('dryRun'):
+            # Only reads statistics, so the plan is returned directly
+            report = run_maintenance(tables=data.get('tables'), reindex=bool(data.get('reindex', True)),
+                                     force=bool(data.get('force', False)), dry_run=True)
+            return jsonify({
+                'success': True,
+                'message': 'Database optimization planned',
+                'report': report
+            })
         
-        # Get duration
-        duration = (datetime.datetime.now() - start_time).total_seconds()
+        app = current_app._get_current_object()
         
-        cursor.close()
-        conn.close()
+        def on_complete(report):
+            # Clear cache after optimization
+            with app.app_context():
+                clear_cache()
+            logger.info(f"Database optimized successfully in {report['seconds']:.2f} seconds")
         
-        # Clear cache after optimization
-        clear_cache()
+        job = start_maintenance_job(
+            tables=data.get('tables'),
+            reindex=bool(data.get('reindex', True)),
+            force=bool(data.get('force', False)),
+            on_complete=on_complete
+        )
         
-        logger.info(f"Database optimized successfully in {duration:.2f} seconds")
+        logger.info(f"Database optimization job {job['job_id']} started")
         return jsonify({
             'success': True,
-            'message': 'Database optimized successfully',
-            'duration': f"{duration:.2f} seconds"
-        })
+            'message': 'Database optimization started',
+            'jobId': job['job_id'],
+            'job': job
+        }), 202
     except Exception as e:
         logger.error(f"Error optimizing database: {str(e)}")
         return jsonify({
@@ -686,45 +695,72 @@ def optimize_database():
             'message': f"Failed to optimize database: {str(e)}"
         }), 500
 
+@operations_scheduler_bp.route('/system/database/optimize/<job_id>', methods=['GET'])
+@admin_required
+def optimize_database_status(job_id):
+    """Get the state of a database optimization job"""
+    from app.db_maintenance import get_maintenance_job
+    
+    job = get_maintenance_job(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': f'Optimization job {job_id} not found'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
 @operations_scheduler_bp.route('/system/database/backup', methods=['POST'])
 @admin_required
 def backup_database():
-    """Create a backup of the database"""
+    """Start a logical backup of the database in the background"""
     try:
-        # Source database path
-        db_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'data', 'growatt_data.db')
-        
-        # Backup directory
-        backup_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'backup', 'app', 'data')
-        
-        # Create backup directory if it doesn't exist
-        os.makedirs(backup_dir, exist_ok=True)
-        
-        # Backup filename with timestamp
-        timestamp = datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_file = os.path.join(backup_dir, f'growatt_data_{timestamp}.db')
-        
-        # Copy the database file
-        import shutil
-        shutil.copy2(db_path, backup_file)
+        from app.db_backup import start_backup_job
         
-        # Update the last backup time
-        current_app.config['LAST_DB_BACKUP'] = datetime.datetime.now().isoformat()
+        data = request.get_json(silent=True) or {}
+        job = start_backup_job(
+            incremental=bool(data.get('incremental', False)),
+            tables=data.get('tables')
+        )
         
-        logger.info(f"Database backup created successfully: {backup_file}")
+        logger.info(f"Database backup job {job['job_id']} started")
         return jsonify({
             'success': True,
-            'message': 'Database backup created successfully',
-            'backupPath': backup_file,
-            'timestamp': timestamp
-        })
+            'message': 'Database backup started',
+            'jobId': job['job_id'],
+            'job': job
+        }), 202
     except Exception as e:
-        logger.error(f"Error backing up database: {str(e)}")
+        logger.error(f"Error starting database backup: {str(e)}")
         return jsonify({
             'success': False,
-            'message': f"Failed to backup database: {str(e)}"
+            'message': f"Failed to start database backup: {str(e)}"
         }), 500
 
+@operations_scheduler_bp.route('/system/database/backup/<job_id>', methods=['GET'])
+@admin_required
+def backup_database_status(job_id):
+    """Get the progress of a database backup job"""
+    from app.db_backup import get_backup_job
+    
+    job = get_backup_job(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': f'Backup job {job_id} not found'
+        }), 404
+    
+    if job['status'] == 'completed':
+        current_app.config['LAST_DB_BACKUP'] = job.get('finished_at')
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
 @operations_scheduler_bp.route('/system/logs/cleanup', methods=['POST'])
 @admin_required
 def cleanup_system_logs():
@@ -987,27 +1023,12 @@ def get_last_backup_time():
         # Check if we have a stored value
         if current_app.config.get('LAST_DB_BACKUP'):
             return current_app.config.get('LAST_DB_BACKUP')
-            
-        # Otherwise check for backup files
-        backup_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'backup', 'app', 'data')
-        
-        if not os.path.exists(backup_dir):
-            return None
-            
-        backup_files = [f for f in os.listdir(backup_dir) if f.startswith('growatt_data_') and f.endswith('.db')]
-        
-        if not backup_files:
-            return None
-            
-        # Get the most recent backup
-        backup_files.sort(reverse=True)
-        latest_backup = backup_files[0]
         
-        # Parse timestamp from filename (format: growatt_data_YYYYMMDD_HHMMSS.db)
-        timestamp_str = latest_backup.replace('growatt_data_', '').replace('.db', '')
-        backup_time = datetime.datetime.strptime(timestamp_str, '%Y%m%d_%H%M%S')
+        # Otherwise check the completed backups on disk
+        from app.db_backup import latest_backup
         
-        return backup_time.isoformat()
+        latest = latest_backup()
+        return latest['created_at'] if latest else None
     except Exception as e:
         logger.error(f"Error getting last backup time: {str(e)}")
         return None
@@ -170,6 +170,50 @@ class BackgroundService:
                 description=f"Collect plant data on schedule: {cron_expr}"
             )
             logger.info(f"Scheduled plant data collection with cron: {cron_expr}")
+        
+        # Check if we should take scheduled database backups
+        if app.config.get('BACKUP_ENABLED', False):
+            cron_expr = app.config.get('BACKUP_CRON', '0 1 * * *')
+            self.add_cron_job(
+                func='app.db_backup:run_scheduled_backup',
+                id='database_backup',
+                cron=cron_expr,
+                description=f"Back up the database on schedule: {cron_expr}"
+            )
+            logger.info(f"Scheduled database backups with cron: {cron_expr}")
+        
+        # Check if we should move closed months to the columnar archive
+        if app.config.get('ARCHIVE_ENABLED', False):
+            cron_expr = app.config.get('ARCHIVE_CRON', '0 2 * * *')
+            self.add_cron_job(
+                func='app.db_archive:archive_closed_months',
+                id='data_archive',
+                cron=cron_expr,
+                description=f"Archive closed months of readings on schedule: {cron_expr}"
+            )
+            logger.info(f"Scheduled data archiving with cron: {cron_expr}")
+        
+        # Check if we should downsample and prune old time-series data
+        if app.config.get('RETENTION_ENABLED', False):
+            cron_expr = app.config.get('RETENTION_CRON', '30 2 * * *')
+            self.add_cron_job(
+                func='app.db_retention:apply_retention',
+                id='data_retention',
+                cron=cron_expr,
+                description=f"Downsample and prune time-series data on schedule: {cron_expr}"
+            )
+            logger.info(f"Scheduled data retention with cron: {cron_expr}")
+        
+        # Check if we should vacuum, analyze and reindex on schedule
+        if app.config.get('MAINTENANCE_ENABLED', False):
+            cron_expr = app.config.get('MAINTENANCE_CRON', '0 3 * * *')
+            self.add_cron_job(
+                func='app.db_maintenance:run_maintenance',
+                id='database_maintenance',
+                cron=cron_expr,
+                description=f"Vacuum, analyze and reindex the database on schedule: {cron_expr}"
+            )
+            logger.info(f"Scheduled database maintenance with cron: {cron_expr}")
     
     def add_interval_job(self, func, id, **kwargs):
         """
@@ -0,0 +1,358 @@
+"""
+Device event bus behind the ``/api/device-status/stream`` Server-Sent Events endpoint
+
+After the collector persists a plant's devices it calls
+``publish_device_changes``, which compares them with the last values seen by
+this process and publishes:
+
+* ``status`` events when a device's status changes (e.g. online -> offline)
+* ``power`` events when its current output (``pac``) moves by at least
+  ``DEVICE_EVENTS_POWER_DELTA``
+
+The first time a device is seen only its baseline is recorded. Events are
+kept in a bounded ring buffer of ``DEVICE_EVENTS_BUFFER_SIZE`` entries, so a
+client reconnecting with ``Last-Event-ID`` receives what it missed. Event ids
+are ``<epoch>-<sequence>``, where the epoch identifies the process: every
+gunicorn worker runs its own collector and bus, so an id from another worker
+(or from before a restart), or one that has already left the buffer, cannot
+be resumed and the client is told to reload its state instead.
+"""
+
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.config import Config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Keys of the Growatt device payload holding the current output
+POWER_KEYS: Tuple[str, ...] = ('pac', 'power')
+
+# Initialize a global event bus instance
+_bus = None
+_bus_lock = threading.Lock()
+
+
+def get_event_bus() -> 'DeviceEventBus':
+    """Get or create the global event bus instance"""
+    global _bus
+    if _bus is None:
+        with _bus_lock:
+            if _bus is None:
+                _bus = DeviceEventBus(max_events=Config.DEVICE_EVENTS_BUFFER_SIZE)
+    return _bus
+
+
+def _power_of(device: Dict[str, Any]) -> Optional[float]:
+    raw_data = device.get('raw_data') or {}
+    for key in POWER_KEYS:
+        value = raw_data.get(key, device.get(key))
+        if value in (None, ''):
+            continue
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+    return None
+
+
+class DeviceEventBus:
+    """Bounded, resumable log of device events with blocking reads for stream subscribers"""
+
+    def __init__(self, max_events: int = 1000):
+        """
+        Args:
+            max_events: Number of events kept for clients resuming with Last-Event-ID
+        """
+        self.epoch = uuid.uuid4().hex[:8]
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._seq = 0
+        self._condition = threading.Condition()
+        # serial_number -> {'status': ..., 'power': ...} as last published
+        self._last_seen: Dict[str, Dict[str, Any]] = {}
+        self._subscribers = 0
+
+    # ----- Publishing -----
+
+    def publish(self, event_type: str, plant_id: Any, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Append an event and wake up waiting subscribers
+
+        Args:
+            event_type: SSE event name, e.g. 'status' or 'power'
+            plant_id: Plant the event belongs to, used for per-plant subscriptions
+            data: JSON-serializable event payload
+
+        Returns:
+            Dict[str, Any]: The stored event with its id
+        """
+        with self._condition:
+            self._seq += 1
+            event = {
+                'seq': self._seq,
+                'id': f"{self.epoch}-{self._seq}",
+                'event': event_type,
+                'plant_id': str(plant_id),
+                'data': data,
+            }
+            self._events.append(event)
+            self._condition.notify_all()
+        return event
+
+    def publish_device_changes(self, devices: Iterable[Dict[str, Any]]) -> int:
+        """
+        Publish status changes and power deltas of freshly persisted devices
+
+        Args:
+            devices: Device entries as saved by the collector (serial_number, plant_id,
+                alias, status, raw_data, ...)
+
+        Returns:
+            int: Number of events published
+        """
+        published = 0
+        threshold = Config.DEVICE_EVENTS_POWER_DELTA
+        timestamp = time.strftime('%Y-%m-%dT%H:%M:%S')
+
+        # The condition's lock is reentrant, so publish() can be called while holding it
+        with self._condition:
+            for device in devices:
+                sn = device.get('serial_number')
+                if not sn:
+                    continue
+                status = device.get('status')
+                power = _power_of(device)
+                previous = self._last_seen.get(sn)
+                if previous is None:
+                    # First sighting only records the baseline
+                    self._last_seen[sn] = {'status': status, 'power': power}
+                    continue
+
+                base = {
+                    'serial_number': sn,
+                    'plant_id': device.get('plant_id'),
+                    'alias': device.get('alias', ''),
+                    'timestamp': timestamp,
+                }
+                if status != previous['status']:
+                    self.publish('status', device.get('plant_id'),
+                                 {**base, 'status': status, 'previous_status': previous['status']})
+                    previous['status'] = status
+                    published += 1
+
+                if power is None or previous['power'] is None:
+                    previous['power'] = power
+                elif abs(power - previous['power']) >= threshold:
+                    self.publish('power', device.get('plant_id'),
+                                 {**base, 'power': power, 'previous_power': previous['power'],
+                                  'delta': round(power - previous['power'], 3)})
+                    previous['power'] = power
+                    published += 1
+                # Smaller changes keep the last published power, so slow drifts still add up to a delta
+
+        return published
+
+    # ----- Reading -----
+
+    def parse_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        """
+        Turn a Last-Event-ID into a sequence number of this bus
+
+        Args:
+            event_id: Id of the last event the client received
+
+        Returns:
+            Optional[int]: Its sequence number, or None if it was not issued by this process
+        """
+        epoch, _, seq = (event_id or '').partition('-')
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    @property
+    def last_seq(self) -> int:
+        """Sequence number of the latest event"""
+        with self._condition:
+            return self._seq
+
+    def _collect(self, after_seq: int, plant_ids: Optional[List[str]]) -> Tuple[List[Dict[str, Any]], int, bool]:
+        # Caller holds the condition
+        oldest = self._events[0]['seq'] if self._events else self._seq + 1
+        complete = after_seq >= oldest - 1
+        events = [event for event in self._events
+                  if event['seq'] > after_seq and (not plant_ids or event['plant_id'] in plant_ids)]
+        return events, self._seq, complete
+
+    def events_since(self, after_seq: int,
+                     plant_ids: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """
+        Read the buffered events after a sequence number
+
+        Args:
+            after_seq: Sequence number of the last event the reader has seen
+            plant_ids: Only events of these plants (default: all plants)
+
+        Returns:
+            Tuple of the matching events, the sequence number to continue from and whether
+            the buffer still held every event after after_seq
+        """
+        with self._condition:
+            return self._collect(after_seq, plant_ids)
+
+    def wait_for_events(self, after_seq: int, plant_ids: Optional[List[str]] = None,
+                        timeout: float = 15.0) -> Tuple[List[Dict[str, Any]], int, bool]:
+        """
+        Like events_since, but block up to timeout seconds until a new event is published
+
+        Returns:
+            Same as events_since; the event list is empty if the timeout expired
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > after_seq, timeout=timeout)
+            return self._collect(after_seq, plant_ids)
+
+    # ----- Subscribers -----
+
+    def subscribe(self, max_subscribers: int) -> bool:
+        """
+        Reserve a stream slot
+
+        Args:
+            max_subscribers: Maximum number of concurrent streams in this process
+
+        Returns:
+            bool: True if a slot was reserved; release it with unsubscribe()
+        """
+        with self._condition:
+            if self._subscribers >= max_subscribers:
+                return False
+            self._subscribers += 1
+            return True
+
+    def unsubscribe(self) -> None:
+        """Release a slot reserved with subscribe()"""
+        with self._condition:
+            self._subscribers = max(0, self._subscribers - 1)
+
+    def info(self) -> Dict[str, Any]:
+        """
+        Describe the bus
+
+        Returns:
+            Dict[str, Any]: Epoch, buffer usage, latest sequence number, tracked devices and open streams
+        """
+        with self._condition:
+            return {
+                'epoch': self.epoch,
+                'buffered_events': len(self._events),
+                'max_events': self._events.maxlen,
+                'last_seq': self._seq,
+                'tracked_devices': len(self._last_seen),
+                'subscribers': self._subscribers,
+            }
+
+
+def publish_device_changes(devices: Iterable[Dict[str, Any]]) -> int:
+    """
+    Publish status changes and power deltas of freshly persisted devices to the global bus.
+    Errors are logged and never interrupt data collection.
+
+    Args:
+        devices: Device entries as saved by the collector
+
+    Returns:
+        int: Number of events published
+    """
+    try:
+        return get_event_bus().publish_device_changes(devices)
+    except Exception as e:
+        logger.error(f"Error publishing device events: {e}")
+        return 0
+
+
+def format_sse(event: Optional[str] = None, data: Any = None, event_id: Optional[str] = None,
+               retry: Optional[int] = None, comment: Optional[str] = None) -> str:
+    """
+    Format one Server-Sent Events message
+
+    Args:
+        event: Event name (optional)
+        data: JSON-serializable payload (optional)
+        event_id: Event id clients send back as Last-Event-ID (optional)
+        retry: Reconnect delay in milliseconds (optional)
+        comment: Comment line, ignored by clients and used as keep-alive (optional)
+
+    Returns:
+        str: The message, terminated by a blank line
+    """
+    lines = []
+    if comment is not None:
+        lines.append(f": {comment}")
+    if retry is not None:
+        lines.append(f"retry: {retry}")
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    if data is not None:
+        lines.append(f"data: {json.dumps(data, default=str, ensure_ascii=False)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def iter_sse(bus: DeviceEventBus, plant_ids: Optional[List[str]] = None,
+             last_event_id: Optional[str] = None) -> Iterator[str]:
+    """
+    Produce the messages of one event stream
+
+    The stream replays the buffered events after last_event_id, then waits for
+    new ones, sending a keep-alive comment every ``DEVICE_EVENTS_HEARTBEAT``
+    seconds, and ends after ``DEVICE_EVENTS_MAX_STREAM_SECONDS`` so that
+    EventSource reconnects (and resumes) instead of holding a thread forever.
+    A ``reset`` event tells the client that events were lost and it should
+    reload the device list.
+
+    Args:
+        bus: Event bus to read from
+        plant_ids: Only events of these plants (default: all plants)
+        last_event_id: Id of the last event the client received (optional)
+
+    Returns:
+        Iterator[str]: SSE messages
+    """
+    deadline = time.monotonic() + Config.DEVICE_EVENTS_MAX_STREAM_SECONDS
+    yield format_sse(retry=Config.DEVICE_EVENTS_RETRY_MS, comment=f"device events {bus.epoch}")
+
+    if last_event_id:
+        after_seq = bus.parse_event_id(last_event_id)
+        if after_seq is None:
+            after_seq = bus.last_seq
+            yield format_sse('reset', {'reason': 'unknown_event_id'}, event_id=f"{bus.epoch}-{after_seq}")
+    else:
+        after_seq = bus.last_seq
+        # Give the client a resume position even if no event arrives before it reconnects
+        yield format_sse(event_id=f"{bus.epoch}-{after_seq}")
+
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events, last_seq, complete = bus.wait_for_events(
+            after_seq, plant_ids, timeout=min(Config.DEVICE_EVENTS_HEARTBEAT, remaining))
+        if not complete:
+            # The reader fell behind the ring buffer
+            yield format_sse('reset', {'reason': 'buffer_overflow'}, event_id=f"{bus.epoch}-{last_seq}")
+        else:
+            for event in events:
+                yield format_sse(event['event'], event['data'], event_id=event['id'])
+        if last_seq == after_seq:
+            yield format_sse(comment='keep-alive')
+        elif complete and not events:
+            # Only other plants' events arrived; an id-only message moves the client's resume position
+            yield format_sse(event_id=f"{bus.epoch}-{last_seq}")
+        after_seq = last_seq
@@ -20,10 +20,22 @@ import requests
 # Application imports
 from app.config import Config
 from app.database import DatabaseConnector
+from app.db_prepared import register_statement
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Looked up before every potential notification, so keep it prepared
+register_statement('last_notification_time', '''
+    SELECT sent_at 
+    FROM notification_history 
+    WHERE device_serial_number = %s 
+      AND notification_type = %s 
+      AND success = TRUE
+    ORDER BY sent_at DESC 
+    LIMIT 1
+''')
+
 class NotificationService:
     """Service for sending notifications about device status changes"""
     
@@ -123,17 +135,7 @@ class NotificationService:
         # If database is available, check there for persistence across restarts
         if self.db:
             try:
-                query = """
-                    SELECT sent_at 
-                    FROM notification_history 
-                    WHERE device_serial_number = %s 
-                      AND notification_type = %s 
-                      AND success = TRUE
-                    ORDER BY sent_at DESC 
-                    LIMIT 1
-                """
-                
-                result = self.db.query(query, (device_serial, notification_type))
+                result = self.db.query_prepared('last_notification_time', (device_serial, notification_type))
                 
                 if result and result[0]['sent_at']:
                     # Parse datetime and convert to timestamp
@@ -11,6 +11,7 @@ document.addEventListener("alpine:init", () => {
     lastUpdated: null,
     refreshInterval: 300000, // 5 minutes
     isRefreshing: false,
+    deviceEvents: null, // EventSource for /api/device-status/stream
 
     // Dashboard data
     summary: {
@@ -66,6 +67,7 @@ document.addEventListener("alpine:init", () => {
       this.setupResponsiveLayout();
       this.loadDashboardData();
       this.setupPeriodicRefresh();
+      this.setupDeviceEvents();
       this.setupEventListeners();
     },
 
@@ -489,6 +491,54 @@ document.addEventListener("alpine:init", () => {
       });
     },
 
+    // Apply live device updates pushed by the server instead of polling for them
+    setupDeviceEvents() {
+      if (!window.EventSource) {
+        return; // Periodic refresh still covers device data
+      }
+
+      this.deviceEvents = new EventSource("/api/device-status/stream");
+
+      const findDevice = (data) =>
+        this.devices.find(
+          (device) =>
+            (device.serial_number || device.deviceSn) === data.serial_number
+        );
+
+      this.deviceEvents.addEventListener("status", (event) => {
+        const data = JSON.parse(event.data);
+        const device = findDevice(data);
+        if (!device) {
+          return;
+        }
+        device.status = data.status;
+        this.countDeviceStatuses();
+        this.filterDevices();
+        this.renderDeviceStatusChart();
+        this.lastUpdated = new Date();
+      });
+
+      this.deviceEvents.addEventListener("power", (event) => {
+        const data = JSON.parse(event.data);
+        const device = findDevice(data);
+        if (device) {
+          device.pac = data.power;
+          this.lastUpdated = new Date();
+        }
+      });
+
+      // Events were lost (server restart, other worker, buffer overflow): reload the list
+      this.deviceEvents.addEventListener("reset", () => {
+        this.loadDevicesData().then(() => {
+          this.renderDeviceStatusChart();
+        });
+      });
+
+      window.addEventListener("beforeunload", () => {
+        this.deviceEvents.close();
+      });
+    },
+
     // Set up responsive layout and event listeners
     setupResponsiveLayout() {
       const updateLayout = () => {
@@ -23,6 +23,7 @@ sys.path.append(project_root)
 # Import from the app for direct access
 from app.config import Config
 from app.database import DatabaseConnector, get_db_connection
+from app.db_blobs import hash_file
 from app.core.growatt import Growatt
 
 # Configure logging
@@ -195,6 +196,7 @@ def save_files_to_db(dir_path, plant_id=None, device_id=None, recursive=False):
         'saved_files': 0,
         'failed_files': 0,
         'skipped_files': 0,
+        'deduplicated_files': 0,
         'total_size_bytes': 0
     }
 
@@ -231,20 +233,22 @@ def save_files_to_db(dir_path, plant_id=None, device_id=None, recursive=False):
         filename = os.path.basename(file_path)
         rel_path = os.path.relpath(file_path, os.path.dirname(dir_path))
 
-        # Skip files that already exist in the database
-        if db_connector.file_exists_in_db(rel_path):
-            logger.info(f"Skipping existing file: {rel_path}")
-            stats['skipped_files'] += 1
-            skipped_files.append(rel_path)
-            continue
-
         try:
-            # Read file content
-            with open(file_path, 'rb') as f:
-                content = f.read()
+            # Skip files whose content is already stored under this path
+            content_hash = hash_file(file_path)
+            if db_connector.content_hash_exists(content_hash):
+                existing = db_connector.get_file_info(rel_path)
+                if existing and existing.get('content_hash') == content_hash:
+                    logger.info(f"Skipping unchanged file: {rel_path}")
+                    stats['skipped_files'] += 1
+                    skipped_files.append(rel_path)
+                    continue
+                # Same content under another path: only the metadata row is written below
+                logger.info(f"Content of {rel_path} already stored, linking path only")
+                stats['deduplicated_files'] += 1
 
             # Get file size
-            size_bytes = len(content)
+            size_bytes = os.path.getsize(file_path)
             stats['total_size_bytes'] += size_bytes
 
             # Get file type
@@ -266,7 +270,8 @@ def save_files_to_db(dir_path, plant_id=None, device_id=None, recursive=False):
             if file_type == 'application/json':
                 try:
                     # Try to parse as JSON to extract metadata
-                    json_data = json.loads(content.decode('utf-8'))
+                    with open(file_path, 'rb') as f:
+                        json_data = json.loads(f.read().decode('utf-8'))
                     # Extract basic metadata
                     metadata = {
                         'record_count': len(json_data) if isinstance(json_data, list) else 1,
@@ -276,16 +281,17 @@ def save_files_to_db(dir_path, plant_id=None, device_id=None, recursive=False):
                 except json.JSONDecodeError:
                     logger.warning(f"Invalid JSON file: {rel_path}")
 
-            # Save file to database
-            success = db_connector.save_file_to_db(
-                filename=filename,
-                file_path=rel_path,
-                content=content,
-                file_type=file_type,
-                plant_id=plant_id,
-                device_id=device_id,
-                metadata=metadata
-            )
+            # Save file to database, streaming the content from disk
+            with open(file_path, 'rb') as f:
+                success = db_connector.save_file_to_db(
+                    filename=filename,
+                    file_path=rel_path,
+                    content=f,
+                    file_type=file_type,
+                    plant_id=plant_id,
+                    device_id=device_id,
+                    metadata=metadata
+                )
 
             if success:
                 logger.info(f"Saved file to database: {rel_path} ({size_bytes} bytes)")
@@ -22,6 +22,8 @@ sys.path.append(parent_dir)
 # Import from the app
 from app.config import Config
 from app.database import get_db_connection
+from app.db_rollups import update_energy_rollups
+from app.db_series import save_daily_series
 from app.core.growatt import Growatt
 
 # Configure logging
@@ -413,6 +415,10 @@ class InverterDataCollector:
                     logger.warning(f"No chart data found for device {device_sn} on {target_date}")
                     continue
                 
+                # Keep the whole day as one packed row per series; the per-timestamp rows below
+                # feed the hourly rollups and are pruned by retention after a few days
+                self.save_daily_series_to_db(plant_id, device_sn, target_date, charts)
+                
                 # Get timestamps from the first chart data (assuming all charts have the same timestamps)
                 first_chart_key = next(iter(charts), None)
                 if not first_chart_key or not charts[first_chart_key]:
@@ -493,6 +499,30 @@ class InverterDataCollector:
             logger.error(f"Error getting inverter history: {str(e)}")
             return []
     
+    def save_daily_series_to_db(self, plant_id: str, device_sn: str, date: str, charts: Dict[str, Any]) -> int:
+        """
+        Save the day chart series of an inverter in packed form
+        
+        Args:
+            plant_id: Plant ID the device belongs to
+            device_sn: Device serial number
+            date: Date of the charts (YYYY-MM-DD)
+            charts: The 'charts' object of the daily energy response
+            
+        Returns:
+            int: Number of series saved
+        """
+        try:
+            with get_db_connection() as conn:
+                cursor = conn.cursor()
+                saved = save_daily_series(cursor, device_sn, plant_id, date, charts)
+                conn.commit()
+                return saved
+                
+        except Exception as e:
+            logger.error(f"Error saving chart series for device {device_sn} on {date}: {str(e)}")
+            return 0
+    
     def save_inverter_data_to_db(self, inverter_data: Dict[str, Any]) -> bool:
         """
         Save inverter data to the database
@@ -605,6 +635,7 @@ class InverterDataCollector:
             return 0
         
         saved_count = 0
+        touched_hours = []
         
         try:
             with get_db_connection() as conn:
@@ -660,6 +691,10 @@ class InverterDataCollector:
                     ))
                     
                     saved_count += 1
+                    touched_hours.append((data_point["serial_number"], data_point["timestamp"]))
+                
+                # Refresh the hourly rollups for the keys in this batch only
+                update_energy_rollups(cursor, hour_keys=touched_hours)
                 
                 conn.commit()
                 logger.info(f"Successfully saved {saved_count} history data points")
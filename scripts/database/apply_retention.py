@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Apply Data Retention
+
+This script downsamples raw rows older than the configured retention period
+(RETENTION_*_DAYS) into hourly/daily/monthly aggregate tables and deletes them
+in small batches. With --dry-run it only reports how many rows and buckets
+each table would lose. The same job runs on RETENTION_CRON when
+RETENTION_ENABLED is set.
+
+Usage:
+    python apply_retention.py [--dry-run] [--table TABLE ...] [--batch-size N] [--max-batches N]
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import app modules
+from app.db_retention import RETENTION_POLICIES, apply_retention, ensure_retention_tables
+from app.config import Config
+
+# Configure logging
+logging.basicConfig(
+    level=logging.getLevelName(Config.LOG_LEVEL),
+    format=Config.LOG_FORMAT,
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Downsample and prune old time-series data')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only report what would be downsampled and deleted')
+    parser.add_argument('--table', action='append', choices=sorted(RETENTION_POLICIES),
+                        help='Table to process (repeatable; default: all)')
+    parser.add_argument('--batch-size', type=int, default=Config.RETENTION_BATCH_SIZE,
+                        help=f'Rows deleted per transaction (default: {Config.RETENTION_BATCH_SIZE})')
+    parser.add_argument('--max-batches', type=int, default=None,
+                        help='Maximum delete batches per table (default: no limit)')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    try:
+        args = parse_args()
+        if not ensure_retention_tables():
+            logger.error("Failed to create retention aggregate tables")
+            sys.exit(1)
+
+        report = apply_retention(dry_run=args.dry_run, tables=args.table,
+                                 batch_size=args.batch_size, max_batches=args.max_batches)
+        print(json.dumps(report, indent=2))
+        sys.exit(1 if any('error' in entry for entry in report.values()) else 0)
+    except KeyboardInterrupt:
+        logger.info("Retention interrupted by user; re-run to continue")
+        sys.exit(0)
+    except Exception as e:
+        logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Archive Closed Months
+
+This script moves closed months of energy_stats, device_data and
+inverter_history into per-month columnar files under ARCHIVE_DIR (one
+memory-mappable .npy file per column plus a manifest.json) and deletes the
+archived rows from the database. It can also load an archived month back.
+
+Usage:
+    python archive_months.py [--table TABLE ...] [--keep-hot]
+    python archive_months.py --table TABLE --month YYYY-MM [--keep-hot] [--overwrite]
+    python archive_months.py --table TABLE --month YYYY-MM --import
+    python archive_months.py --list
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import app modules
+from app.db_archive import (
+    ARCHIVE_TABLES, archive_closed_months, archived_months, export_month, import_month, parse_month
+)
+from app.config import Config
+
+# Configure logging
+logging.basicConfig(
+    level=logging.getLevelName(Config.LOG_LEVEL),
+    format=Config.LOG_FORMAT,
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Move closed months of readings to the columnar archive')
+    parser.add_argument('--table', action='append', choices=sorted(ARCHIVE_TABLES),
+                        help='Table to archive (repeatable; default: all)')
+    parser.add_argument('--month', help='Single month to export or import (YYYY-MM; requires one --table)')
+    parser.add_argument('--keep-hot', action='store_true',
+                        help='Keep the archived rows in the database')
+    parser.add_argument('--overwrite', action='store_true',
+                        help='Replace an existing archive of --month')
+    parser.add_argument('--import', dest='import_month', action='store_true',
+                        help='Load --month from the archive back into the database')
+    parser.add_argument('--list', action='store_true',
+                        help='List archived months and exit')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    try:
+        args = parse_args()
+
+        if args.list:
+            for table in args.table or ARCHIVE_TABLES:
+                months = [f"{month:%Y-%m}" for month in archived_months(table)]
+                print(f"{table}: {', '.join(months) or '(none)'}")
+            sys.exit(0)
+
+        if args.month:
+            if not args.table or len(args.table) != 1:
+                logger.error("--month requires exactly one --table")
+                sys.exit(1)
+            table, month = args.table[0], parse_month(args.month)
+            if args.import_month:
+                imported = import_month(table, month)
+                logger.info(f"Imported {imported} rows into {table}")
+            else:
+                result = export_month(table, month, delete_hot=not args.keep_hot, overwrite=args.overwrite)
+                print(json.dumps(result, indent=2))
+            sys.exit(0)
+
+        report = archive_closed_months(tables=args.table, delete_hot=not args.keep_hot)
+        print(json.dumps(report, indent=2))
+        sys.exit(1 if any('error' in entry for entries in report.values() for entry in entries) else 0)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.info("Archiving interrupted by user; re-run to continue")
+        sys.exit(0)
+    except Exception as e:
+        logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
+        sys.exit(1)
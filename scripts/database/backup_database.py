@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Backup Database
+
+This script writes a logical backup of the database to BACKUP_DIR: every
+table is streamed with COPY into a gzip-compressed CSV file, inside a single
+consistent snapshot. Incremental backups only copy the rows of append-only
+tables (device_data, notification_history, raw_data_history) added since the
+previous backup; every other table is copied in full.
+
+Usage:
+    python backup_database.py [--incremental] [--table TABLE ...]
+    python backup_database.py --list
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import app modules
+from app.db_backup import create_backup, list_backups
+from app.config import Config
+
+# Configure logging
+logging.basicConfig(
+    level=logging.getLevelName(Config.LOG_LEVEL),
+    format=Config.LOG_FORMAT,
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Create a logical backup of the database')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only copy rows of append-only tables added since the latest backup')
+    parser.add_argument('--table', action='append',
+                        help='Table to back up (repeatable; default: all; full backups only)')
+    parser.add_argument('--list', action='store_true',
+                        help='List completed backups and exit')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    try:
+        args = parse_args()
+
+        if args.list:
+            for manifest in list_backups():
+                base = f" (base {manifest['base']})" if manifest.get('base') else ''
+                print(f"{manifest['id']}: {manifest['kind']}{base}, "
+                      f"{len(manifest['tables'])} tables, {manifest.get('bytes', 0)} bytes")
+            sys.exit(0)
+
+        if args.incremental and args.table:
+            logger.error("--table cannot be combined with --incremental")
+            sys.exit(1)
+
+        manifest = create_backup(incremental=args.incremental, tables=args.table)
+        print(json.dumps({
+            'id': manifest['id'],
+            'kind': manifest['kind'],
+            'base': manifest['base'],
+            'bytes': manifest['bytes'],
+            'rows': {table: entry['rows'] for table, entry in manifest['tables'].items()},
+        }, indent=2))
+        sys.exit(0)
+    except KeyboardInterrupt:
+        logger.info("Backup interrupted by user; the partial backup was discarded")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
+        sys.exit(1)
@@ -18,6 +18,7 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../.
 
 # Import app modules
 from app.database import get_db_connection
+from app.db_migration import add_fault_log_search_indexes
 from app.config import Config
 
 # Configure logging
@@ -84,6 +85,8 @@ if __name__ == "__main__":
         success = create_fault_logs_table()
         if success:
             logger.info("Fault logs table created successfully")
+            if not add_fault_log_search_indexes():
+                logger.warning("Failed to create fault log search indexes")
             sys.exit(0)
         else:
             logger.error("Failed to create fault logs table")
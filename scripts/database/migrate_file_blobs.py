@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Migrate File Contents to Blob Storage
+
+This script moves file contents stored inline in the files table into the
+content-addressed file_blobs/file_chunks tables, storing each distinct content
+only once. New files are written to blob storage directly; run this once to
+convert rows saved before blob storage existed. It is safe to re-run.
+
+Usage:
+    python migrate_file_blobs.py [--batch-size N]
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import app modules
+from app.db_blobs import ensure_blob_tables, migrate_legacy_file_contents
+from app.config import Config
+
+# Configure logging
+logging.basicConfig(
+    level=logging.getLevelName(Config.LOG_LEVEL),
+    format=Config.LOG_FORMAT,
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Move inline file contents into deduplicated blob storage')
+    parser.add_argument('--batch-size', type=int, default=50,
+                        help='Number of files migrated per transaction (default: 50)')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    try:
+        args = parse_args()
+        if not ensure_blob_tables():
+            logger.error("Failed to create file blob tables")
+            sys.exit(1)
+
+        logger.info("Migrating inline file contents to blob storage...")
+        migrated = migrate_legacy_file_contents(batch_size=args.batch_size)
+        logger.info(f"Migrated {migrated} files to blob storage")
+        sys.exit(0)
+    except KeyboardInterrupt:
+        logger.info("Migration interrupted by user; re-run to continue")
+        sys.exit(0)
+    except Exception as e:
+        logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Rebuild Energy Rollups
+
+This script recomputes the hourly, daily and monthly energy rollup tables
+from the raw energy_stats and inverter_history rows. The collectors keep the
+rollups up to date incrementally; use this script to repair them after manual
+data fixes or a failed collection run.
+
+Only buckets whose raw rows are still in the database are rebuilt; rollups
+of periods already pruned by retention or moved to the cold archive are kept.
+
+Usage:
+    python rebuild_energy_rollups.py [--since YYYY-MM-DD]
+"""
+
+import os
+import sys
+import logging
+import argparse
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import app modules
+from app.db_rollups import ensure_rollup_tables, rebuild_energy_rollups
+from app.config import Config
+
+# Configure logging
+logging.basicConfig(
+    level=logging.getLevelName(Config.LOG_LEVEL),
+    format=Config.LOG_FORMAT,
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Rebuild energy rollup tables from raw data')
+    parser.add_argument('--since', type=str, default=None,
+                        help='Only rebuild buckets from this date (YYYY-MM-DD) onwards; default rebuilds '
+                             'everything still backed by raw rows')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    try:
+        args = parse_args()
+        if not ensure_rollup_tables():
+            logger.error("Failed to create energy rollup tables")
+            sys.exit(1)
+
+        logger.info(f"Rebuilding energy rollups{' since ' + args.since if args.since else ''}...")
+        counts = rebuild_energy_rollups(since=args.since)
+        logger.info(f"Energy rollups rebuilt: {counts['hour']} hourly, {counts['day']} daily, "
+                    f"{counts['month']} monthly device rows")
+        sys.exit(0)
+    except KeyboardInterrupt:
+        logger.info("Rollup rebuild interrupted by user")
+        sys.exit(0)
+    except Exception as e:
+        logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Restore Backup
+
+This script restores a backup written by backup_database.py. Incremental
+backups are restored together with the chain they are based on. Tables are
+emptied and reloaded in a single transaction, so a failed restore leaves the
+database unchanged.
+
+Usage:
+    python restore_backup.py BACKUP_ID [--table TABLE ...] [--no-truncate] [--yes]
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import app modules
+from app.db_backup import backup_chain, restore_backup
+from app.config import Config
+
+# Configure logging
+logging.basicConfig(
+    level=logging.getLevelName(Config.LOG_LEVEL),
+    format=Config.LOG_FORMAT,
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Restore a logical database backup')
+    parser.add_argument('backup_id', help='Backup to restore (see backup_database.py --list)')
+    parser.add_argument('--table', action='append',
+                        help='Table to restore (repeatable; default: all tables in the backup)')
+    parser.add_argument('--no-truncate', action='store_true',
+                        help='Load rows without emptying the tables first')
+    parser.add_argument('--yes', action='store_true',
+                        help='Do not ask for confirmation')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    try:
+        args = parse_args()
+
+        chain = backup_chain(args.backup_id)
+        logger.info(f"Restoring {' -> '.join(m['id'] for m in chain)}")
+
+        if not args.yes and not args.no_truncate:
+            answer = input("This replaces the contents of the restored tables. Continue? [y/N] ")
+            if answer.strip().lower() != 'y':
+                logger.info("Restore cancelled")
+                sys.exit(0)
+
+        loaded = restore_backup(args.backup_id, tables=args.table, truncate=not args.no_truncate)
+        print(json.dumps(loaded, indent=2))
+        sys.exit(0)
+    except ValueError as e:
+        logger.error(str(e))
+        sys.exit(1)
+    except KeyboardInterrupt:
+        logger.info("Restore interrupted by user; no changes were committed")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
+        sys.exit(1)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Run Database Maintenance
+
+This script estimates table and index bloat, runs VACUUM (ANALYZE) on tables
+with many dead tuples or stale planner statistics and rebuilds bloated
+indexes with REINDEX CONCURRENTLY, printing per-table timings. The same job
+runs on MAINTENANCE_CRON when MAINTENANCE_ENABLED is set.
+
+Usage:
+    python run_maintenance.py [--dry-run] [--table TABLE ...] [--no-reindex] [--force]
+    python run_maintenance.py --bloat [--table TABLE ...]
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+
+# Add the parent directory to the path so we can import the app modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+# Import app modules
+from app.db_maintenance import estimate_bloat, run_maintenance
+from app.config import Config
+
+# Configure logging
+logging.basicConfig(
+    level=logging.getLevelName(Config.LOG_LEVEL),
+    format=Config.LOG_FORMAT,
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+logger = logging.getLogger(__name__)
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Vacuum, analyze and reindex the database')
+    parser.add_argument('--table', action='append',
+                        help='Table to maintain (repeatable; default: all)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only report which tables and indexes would be processed')
+    parser.add_argument('--no-reindex', action='store_true',
+                        help='Do not rebuild bloated indexes')
+    parser.add_argument('--force', action='store_true',
+                        help='Vacuum every selected table regardless of its dead tuple ratio')
+    parser.add_argument('--bloat', action='store_true',
+                        help='Print the bloat estimates and exit')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    try:
+        args = parse_args()
+
+        if args.bloat:
+            print(json.dumps(estimate_bloat(args.table), indent=2, default=str))
+            sys.exit(0)
+
+        report = run_maintenance(tables=args.table, reindex=not args.no_reindex,
+                                 force=args.force, dry_run=args.dry_run)
+        print(json.dumps(report, indent=2, default=str))
+        failed = any(isinstance(result, dict) and 'error' in result
+                     for entry in report['tables'].values() for result in entry['actions'].values())
+        sys.exit(1 if failed else 0)
+    except KeyboardInterrupt:
+        logger.info("Maintenance interrupted by user")
+        sys.exit(1)
+    except Exception as e:
+        logger.error(f"Unhandled exception: {str(e)}", exc_info=True)
+        sys.exit(1)
@@ -562,11 +562,99 @@ def visualize_sample_data(db, output_dir: str, days: int = 7) -> None:
         logger.error(f"Error visualizing sample data: {e}")
         logger.error(traceback.format_exc())
 
+def profile_numeric_columns(db, output_dir: str, tables: Optional[List[str]] = None, bins: int = 20) -> None:
+    """
+    Build histograms of every numeric column over the full tables
+
+    Rows are streamed from a server-side cursor as NumPy batches and binned into
+    fixed ranges taken from SQL MIN/MAX, so memory use does not grow with table size.
+    
+    Args:
+        db: Database connector
+        output_dir: Directory to save output files
+        tables: Tables to profile (default: devices, inverter_details, inverter_history)
+        bins: Number of histogram bins per column
+    """
+    numeric_types = ('smallint', 'integer', 'bigint', 'real', 'double precision', 'numeric')
+    tables = tables or ['devices', 'inverter_details', 'inverter_history']
+    
+    for table in tables:
+        try:
+            columns_result = db.query("""
+                SELECT column_name FROM information_schema.columns
+                WHERE table_name = %s AND data_type IN %s
+                ORDER BY ordinal_position
+            """, (table, numeric_types))
+            numeric_cols = [col['column_name'] for col in columns_result][:10]
+            
+            if not numeric_cols:
+                logger.warning(f"No numeric columns found for table {table}")
+                continue
+            
+            # Fix the bin edges up front so batches can be accumulated independently
+            bounds_query = "SELECT " + ", ".join(
+                f'MIN("{col}")::float AS "min_{col}", MAX("{col}")::float AS "max_{col}"' for col in numeric_cols
+            ) + f" FROM {table}"
+            bounds = db.query(bounds_query)
+            if not bounds:
+                continue
+            
+            edges = {}
+            for col in numeric_cols:
+                low, high = bounds[0][f'min_{col}'], bounds[0][f'max_{col}']
+                if low is None or high is None:
+                    continue
+                if low == high:
+                    high = low + 1
+                edges[col] = np.linspace(low, high, bins + 1)
+            
+            if not edges:
+                logger.warning(f"All numeric columns in {table} are empty")
+                continue
+            
+            counts = {col: np.zeros(bins, dtype=np.int64) for col in edges}
+            total_rows = 0
+            select_cols = ", ".join(f'"{col}"' for col in edges)
+            
+            for batch in db.stream_batches(f"SELECT {select_cols} FROM {table}", row_format='numpy'):
+                for col, col_edges in edges.items():
+                    values = batch[col]
+                    values = values[~np.isnan(values)]
+                    counts[col] += np.histogram(values, bins=col_edges)[0]
+                total_rows += len(next(iter(batch.values())))
+            
+            logger.info(f"Profiled {total_rows} rows across {len(edges)} numeric columns of {table}")
+            
+            n_cols = min(3, len(edges))
+            n_rows = (len(edges) + n_cols - 1) // n_cols
+            fig, axes = plt.subplots(n_rows, n_cols, figsize=(n_cols * 5, n_rows * 4))
+            axes = np.array(axes).flatten()
+            
+            for i, (col, col_edges) in enumerate(edges.items()):
+                ax = axes[i]
+                ax.bar(col_edges[:-1], counts[col], width=np.diff(col_edges), align='edge')
+                ax.set_title(f"{col} Distribution (all {total_rows} rows)")
+                ax.set_xlabel(col)
+                ax.set_ylabel("Frequency")
+            
+            for j in range(len(edges), len(axes)):
+                axes[j].axis('off')
+            
+            plt.tight_layout()
+            plt.savefig(os.path.join(output_dir, f'{table}_full_numeric_distributions.png'), dpi=120)
+            plt.close()
+        except Exception as e:
+            logger.error(f"Error profiling table {table}: {e}")
+            logger.error(traceback.format_exc())
+    
+    logger.info(f"Full-table numeric profiles saved to {output_dir}")
+
 def main():
     parser = argparse.ArgumentParser(description="Database Visualizer for Growatt Devices Monitor")
     parser.add_argument("--days", type=int, default=7, help="Number of days to look back for data")
     parser.add_argument("--debug", action="store_true", help="Enable debug logging")
     parser.add_argument("--output", type=str, default="db_analysis", help="Output directory for visualizations")
+    parser.add_argument("--full-scan", action="store_true", help="Profile numeric columns over the full tables using a streaming cursor")
     args = parser.parse_args()
     
     # Set debug level if requested
@@ -593,6 +681,8 @@ def main():
         visualize_table_structure(db, output_dir)
         visualize_table_relationships(db, output_dir)
         visualize_sample_data(db, output_dir, args.days)
+        if args.full_scan:
+            profile_numeric_columns(db, output_dir)
         
         logger.info(f"All database visualizations completed successfully. Output saved to {output_dir}")
         return 0
@@ -157,15 +157,16 @@ def fetch_device_status_data(days: int = 7) -> pd.DataFrame:
                 d.serial_number, d.last_update_time
         """
         
-        # Execute the query using the DatabaseConnector
-        results = db.query(query, (start_date_str, end_date_str))
-        
-        if not results:
+        # Stream rows from a server-side cursor straight into the DataFrame
+        columns = ['serial_number', 'alias', 'status', 'last_update_time', 'type', 'plant_name']
+        df = pd.DataFrame.from_records(
+            db.stream(query, (start_date_str, end_date_str), as_tuples=True),
+            columns=columns
+        )
+        
+        if df.empty:
             logger.warning(f"No device status data found for the period {start_date_str} to {end_date_str}")
             return pd.DataFrame()
-            
-        # Convert to DataFrame
-        df = pd.DataFrame(results)
         
         # Parse dates
         df['last_update_time'] = pd.to_datetime(df['last_update_time'])
@@ -199,7 +200,10 @@ def fetch_device_status_data(days: int = 7) -> pd.DataFrame:
 
 def fetch_energy_data(days: int = 7) -> pd.DataFrame:
     """
-    Fetch energy production data from the database
+    Fetch energy production data from the hourly energy rollups
+    
+    Falls back to the daily rollups when no hourly data was collected for the
+    period, in which case ac_power holds the daily peak power.
     
     Args:
         days: Number of days to look back
@@ -208,60 +212,43 @@ def fetch_energy_data(days: int = 7) -> pd.DataFrame:
         pd.DataFrame: DataFrame containing energy production data
     """
     try:
-        from app.database import DatabaseConnector
-        
-        # Initialize database connector
-        db = DatabaseConnector()
+        from app.db_rollups import get_energy_rollups
         
         # Calculate date range
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # Format dates for SQL
+        # Format dates for logging
         start_date_str = start_date.strftime('%Y-%m-%d')
         end_date_str = end_date.strftime('%Y-%m-%d')
         
-        # Query for energy data
-        query = """
-            SELECT 
-                d.serial_number, 
-                d.alias, 
-                d.type,
-                p.name as plant_name,
-                de.energy_today,
-                de.energy_total,
-                de.ac_power,
-                de.collected_at
-            FROM 
-                device_data de
-            JOIN
-                devices d ON de.device_serial_number = d.serial_number
-            LEFT JOIN 
-                plants p ON d.plant_id = p.id
-            WHERE 
-                de.collected_at BETWEEN %s AND %s
-            ORDER BY 
-                d.serial_number, de.collected_at
-        """
-        
-        # Execute the query using the DatabaseConnector
-        results = db.query(query, (start_date_str, end_date_str))
+        # Read pre-aggregated hourly buckets instead of raw readings
+        results = get_energy_rollups('hour', start_date, end_date)
+        power_column = 'avg_power'
+        if not results:
+            results = get_energy_rollups('day', start_date, end_date)
+            power_column = 'peak_power'
         
         if not results:
             logger.warning(f"No energy data found for the period {start_date_str} to {end_date_str}")
             return pd.DataFrame()
             
-        # Convert to DataFrame
-        df = pd.DataFrame(results)
+        # Convert to DataFrame using the column names the plots expect
+        df = pd.DataFrame(results).rename(columns={
+            'energy': 'energy_today',
+            power_column: 'ac_power',
+            'bucket': 'collected_at'
+        })
+        df['alias'] = df['alias'].fillna(df['serial_number'])
         
         # Parse dates
         df['collected_at'] = pd.to_datetime(df['collected_at'])
         
         # Convert energy columns to numeric
-        for col in ['energy_today', 'energy_total', 'ac_power']:
+        for col in ['energy_today', 'ac_power']:
             df[col] = pd.to_numeric(df[col], errors='coerce')
         
-        logger.info(f"Fetched {len(df)} energy records for {len(df['serial_number'].unique())} devices")
+        logger.info(f"Fetched {len(df)} energy rollup records for {len(df['serial_number'].unique())} devices")
         return df
         
     except ImportError as e:
@@ -47,11 +47,7 @@ def fetch_energy_data(timeframe: str) -> Dict[str, Any]:
         Dict containing energy data for all devices
     """
     try:
-        from app.database import DatabaseConnector
-        from app.config import Config
-        
-        # Initialize database connector
-        db = DatabaseConnector()
+        from app.db_rollups import get_energy_rollups
         
         # Calculate date range based on timeframe
         end_date = datetime.now()
@@ -78,13 +74,10 @@ def fetch_energy_data(timeframe: str) -> Dict[str, Any]:
         
         logger.info(f"Fetching {timeframe} energy data from {start_date_str} to {end_date_str}")
         
-        # Query plants from database
-        plants_query = """
-            SELECT id, name
-            FROM plants
-            ORDER BY name
-        """
-        plants = db.query(plants_query)
+        # Energy is read from the pre-aggregated rollup tables: hourly buckets
+        # for the daily report, daily buckets for the weekly/monthly reports
+        granularity = 'hour' if timeframe == 'daily' else 'day'
+        rollups = get_energy_rollups(granularity, start_date, end_date)
         
         all_data = {
             'timeframe': timeframe,
@@ -94,60 +87,36 @@ def fetch_energy_data(timeframe: str) -> Dict[str, Any]:
             'plants': []
         }
         
-        # Fetch energy data for each plant
-        for plant in plants:
-            plant_id = plant['id']
-            plant_name = plant['name']
-            
-            plant_data = {
-                'plant_id': plant_id,
-                'plant_name': plant_name,
-                'devices': []
-            }
-            
-            # Fetch devices for this plant
-            devices_query = """
-                SELECT serial_number, alias, type
-                FROM devices
-                WHERE plant_id = %s
-                ORDER BY alias
-            """
-            devices = db.query(devices_query, (plant_id,))
+        # Rollup rows are ordered by plant, device and bucket, so group them in one pass
+        plants_by_id = {}
+        devices_by_sn = {}
+        for row in rollups:
+            plant_id = row['plant_id']
+            plant_data = plants_by_id.get(plant_id)
+            if plant_data is None:
+                plant_data = {
+                    'plant_id': plant_id,
+                    'plant_name': row['plant_name'] or plant_id,
+                    'devices': []
+                }
+                plants_by_id[plant_id] = plant_data
+                all_data['plants'].append(plant_data)
             
-            # For each device, fetch energy data
-            for device in devices:
-                serial_number = device['serial_number']
-                device_alias = device['alias'] or serial_number
-                
+            serial_number = row['serial_number']
+            device_data = devices_by_sn.get(serial_number)
+            if device_data is None:
                 device_data = {
                     'serial_number': serial_number,
-                    'alias': device_alias,
+                    'alias': row['alias'] or serial_number,
                     'energy_data': []
                 }
-                
-                # Fetch energy stats from the energy_stats table
-                energy_query = """
-                    SELECT date, daily_energy as energy
-                    FROM energy_stats
-                    WHERE mix_sn = %s AND date BETWEEN %s AND %s
-                    ORDER BY date
-                """
-                energy_results = db.query(energy_query, (serial_number, start_date_str, end_date_str))
-                
-                # Format the results for the chart generator
-                for data in energy_results:
-                    device_data['energy_data'].append({
-                        'date': data['date'],
-                        'energy': float(data['energy'] or 0)
-                    })
-                
-                # Add device data to plant if we have energy data
-                if device_data['energy_data']:
-                    plant_data['devices'].append(device_data)
+                devices_by_sn[serial_number] = device_data
+                plant_data['devices'].append(device_data)
             
-            # Add plant to all_data if it has devices with data
-            if plant_data['devices']:
-                all_data['plants'].append(plant_data)
+            device_data['energy_data'].append({
+                'date': row['bucket'].strftime(date_format),
+                'energy': float(row['energy'] or 0)
+            })
         
         return all_data
         
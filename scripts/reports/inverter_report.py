@@ -287,74 +287,43 @@ def extract_numeric_id(name_series):
 
 def fetch_inverter_data(days: int = 7) -> pd.DataFrame:
     """
-    Fetch inverter data from the database for the specified number of days
+    Fetch daily inverter energy from the energy rollups for the specified number of days
     
     Args:
         days: Number of days to look back
         
     Returns:
-        pd.DataFrame: DataFrame containing inverter details
+        pd.DataFrame: DataFrame with one row per inverter per day
     """
     try:
-        from app.database import DatabaseConnector
-        
-        # Initialize database connector
-        db = DatabaseConnector()
+        from app.db_rollups import get_energy_rollups
         
         # Calculate date range
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         
-        # Format dates for SQL
-        start_date_str = start_date.strftime('%Y-%m-%d')
-        end_date_str = end_date.strftime('%Y-%m-%d')
-        
-        # Query to fetch inverter data
-        query = f"""
-            SELECT 
-                inv.serial_number as inverter_serial,
-                inv.collected_at as timestamp,
-                inv.energy_today,
-                inv.energy_total,
-                inv.grid_voltage,
-                inv.grid_current,
-                inv.grid_power,
-                inv.grid_frequency,
-                inv.temp as temperature,
-                d.alias as inverter_name,
-                d.type as inverter_type,
-                p.name as plant_name
-            FROM 
-                inverter_details inv
-            JOIN 
-                devices d ON inv.serial_number = d.serial_number
-            LEFT JOIN 
-                plants p ON d.plant_id = p.id
-            WHERE 
-                inv.collected_at BETWEEN %s AND %s
-            ORDER BY 
-                inv.serial_number, inv.collected_at
-        """
-        
-        # Execute the query
-        results = db.query(query, (start_date_str, end_date_str))
-        
-        # Convert to DataFrame
-        df = pd.DataFrame(results)
-        
-        # Set column names
-        df.columns = [
-            'inverter_serial', 'timestamp', 'energy_today', 'energy_total',
-            'grid_voltage', 'grid_current', 'grid_power', 'grid_frequency',
-            'temperature', 'inverter_name', 'inverter_type', 'plant_name'
-        ]
+        # Read pre-aggregated daily buckets instead of re-aggregating raw rows
+        results = get_energy_rollups('day', start_date, end_date)
+        if not results:
+            logger.warning(f"No inverter energy data found for the last {days} days")
+            return pd.DataFrame()
+        
+        df = pd.DataFrame(results).rename(columns={
+            'serial_number': 'inverter_serial',
+            'bucket': 'timestamp',
+            'energy': 'energy_today',
+            'alias': 'inverter_name',
+            'type': 'inverter_type'
+        })
+        df['inverter_name'] = df['inverter_name'].fillna(df['inverter_serial'])
+        df = df[['inverter_serial', 'timestamp', 'energy_today', 'peak_power',
+                 'inverter_name', 'inverter_type', 'plant_name']]
         
         # Convert timestamp to datetime
         df['timestamp'] = pd.to_datetime(df['timestamp'])
         
         # Convert numeric columns
-        numeric_cols = ['energy_today', 'energy_total', 'grid_voltage', 'grid_current', 'grid_power', 'grid_frequency', 'temperature']
-        for col in numeric_cols:
+        for col in ['energy_today', 'peak_power']:
             df[col] = pd.to_numeric(df[col], errors='coerce')
         
         return df
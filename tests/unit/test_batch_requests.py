@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test file for batched internal requests in app/batch_requests.py
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+from flask import Flask, jsonify, request
+from flask_caching import Cache
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.batch_requests import BATCH_LOGIN_ENVIRON_KEY, parse_batch, run_batch
+from app.cache_utils import cached_route
+
+
+class TestBatchRequests(unittest.TestCase):
+    """Tests for batch validation and concurrent dispatch through the app"""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(CACHE_TYPE='SimpleCache', CACHE_EARLY_REFRESH_BETA=0, BATCH_TIMEOUT=5)
+        self.app.cache = Cache(self.app)
+        self.calls = 0
+        self.barrier = threading.Barrier(2, timeout=5)
+
+        @self.app.route('/api/plants/<int:plant_id>')
+        @cached_route(timeout=60, key_prefix='plant_detail_')
+        def plant_detail(plant_id):
+            self.calls += 1
+            return jsonify({'id': plant_id, 'login': request.environ.get(BATCH_LOGIN_ENVIRON_KEY)}), 200
+
+        @self.app.route('/api/weather')
+        def weather():
+            # Only returns if another sub-request runs at the same time
+            self.barrier.wait()
+            return jsonify({'plantId': request.args.get('plantId')}), 200
+
+        @self.app.route('/api/fault-logs')
+        def fault_logs():
+            self.barrier.wait()
+            return jsonify({'error': 'upstream'}), 502
+
+    def _run(self, body, **kwargs):
+        with self.app.test_request_context('/api/batch', method='POST'):
+            return run_batch(parse_batch(body, max_requests=5), **kwargs)
+
+    def test_items_run_concurrently_with_per_item_status(self):
+        """Test that sub-requests run in parallel and keep their own status codes"""
+        results = self._run({'requests': [
+            {'id': 'weather', 'path': '/api/weather', 'params': {'plantId': '7'}},
+            '/api/fault-logs',
+        ]})
+
+        self.assertEqual(results[0], {**results[0], 'id': 'weather', 'status': 200, 'body': {'plantId': '7'}})
+        self.assertEqual((results[1]['id'], results[1]['status']), (1, 502))
+
+    def test_sub_requests_share_the_cache_and_login_status(self):
+        """Test that batched items hit the route cache and see the batch's login check"""
+        login = {'success': True}
+        first = self._run(['/api/plants/1'], environ={BATCH_LOGIN_ENVIRON_KEY: login})[0]
+        second = self._run(['/api/plants/1'])[0]
+
+        self.assertEqual(first['body'], {'id': 1, 'login': login})
+        self.assertEqual((first['headers']['X-Cache'], second['headers']['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(self.calls, 1)
+
+    def test_unfinished_items_time_out(self):
+        """Test that items still running at the deadline are reported as 504"""
+        result = self._run(['/api/weather'], timeout=0.1)[0]
+        self.barrier.abort()
+        self.assertEqual(result['status'], 504)
+
+    def test_invalid_batches_are_rejected(self):
+        """Test that only internal GET API paths can be batched"""
+        for body in ([], {'requests': 'x'}, ['https://example.com/api/plants'], ['/admin'],
+                     [{'path': '/api/plants/1', 'method': 'POST'}], ['/api/batch'],
+                     ['/api/device-status/stream'], ['/api/weather'] * 6):
+            with self.assertRaises(ValueError, msg=body):
+                parse_batch(body, max_requests=5)
+
+        self.assertEqual(parse_batch(['/api/devices?plant_id=1'], max_requests=5),
+                         [{'id': 0, 'path': '/api/devices', 'query_string': 'plant_id=1', 'params': {}}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test file for the two-tier cache in app/cache_tiers.py
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+from flask_caching import Cache
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.cache_tiers import TwoTierCache
+
+
+class TestTwoTierCache(unittest.TestCase):
+    """Tests for L1 hits, bounds and cross-worker invalidation"""
+
+    def setUp(self):
+        app = Flask(__name__)
+        app.config.update(CACHE_TYPE='SimpleCache')
+        self.l2 = Cache(app)
+        # Two "workers" sharing one backend
+        self.worker_a = TwoTierCache(self.l2, max_items=2, ttl=60, check_interval=0)
+        self.worker_b = TwoTierCache(self.l2, max_items=2, ttl=60, check_interval=0)
+
+    def test_hits_are_served_from_process_memory(self):
+        """Test that a value read once is not fetched from L2 again"""
+        self.worker_a.set('devices', {'count': 3})
+        with patch.object(self.l2, 'get', wraps=self.l2.get) as l2_get:
+            value = self.worker_a.get('devices')
+
+        self.assertEqual(value, {'count': 3})
+        self.assertIs(self.worker_a.get('devices'), value)
+        self.assertNotIn('devices', [call.args[0] for call in l2_get.call_args_list])
+        self.assertEqual(self.worker_a.l1_info()['l1_hits'], 2)
+
+    def test_lru_is_bounded(self):
+        """Test that the least recently used value is evicted"""
+        for key in ('a', 'b', 'c'):
+            self.worker_a.set(key, key)
+
+        info = self.worker_a.l1_info()
+        self.assertEqual(info['items'], 2)
+        self.assertEqual(info['l1_evictions'], 1)
+        # Evicted from L1 but still in L2
+        self.assertEqual(self.worker_a.get('a'), 'a')
+
+    def test_delete_invalidates_other_workers(self):
+        """Test that a delete in one worker drops the copies held by the others"""
+        self.worker_a.set('plants', ['p1'])
+        self.assertEqual(self.worker_b.get('plants'), ['p1'])
+
+        self.worker_a.delete('plants')
+
+        self.assertIsNone(self.worker_b.get('plants'))
+        self.assertEqual(self.worker_b.l1_info()['l1_flushes'], 1)
+
+    def test_coordination_keys_bypass_l1(self):
+        """Test that tag generations are always read from the shared backend"""
+        self.worker_a.set('tag:devices', 'gen-1')
+        self.worker_b.set('tag:devices', 'gen-2')
+
+        self.assertEqual(self.worker_a.get('tag:devices'), 'gen-2')
+        self.assertEqual(self.worker_a.get_many('tag:devices', 'missing'), ['gen-2', None])
+        self.assertEqual(self.worker_a.l1_info()['items'], 0)
+
+    def test_other_methods_delegate_to_backend(self):
+        """Test that the wrapper keeps the Flask-Caching interface"""
+        self.assertIs(self.worker_a.cache, self.l2.cache)
+        self.assertTrue(self.worker_a.add('lock:key', 'token', timeout=10))
+        self.assertFalse(self.worker_b.add('lock:key', 'other', timeout=10))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Test file for the route cache in app/cache_utils.py
+"""
+
+import gzip
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, jsonify, request
+from flask_caching import Cache
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.cache_utils import bump_tags, cached_route, get_cache_stats
+
+
+class TestCachedRoute(unittest.TestCase):
+    """Tests for single-flight recomputation, stale-while-revalidate and tag invalidation"""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(CACHE_TYPE='SimpleCache', CACHE_LOCK_WAIT=5, CACHE_EARLY_REFRESH_BETA=0)
+        self.app.cache = Cache(self.app)
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+        @self.app.route('/devices')
+        @cached_route(timeout=60, key_prefix='devices_', stale_ttl=60,
+                      tags=lambda: ['devices'] + [f"devices:{p}" for p in request.args.getlist('plant_id')])
+        def devices():
+            self.calls += 1
+            self.release.wait(5)
+            if self.calls > 10:
+                return jsonify({'error': 'upstream'}), 500
+            return jsonify({'call': self.calls, 'devices': request.args.get('size', type=int, default=0) * 'x'}), 200
+
+        self.client = self.app.test_client()
+        get_cache_stats(reset=True)
+
+    def test_hit_after_miss(self):
+        """Test that the second request is served from the cache"""
+        first = self.client.get('/devices')
+        second = self.client.get('/devices')
+
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(second.get_json(), {'call': 1, 'devices': ''})
+        self.assertEqual(self.calls, 1)
+
+    def test_concurrent_misses_compute_once(self):
+        """Test that requests arriving during a recompute wait for its result"""
+        self.release.clear()
+        responses = []
+
+        def request_devices():
+            responses.append(self.app.test_client().get('/devices'))
+
+        threads = [threading.Thread(target=request_devices) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.2)
+        self.release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(sorted(r.headers['X-Cache'] for r in responses), ['HIT'] * 4 + ['MISS'])
+        self.assertTrue(all(r.get_json() == {'call': 1, 'devices': ''} for r in responses))
+
+    def test_waiter_does_not_recompute_while_lock_is_held(self):
+        """Test that a miss outwaited by a slow recompute answers 503 instead of computing again"""
+        self.app.config['CACHE_LOCK_WAIT'] = 0.2
+        self.release.clear()
+        owner = threading.Thread(target=lambda: self.app.test_client().get('/devices'))
+        owner.start()
+        time.sleep(0.1)
+
+        waiter = self.client.get('/devices')
+        self.release.set()
+        owner.join(5)
+
+        self.assertEqual(waiter.status_code, 503)
+        self.assertIn('Retry-After', waiter.headers)
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(get_cache_stats()['devices_']['lock_timeout'], 1)
+
+    def test_stale_entry_served_while_refreshing(self):
+        """Test that a soft-expired entry is returned and recomputed in the background"""
+        self.client.get('/devices')
+
+        with patch('app.cache_utils.time.time', return_value=time.time() + 90), \
+             patch('app.cache_utils.threading.Thread') as thread:
+            response = self.client.get('/devices')
+
+        self.assertEqual(response.headers['X-Cache'], 'STALE')
+        self.assertEqual(response.get_json(), {'call': 1, 'devices': ''})
+        thread.return_value.start.assert_called_once()
+
+    def test_errors_are_not_cached(self):
+        """Test that non-200 responses are recomputed on every request"""
+        self.calls = 10
+        self.assertEqual(self.client.get('/devices').status_code, 500)
+        self.assertEqual(self.client.get('/devices').status_code, 500)
+        self.assertEqual(self.calls, 12)
+
+    def test_no_cache_header_bypasses(self):
+        """Test that Cache-Control: no-cache skips the cache"""
+        self.client.get('/devices')
+        response = self.client.get('/devices', headers={'Cache-Control': 'no-cache'})
+
+        self.assertEqual(response.headers['X-Cache'], 'BYPASS')
+        self.assertEqual(self.calls, 2)
+
+    def test_bumped_tag_invalidates_dependent_entries(self):
+        """Test that bumping a tag turns only the entries depending on it into misses"""
+        self.client.get('/devices?plant_id=1')
+        self.client.get('/devices?plant_id=2')
+
+        with self.app.app_context():
+            self.assertEqual(bump_tags('devices:1'), 1)
+
+        first = self.client.get('/devices?plant_id=1')
+        second = self.client.get('/devices?plant_id=2')
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+
+        with self.app.app_context():
+            bump_tags('devices')
+        self.assertEqual(self.client.get('/devices?plant_id=2').headers['X-Cache'], 'MISS')
+
+    def test_bump_outside_app_context_uses_global_cache(self):
+        """Test that the collector can bump tags without an app context"""
+        with patch('app.cache', self.app.cache):
+            self.client.get('/devices')
+            self.assertEqual(bump_tags('devices'), 1)
+        self.assertEqual(self.client.get('/devices').headers['X-Cache'], 'MISS')
+
+    def test_if_none_match_returns_304(self):
+        """Test that a client holding the current body gets 304 without the body"""
+        first = self.client.get('/devices')
+        etag = first.headers['ETag']
+
+        response = self.client.get('/devices', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+
+        modified = self.client.get('/devices', headers={'If-None-Match': '"other"'})
+        self.assertEqual(modified.status_code, 200)
+
+    def test_if_modified_since_returns_304(self):
+        """Test that Last-Modified can be used for revalidation as well"""
+        first = self.client.get('/devices')
+        response = self.client.get('/devices', headers={'If-Modified-Since': first.headers['Last-Modified']})
+        self.assertEqual(response.status_code, 304)
+
+    def test_large_bodies_are_served_precompressed(self):
+        """Test that the stored gzip copy is sent to clients accepting it"""
+        self.client.get('/devices?size=5000')
+        response = self.client.get('/devices?size=5000', headers={'Accept-Encoding': 'gzip'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertTrue(response.headers['ETag'].endswith('-gzip"'))
+        self.assertEqual(gzip.decompress(response.data), self.client.get('/devices?size=5000').data)
+
+        # The compressed variant still revalidates against the same content hash
+        revalidated = self.client.get('/devices?size=5000', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+    def test_stats_are_recorded_per_prefix(self):
+        """Test that lookups, recomputes and stored sizes are counted per key prefix"""
+        first = self.client.get('/devices')
+        etag = first.headers['ETag']
+        self.client.get('/devices')
+        self.client.get('/devices', headers={'If-None-Match': etag})
+        self.client.get('/devices', headers={'Cache-Control': 'no-cache'})
+
+        stats = get_cache_stats()['devices_']
+        self.assertEqual((stats['miss'], stats['hit'], stats['bypass'], stats['not_modified']), (1, 2, 1, 1))
+        self.assertEqual(stats['recomputes'], 2)
+        self.assertEqual(stats['hit_ratio'], round(2 / 3, 4))
+        self.assertEqual(stats['stored_bytes_last'], len(first.data))
+        self.assertEqual(stats['route'], '/devices')
+
+        get_cache_stats(reset=True)
+        self.assertEqual(get_cache_stats(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Test file for the streaming server-side cursor API of DatabaseConnector in app/database.py
+"""
+
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+import numpy as np
+import psycopg2
+from psycopg2.extras import RealDictCursor
+
+from app.database import DatabaseConnector
+
+
+class FakeNamedCursor:
+    """Named cursor returning pre-split batches from fetchmany"""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.fetch_sizes = []
+        self.description = [MagicMock(), MagicMock()]
+        self.description[0].name, self.description[1].name = 'serial_number', 'ac_power'
+        self.closed = False
+
+    def execute(self, query, params=None):
+        self.query, self.params = query, params
+
+    def fetchmany(self, size):
+        self.fetch_sizes.append(size)
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class TestDatabaseStream(unittest.TestCase):
+    """Tests for batch sizes, row formats, replica routing and cursor cleanup"""
+
+    def setUp(self):
+        self.cursor = FakeNamedCursor([('SN1', 1.0), ('SN2', 2.0), ('SN3', None), ('SN4', 4.0), ('SN5', 5.0)])
+        self.conn = MagicMock()
+        self.conn.cursor.return_value = self.cursor
+        self.connections = []
+
+        @contextmanager
+        def fake_connection(replica=False):
+            self.connections.append({'replica': replica, 'returned': False})
+            try:
+                yield self.conn
+            finally:
+                self.connections[-1]['returned'] = True
+
+        patcher = patch('app.database.get_db_connection', fake_connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.db = DatabaseConnector()
+
+    def test_batches_follow_fetch_size(self):
+        """Test that rows arrive in fetch_size batches from a named cursor"""
+        batches = list(self.db.stream_batches("SELECT serial_number, ac_power FROM device_data",
+                                              fetch_size=2, row_format='tuple'))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+        self.assertEqual(self.cursor.fetch_sizes, [2, 2, 2, 2])
+        self.assertEqual(self.cursor.itersize, 2)
+        name = self.conn.cursor.call_args.kwargs['name']
+        self.assertTrue(name.startswith('stream_'))
+        self.assertIs(self.conn.cursor.call_args.kwargs['cursor_factory'], psycopg2.extensions.cursor)
+        self.assertTrue(self.cursor.closed)
+
+    @patch('app.database.Config.POSTGRES_STREAM_FETCH_SIZE', 3)
+    def test_stream_yields_rows_with_default_fetch_size(self):
+        """Test that stream flattens the batches and defaults to the configured fetch size"""
+        rows = list(self.db.stream("SELECT serial_number, ac_power FROM device_data", as_tuples=True))
+
+        self.assertEqual(rows[0], ('SN1', 1.0))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(self.cursor.fetch_sizes[0], 3)
+
+        list(self.db.stream("SELECT serial_number, ac_power FROM device_data"))
+        self.assertIs(self.conn.cursor.call_args.kwargs['cursor_factory'], RealDictCursor)
+
+    def test_numpy_batches_hold_one_array_per_column(self):
+        """Test that the numpy format turns each batch into column arrays with NULLs as NaN"""
+        batch = next(self.db.stream_batches("SELECT serial_number, ac_power FROM device_data",
+                                            fetch_size=3, row_format='numpy'))
+
+        self.assertEqual(list(batch['serial_number']), ['SN1', 'SN2', 'SN3'])
+        self.assertEqual(batch['ac_power'][:2].tolist(), [1.0, 2.0])
+        self.assertTrue(np.isnan(batch['ac_power'][2]))
+
+    def test_replica_selection(self):
+        """Test that read-only queries go to the replica unless told otherwise"""
+        list(self.db.stream_batches("SELECT serial_number FROM devices"))
+        list(self.db.stream_batches("SELECT serial_number FROM devices", use_replica=False))
+        list(self.db.stream_batches("UPDATE devices SET status = 'offline' RETURNING serial_number"))
+
+        self.assertEqual([c['replica'] for c in self.connections], [True, False, False])
+
+    def test_abandoned_stream_closes_cursor_and_returns_connection(self):
+        """Test that closing the generator early releases the server-side cursor"""
+        rows = self.db.stream("SELECT serial_number, ac_power FROM device_data", fetch_size=2)
+        next(rows)
+        self.assertFalse(self.cursor.closed)
+
+        rows.close()
+
+        self.assertTrue(self.cursor.closed)
+        self.assertTrue(self.connections[0]['returned'])
+        self.assertEqual(self.cursor.fetch_sizes, [2])
+
+    def test_invalid_row_format_rejected(self):
+        """Test that an unknown row format fails before any connection is taken"""
+        with self.assertRaises(ValueError):
+            next(self.db.stream_batches("SELECT 1", row_format='csv'))
+        self.assertEqual(self.connections, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
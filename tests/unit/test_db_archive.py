@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Test file for the columnar cold archive in app/db_archive.py
+"""
+
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.database import DatabaseConnector
+from app.db_archive import archived_months, export_month, read_range
+
+# Exported rows end with their ctid and xmin
+ARCHIVED_ROWS = [
+    ('SN1', datetime(2025, 4, 1, 6, 0), 0.5, 100.0, 250.0, '(0,1)', '700'),
+    ('SN2', datetime(2025, 4, 15, 12, 0), None, 200.0, 1200.0, '(0,2)', '700'),
+    ('SN1', datetime(2025, 4, 30, 18, 0), 9.5, 109.0, 10.0, '(0,3)', '701'),
+]
+HOT_ROWS = [
+    ('SN1', datetime(2025, 5, 2, 9, 0), 1.0, 110.0, 800.0),
+]
+
+
+class TestColumnarArchive(unittest.TestCase):
+    """Tests for exporting a month and reading across archive and database"""
+
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        patcher = patch('app.db_archive.Config.ARCHIVE_DIR', self.archive_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.archive_dir)
+
+    def _export_april(self):
+        with patch.object(DatabaseConnector, 'stream_batches', return_value=iter([ARCHIVED_ROWS])), \
+             patch('app.db_archive._delete_exported_rows', return_value=3) as delete:
+            result = export_month('device_data', datetime(2025, 4, 1))
+        delete.assert_called_once_with('device_data', [('(0,1)', '700'), ('(0,2)', '700'), ('(0,3)', '701')])
+        return result
+
+    def test_export_writes_memory_mappable_columns(self):
+        """Test that a month becomes one .npy file per column plus a manifest"""
+        result = self._export_april()
+
+        self.assertEqual(result, {'month': '2025-04', 'row_count': 3, 'rows_deleted': 3})
+        self.assertEqual(archived_months('device_data'), [datetime(2025, 4, 1)])
+
+        month_dir = os.path.join(self.archive_dir, 'device_data', '2025-04')
+        with open(os.path.join(month_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+        self.assertEqual(manifest['columns']['device_serial_number']['categories'], ['SN1', 'SN2'])
+
+        energy = np.load(os.path.join(month_dir, 'energy_today.npy'), mmap_mode='r')
+        self.assertIsInstance(energy, np.memmap)
+        self.assertEqual(energy.dtype, np.float32)
+        self.assertTrue(np.isnan(energy[1]))
+
+    def test_read_range_merges_archive_and_database(self):
+        """Test that archived months come from disk and the rest from Postgres"""
+        self._export_april()
+
+        with patch.object(DatabaseConnector, 'stream_batches', return_value=iter([HOT_ROWS])) as stream:
+            data = read_range('device_data', datetime(2025, 4, 10), datetime(2025, 6, 1),
+                              columns=['collected_at', 'ac_power'], serial_numbers=['SN1'])
+
+        query, params = stream.call_args.args
+        self.assertEqual(params, (datetime(2025, 4, 10), datetime(2025, 6, 1), ['SN1']))
+        self.assertEqual(list(data), ['collected_at', 'ac_power'])
+        np.testing.assert_array_equal(data['ac_power'], np.array([10.0, 800.0], dtype=np.float32))
+        self.assertEqual(str(data['collected_at'][0]), '2025-04-30T18:00:00')
+
+
+    def test_unsettled_month_is_not_exported(self):
+        """Test that a month is only archived once the collector's backfill window has passed"""
+        with patch('app.db_archive.datetime') as fake_datetime:
+            fake_datetime.now.return_value = datetime(2025, 5, 3, 2, 0)
+            fake_datetime.side_effect = datetime
+            with self.assertRaises(ValueError):
+                export_month('device_data', datetime(2025, 4, 1))
+
+    def test_late_rows_are_merged_into_the_archive(self):
+        """Test that rows written into an archived month replace or extend it on the next run"""
+        self._export_april()
+        late = [
+            ('SN1', datetime(2025, 4, 30, 18, 0), 9.9, 109.5, 12.0, '(5,1)', '900'),
+            ('SN3', datetime(2025, 4, 29, 8, 0), 1.0, 1.0, 50.0, '(5,2)', '900'),
+        ]
+        with patch.object(DatabaseConnector, 'stream_batches', return_value=iter([late])), \
+             patch('app.db_archive._delete_exported_rows', return_value=2) as delete:
+            result = export_month('device_data', datetime(2025, 4, 1), merge=True)
+
+        self.assertEqual(result['row_count'], 4)
+        delete.assert_called_once_with('device_data', [('(5,1)', '900'), ('(5,2)', '900')])
+        with patch.object(DatabaseConnector, 'stream_batches', return_value=iter([])):
+            data = read_range('device_data', datetime(2025, 4, 1), datetime(2025, 5, 1))
+        self.assertEqual(data['device_serial_number'].tolist(), ['SN1', 'SN2', 'SN3', 'SN1'])
+        self.assertAlmostEqual(float(data['energy_today'][-1]), 9.9, places=5)
+
+    def test_hot_rows_replace_archived_rows_when_reading(self):
+        """Test that a row still in Postgres wins over the archived copy of the same reading"""
+        self._export_april()
+        newer = [('SN1', datetime(2025, 4, 30, 18, 0), 9.9, 109.5, 12.0)]
+        with patch.object(DatabaseConnector, 'stream_batches', return_value=iter([newer])):
+            data = read_range('device_data', datetime(2025, 4, 1), datetime(2025, 5, 1), columns=['ac_power'])
+        np.testing.assert_array_equal(data['ac_power'], np.array([250.0, 1200.0, 12.0], dtype=np.float32))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Test file for the logical backup engine in app/db_backup.py
+"""
+
+import os
+import sys
+import gzip
+import shutil
+import tempfile
+import unittest
+from contextlib import contextmanager
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.db_backup import backup_chain, create_backup, get_backup_job, restore_backup, start_backup_job
+
+
+class FakeCursor:
+    """Cursor answering the catalog queries of a database with three tables"""
+
+    def __init__(self, max_id, inverter_rows=b'id,serial_number,ac_power\n1,INV001,100.0\n'):
+        self.max_id = max_id
+        self.inverter_rows = inverter_rows
+        self.copies = []
+        self.loaded = {}
+        self.executed = []
+        self.rowcount = -1
+        self._result = []
+
+    def execute(self, query, params=None):
+        self.executed.append(query)
+        if 'information_schema.tables' in query:
+            self._result = [{'table_name': 'device_data'}, {'table_name': 'inverter_history'},
+                            {'table_name': 'plants'}]
+        elif 'information_schema.columns' in query:
+            columns = {
+                'device_data': ['id', 'ac_power'],
+                'inverter_history': ['id', 'serial_number', 'ac_power'],
+            }.get(params[0], ['plant_id', 'name'])
+            self._result = [{'column_name': c} for c in columns]
+        elif 'FROM pg_class' in query:
+            self._result = [{'relname': 'device_data', 'estimate': 10}]
+        elif 'AS watermark' in query:
+            self._result = [{'watermark': self.max_id}]
+        else:
+            self._result = []
+
+    def fetchall(self):
+        return self._result
+
+    def fetchone(self):
+        return self._result[0]
+
+    def copy_expert(self, query, fileobj):
+        self.copies.append(query)
+        if 'TO STDOUT' in query:
+            if 'inverter_history' in query:
+                fileobj.write(self.inverter_rows)
+            else:
+                fileobj.write(b'id,ac_power\n1,250.0\n2,300.0\n')
+            self.rowcount = 2
+        else:
+            self.loaded.setdefault(query.split()[1], []).append(fileobj.read())
+            self.rowcount = 2
+
+
+class TestDatabaseBackup(unittest.TestCase):
+    """Tests for full/incremental backups, restore chains and background jobs"""
+
+    def setUp(self):
+        self.backup_dir = tempfile.mkdtemp()
+        for name, value in (('BACKUP_DIR', self.backup_dir), ('BACKUP_WATERMARK_OVERLAP', 0)):
+            patcher = patch(f'app.db_backup.Config.{name}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.backup_dir)
+
+    def _backup(self, cursor, **kwargs):
+        @contextmanager
+        def fake_connection(replica=False):
+            conn = MagicMock()
+            conn.cursor.return_value = cursor
+            yield conn
+
+        with patch('app.db_backup.get_db_connection', fake_connection):
+            return create_backup(**kwargs)
+
+    def test_full_backup_streams_compressed_copy(self):
+        """Test that every table is copied into a gzip file with a manifest"""
+        cursor = FakeCursor(max_id=2)
+        manifest = self._backup(cursor)
+
+        self.assertEqual(manifest['kind'], 'full')
+        self.assertEqual(sorted(manifest['tables']), ['device_data', 'inverter_history', 'plants'])
+        self.assertEqual(manifest['tables']['device_data']['watermark_to'], 2)
+        self.assertIn('"id" <= 2', cursor.copies[0])
+
+        path = os.path.join(self.backup_dir, manifest['id'], 'device_data.csv.gz')
+        with gzip.open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'id,ac_power\n1,250.0\n2,300.0\n')
+
+    def test_incremental_backup_starts_at_base_watermark(self):
+        """Test that append-only tables only copy rows above the previous watermark"""
+        full = self._backup(FakeCursor(max_id=2))
+        cursor = FakeCursor(max_id=5)
+        incremental = self._backup(cursor, incremental=True)
+
+        self.assertEqual(incremental['kind'], 'incremental')
+        self.assertEqual(incremental['base'], full['id'])
+        self.assertEqual(incremental['tables']['device_data']['mode'], 'incremental')
+        self.assertEqual(incremental['tables']['plants']['mode'], 'full')
+        self.assertIn('"id" <= 5 AND "id" > 2', cursor.copies[0])
+        self.assertEqual([m['id'] for m in backup_chain(incremental['id'])], [full['id'], incremental['id']])
+
+    def test_incremental_backup_overlaps_base_watermark(self):
+        """Test that rows committed after the base snapshot below its watermark are copied again"""
+        self._backup(FakeCursor(max_id=2))
+        cursor = FakeCursor(max_id=5)
+        with patch('app.db_backup.Config.BACKUP_WATERMARK_OVERLAP', 1):
+            incremental = self._backup(cursor, incremental=True)
+
+        self.assertIn('"id" <= 5 AND "id" > 1', cursor.copies[0])
+        self.assertEqual(incremental['tables']['device_data']['watermark_from'], 2)
+        self.assertEqual(incremental['tables']['device_data']['copy_from'], 1)
+
+    def test_restore_replays_chain_for_append_only_tables(self):
+        """Test that restore loads every file of the chain for incremental tables only"""
+        self._backup(FakeCursor(max_id=2))
+        incremental = self._backup(FakeCursor(max_id=5), incremental=True)
+
+        cursor = FakeCursor(max_id=5)
+        with patch('app.db_backup.get_db_connection') as get_conn, \
+             patch('app.db_maintenance.analyze_tables') as analyze:
+            get_conn.return_value.__enter__.return_value.cursor.return_value = cursor
+            loaded = restore_backup(incremental['id'])
+
+        self.assertEqual(loaded, {'device_data': 4, 'inverter_history': 2, 'plants': 2})
+        analyze.assert_called_once_with(loaded)
+        self.assertEqual(sum('COPY "device_data"' in q for q in cursor.copies), 1)
+        # The incremental file may repeat rows of the full one, so its IDs are deduplicated
+        self.assertEqual(sum('COPY restore_staging' in q for q in cursor.copies), 1)
+        self.assertTrue(any(q.startswith('INSERT INTO "device_data"') and 'NOT EXISTS' in q
+                            for q in cursor.executed))
+        self.assertEqual(sum('COPY "plants"' in q for q in cursor.copies), 1)
+
+    def test_upserted_rows_restore_their_latest_values(self):
+        """Test that inverter_history rows updated in place after the full backup are restored as updated"""
+        full = self._backup(FakeCursor(max_id=2))
+        updated = b'id,serial_number,ac_power\n1,INV001,180.0\n'
+        incremental = self._backup(FakeCursor(max_id=5, inverter_rows=updated), incremental=True)
+
+        entry = incremental['tables']['inverter_history']
+        self.assertEqual(entry['mode'], 'full')
+        self.assertNotIn('watermark_column', entry)
+        self.assertEqual(full['tables']['inverter_history']['mode'], 'full')
+
+        cursor = FakeCursor(max_id=5)
+        with patch('app.db_backup.get_db_connection') as get_conn, \
+             patch('app.db_maintenance.analyze_tables'):
+            get_conn.return_value.__enter__.return_value.cursor.return_value = cursor
+            restore_backup(incremental['id'])
+
+        # Only the newest copy is loaded, so the base file's stale value never comes back
+        self.assertEqual(cursor.loaded['"inverter_history"'], [updated])
+
+    def test_backup_job_reports_progress(self):
+        """Test that a background job ends as completed at 100%"""
+        manifest = {'kind': 'full', 'bytes': 42}
+        with patch('app.db_backup.create_backup', return_value=manifest), \
+             patch('app.db_backup.threading.Thread') as thread:
+            job = start_backup_job()
+            target = thread.call_args.kwargs['target']
+            target(*thread.call_args.kwargs['args'])
+
+        self.assertEqual(job['status'], 'running')
+        state = get_backup_job(job['job_id'])
+        self.assertEqual(state['status'], 'completed')
+        self.assertEqual(state['percent'], 100.0)
+        self.assertIsNone(get_backup_job('unknown'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test file for the content-addressed file storage in app/db_blobs.py
+"""
+
+import os
+import io
+import sys
+import hashlib
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.db_blobs import delete_orphaned_blob, store_blob
+
+
+class OneShotStream(io.RawIOBase):
+    """Readable stream that cannot seek, like a request body"""
+
+    def __init__(self, data):
+        self._buffer = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._buffer.read(size)
+
+
+@patch('app.db_blobs.Config.FILE_CHUNK_SIZE', 4)
+class TestStoreBlob(unittest.TestCase):
+    """Tests for hashing, chunking and deduplication"""
+
+    def test_new_content_is_chunked(self):
+        """Test that new content is split into chunk rows under its SHA-256"""
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'created': True}
+
+        blob = store_blob(cursor, b'0123456789')
+
+        self.assertTrue(blob['created'])
+        self.assertEqual(blob['content_hash'], hashlib.sha256(b'0123456789').hexdigest())
+        self.assertEqual(blob['md5_hash'], hashlib.md5(b'0123456789').hexdigest())
+        self.assertEqual(blob['size_bytes'], 10)
+
+        blob_params = cursor.execute.call_args_list[0].args[1]
+        self.assertEqual(blob_params[1:4], (10, 4, 3))  # size, chunk size, chunk count
+        chunks = [c.args[1][2].adapted for c in cursor.execute.call_args_list[1:]]
+        self.assertEqual(chunks, [b'0123', b'4567', b'89'])
+
+    def test_existing_content_is_not_uploaded(self):
+        """Test that content already stored is deduplicated without chunk writes"""
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'created': False}
+
+        blob = store_blob(cursor, OneShotStream(b'0123456789'))
+
+        self.assertFalse(blob['created'])
+        self.assertEqual(cursor.execute.call_count, 1)
+
+
+    def test_existing_blob_is_locked_while_referenced(self):
+        """Test that deduplication locks the stored blob instead of just skipping the insert"""
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'created': False}
+
+        store_blob(cursor, b'0123')
+
+        self.assertIn('DO UPDATE', cursor.execute.call_args_list[0].args[0])
+
+
+class TestDeleteOrphanedBlob(unittest.TestCase):
+    """Tests for removing blobs nothing references"""
+
+    def test_blob_is_locked_before_the_reference_check(self):
+        """Test that the delete waits for concurrent writers of the same blob"""
+        cursor = MagicMock()
+        cursor.fetchone.return_value = {'?column?': 1}
+        cursor.rowcount = 1
+
+        self.assertTrue(delete_orphaned_blob(cursor, 'abc'))
+
+        statements = [c.args[0].strip() for c in cursor.execute.call_args_list]
+        self.assertTrue(statements[0].endswith('FOR UPDATE'))
+        self.assertTrue(any(statement.startswith('DELETE FROM file_blobs') for statement in statements[1:]))
+
+    def test_missing_blob_is_not_deleted(self):
+        """Test that an already removed blob is reported as not deleted"""
+        cursor = MagicMock()
+        cursor.fetchone.return_value = None
+
+        self.assertFalse(delete_orphaned_blob(cursor, 'abc'))
+        self.assertEqual(cursor.execute.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
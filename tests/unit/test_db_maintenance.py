@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test file for the database maintenance engine in app/db_maintenance.py
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.db_maintenance import (estimate_bloat, get_maintenance_job, run_maintenance, start_maintenance_job,
+                                vacuum_table)
+
+BLOAT = {
+    'devices': {
+        'live_tuples': 100, 'dead_tuples': 60, 'dead_ratio': 0.375, 'modified_since_analyze': 0,
+        'bytes': 65536,
+        'indexes': {
+            'devices_pkey': {'bytes': 8 * 1024 * 1024, 'valid': True, 'method': 'btree', 'bloat_ratio': 0.8},
+            'devices_pkey_ccnew': {'bytes': 8192, 'valid': False, 'method': 'btree', 'bloat_ratio': 0.0},
+        },
+    },
+    'plants': {
+        'live_tuples': 10, 'dead_tuples': 0, 'dead_ratio': 0.0, 'modified_since_analyze': 0,
+        'bytes': 8192,
+        'indexes': {
+            'plants_pkey': {'bytes': 16384, 'valid': True, 'method': 'btree', 'bloat_ratio': 0.9},
+        },
+    },
+}
+
+
+class TestDatabaseMaintenance(unittest.TestCase):
+    """Tests for bloat estimates and the maintenance plan"""
+
+    def _mock_connection(self, get_conn):
+        conn = get_conn.return_value.__enter__.return_value
+        cursor = MagicMock()
+        conn.cursor.return_value = cursor
+        return conn, cursor
+
+    @patch('app.db_maintenance.get_db_connection')
+    def test_estimate_bloat_compares_index_size_with_expected(self, get_conn):
+        """Test that an index four times its expected size is reported as 75% bloated"""
+        _, cursor = self._mock_connection(get_conn)
+        cursor.fetchall.side_effect = [
+            [{'table_name': 'devices', 'n_live_tup': 90, 'n_dead_tup': 10, 'n_mod_since_analyze': 5,
+              'last_vacuum': None, 'last_autovacuum': None, 'last_analyze': None, 'last_autoanalyze': None,
+              'table_bytes': 81920}],
+            # 8168 usable bytes * 100% fillfactor / (4 + 12) bytes per entry = 510.5 entries per page
+            [{'table_name': 'devices', 'index_name': 'devices_pkey', 'method': 'btree', 'relpages': 8,
+              'reltuples': 510.5, 'index_bytes': 65536, 'block_size': 8192, 'fillfactor': 100,
+              'key_width': 4, 'indisvalid': True}],
+        ]
+
+        report = estimate_bloat()
+
+        self.assertEqual(report['devices']['dead_ratio'], 0.1)
+        self.assertEqual(report['devices']['indexes']['devices_pkey']['bloat_ratio'], 0.75)
+
+    @patch('app.db_maintenance.get_db_connection')
+    def test_vacuum_runs_in_autocommit(self, get_conn):
+        """Test that VACUUM is issued outside a transaction block"""
+        conn, cursor = self._mock_connection(get_conn)
+
+        vacuum_table('energy_stats')
+
+        self.assertTrue(conn.autocommit)
+        cursor.execute.assert_called_once_with('VACUUM (ANALYZE) "energy_stats"')
+
+    @patch('app.db_maintenance._server_version', return_value=150000)
+    @patch('app.db_maintenance.reindex_index', return_value=1.5)
+    @patch('app.db_maintenance.vacuum_table', return_value=0.25)
+    @patch('app.db_maintenance.estimate_bloat', return_value=BLOAT)
+    def test_run_maintenance_only_touches_bloated_objects(self, _, vacuum, reindex, __):
+        """Test that churned tables are vacuumed and large bloated indexes rebuilt"""
+        report = run_maintenance()
+
+        vacuum.assert_called_once_with('devices')
+        reindex.assert_called_once_with('devices_pkey')
+        self.assertEqual(report['tables']['devices']['actions'],
+                         {'vacuum': 0.25, 'reindex:devices_pkey': 1.5})
+        self.assertEqual(report['tables']['plants']['actions'], {})
+
+    @patch('app.db_maintenance.reindex_index')
+    @patch('app.db_maintenance.vacuum_table')
+    @patch('app.db_maintenance.estimate_bloat', return_value=BLOAT)
+    def test_dry_run_changes_nothing(self, _, vacuum, reindex):
+        """Test that a dry run only lists the pending actions"""
+        report = run_maintenance(dry_run=True)
+
+        vacuum.assert_not_called()
+        reindex.assert_not_called()
+        self.assertEqual(report['tables']['devices']['actions'],
+                         {'vacuum': 'pending', 'reindex:devices_pkey': 'pending'})
+
+
+    @patch('app.db_maintenance.run_maintenance', return_value={'seconds': 1.0, 'tables': {}})
+    def test_maintenance_job_runs_in_background(self, run):
+        """Test that a job returns at once and reports the run's result when done"""
+        done = MagicMock()
+        with patch('app.db_maintenance.threading.Thread') as thread:
+            job = start_maintenance_job(tables=['devices'], on_complete=done)
+            # A second request while the first is running joins it
+            self.assertEqual(start_maintenance_job()['job_id'], job['job_id'])
+            thread.assert_called_once()
+            target = thread.call_args.kwargs['target']
+            target(*thread.call_args.kwargs['args'])
+
+        self.assertEqual(job['status'], 'running')
+        run.assert_called_once_with(tables=['devices'], reindex=True, force=False)
+        done.assert_called_once_with(run.return_value)
+        state = get_maintenance_job(job['job_id'])
+        self.assertEqual(state['status'], 'completed')
+        self.assertEqual(state['report'], run.return_value)
+        self.assertIsNone(get_maintenance_job('unknown'))
+
+
+if __name__ == '__main__':
+    unittest.main()
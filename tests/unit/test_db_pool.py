@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test file for the observable connection pool in app/db_pool.py
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from psycopg2 import extensions
+
+from app.db_pool import ObservableConnectionPool, PoolTimeoutError
+
+
+def make_connection(*args, **kwargs):
+    """Create a fake psycopg2 connection in the idle state"""
+    conn = MagicMock()
+    conn.closed = 0
+    conn.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close():
+        conn.closed = 1
+    conn.close.side_effect = close
+    return conn
+
+
+@patch('app.db_pool.psycopg2.connect', side_effect=make_connection)
+class TestObservableConnectionPool(unittest.TestCase):
+    """Tests for blocking checkout, recycling, leak detection and metrics"""
+
+    def test_reuses_returned_connection(self, mock_connect):
+        """Test that a returned connection is handed out again"""
+        pool = ObservableConnectionPool(1, 2, timeout=0.1, pre_ping_idle=60)
+        conn = pool.getconn()
+        pool.putconn(conn)
+
+        self.assertIs(pool.getconn(), conn)
+        self.assertEqual(mock_connect.call_count, 1)
+
+        stats = pool.get_stats()
+        self.assertEqual(stats['in_use'], 1)
+        self.assertEqual(stats['checkouts'], 2)
+
+    def test_times_out_when_exhausted(self, mock_connect):
+        """Test that checkout waits for the timeout and then raises"""
+        pool = ObservableConnectionPool(0, 1, timeout=0.05)
+        pool.getconn()
+
+        with self.assertRaises(PoolTimeoutError):
+            pool.getconn()
+        self.assertEqual(pool.get_stats()['timeouts'], 1)
+
+    def test_reaps_connection_closed_without_putconn(self, mock_connect):
+        """Test that a leaked, closed connection frees its slot"""
+        pool = ObservableConnectionPool(0, 1, timeout=0.05)
+        leaked = pool.getconn()
+        leaked.close()
+
+        conn = pool.getconn()
+
+        self.assertIsNot(conn, leaked)
+        self.assertEqual(pool.get_stats()['leaks_detected'], 1)
+
+    def test_recycles_expired_and_stale_connections(self, mock_connect):
+        """Test max lifetime and checkout health checks"""
+        clock = [1000.0]
+        with patch('app.db_pool.time.monotonic', side_effect=lambda: clock[0]):
+            pool = ObservableConnectionPool(1, 1, timeout=0.1, max_lifetime=60, pre_ping_idle=0)
+            first = pool.getconn()
+            pool.putconn(first)
+
+            clock[0] += 3600
+            second = pool.getconn()
+
+        self.assertIsNot(second, first)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.get_stats()['lifetime_recycles'], 1)
+
+    def test_counts_connections_expired_on_return(self, mock_connect):
+        """Test that a connection outliving max_lifetime while checked out is recycled on putconn"""
+        clock = [1000.0]
+        with patch('app.db_pool.time.monotonic', side_effect=lambda: clock[0]):
+            pool = ObservableConnectionPool(0, 1, timeout=0.1, max_lifetime=60)
+            conn = pool.getconn()
+            clock[0] += 3600
+            pool.putconn(conn)
+
+        self.assertTrue(conn.closed)
+        self.assertEqual(pool.get_stats()['lifetime_recycles'], 1)
+
+    def test_reports_long_held_checkouts(self, mock_connect):
+        """Test that checkouts past the leak threshold are listed with their stack"""
+        pool = ObservableConnectionPool(0, 1, leak_threshold=0)
+        pool.getconn()
+
+        leaks = pool.get_leaks()
+        self.assertEqual(len(leaks), 1)
+        self.assertIn('test_reports_long_held_checkouts', leaks[0]['stack'])
+
+
+if __name__ == '__main__':
+    unittest.main()
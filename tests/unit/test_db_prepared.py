@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test file for the prepared statement registry in app/db_prepared.py
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from psycopg2 import extensions
+
+from app import db_prepared
+from app.db_prepared import register_statement, execute_prepared
+
+
+class FakeConnection:
+    """Minimal stand-in for a psycopg2 connection that supports weak references"""
+
+    def __init__(self, autocommit=False):
+        self.autocommit = autocommit
+        self.info = MagicMock()
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+
+class TestPreparedStatements(unittest.TestCase):
+    """Tests for lazy per-connection preparation and pooler fallbacks"""
+
+    def setUp(self):
+        register_statement('test_lookup', "SELECT * FROM devices WHERE serial_number = %s AND plant_id = %s")
+
+    def _cursor(self, conn):
+        cursor = MagicMock()
+        cursor.connection = conn
+        return cursor
+
+    @patch.object(db_prepared.Config, 'POSTGRES_POOL_MODE', 'session')
+    @patch.object(db_prepared.Config, 'POSTGRES_PREPARED_STATEMENTS', True)
+    def test_prepares_once_per_connection(self):
+        """Test that a statement is prepared on first use only, and again on a new connection"""
+        conn = FakeConnection()
+        cursor = self._cursor(conn)
+
+        execute_prepared(cursor, 'test_lookup', ('SN1', 'P1'))
+        execute_prepared(cursor, 'test_lookup', ('SN2', 'P1'))
+
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        self.assertEqual(len(statements), 3)
+        self.assertIn("PREPARE test_lookup AS SELECT * FROM devices WHERE serial_number = $1 AND plant_id = $2",
+                      statements[0])
+        self.assertEqual(statements[1], "EXECUTE test_lookup (%s, %s)")
+        self.assertEqual(cursor.execute.call_args_list[2].args[1], ('SN2', 'P1'))
+
+        # A reconnect yields a new connection object, which prepares again
+        other_cursor = self._cursor(FakeConnection())
+        execute_prepared(other_cursor, 'test_lookup', ('SN1', 'P1'))
+        self.assertIn("PREPARE test_lookup", other_cursor.execute.call_args_list[0].args[0])
+
+    @patch.object(db_prepared.Config, 'POSTGRES_POOL_MODE', 'transaction')
+    @patch.object(db_prepared.Config, 'POSTGRES_PREPARED_STATEMENTS', True)
+    def test_transaction_pooler_runs_unprepared(self):
+        """Test that each call behind a transaction pooler is a single plain statement"""
+        for autocommit, status in ((False, extensions.TRANSACTION_STATUS_IDLE),
+                                   (False, extensions.TRANSACTION_STATUS_INTRANS),
+                                   (True, extensions.TRANSACTION_STATUS_IDLE)):
+            conn = FakeConnection(autocommit=autocommit)
+            conn.info.transaction_status = status
+            cursor = self._cursor(conn)
+
+            execute_prepared(cursor, 'test_lookup', ('SN1', 'P1'))
+            execute_prepared(cursor, 'test_lookup', ('SN2', 'P1'))
+
+            self.assertEqual(cursor.execute.call_count, 2)
+            cursor.execute.assert_called_with(
+                "SELECT * FROM devices WHERE serial_number = %s AND plant_id = %s", ('SN2', 'P1'))
+
+    def test_register_conflicting_sql_rejected(self):
+        """Test that a name cannot be re-registered with different SQL"""
+        with self.assertRaises(ValueError):
+            register_statement('test_lookup', "SELECT 1")
+
+
+if __name__ == '__main__':
+    unittest.main()
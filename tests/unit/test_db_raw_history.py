@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test file for the delta-encoded raw payload history in app/db_raw_history.py
+"""
+
+import os
+import sys
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.db_raw_history import apply_diff, json_diff, record_raw_data
+
+
+PAYLOAD = {
+    'model': 'MIN 5000TL-X',
+    'firmware': {'version': 'GH1.0', 'build': 7},
+    'plant': {'name': 'Rooftop', 'city': 'Bangkok'},
+    'pac': 1200.5,
+    'eToday': 3.2,
+    'lost': False,
+}
+
+
+class TestRawDataHistory(unittest.TestCase):
+    """Tests for diffing, reconstruction and snapshot/delta selection"""
+
+    def test_diff_round_trip(self):
+        """Test that applying a diff rebuilds the target, including nested and removed keys"""
+        new = dict(PAYLOAD, pac=0, firmware={'version': 'GH1.1', 'build': 7}, alarm='E101')
+        del new['lost']
+
+        diff = json_diff(PAYLOAD, new)
+
+        self.assertEqual(diff['set'], {'pac': 0, 'alarm': 'E101'})
+        self.assertEqual(diff['patch'], {'firmware': {'set': {'version': 'GH1.1'}}})
+        self.assertEqual(diff['unset'], ['lost'])
+        self.assertEqual(apply_diff(PAYLOAD, diff), new)
+        self.assertEqual(json_diff(PAYLOAD, dict(PAYLOAD)), {})
+
+    def test_records_snapshot_then_delta_then_skips_unchanged(self):
+        """Test that a serial gets a snapshot first, small changes as deltas, and repeats are skipped"""
+        cursor = MagicMock()
+        cursor.fetchall.return_value = []
+        cursor.fetchone.return_value = {'id': 1}
+        polled_at = datetime(2025, 5, 14, 12, 0)
+
+        counts = record_raw_data(cursor, [('SN1', PAYLOAD)], polled_at)
+        self.assertEqual(counts['snapshots'], 1)
+
+        changed = dict(PAYLOAD, pac=900.0)
+        head = {'serial_number': 'SN1', 'snapshot_id': 1, 'snapshot_at': polled_at,
+                'snapshot': PAYLOAD, 'delta_count': 0, 'last_delta': None}
+        cursor.fetchall.return_value = [head]
+        counts = record_raw_data(cursor, [('SN1', changed)], polled_at.replace(minute=15))
+        self.assertEqual(counts['deltas'], 1)
+        self.assertEqual(cursor.execute.call_args.args[1][0].adapted, {'set': {'pac': 900.0}})
+
+        cursor.fetchall.return_value = [dict(head, delta_count=1, last_delta={'set': {'pac': 900.0}})]
+        counts = record_raw_data(cursor, [('SN1', changed)], polled_at.replace(minute=30))
+        self.assertEqual(counts['unchanged'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test file for read replica routing in app/database.py
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.database import DatabaseConnector, ReplicaUnavailableError, is_read_only_query
+
+
+class TestReplicaRouting(unittest.TestCase):
+    """Tests for read-only detection and primary fallback"""
+
+    def test_is_read_only_query(self):
+        """Test that only plain reads are routed to the replica"""
+        self.assertTrue(is_read_only_query("SELECT * FROM devices"))
+        self.assertTrue(is_read_only_query("\n  with x AS (SELECT 1) SELECT * FROM x"))
+        self.assertFalse(is_read_only_query("INSERT INTO devices VALUES (1)"))
+        self.assertFalse(is_read_only_query("SELECT * FROM devices FOR UPDATE"))
+        self.assertFalse(is_read_only_query("WITH d AS (DELETE FROM devices RETURNING *) SELECT * FROM d"))
+
+    def test_query_routes_and_falls_back(self):
+        """Test automatic routing, per-call override and fallback to the primary"""
+        db = DatabaseConnector()
+
+        with patch.object(DatabaseConnector, '_fetch_all', return_value=[{'n': 1}]) as fetch:
+            db.query("SELECT 1 AS n")
+            db.query("SELECT 1 AS n", use_replica=False)
+            self.assertEqual([c.kwargs['replica'] for c in fetch.call_args_list], [True, False])
+
+        with patch.object(DatabaseConnector, '_fetch_all',
+                          side_effect=[ReplicaUnavailableError("replica down"), [{'n': 1}]]) as fetch:
+            self.assertEqual(db.query("SELECT 1 AS n"), [{'n': 1}])
+            self.assertEqual([c.kwargs['replica'] for c in fetch.call_args_list], [True, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
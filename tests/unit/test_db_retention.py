@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test file for the retention engine in app/db_retention.py
+"""
+
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.db_retention import apply_retention, prune_table, retention_cutoff
+
+
+def fake_connection_factory(cursor):
+    """Build a get_db_connection replacement that always yields the same cursor"""
+    conn = MagicMock()
+    conn.cursor.return_value = cursor
+
+    @contextmanager
+    def fake_connection(replica=False):
+        yield conn
+    return fake_connection
+
+
+class TestRetention(unittest.TestCase):
+    """Tests for cutoffs, batched deletes and dry runs"""
+
+    @patch('app.db_retention.Config.RETENTION_WEATHER_DATA_DAYS', 0)
+    @patch('app.db_retention.Config.RETENTION_DEVICE_DATA_DAYS', 30)
+    def test_cutoff_is_aligned_to_bucket(self):
+        """Test that cutoffs start a whole bucket and that 0 days disables retention"""
+        now = datetime(2025, 5, 31, 13, 45, 12)
+        self.assertEqual(retention_cutoff('device_data', now), datetime(2025, 5, 1, 13))
+        self.assertIsNone(retention_cutoff('weather_data', now))
+
+    @patch('app.db_retention.time.sleep')
+    def test_prune_deletes_until_short_batch(self, mock_sleep):
+        """Test that deletes run in separate batches until one comes back short"""
+        cursor = MagicMock()
+        counts = iter([100, 100, 7])
+
+        def execute(query, params=None):
+            if query.lstrip().startswith('DELETE'):
+                cursor.rowcount = next(counts)
+        cursor.execute.side_effect = execute
+
+        with patch('app.db_retention.get_db_connection', fake_connection_factory(cursor)):
+            deleted = prune_table('device_data', datetime(2025, 5, 1), batch_size=100)
+
+        self.assertEqual(deleted, 207)
+        self.assertEqual(mock_sleep.call_count, 2)
+
+    def test_dry_run_does_not_write(self):
+        """Test that a dry run only counts rows"""
+        cursor = MagicMock()
+        cursor.fetchone.side_effect = [
+            {'present': True},
+            {'rows': 12001, 'buckets': 40, 'oldest': datetime(2025, 1, 1)},
+        ]
+
+        with patch('app.db_retention.get_db_connection', fake_connection_factory(cursor)):
+            report = apply_retention(dry_run=True, tables=['device_data'], batch_size=5000)
+
+        entry = report['device_data']
+        self.assertEqual(entry['rows_to_delete'], 12001)
+        self.assertEqual(entry['batches'], 3)
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        self.assertFalse(any('DELETE' in s or 'INSERT' in s for s in statements))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test file for the energy rollup helpers in app/db_rollups.py
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+from datetime import datetime, date
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.db_rollups import rebuild_energy_rollups, truncate_bucket, update_energy_rollups
+
+
+class TestEnergyRollups(unittest.TestCase):
+    """Tests for bucket truncation and incremental rollup refresh"""
+
+    def test_truncate_bucket(self):
+        """Test truncation of dates, datetimes and strings to bucket starts"""
+        ts = datetime(2025, 5, 14, 13, 45, 12)
+        self.assertEqual(truncate_bucket(ts, 'hour'), datetime(2025, 5, 14, 13))
+        self.assertEqual(truncate_bucket(ts, 'day'), datetime(2025, 5, 14))
+        self.assertEqual(truncate_bucket(ts, 'month'), datetime(2025, 5, 1))
+        self.assertEqual(truncate_bucket(date(2025, 5, 14), 'day'), datetime(2025, 5, 14))
+        self.assertEqual(truncate_bucket('2025-05-14', 'day'), datetime(2025, 5, 14))
+        self.assertEqual(truncate_bucket('2025-05-14 00:00:00', 'month'), datetime(2025, 5, 1))
+        self.assertEqual(truncate_bucket('2025-05-14 13:05:00', 'hour'), datetime(2025, 5, 14, 13))
+
+    def test_truncate_bucket_invalid_granularity(self):
+        """Test that unknown granularities are rejected"""
+        with self.assertRaises(ValueError):
+            truncate_bucket(datetime.now(), 'week')
+
+    def test_update_without_keys_is_noop(self):
+        """Test that an empty batch issues no statements"""
+        cursor = MagicMock()
+        self.assertTrue(update_energy_rollups(cursor))
+        cursor.execute.assert_not_called()
+
+    def test_update_day_keys_cascades_to_month_and_plant(self):
+        """Test that day keys refresh day, month and plant rollups for touched keys only"""
+        cursor = MagicMock()
+        cursor.fetchall.side_effect = [
+            [{'plant_id': 'P1', 'bucket': datetime(2025, 5, 14)}],
+            [{'plant_id': 'P1', 'bucket': datetime(2025, 5, 1)}],
+        ]
+
+        result = update_energy_rollups(cursor, day_keys=[
+            ('SN1', '2025-05-14'),
+            ('SN1', datetime(2025, 5, 14)),  # same key, different spelling
+        ])
+
+        self.assertTrue(result)
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        self.assertEqual(statements[0], "SAVEPOINT energy_rollups")
+        self.assertEqual(statements[-1], "RELEASE SAVEPOINT energy_rollups")
+        # day refresh, plant day, month refresh, plant month
+        self.assertEqual(len(statements), 6)
+
+        day_params = cursor.execute.call_args_list[1].args[1]
+        self.assertEqual(day_params, (['SN1'], [datetime(2025, 5, 14)]))
+        month_params = cursor.execute.call_args_list[3].args[1]
+        self.assertEqual(month_params, (['SN1'], [datetime(2025, 5, 1)]))
+        plant_month_params = cursor.execute.call_args_list[4].args[1]
+        self.assertEqual(plant_month_params, (['P1'], [datetime(2025, 5, 1)], 'month'))
+
+
+    @patch('app.db_maintenance.analyze_tables')
+    @patch('app.db_archive.archived_months')
+    @patch('app.db_rollups.get_db_connection')
+    def test_rebuild_starts_at_the_oldest_complete_raw_bucket(self, get_conn, archived, _analyze):
+        """Test that a rebuild keeps rollups of pruned or archived periods"""
+        cursor = MagicMock()
+        get_conn.return_value.__enter__.return_value.cursor.return_value = cursor
+        cursor.fetchone.side_effect = [
+            {'present': True}, {'oldest': datetime(2025, 3, 10, 13, 20)},  # pruned mid-hour
+            {'present': True}, {'oldest': date(2025, 2, 3)},
+        ]
+        # February of energy_stats has late rows, but the month itself is archived
+        archived.side_effect = lambda table: [datetime(2025, 2, 1)] if table == 'energy_stats' else []
+
+        rebuild_energy_rollups()
+
+        deletes = [c.args[1] for c in cursor.execute.call_args_list
+                   if c.args[0].startswith("DELETE FROM energy_rollup_device")]
+        self.assertEqual(deletes, [('hour', datetime(2025, 3, 10, 14)),
+                                   ('day', datetime(2025, 3, 1)),
+                                   ('month', datetime(2025, 3, 1))])
+
+    @patch('app.db_maintenance.analyze_tables')
+    @patch('app.db_archive.archived_months', return_value=[])
+    @patch('app.db_rollups.get_db_connection')
+    def test_rebuild_without_raw_rows_deletes_nothing(self, get_conn, _archived, _analyze):
+        """Test that an empty raw table leaves its rollups alone"""
+        cursor = MagicMock()
+        get_conn.return_value.__enter__.return_value.cursor.return_value = cursor
+        cursor.fetchone.side_effect = [{'present': False}, {'present': True}, {'oldest': None}]
+
+        self.assertEqual(rebuild_energy_rollups(), {'hour': 0, 'day': 0, 'month': 0})
+        self.assertFalse(any('DELETE' in c.args[0] for c in cursor.execute.call_args_list))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test file for packed chart series storage in app/db_series.py
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.db_series import decode_series, encode_series, save_daily_series, series_timestamps
+
+
+class TestChartSeries(unittest.TestCase):
+    """Tests for encoding, decoding and saving packed series"""
+
+    def test_encode_plain_and_labelled_points(self):
+        """Test that both chart formats land in the right slots with NaN for gaps"""
+        plain = encode_series(['1.5', None, 3])
+        self.assertEqual(plain.dtype, np.float32)
+        self.assertEqual(len(plain), 288)
+        np.testing.assert_array_equal(plain[:3], [1.5, np.nan, 3.0])
+        self.assertTrue(np.isnan(plain[3:]).all())
+
+        labelled = encode_series([['00:10', '2'], ['12:00', None], ['23:55', 7.25]])
+        self.assertEqual(labelled[2], 2.0)
+        self.assertTrue(np.isnan(labelled[144]))
+        self.assertEqual(labelled[287], 7.25)
+
+    def test_decode_round_trip(self):
+        """Test that stored arrays with NULL elements decode to NaN"""
+        decoded = decode_series([0.5, None, 2.0])
+        np.testing.assert_array_equal(decoded, np.array([0.5, np.nan, 2.0], dtype=np.float32))
+        self.assertEqual(str(series_timestamps('2025-05-14')[-1]), '2025-05-14T23:55')
+
+    @patch('app.db_series.execute_values')
+    def test_save_writes_one_row_per_series(self, mock_execute_values):
+        """Test that a day's charts become one row per series"""
+        charts = {'ppv': [1, 2], 'pacToUser': [None, 4], 'etouser': '5.2'}
+
+        saved = save_daily_series(MagicMock(), 'SN1', 'P1', '2025-05-14', charts)
+
+        self.assertEqual(saved, 2)
+        rows = mock_execute_values.call_args.args[2]
+        self.assertEqual([row[3] for row in rows], ['ppv', 'pacToUser'])
+        self.assertEqual(rows[1][5][:3], [None, 4.0, None])
+        self.assertEqual(rows[1][6], 1)
+
+    @patch('app.db_series.execute_values')
+    def test_malformed_series_is_skipped_alone(self, mock_execute_values):
+        """Test that a short [time, value] pair drops only its own series"""
+        charts = {'ppv': [['00:00', 1], ['00:05']], 'pacToUser': [['00:00', 2]]}
+
+        with self.assertRaises(ValueError):
+            encode_series(charts['ppv'])
+        saved = save_daily_series(MagicMock(), 'SN1', 'P1', '2025-05-14', charts)
+
+        self.assertEqual(saved, 1)
+        self.assertEqual(mock_execute_values.call_args.args[2][0][3], 'pacToUser')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test file for the database snapshot read path in app/db_snapshot.py
+"""
+
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import psycopg2
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import db_snapshot
+from app.db_snapshot import query_devices, read_snapshot, trigger_refresh
+
+
+class TestDatabaseSnapshot(unittest.TestCase):
+    """Tests for snapshot freshness, background refresh throttling and device listings"""
+
+    def setUp(self):
+        db_snapshot._refresh_started.clear()
+        db_snapshot._refresh_running.clear()
+
+    def _mock_rows(self, get_conn, rows):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = rows
+        get_conn.return_value.__enter__.return_value.cursor.return_value = cursor
+        return cursor
+
+    @patch('app.db_snapshot.get_db_connection')
+    def test_devices_snapshot_within_sla_is_fresh(self, get_conn):
+        """Test that stored devices come back in the live format with their age"""
+        collected = datetime.now() - timedelta(seconds=60)
+        self._mock_rows(get_conn, [{
+            'serial_number': 'INV001', 'plant_id': '42', 'alias': 'Roof', 'type': 'inverter',
+            'status': 'online', 'last_update_time': collected, 'last_updated': collected,
+            'raw_data': {'deviceSn': 'INV001', 'eTotal': 1200}, 'plant_name': 'Home',
+        }])
+
+        snapshot = read_snapshot('devices')
+
+        device = snapshot['data'][0]
+        self.assertEqual(device['serial_number'], 'INV001')
+        self.assertEqual(device['plantId'], '42')
+        self.assertEqual(device['plantName'], 'Home')
+        self.assertEqual(device['eTotal'], 1200)
+        self.assertTrue(snapshot['fresh'])
+        self.assertGreaterEqual(snapshot['age_seconds'], 60)
+        get_conn.assert_called_once_with(replica=True)
+
+    @patch('app.db_snapshot.Config.PLANT_SNAPSHOT_SLA', 3600)
+    @patch('app.db_snapshot.get_db_connection')
+    def test_snapshot_past_sla_is_stale(self, get_conn):
+        """Test that a snapshot older than its SLA is marked as not fresh"""
+        collected = datetime.now() - timedelta(hours=2)
+        self._mock_rows(get_conn, [{'id': '42', 'name': 'Home', 'status': 1, 'raw_data': None,
+                                    'last_updated': collected}])
+
+        snapshot = read_snapshot('plants')
+
+        self.assertFalse(snapshot['fresh'])
+        self.assertEqual(snapshot['data'], [{'id': '42', 'plantName': 'Home', 'status': 1}])
+
+    @patch('app.db_snapshot.get_db_connection')
+    def test_empty_snapshot_returns_none(self, get_conn):
+        """Test that nothing collected yet means the route has to fetch live"""
+        self._mock_rows(get_conn, [])
+        self.assertIsNone(read_snapshot('weather'))
+
+    @patch('app.db_snapshot.Config.SNAPSHOT_REFRESH_MIN_INTERVAL', 300)
+    @patch('app.db_snapshot.threading.Thread')
+    def test_refresh_is_single_flight_and_throttled(self, thread):
+        """Test that one collection runs per job and interval"""
+        self.assertTrue(trigger_refresh('plants'))
+        # Weather is refreshed by the same collector job
+        self.assertFalse(trigger_refresh('weather'))
+
+        with patch('app.data_collector.collect_plant_data', return_value={'success': True}) as collect:
+            thread.call_args.kwargs['target'](*thread.call_args.kwargs['args'])
+        collect.assert_called_once()
+
+        # Finished, but within the minimum interval
+        self.assertFalse(trigger_refresh('plants'))
+        self.assertTrue(trigger_refresh('devices'))
+        self.assertEqual(thread.call_count, 2)
+
+    @patch('app.db_snapshot.Config.SNAPSHOT_REFRESH_MIN_INTERVAL', 300)
+    @patch('app.db_snapshot.threading.Thread')
+    def test_refresh_is_shared_across_workers(self, thread):
+        """Test that a refresh started by another worker within the interval is not repeated"""
+        from flask import Flask
+        from flask_caching import Cache
+
+        app = Flask(__name__)
+        app.config.update(CACHE_TYPE='SimpleCache')
+        app.cache = Cache(app)
+        with app.app_context():
+            self.assertTrue(trigger_refresh('plants'))
+            # Another worker: its own in-process state, the same cache
+            db_snapshot._refresh_started.clear()
+            db_snapshot._refresh_running.clear()
+            self.assertFalse(trigger_refresh('plants'))
+            self.assertTrue(trigger_refresh('devices'))
+        self.assertEqual(thread.call_count, 2)
+
+    @patch('app.db_snapshot.get_db_connection')
+    def test_query_devices_filters_projects_and_pages(self, get_conn):
+        """Test that filters become SQL conditions and a full page returns a cursor"""
+        rows = [{
+            'serial_number': sn, 'plant_id': '42', 'alias': f'Roof {sn}', 'type': 'inverter',
+            'status': 'online', 'last_update_time': None, 'raw_data': {'eToday': 5}, 'plant_name': 'Home',
+        } for sn in ('INV001', 'INV002', 'INV003')]
+        cursor = self._mock_rows(get_conn, rows)
+
+        page = query_devices(plant_ids=['42'], statuses=['online'], q='roof_1',
+                             fields=['serial_number', 'eToday', 'missing'], limit=2)
+
+        query, params = cursor.execute.call_args[0]
+        self.assertIn('jsonb_each(d.raw_data)', query)
+        self.assertIn('d.plant_id = ANY(%s)', query)
+        self.assertIn('d.status = ANY(%s)', query)
+        self.assertNotIn('d.type', query.split('WHERE')[1])
+        self.assertEqual(params, (['serial_number', 'eToday', 'missing'], ['42'], ['online'],
+                                  '%roof\\_1%', '%roof\\_1%', 3))
+        self.assertEqual(page['devices'], [{'serial_number': 'INV001', 'eToday': 5},
+                                           {'serial_number': 'INV002', 'eToday': 5}])
+        self.assertIsNotNone(page['next_cursor'])
+
+        query_devices(cursor=page['next_cursor'])
+        query, params = cursor.execute.call_args[0]
+        self.assertIn('d.serial_number > %s', query)
+        self.assertEqual(params, ('INV002', 201))
+
+    @patch('app.db_snapshot.get_db_connection')
+    def test_query_devices_database_error_is_not_an_empty_page(self, get_conn):
+        """Test that a failed read returns None instead of an empty device list"""
+        cursor = self._mock_rows(get_conn, [])
+        cursor.execute.side_effect = psycopg2.OperationalError('connection refused')
+
+        self.assertIsNone(query_devices(plant_ids=['42']))
+
+    def test_query_devices_rejects_bad_cursor(self):
+        """Test that a malformed cursor is reported as invalid input"""
+        with self.assertRaises(ValueError):
+            query_devices(cursor='%%%')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Test file for the database statistics service in app/db_stats.py
+"""
+
+import os
+import sys
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app import db_stats
+from app.db_stats import get_data_stats
+
+
+def relation(name, estimate):
+    return {'relname': name, 'estimate': estimate, 'table_bytes': 8192,
+            'index_bytes': 16384, 'total_bytes': 24576}
+
+
+class TestDataStats(unittest.TestCase):
+    """Tests for approximate/exact counts and the TTL cache"""
+
+    def setUp(self):
+        db_stats._cache.clear()
+        patcher = patch('app.db_stats.get_db_connection')
+        get_conn = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cursor = MagicMock()
+        get_conn.return_value.__enter__.return_value.cursor.return_value = self.cursor
+        self.cursor.fetchall.return_value = [relation('plants', 3), relation('energy_stats', 120000),
+                                             relation('devices', -1)]
+
+    def _queries(self):
+        return [call.args[0] for call in self.cursor.execute.call_args_list]
+
+    def test_counts_come_from_planner_estimates(self):
+        """Test that analyzed tables are not scanned and unanalyzed ones are counted"""
+        self.cursor.fetchone.side_effect = [
+            {'size': 10 * 1024 * 1024},
+            {'count': 7},
+            {'oldest': '2024-01-01', 'newest': '2025-06-30'},
+        ]
+
+        stats = get_data_stats()
+
+        self.assertEqual(stats['plants'], 3)
+        self.assertEqual(stats['energy_records'], 120000)
+        self.assertEqual(stats['devices'], 7)
+        self.assertTrue(stats['tables']['devices']['exact'])
+        self.assertFalse(stats['tables']['energy_records']['exact'])
+        self.assertEqual(stats['oldest_data'], '2024-01-01')
+        self.assertEqual(stats['database_size_mb'], 10.0)
+        self.assertEqual(sum('COUNT(*)' in q for q in self._queries()), 1)
+        self.assertNotIn('weather_records', stats)
+
+    def test_exact_counts_and_cache(self):
+        """Test that exact counts scan every table and results are cached per mode"""
+        self.cursor.fetchone.side_effect = [
+            {'size': 0},
+            {'count': 3},
+            {'count': 2},
+            {'count': 119000},
+            {'oldest': datetime(2024, 1, 1), 'newest': datetime(2025, 6, 30)},
+        ]
+
+        stats = get_data_stats(exact=True)
+        self.assertEqual(stats['energy_records'], 119000)
+        self.assertEqual(stats['tables']['energy_records']['newest'], '2025-06-30T00:00:00')
+        self.assertFalse(stats['approximate'])
+
+        executed = self.cursor.execute.call_count
+        self.assertIs(get_data_stats(exact=True), stats)
+        self.assertEqual(self.cursor.execute.call_count, executed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test file for the device event bus in app/services/device_events.py
+"""
+
+import os
+import sys
+import threading
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.services.device_events import DeviceEventBus, format_sse, iter_sse
+
+
+def _device(sn, plant_id='1', status='online', pac=None):
+    return {'serial_number': sn, 'plant_id': plant_id, 'alias': sn, 'status': status,
+            'raw_data': {'pac': pac} if pac is not None else {}}
+
+
+class TestDeviceEventBus(unittest.TestCase):
+    """Tests for change detection, the ring buffer and the SSE stream"""
+
+    def setUp(self):
+        self.bus = DeviceEventBus(max_events=3)
+
+    def test_changes_are_published_after_the_baseline(self):
+        """Test that status changes and large power deltas become events"""
+        self.assertEqual(self.bus.publish_device_changes([_device('INV001', pac='1000')]), 0)
+
+        with patch('app.services.device_events.Config.DEVICE_EVENTS_POWER_DELTA', 50):
+            self.assertEqual(self.bus.publish_device_changes([_device('INV001', pac='1020')]), 0)
+            # Small changes add up against the last published power
+            published = self.bus.publish_device_changes([_device('INV001', status='offline', pac='1060')])
+
+        events, last_seq, complete = self.bus.events_since(0)
+        self.assertEqual(published, 2)
+        self.assertEqual([event['event'] for event in events], ['status', 'power'])
+        self.assertEqual(events[0]['data']['previous_status'], 'online')
+        self.assertEqual((events[1]['data']['power'], events[1]['data']['delta']), (1060.0, 60.0))
+        self.assertEqual((last_seq, complete), (2, True))
+
+    def test_ring_buffer_is_bounded(self):
+        """Test that old events are dropped and readers behind the buffer are told so"""
+        for index in range(5):
+            self.bus.publish('status', str(index % 2), {'index': index})
+
+        events, last_seq, complete = self.bus.events_since(3)
+        self.assertEqual([event['data']['index'] for event in events], [3, 4])
+        self.assertTrue(complete)
+
+        events, _, complete = self.bus.events_since(1)
+        self.assertFalse(complete)
+        self.assertEqual(self.bus.info()['buffered_events'], 3)
+
+        events, _, _ = self.bus.events_since(2, plant_ids=['1'])
+        self.assertEqual([event['data']['index'] for event in events], [3])
+
+    def test_event_ids_are_scoped_to_the_process(self):
+        """Test that ids of another bus cannot be resumed"""
+        event = self.bus.publish('status', '1', {})
+        self.assertEqual(self.bus.parse_event_id(event['id']), 1)
+        self.assertIsNone(DeviceEventBus().parse_event_id(event['id']))
+        self.assertIsNone(self.bus.parse_event_id('garbage'))
+
+    def test_waiting_reader_is_woken_by_publish(self):
+        """Test that a blocked subscriber receives an event as soon as it is published"""
+        timer = threading.Timer(0.1, self.bus.publish, args=('power', '1', {'power': 5}))
+        timer.start()
+        events, _, _ = self.bus.wait_for_events(0, timeout=5)
+        timer.join()
+        self.assertEqual(events[0]['data'], {'power': 5})
+
+    def test_subscriber_limit(self):
+        """Test that stream slots are limited and released"""
+        self.assertTrue(self.bus.subscribe(1))
+        self.assertFalse(self.bus.subscribe(1))
+        self.bus.unsubscribe()
+        self.assertTrue(self.bus.subscribe(1))
+
+    @patch('app.services.device_events.Config.DEVICE_EVENTS_HEARTBEAT', 0.01)
+    @patch('app.services.device_events.Config.DEVICE_EVENTS_MAX_STREAM_SECONDS', 0.05)
+    def test_stream_replays_backlog_for_subscribed_plants(self):
+        """Test that a resumed stream sends the missed events of its plants, then keep-alives"""
+        first = self.bus.publish('status', '1', {'n': 1})
+        self.bus.publish('status', '2', {'n': 2})
+        third = self.bus.publish('power', '1', {'n': 3})
+
+        messages = list(iter_sse(self.bus, plant_ids=['1'], last_event_id=first['id']))
+
+        self.assertTrue(messages[0].startswith(': device events'))
+        self.assertEqual(messages[1], format_sse('power', {'n': 3}, event_id=third['id']))
+        self.assertIn(': keep-alive\n\n', messages[2:])
+
+    @patch('app.services.device_events.Config.DEVICE_EVENTS_MAX_STREAM_SECONDS', 0)
+    def test_stream_resets_unknown_event_ids(self):
+        """Test that a client resuming with an id this process did not issue is told to reload"""
+        messages = list(iter_sse(self.bus, last_event_id='other-12'))
+        self.assertIn('event: reset', messages[1])
+        self.assertIn('unknown_event_id', messages[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
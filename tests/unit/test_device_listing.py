@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Test file for the filtered device listing of /api/devices in app/routes/api/routes.py
+"""
+
+import os
+import sys
+import datetime
+import unittest
+from unittest.mock import patch
+
+from flask import Flask
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.routes.api.routes import _list_devices_page
+
+
+class TestDeviceListing(unittest.TestCase):
+    """Tests for the database-backed device listing page"""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def _list(self, page):
+        with self.app.test_request_context('/api/devices?status=online'), \
+             patch('app.db_snapshot.query_devices', return_value=page):
+            response, status = _list_devices_page(datetime.datetime.now())
+            return response.get_json(), status
+
+    def test_page_is_returned(self):
+        """Test that a page of devices is answered with its count and cursor"""
+        body, status = self._list({'devices': [{'serial_number': 'INV001'}], 'next_cursor': 'abc'})
+
+        self.assertEqual(status, 200)
+        self.assertEqual((body['count'], body['next_cursor']), (1, 'abc'))
+
+    def test_database_error_is_unavailable_not_empty(self):
+        """Test that a failed database read is a 503, which cached_route does not store"""
+        body, status = self._list(None)
+
+        self.assertEqual(status, 503)
+        self.assertEqual(body['code'], 'DATABASE_UNAVAILABLE')
+        self.assertNotIn('devices', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test file for fault log search in app/database.py
+"""
+
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.database import DatabaseConnector, FAULT_LOG_SEARCH_DOCUMENT, _decode_keyset_cursor
+
+
+class TestFaultLogSearch(unittest.TestCase):
+    """Tests for search conditions and pagination"""
+
+    def _search(self, rows, **kwargs):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = rows
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        @contextmanager
+        def fake_connection(replica=False):
+            yield conn
+
+        with patch('app.database.get_db_connection', fake_connection):
+            page = DatabaseConnector().search_fault_logs(**kwargs)
+        return page, cursor.execute.call_args.args
+
+    def test_text_query_uses_indexed_expression(self):
+        """Test that text matching uses the indexed document and escapes wildcards"""
+        page, (query, params) = self._search([], q=' 100% ', plant_id='P1', fault_type=2, fuzzy=True)
+
+        self.assertIn(f"to_tsvector('simple', {FAULT_LOG_SEARCH_DOCUMENT})", query)
+        self.assertIn(f"{FAULT_LOG_SEARCH_DOCUMENT} ILIKE %s", query)
+        self.assertIn(f"%s <%% {FAULT_LOG_SEARCH_DOCUMENT}", query)
+        self.assertEqual(params, ('100%', '%100\\%%', '100%', 'P1', 2, 51))
+        self.assertIsNone(page['next_cursor'])
+
+    def test_full_page_returns_cursor(self):
+        """Test that a full page yields a cursor at its last row"""
+        rows = [{'id': i, 'happen_time': datetime(2025, 5, 14, 12, i)} for i in (9, 8, 7)]
+        page, _ = self._search(rows, limit=2)
+
+        self.assertEqual([log['id'] for log in page['fault_logs']], [9, 8])
+        self.assertEqual(_decode_keyset_cursor(page['next_cursor']), (datetime(2025, 5, 14, 12, 8), 8))
+
+        _, (query, params) = self._search([], limit=2, cursor=page['next_cursor'])
+        self.assertIn("(happen_time, id) < (%s, %s)", query)
+        self.assertEqual(params, (datetime(2025, 5, 14, 12, 8), 8, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
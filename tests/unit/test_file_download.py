@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Test file for the file download headers in app/routes/data/routes.py
+"""
+
+import os
+import sys
+import unittest
+from urllib.parse import unquote
+
+from werkzeug.http import parse_options_header
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.routes.data.routes import content_disposition
+
+
+class TestContentDisposition(unittest.TestCase):
+    """Tests for quoting stored filenames in Content-Disposition"""
+
+    def test_quotes_are_escaped(self):
+        """Test that a quote in the name does not end the parameter"""
+        value, options = parse_options_header(content_disposition('report "final".pdf'))
+
+        self.assertEqual(value, 'attachment')
+        self.assertEqual(options['filename'], 'report "final".pdf')
+
+    def test_non_latin_names_use_rfc5987(self):
+        """Test that a Thai filename is sent ASCII-only with a UTF-8 filename* parameter"""
+        header = content_disposition('รายงาน โรงไฟฟ้า.pdf')
+
+        header.encode('latin-1')
+        self.assertIn("filename*=UTF-8''", header)
+        encoded = header.split("filename*=UTF-8''", 1)[1]
+        self.assertEqual(unquote(encoded), 'รายงาน โรงไฟฟ้า.pdf')
+
+    def test_line_breaks_are_dropped(self):
+        """Test that a stored name cannot inject header lines"""
+        self.assertNotIn('\n', content_disposition('a\r\nSet-Cookie: x.pdf'))
+
+
+if __name__ == '__main__':
+    unittest.main()
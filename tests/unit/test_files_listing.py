@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test file for keyset-paginated file listings in app/database.py
+"""
+
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.database import DatabaseConnector, _decode_keyset_cursor, _encode_keyset_cursor
+
+
+class TestFilesListing(unittest.TestCase):
+    """Tests for the opaque cursor and page assembly"""
+
+    def _connection_returning(self, rows):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = rows
+        conn = MagicMock()
+        conn.cursor.return_value = cursor
+
+        @contextmanager
+        def fake_connection(replica=False):
+            yield conn
+        return fake_connection, cursor
+
+    def test_cursor_round_trip(self):
+        """Test that cursors decode to the position they encode and reject garbage"""
+        created_at = datetime(2025, 5, 14, 13, 45, 12, 123456)
+        cursor = _encode_keyset_cursor(created_at, 42)
+
+        self.assertNotIn('=', cursor)
+        self.assertEqual(_decode_keyset_cursor(cursor), (created_at, 42))
+        with self.assertRaises(ValueError):
+            _decode_keyset_cursor('not-a-cursor')
+
+    def test_page_sets_next_cursor_and_keyset_condition(self):
+        """Test that a full page yields a cursor and the next page seeks past it"""
+        rows = [{'id': i, 'created_at': datetime(2025, 5, 14, 12, i)} for i in (3, 2, 1)]
+        fake_connection, cursor = self._connection_returning(rows)
+
+        with patch('app.database.get_db_connection', fake_connection):
+            page = DatabaseConnector().list_files_page(plant_id='P1', limit=2)
+
+        self.assertEqual([f['id'] for f in page['files']], [3, 2])
+        self.assertEqual(_decode_keyset_cursor(page['next_cursor']), (datetime(2025, 5, 14, 12, 2), 2))
+        self.assertEqual(cursor.execute.call_args.args[1], ('P1', 3))
+
+        fake_connection, cursor = self._connection_returning([])
+        with patch('app.database.get_db_connection', fake_connection):
+            page = DatabaseConnector().list_files_page(plant_id='P1', limit=2, cursor=page['next_cursor'])
+
+        query, params = cursor.execute.call_args.args
+        self.assertIn("(created_at, id) < (%s, %s)", query)
+        self.assertEqual(params, ('P1', datetime(2025, 5, 14, 12, 2), 2, 3))
+        self.assertIsNone(page['next_cursor'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test file for the concurrent per-plant fan-out in app/routes/common/api_helpers.py
+"""
+
+import os
+import sys
+import time
+import threading
+import unittest
+from unittest.mock import patch
+
+from flask import Flask, current_app
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+
+from app.routes.common import api_helpers
+from app.routes.common.api_helpers import fan_out
+
+
+class TestPlantFanOut(unittest.TestCase):
+    """Tests for bounded concurrent fetches with per-item timeouts"""
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config.update(PLANT_FETCH_TIMEOUT=5, PLANT_FETCH_MAX_WORKERS=8)
+
+    def test_results_keep_input_order_and_run_concurrently(self):
+        """Test that total latency is the slowest item, not the sum"""
+        delays = {'p1': 0.3, 'p2': 0.1, 'p3': 0.2}
+
+        def fetch(plant_id):
+            time.sleep(delays[plant_id])
+            return f"{plant_id}:{current_app.name}"
+
+        with self.app.test_request_context('/api/devices'):
+            started = time.monotonic()
+            outcomes = fan_out(['p1', 'p2', 'p3'], fetch)
+            elapsed = time.monotonic() - started
+
+        self.assertEqual([o['item'] for o in outcomes], ['p1', 'p2', 'p3'])
+        self.assertEqual(outcomes[0]['result'], f"p1:{self.app.name}")
+        self.assertLess(elapsed, 0.55)
+
+    def test_errors_and_timeouts_are_reported_per_item(self):
+        """Test that a failing or hanging item does not fail the others"""
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def fetch(plant_id):
+            if plant_id == 'slow':
+                release.wait(5)
+            if plant_id == 'broken':
+                raise RuntimeError('upstream 502')
+            return plant_id
+
+        with self.app.app_context():
+            outcomes = fan_out(['ok', 'broken', 'slow'], fetch, timeout=0.2)
+
+        self.assertEqual(outcomes[0]['result'], 'ok')
+        self.assertIsNone(outcomes[0]['error'])
+        self.assertEqual(outcomes[1]['error'], 'API error: upstream 502')
+        self.assertEqual(outcomes[2]['error'], 'Timed out after 0.2s')
+        self.assertIsNone(outcomes[2]['result'])
+
+
+    def test_saturated_executor_still_returns_by_the_deadline(self):
+        """Test that calls queued behind hung workers are cancelled instead of waiting forever"""
+        self.app.config.update(PLANT_FETCH_MAX_WORKERS=1)
+        release = threading.Event()
+        self.addCleanup(release.set)
+        ran = []
+
+        def fetch(plant_id):
+            ran.append(plant_id)
+            if plant_id == 'hung':
+                release.wait(5)
+            return plant_id
+
+        with patch.object(api_helpers, '_plant_executor', None), self.app.app_context():
+            fan_out(['hung'], fetch, timeout=0.1)
+            started = time.monotonic()
+            outcomes = fan_out(['ok'], fetch, timeout=0.3)
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(outcomes[0]['error'], 'Timed out after 0.3s')
+        self.assertEqual(ran, ['hung'])
+
+if __name__ == '__main__':
+    unittest.main()